@@ -0,0 +1,214 @@
+"""Cold-start profile for the API Lambda handlers.
+
+Each handler is imported and invoked once in a fresh interpreter started with
+``-X importtime``, which is what a new Lambda container pays. AWS calls are answered
+locally with empty responses via a botocore ``before-send`` hook, so the numbers
+cover import, client creation and request handling but not network latency.
+
+    python benchmarks/cold_start.py              # print the profile
+    python benchmarks/cold_start.py --check      # compare with the tracked baseline
+    python benchmarks/cold_start.py --update     # rewrite the tracked baseline
+
+``--check`` fails when a handler starts importing boto3 where the baseline did not,
+or when its import/first-invocation time grows past the tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+API_DIR = ROOT / "src" / "api"
+BASELINE_PATH = Path(__file__).resolve().with_name("cold_start_baseline.json")
+
+# Relative growth allowed before --check fails, plus an absolute floor for noise.
+TOLERANCE = 0.5
+SLACK_MS = 25.0
+
+HANDLER_EVENTS: Dict[str, dict] = {
+    "health": {"httpMethod": "GET"},
+    "schemas": {"httpMethod": "GET"},
+    "query": {"httpMethod": "POST", "body": "{}"},
+    "materialize": {"httpMethod": "POST", "body": "{}"},
+    "run": {"httpMethod": "POST", "body": "{}"},
+    "run_status": {"httpMethod": "GET", "pathParameters": {"runId": "bench"}},
+    "query_cancel": {"httpMethod": "DELETE", "pathParameters": {"queryExecutionId": "bench"}},
+    "query_batch": {"httpMethod": "POST", "body": "{}"},
+    "materialize_status": {"httpMethod": "GET", "pathParameters": {"jobId": "bench"}},
+    "views": {"httpMethod": "GET"},
+    # Not API routes: the refresh event and the schedule invoke these with plain payloads.
+    "view_refresh": {"tables": []},
+    "finalizer": {},
+    # Single-Lambda router serving /health: only the routes it has dispatched to are loaded.
+    "router": {"resource": "/health", "httpMethod": "GET"},
+}
+
+HARNESS_ENV = {
+    "AWS_REGION": "us-west-1",
+    "AWS_DEFAULT_REGION": "us-west-1",
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "AWS_EC2_METADATA_DISABLED": "true",
+    "ATHENA_OUTPUT": "s3://bench-output/",
+    "ATHENA_WG": "primary",
+    "ATHENA_CATALOG": "AwsDataCatalog",
+    "DDB_TABLE": "bench-cooldowns",
+    "PROGRESS_TABLE": "bench-progress",
+    "MATERIALIZE_JOBS_TABLE": "bench-materialize-jobs",
+    "MATERIALIZED_VIEWS_TABLE": "bench-views",
+    "ORCHESTRATOR_FN": "bench-orchestrator",
+    "BRONZE_PREFIX_S3": "s3://bench/bronze/",
+    "SILVER_PREFIX_S3": "s3://bench/silver/",
+    "GOLD_PREFIX_S3": "s3://bench/gold/",
+}
+
+# Runs inside the child interpreter. The offline hook is installed only once the handler
+# itself imports boto3, so a handler that stays off boto3 is measured (and reported) as such.
+_CHILD = r"""
+import builtins, json, sys, time
+
+def _offline_send(request, **_kwargs):
+    from botocore.awsrequest import AWSResponse
+
+    class _Raw:
+        def stream(self, **_k):
+            yield b""
+
+    return AWSResponse(request.url, 200, {}, _Raw())
+
+_real_import = builtins.__import__
+_hooked = False
+
+def _tracking_import(name, *args, **kwargs):
+    # Once boto3.session has loaded, answer every request its sessions send locally.
+    global _hooked
+    module = _real_import(name, *args, **kwargs)
+    session_cls = getattr(sys.modules.get("boto3.session"), "Session", None)
+    if not _hooked and session_cls is not None:
+        _hooked = True
+        original = session_cls.__init__
+
+        def patched(self, *a, **k):
+            original(self, *a, **k)
+            self.events.register("before-send", _offline_send)
+
+        session_cls.__init__ = patched
+    return module
+
+builtins.__import__ = _tracking_import
+started = time.perf_counter()
+handler = __import__("handlers." + HANDLER, fromlist=["lambda_handler"])
+import_ms = (time.perf_counter() - started) * 1000
+boto3_loaded = "boto3" in sys.modules
+started = time.perf_counter()
+response = handler.lambda_handler(EVENT, None)
+invoke_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({
+    "import_ms": import_ms,
+    "first_invoke_ms": invoke_ms,
+    "status": response.get("statusCode"),
+    "imports_boto3": boto3_loaded,
+}))
+"""
+
+
+def _child_source(handler: str) -> str:
+    return f"HANDLER = {handler!r}\nEVENT = {json.dumps(HANDLER_EVENTS[handler])}\n" + _CHILD
+
+
+def _parse_importtime(stderr: str, module: str) -> float | None:
+    """Cumulative import time (ms) reported by ``-X importtime`` for ``module``."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1]) / 1000
+    return None
+
+
+def profile_handler(handler: str) -> Dict[str, object]:
+    env = {**os.environ, **HARNESS_ENV, "PYTHONPATH": str(API_DIR)}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _child_source(handler)],
+        cwd=API_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{handler} harness failed:\n{completed.stderr[-2000:]}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["importtime_ms"] = _parse_importtime(completed.stderr, f"handlers.{handler}")
+    return result
+
+
+def profile(handlers: List[str], repeat: int) -> Dict[str, Dict[str, object]]:
+    results: Dict[str, Dict[str, object]] = {}
+    for handler in handlers:
+        runs = [profile_handler(handler) for _ in range(repeat)]
+        results[handler] = {
+            "import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+            "first_invoke_ms": round(statistics.median(run["first_invoke_ms"] for run in runs), 1),
+            "importtime_ms": round(statistics.median(run["importtime_ms"] or 0 for run in runs), 1),
+            "status": runs[-1]["status"],
+            "imports_boto3": any(run["imports_boto3"] for run in runs),
+        }
+    return results
+
+
+def compare(results: Dict[str, Dict[str, object]], baseline: Dict[str, Dict[str, object]]) -> List[str]:
+    failures = []
+    for handler, current in results.items():
+        expected = baseline.get(handler)
+        if not expected:
+            continue
+        if current["imports_boto3"] and not expected["imports_boto3"]:
+            failures.append(f"{handler}: now imports boto3 at cold start")
+        for metric in ("import_ms", "first_invoke_ms"):
+            limit = float(expected[metric]) * (1 + TOLERANCE) + SLACK_MS
+            if float(current[metric]) > limit:
+                failures.append(f"{handler}: {metric} {current[metric]} ms exceeds {limit:.1f} ms")
+    return failures
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("handlers", nargs="*", help=f"subset of: {', '.join(HANDLER_EVENTS)}")
+    parser.add_argument("--repeat", type=int, default=5)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    mode.add_argument("--update", action="store_true", help="rewrite the tracked baseline")
+    args = parser.parse_args(argv)
+    unknown = set(args.handlers) - set(HANDLER_EVENTS)
+    if unknown:
+        parser.error(f"unknown handlers: {', '.join(sorted(unknown))}")
+
+    results = profile(args.handlers or list(HANDLER_EVENTS), args.repeat)
+    print(f"{'handler':<18} {'import':>9} {'importtime':>11} {'1st call':>9} {'status':>7} boto3")
+    for handler, row in results.items():
+        print(
+            f"{handler:<18} {row['import_ms']:>7.1f}ms {row['importtime_ms']:>9.1f}ms "
+            f"{row['first_invoke_ms']:>7.1f}ms {row['status']!s:>7} {'yes' if row['imports_boto3'] else 'no'}"
+        )
+
+    if args.update:
+        BASELINE_PATH.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {BASELINE_PATH.relative_to(ROOT)}")
+    elif args.check:
+        failures = compare(results, json.loads(BASELINE_PATH.read_text()))
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
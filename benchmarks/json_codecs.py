@@ -0,0 +1,115 @@
+"""Compares the response JSON codecs on the payload shapes the API actually returns.
+
+    python benchmarks/json_codecs.py [--number 50]
+
+For each shape it times the previous path (``to_dict()`` + stdlib ``json.dumps``) against
+every available codec in ``app.presentation.http`` encoding the domain models directly.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src" / "api"))
+
+from app.domain.models import (  # noqa: E402
+    DatabaseSummary,
+    DirectoryDescriptor,
+    FileDescriptor,
+    LayerSnapshot,
+    QueryResultPage,
+    QueryStatistics,
+)
+from app.presentation.http import available_codecs  # noqa: E402
+
+PRESIGNED = (
+    "https://fabric-aws-poc.s3.us-west-1.amazonaws.com/{key}?X-Amz-Algorithm=AWS4-HMAC-SHA256"
+    "&X-Amz-Credential=ASIAEXAMPLE%2F20250813%2Fus-west-1%2Fs3%2Faws4_request&X-Amz-Date=20250813T000000Z"
+    "&X-Amz-Expires=900&X-Amz-SignedHeaders=host&X-Amz-Signature=" + "f" * 64
+)
+
+
+def query_page(rows: int = 1000, columns: int = 12) -> QueryResultPage:
+    names = [f"column_{index}" for index in range(columns)]
+    data = [[f"value-{row}-{col}" if col % 5 else None for col in range(columns)] for row in range(rows)]
+    return QueryResultPage(
+        columns=names,
+        rows=data,
+        stats=QueryStatistics(scanned_bytes=123_456_789, execution_time_ms=4321),
+        query_execution_id="6b0a5f0e-6f53-4b3c-9d55-2b8c1f0c9a11",
+        next_page_token="AQAB" * 40,
+    )
+
+
+def run_layers(dirs: int = 25, files: int = 50) -> dict:
+    def layer(name: str) -> LayerSnapshot:
+        directories = []
+        for d in range(dirs):
+            prefix = f"{name}/run=2025-08-13/table_{d}/"
+            descriptors = [
+                FileDescriptor(
+                    key=f"{prefix}part-{f:05d}.parquet",
+                    size=1_048_576 + f,
+                    last_modified="2025-08-13T00:00:00+00:00",
+                    url=PRESIGNED.format(key=f"{prefix}part-{f:05d}.parquet"),
+                )
+                for f in range(files)
+            ]
+            directories.append(DirectoryDescriptor(name=f"table_{d}", prefix=prefix, file_count=files, files=descriptors, truncated=False))
+        return LayerSnapshot(prefix=f"s3://fabric-aws-poc/{name}/", dir_count=dirs, dirs=directories, truncated=False)
+
+    return {"bronze": layer("bronze"), "silver": layer("silver"), "gold": layer("gold"), "ttlSeconds": 900}
+
+
+def schemas(databases: int = 50, tables: int = 40) -> dict:
+    return {"databases": [DatabaseSummary(name=f"db_{d}", tables=[f"table_{t}" for t in range(tables)]) for d in range(databases)]}
+
+
+def _as_dicts(value):
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    if isinstance(value, dict):
+        return {key: _as_dicts(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_as_dicts(item) for item in value]
+    return value
+
+
+SHAPES = {
+    "query page (1000x12)": query_page,
+    "run layers (3x25x50)": run_layers,
+    "schemas (50x40)": schemas,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args(argv)
+    codecs = available_codecs()
+
+    print(f"{'payload':<22} {'size':>9} {'to_dict+json':>13} " + " ".join(f"{name:>12}" for name in codecs))
+    for label, build in SHAPES.items():
+        payload = build()
+        baseline = min(timeit.repeat(lambda: json.dumps(_as_dicts(payload)), number=args.number, repeat=3)) / args.number
+        timings = [min(timeit.repeat(lambda c=codec: c.dumps(payload), number=args.number, repeat=3)) / args.number for codec in codecs.values()]
+        size = len(next(iter(codecs.values())).dumps(payload))
+        print(
+            f"{label:<22} {size / 1024:>7.0f}KB {baseline * 1000:>11.2f}ms "
+            + " ".join(f"{timing * 1000:>10.2f}ms" for timing in timings)
+        )
+
+    body = json.dumps({"sql": "SELECT * FROM gold.fact_visit WHERE run = '2025-08-13'", "maxRows": 1000, "database": "gold"})
+    decode = " ".join(
+        f"{name}={min(timeit.repeat(lambda c=codec: c.loads(body), number=args.number * 100, repeat=3)) / (args.number * 100) * 1e6:.1f}us"
+        for name, codec in codecs.items()
+    )
+    print(f"request decode: {decode}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Service-level benchmarks against in-process AWS stand-ins (no AWS account needed).
+
+    python benchmarks/services.py                  # default scenarios
+    python benchmarks/services.py run-1m --large   # include the large data sets
+    python benchmarks/services.py --check          # compare with the tracked baseline
+    python benchmarks/services.py --update         # rewrite the tracked baseline
+
+Each scenario drives one application service (or the Athena runner job) against the fakes
+in ``benchmarks/stubs.py``: S3 buckets of 10k-1M keys, Glue catalogs with hundreds to
+thousands of tables, and Athena with a log-normal latency model on a virtual clock. Polling
+therefore costs its real CPU but no wall time; the simulated Athena wait is reported
+separately. Reported per scenario: throughput, p50/p99 latency, peak allocation per
+operation (tracemalloc, measured in a separate pass), stand-in client calls (API calls
+plus presigns) and simulated wait.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path[:0] = [str(ROOT / "src" / "api"), str(ROOT / "src"), str(Path(__file__).resolve().parent)]
+
+from app.application.materialize_service import MaterializeService  # noqa: E402
+from app.application.query_service import QueryService  # noqa: E402
+from app.application.run_service import RunService  # noqa: E402
+from app.application.schemas_service import SchemasService  # noqa: E402
+from app.config.settings import MaterializeSettings, QuerySettings, RunSettings, SchemasSettings  # noqa: E402
+from jobs import athena_runner  # noqa: E402
+from stubs import FakeAthena, FakeEvents, FakeGlue, FakeS3, LatencyModel, StubClients, VirtualClock  # noqa: E402
+
+BASELINE_PATH = Path(__file__).resolve().with_name("services_baseline.json")
+
+# Same rule as the cold-start check: relative growth allowed, plus an absolute floor for noise.
+TOLERANCE = 0.5
+SLACK_MS = 2.0
+# Client calls follow the sampled latencies and, for batches, how polls interleave across
+# worker threads; a small relative margin absorbs that without hiding a new call per op.
+CALLS_TOLERANCE = 0.1
+
+RUN = "2025-08-13"
+
+
+@dataclass
+class Scenario:
+    """``setup`` builds the stand-ins once and returns the operation to time plus its clients."""
+
+    setup: Callable[[], tuple]
+    iterations: int
+    large: bool = False
+
+
+def _run_settings() -> RunSettings:
+    return RunSettings(
+        region="us-west-1",
+        allowed_origin="*",
+        orchestrator_function="bench-orchestrator",
+        cooldown_table_name="bench-cooldowns",
+        resource_key="full-load",
+        cooldown_seconds=30,
+        bronze_prefix="s3://bench/bronze/run={run}/",
+        silver_prefix="s3://bench/silver/run={run}/",
+        gold_prefix="s3://bench/gold/run={run}/",
+        presign_ttl_seconds=900,
+        max_dirs_per_layer=25,
+        max_files_per_dir=50,
+    )
+
+
+def _athena_settings(cls):
+    extra = {"athena_catalog": "AwsDataCatalog", "default_database": "gold"} if cls is QuerySettings else {}
+    return cls(region="us-west-1", allowed_origin="*", athena_workgroup="primary", athena_output="s3://bench-output/", **extra)
+
+
+def _typical(seed: int) -> LatencyModel:
+    # A fresh, seeded model per setup: a scenario sees the same latencies whichever
+    # scenarios ran before it.
+    return LatencyModel(median_s=1.5, p99_s=8.0, seed=seed)
+
+
+def run_layers(keys: int):
+    def setup():
+        clients = StubClients(s3=FakeS3(keys))
+        service = RunService(_run_settings(), clients)
+        return (lambda: service.execute({"run": RUN})), clients
+
+    return setup
+
+
+def query_start(seed: int):
+    def setup():
+        clients = StubClients(athena=FakeAthena(CLOCK, _typical(seed)))
+        service = QueryService(_athena_settings(QuerySettings), clients)
+        return (lambda: service.execute({"sql": "SELECT * FROM gold.fact_visit", "maxRows": 1000})), clients
+
+    return setup
+
+
+def query_page():
+    def setup():
+        clients = StubClients(athena=FakeAthena(CLOCK, rows=5000))
+        service = QueryService(_athena_settings(QuerySettings), clients)
+        payload = {"queryExecutionId": "existing", "nextPageToken": "1001", "maxRows": 1000}
+        return (lambda: service.execute(payload)), clients
+
+    return setup
+
+
+def query_batch(seed: int, statements: int):
+    def setup():
+        clients = StubClients(athena=FakeAthena(CLOCK, _typical(seed), rows=100))
+        service = QueryService(_athena_settings(QuerySettings), clients)
+        payload = {"queries": [f"SELECT * FROM gold.fact_visit WHERE day = {day}" for day in range(statements)], "maxRows": 100}
+        return (lambda: service.execute_batch(payload)), clients
+
+    return setup
+
+
+def materialize(seed: int):
+    def setup():
+        clients = StubClients(athena=FakeAthena(CLOCK, _typical(seed)))
+        service = MaterializeService(_athena_settings(MaterializeSettings), clients)
+        payload = {"target": {"db": "gold", "table": "visits_by_day"}, "sql": "SELECT visit_ts FROM silver.visit", "mode": "append"}
+        return (lambda: service.execute(payload)), clients
+
+    return setup
+
+
+def schemas(databases: int, tables: int):
+    def setup():
+        clients = StubClients(glue=FakeGlue(databases, tables))
+        service = SchemasService(SchemasSettings(region="us-west-1", allowed_origin="*"), clients)
+        return service.execute, clients
+
+    return setup
+
+
+def runner(seed: int):
+    def setup():
+        clients = StubClients(athena=FakeAthena(CLOCK, _typical(seed)), events=FakeEvents())
+        config = athena_runner.AthenaRunnerConfig(
+            output_location="s3://bench-output/", workgroup="primary", catalog="AwsDataCatalog", event_bus="default"
+        )
+        service = athena_runner.AthenaRunnerService(clients.athena(), clients.events(), config)
+        request = athena_runner.RefreshRequest(run=RUN)
+        return (lambda: service.run_refresh(request)), clients
+
+    return setup
+
+
+CLOCK = VirtualClock()
+
+SCENARIOS: Dict[str, Scenario] = {
+    "run-10k": Scenario(run_layers(10_000), iterations=10),
+    "run-100k": Scenario(run_layers(100_000), iterations=5),
+    "run-1m": Scenario(run_layers(1_000_000), iterations=3, large=True),
+    "query-start": Scenario(query_start(seed=1), iterations=200),
+    "query-page": Scenario(query_page(), iterations=200),
+    "query-batch-10": Scenario(query_batch(seed=2, statements=10), iterations=50),
+    "materialize": Scenario(materialize(seed=3), iterations=200),
+    "schemas-20x50": Scenario(schemas(20, 50), iterations=50),
+    "schemas-100x200": Scenario(schemas(100, 200), iterations=10, large=True),
+    "runner": Scenario(runner(seed=4), iterations=50),
+}
+
+
+def measure(scenario: Scenario, iterations: int | None = None) -> Dict[str, float]:
+    operation, clients = scenario.setup()
+    count = iterations or scenario.iterations
+    with CLOCK.installed():
+        operation()  # warm caches, lazy clients and imports outside the timed loop
+        calls_before, slept_before = clients.call_count(), CLOCK.slept
+        durations: List[float] = []
+        gc.collect()
+        for _ in range(count):
+            started = time.perf_counter()
+            operation()
+            durations.append((time.perf_counter() - started) * 1000)
+        calls = (clients.call_count() - calls_before) / count
+        simulated_wait = (CLOCK.slept - slept_before) / count
+
+        # Allocations in their own pass: tracing slows the code down too much to time it.
+        tracemalloc.start()
+        peaks = []
+        for _ in range(min(count, 3)):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            operation()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+        tracemalloc.stop()
+
+    durations.sort()
+    mean = statistics.fmean(durations)
+    return {
+        "iterations": count,
+        "ops_per_s": round(1000 / mean, 1) if mean else 0.0,
+        "p50_ms": round(_percentile(durations, 50), 3),
+        "p99_ms": round(_percentile(durations, 99), 3),
+        "peak_alloc_kb": round(statistics.median(peaks) / 1024, 1),
+        "client_calls": round(calls, 1),
+        "simulated_wait_s": round(simulated_wait, 2),
+    }
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]]) -> List[str]:
+    failures = []
+    for name, current in results.items():
+        expected = baseline.get(name)
+        if not expected:
+            continue
+        for metric, slack in (("p50_ms", SLACK_MS), ("peak_alloc_kb", 64.0)):
+            limit = float(expected[metric]) * (1 + TOLERANCE) + slack
+            if float(current[metric]) > limit:
+                failures.append(f"{name}: {metric} {current[metric]} exceeds {limit:.1f}")
+        limit = float(expected["client_calls"]) * (1 + CALLS_TOLERANCE)
+        if float(current["client_calls"]) > limit:
+            failures.append(f"{name}: client_calls {current['client_calls']} exceeds {limit:.1f}")
+    return failures
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help=f"subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--large", action="store_true", help="include the large data sets (1M keys, 20k tables)")
+    parser.add_argument("--iterations", type=int, help="override every scenario's iteration count")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="fail on regressions against the baseline")
+    mode.add_argument("--update", action="store_true", help="rewrite the tracked baseline")
+    args = parser.parse_args(argv)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    names = args.scenarios or [name for name, scenario in SCENARIOS.items() if args.large or not scenario.large]
+    print(f"{'scenario':<16} {'ops/s':>9} {'p50':>10} {'p99':>10} {'peak alloc':>11} {'client calls':>10} {'athena wait':>12}")
+    results = {}
+    for name in names:
+        row = results[name] = measure(SCENARIOS[name], args.iterations)
+        print(
+            f"{name:<16} {row['ops_per_s']:>9.1f} {row['p50_ms']:>8.2f}ms {row['p99_ms']:>8.2f}ms "
+            f"{row['peak_alloc_kb']:>9.0f}KB {row['client_calls']:>12.1f} {row['simulated_wait_s']:>11.2f}s"
+        )
+
+    if args.update:
+        baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+        baseline.update(results)
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"baseline written to {BASELINE_PATH.relative_to(ROOT)}")
+    elif args.check:
+        failures = compare(results, json.loads(BASELINE_PATH.read_text()))
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+"""In-process stand-ins for the AWS services the API and jobs call, sized for benchmarking.
+
+They answer the client methods the services use with realistic page sizes and payload
+shapes, count every call, and model Athena latency on a :class:`VirtualClock` so polling
+loops cost their real CPU but no wall time. Presigned URLs are produced by a real botocore
+S3 client (signing is local work the services genuinely pay for).
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import random
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+S3_PAGE_SIZE = 1000
+GLUE_PAGE_SIZE = 100
+
+
+class VirtualClock:
+    """Simulated seconds; ``time.sleep`` advances it instead of blocking while installed."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept = 0.0
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+        self.slept += seconds
+
+    @contextmanager
+    def installed(self) -> Iterator["VirtualClock"]:
+        real_sleep = time.sleep
+        time.sleep = self.sleep
+        try:
+            yield self
+        finally:
+            time.sleep = real_sleep
+
+
+class LatencyModel:
+    """Log-normal query latency fitted to a median and p99 (seconds), with a queued share."""
+
+    def __init__(self, median_s: float = 1.5, p99_s: float = 8.0, queued_share: float = 0.3, seed: int = 7) -> None:
+        self._mu = math.log(median_s)
+        self._sigma = math.log(p99_s / median_s) / 2.326
+        self._queued_share = queued_share
+        self._random = random.Random(seed)
+
+    def sample(self) -> tuple[float, float]:
+        total = self._random.lognormvariate(self._mu, self._sigma)
+        return total * self._queued_share, total * (1 - self._queued_share)
+
+
+class _Pages:
+    def __init__(self, pages: Iterator[dict]) -> None:
+        self._pages = pages
+
+    def __iter__(self):
+        return self._pages
+
+
+class FakeS3:
+    """A bucket of parquet keys laid out as ``<layer>/run=<run>/table_NNN/part-NNNNNN.parquet``."""
+
+    def __init__(self, keys: int, *, run: str = "2025-08-13", tables: int = 40, layers=("bronze", "silver", "gold")) -> None:
+        per_table = max(1, keys // (len(layers) * tables))
+        self.bucket = "bench"
+        self.calls: Counter = Counter()
+        self._keys: List[str] = sorted(
+            f"{layer}/run={run}/table_{table:03d}/part-{part:06d}.parquet"
+            for layer in layers
+            for table in range(tables)
+            for part in range(per_table)
+        )
+        self._signer = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def get_paginator(self, name: str):
+        assert name == "list_objects_v2", name
+        return self
+
+    def paginate(self, Bucket: str, Prefix: str = "", Delimiter: Optional[str] = None, **_kwargs) -> _Pages:
+        return _Pages(self._list_pages(Prefix, Delimiter))
+
+    def generate_presigned_url(self, **kwargs) -> str:
+        self.calls["generate_presigned_url"] += 1
+        if self._signer is None:
+            import boto3
+
+            session = boto3.session.Session(aws_access_key_id="bench", aws_secret_access_key="bench", region_name="us-west-1")
+            self._signer = session.client("s3")
+        return self._signer.generate_presigned_url(**kwargs)
+
+    def _list_pages(self, prefix: str, delimiter: Optional[str]) -> Iterator[dict]:
+        index = bisect.bisect_left(self._keys, prefix)
+        while True:
+            self.calls["list_objects_v2"] += 1
+            page: Dict[str, list] = {"Contents": [], "CommonPrefixes": []}
+            returned = 0
+            while returned < S3_PAGE_SIZE and index < len(self._keys) and self._keys[index].startswith(prefix):
+                key = self._keys[index]
+                cut = key.find(delimiter, len(prefix)) if delimiter else -1
+                if cut >= 0:
+                    common = key[: cut + 1]
+                    page["CommonPrefixes"].append({"Prefix": common})
+                    index = bisect.bisect_left(self._keys, common + "\uffff", index)
+                else:
+                    page["Contents"].append({"Key": key, "Size": 1_048_576})
+                    index += 1
+                returned += 1
+            yield page
+            if returned < S3_PAGE_SIZE or index >= len(self._keys) or not self._keys[index].startswith(prefix):
+                return
+
+
+class FakeGlue:
+    def __init__(self, databases: int, tables_per_database: int) -> None:
+        self.calls: Counter = Counter()
+        self._databases = [f"db_{index:03d}" for index in range(databases)]
+        self._tables = [f"table_{index:04d}" for index in range(tables_per_database)]
+
+    def get_paginator(self, name: str):
+        return _GluePaginator(self, name)
+
+    def _pages(self, name: str, kwargs: dict) -> Iterator[dict]:
+        if name == "get_databases":
+            items, field = [{"Name": database} for database in self._databases], "DatabaseList"
+        else:
+            items, field = [{"Name": table, "DatabaseName": kwargs["DatabaseName"]} for table in self._tables], "TableList"
+        limit = (kwargs.get("PaginationConfig") or {}).get("MaxItems") or len(items)
+        items = items[:limit]
+        for start in range(0, max(len(items), 1), GLUE_PAGE_SIZE):
+            self.calls[name] += 1
+            yield {field: items[start:start + GLUE_PAGE_SIZE]}
+
+
+class _GluePaginator:
+    def __init__(self, glue: FakeGlue, name: str) -> None:
+        self._glue = glue
+        self._name = name
+
+    def paginate(self, **kwargs) -> _Pages:
+        return _Pages(self._glue._pages(self._name, kwargs))
+
+
+class FakeAthena:
+    """Queries move QUEUED -> RUNNING -> SUCCEEDED as the virtual clock passes their sampled latency."""
+
+    def __init__(self, clock: VirtualClock, latency: Optional[LatencyModel] = None, *, rows: int = 1000, columns: int = 12) -> None:
+        self.calls: Counter = Counter()
+        self._clock = clock
+        self._latency = latency or LatencyModel()
+        self._queries: Dict[str, dict] = {}
+        header = [{"VarCharValue": f"column_{col}"} for col in range(columns)]
+        self._columns = [{"Name": f"column_{col}", "Label": f"column_{col}", "Type": "varchar"} for col in range(columns)]
+        self._rows = [{"Data": header}] + [
+            {"Data": [{"VarCharValue": f"value-{row}-{col}"} if col % 5 else {} for col in range(columns)]} for row in range(rows)
+        ]
+
+    def start_query_execution(self, **_kwargs) -> dict:
+        self.calls["start_query_execution"] += 1
+        query_id = str(uuid.uuid4())
+        queued, running = self._latency.sample()
+        self._queries[query_id] = {"started": self._clock.now, "queued": queued, "running": running}
+        return {"QueryExecutionId": query_id}
+
+    def get_query_execution(self, QueryExecutionId: str) -> dict:
+        self.calls["get_query_execution"] += 1
+        return {"QueryExecution": self._execution(QueryExecutionId)}
+
+    def batch_get_query_execution(self, QueryExecutionIds: List[str]) -> dict:
+        self.calls["batch_get_query_execution"] += 1
+        return {"QueryExecutions": [self._execution(query_id) for query_id in QueryExecutionIds], "UnprocessedQueryExecutionIds": []}
+
+    def get_query_results(self, QueryExecutionId: str, MaxResults: int = 1000, NextToken: Optional[str] = None) -> dict:
+        self.calls["get_query_results"] += 1
+        start = int(NextToken or 0)
+        end = start + MaxResults
+        response = {"ResultSet": {"Rows": self._rows[start:end], "ResultSetMetadata": {"ColumnInfo": self._columns}}}
+        if end < len(self._rows):
+            response["NextToken"] = str(end)
+        return response
+
+    def _execution(self, query_id: str) -> dict:
+        query = self._queries.setdefault(query_id, {"started": -1e9, "queued": 0.0, "running": 0.0})
+        elapsed = self._clock.now - query["started"]
+        if elapsed < query["queued"]:
+            state = "QUEUED"
+        elif elapsed < query["queued"] + query["running"]:
+            state = "RUNNING"
+        else:
+            state = "SUCCEEDED"
+        return {
+            "QueryExecutionId": query_id,
+            "Status": {"State": state},
+            "Statistics": {
+                "DataScannedInBytes": 123_456_789,
+                "QueryQueueTimeInMillis": int(query["queued"] * 1000),
+                "EngineExecutionTimeInMillis": int(query["running"] * 1000),
+                "TotalExecutionTimeInMillis": int((query["queued"] + query["running"]) * 1000),
+            },
+        }
+
+
+class FakeDynamoDB:
+    def __init__(self, item: Optional[dict] = None) -> None:
+        self.calls: Counter = Counter()
+        self._item = item or {}
+
+    def put_item(self, **_kwargs) -> dict:
+        self.calls["put_item"] += 1
+        return {}
+
+    def get_item(self, **_kwargs) -> dict:
+        self.calls["get_item"] += 1
+        return {"Item": self._item}
+
+    def update_item(self, **_kwargs) -> dict:
+        self.calls["update_item"] += 1
+        return {"Attributes": {}}
+
+
+class FakeLambda:
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+
+    def invoke(self, **_kwargs) -> dict:
+        self.calls["invoke"] += 1
+        return {"StatusCode": 202}
+
+
+class FakeEvents:
+    def __init__(self) -> None:
+        self.calls: Counter = Counter()
+
+    def remove_targets(self, **_kwargs) -> dict:
+        self.calls["remove_targets"] += 1
+        return {}
+
+    def delete_rule(self, **_kwargs) -> dict:
+        self.calls["delete_rule"] += 1
+        return {}
+
+
+class StubClients:
+    """Stands in for ``AwsClients``: same accessors, backed by the fakes above."""
+
+    def __init__(self, **clients) -> None:
+        self._clients = clients
+
+    def dynamodb(self):
+        return self._clients.setdefault("dynamodb", FakeDynamoDB())
+
+    def lambda_(self):
+        return self._clients.setdefault("lambda", FakeLambda())
+
+    def s3(self):
+        return self._clients["s3"]
+
+    def athena(self):
+        return self._clients["athena"]
+
+    def glue(self):
+        return self._clients["glue"]
+
+    def events(self):
+        return self._clients.setdefault("events", FakeEvents())
+
+    def call_count(self) -> int:
+        return sum(sum(client.calls.values()) for client in self._clients.values())
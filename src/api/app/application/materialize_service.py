@@ -1,45 +1,109 @@
 ﻿from __future__ import annotations
 
+import re
 import time
-from typing import Dict
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 from botocore.exceptions import ClientError
 
 from ..config.settings import MaterializeSettings
-from ..domain.errors import DomainError, ValidationError, ExternalServiceError
+from ..domain.errors import AthenaBusyError, DomainError, ExternalServiceError, NotFoundError, ValidationError
+from ..domain.models import MaterializeJob
+from ..domain.sql import validate_select
+from ..infrastructure.admission import INTERACTIVE, AthenaAdmission, Lease
 from ..infrastructure.aws_clients import AwsClients
-from ..presentation.logging import get_logger
+from ..infrastructure.dynamodb import ConditionalCheckFailedError, DynamoTable
+from ..infrastructure.glue_catalog import GlueCatalog
+from ..presentation.logging import add_log_context, get_logger
+from ..presentation.timing import phase
 
 
 _LOGGER = get_logger("sewingmachine.materialize")
 
+_BUSY_RETRY_AFTER_SECONDS = 2
+_TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELLED")
+_MODES = ("append", "replace", "overwrite_partitions", "merge")
+# How long one status read may hold a finished job while it swaps the table in.
+_SWAP_CLAIM_SECONDS = 60
+_DEFAULT_PROPERTIES = {"table_type": "ICEBERG", "format": "PARQUET"}
+_PROPERTY_NAME = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+
+@dataclass(frozen=True)
+class _Build:
+    """New table data built as ``shadow`` at ``location``, then swapped in.
+
+    A ``partitioned`` build replaces only the target's partitions it produced; otherwise
+    it replaces the whole table.
+    """
+
+    database: str
+    table: str
+    shadow: str
+    location: str
+    partitioned: bool = False
+
 
 class MaterializeService:
-    def __init__(self, settings: MaterializeSettings, clients: AwsClients) -> None:
+    def __init__(
+        self,
+        settings: MaterializeSettings,
+        clients: AwsClients,
+        admission: Optional[AthenaAdmission] = None,
+        pool: str = INTERACTIVE,
+    ) -> None:
         self._settings = settings
         self._athena = clients.athena()
+        self._admission = admission
+        self._pool = pool
+        self._jobs = DynamoTable(clients.dynamodb(), settings.jobs_table_name) if settings.jobs_table_name else None
+        self._clients = clients
+        self._glue_catalog: Optional[GlueCatalog] = None
+
+    def execute(
+        self, payload: Dict[str, object], principals: Sequence[str] = (), wait: bool = False
+    ) -> Union[MaterializeJob, Dict[str, object]]:
+        """Runs the materialization. With a jobs table it only starts the statement and returns the job.
 
-    def execute(self, payload: Dict[str, object]) -> Dict[str, object]:
-        mode = str(payload.get("mode") or "append").lower()
-        target = payload.get("target") or {}
-        sql = payload.get("sql")
-        properties = payload.get("properties") or {}
+        ``wait`` runs it to completion even then; the finished job is still recorded so the
+        data it replaced gets cleaned up.
+        """
+        with phase("validate"):
+            mode = str(payload.get("mode") or "append").lower()
+            target = payload.get("target") or {}
+            sql = payload.get("sql")
+            properties = payload.get("properties") or {}
 
-        if not isinstance(target, dict):
-            raise ValidationError("target must be an object")
+            if not isinstance(target, dict):
+                raise ValidationError("target must be an object")
 
-        database = target.get("db")
-        table = target.get("table")
+            database = target.get("db")
+            table = target.get("table")
 
-        if not database or not table or not sql:
-            raise ValidationError("target.db, target.table and sql are required", code="MissingParam")
-        if mode not in {"append", "replace"}:
-            raise ValidationError("mode must be append or replace", code="BadParam")
-        if not self._is_select_statement(str(sql)):
-            raise ValidationError("sql must be a SELECT statement", code="UnsafeSql")
+            if not database or not table or not sql:
+                raise ValidationError("target.db, target.table and sql are required", code="MissingParam")
+            if mode not in _MODES:
+                raise ValidationError("mode must be append, replace, overwrite_partitions or merge", code="BadParam")
+            statement = validate_select(str(sql))
+            if not isinstance(properties, dict):
+                raise ValidationError("properties must be an object", code="BadParam")
 
-        athena_sql = self._compose_sql(mode, str(sql), str(database), str(table), properties)
-        query_id = self._start_and_wait(athena_sql, str(database))
+            database, table = str(database), str(table)
+            athena_sql, build = self._compose_sql(mode, statement.text, database, table, properties, payload.get("keys"))
+        if self._jobs is not None and not wait:
+            return self._submit(athena_sql, database, f"{database}.{table}", mode, principals, build)
+        try:
+            query_id = self._run(athena_sql, database, principals)
+        except ExternalServiceError:
+            if build is not None:
+                self._retire(f"{database}.{table}", mode, None, principals, self._discard(build))
+            raise
+        if build is not None:
+            retired = self._swap_in(build)
+            self._drop_shadow(build)
+            self._retire(f"{database}.{table}", mode, query_id, principals, retired)
 
         return {
             "status": "ok",
@@ -48,41 +112,554 @@ class MaterializeService:
             "qid": query_id,
         }
 
-    def _compose_sql(self, mode: str, select_sql: str, database: str, table: str, props: Dict[str, object]) -> str:
-        if mode == "replace":
-            if props:
-                props_sql = ", ".join(f"'{k}' = '{v}'" for k, v in props.items())
+    def status(self, job_id: Optional[str]) -> MaterializeJob:
+        """The job's state; while it runs, refreshed from Athena and written back to the job item.
+
+        A replace or overwrite_partitions job's data is swapped in by the first read that
+        sees its query succeed. The swap is recorded on the job before the shadow table is
+        dropped, so a read retrying after a lost write does not swap (or retire) twice.
+        """
+        if not job_id:
+            raise ValidationError("jobId required", code="MissingParam")
+        if self._jobs is None:
+            raise NotFoundError(f"Job {job_id} not found")
+        add_log_context(jobId=job_id)
+        try:
+            with phase("dynamodb"):
+                item = self._jobs.get_item({"jobId": {"S": job_id}})
+        except ClientError as exc:
+            _LOGGER.error("Failed to read materialize job", exc_info=True)
+            raise ExternalServiceError("Failed to read materialize job") from exc
+        if not item:
+            raise NotFoundError(f"Job {job_id} not found")
+
+        job = _to_job(item)
+        if job.state in _TERMINAL_STATES or not job.query_execution_id:
+            return job
+        add_log_context(queryExecutionId=job.query_execution_id)
+        try:
+            with phase("athena-status"):
+                execution = self._athena.get_query_execution(QueryExecutionId=job.query_execution_id)["QueryExecution"]
+        except ClientError as exc:
+            _LOGGER.error("Failed to read Athena query", exc_info=True)
+            raise ExternalServiceError("Failed to read Athena query") from exc
+
+        status, statistics = execution.get("Status", {}), execution.get("Statistics", {})
+        previous, state = job.state, status.get("State", job.state)
+        job.scanned_bytes = statistics.get("DataScannedInBytes")
+        job.execution_time_ms = statistics.get("TotalExecutionTimeInMillis")
+        job.reason = status.get("StateChangeReason") if state in ("FAILED", "CANCELLED") else None
+        job.updated_at = int(time.time())
+
+        retired: List[str] = []
+        build = _to_build(item)
+        if build is not None and state == "SUCCEEDED":
+            if "swappedAt" in item:
+                # An earlier read swapped it in and recorded the replaced data, then lost its final write.
+                self._drop_shadow(build)
+            elif not self._claim_swap(job.job_id):
+                return job  # another read is swapping the table in and records the outcome
             else:
-                props_sql = "table_type = 'ICEBERG', format = 'PARQUET'"
-            return f"DROP TABLE IF EXISTS {database}.{table};\nCREATE TABLE {database}.{table} WITH ({props_sql}) AS {select_sql}"
-        return f"INSERT INTO {database}.{table} {select_sql}"
-
-    def _start_and_wait(self, sql: str, database: str) -> str:
-        try:
-            response = self._athena.start_query_execution(
-                QueryString=sql,
-                QueryExecutionContext={"Database": database},
-                ResultConfiguration={"OutputLocation": self._settings.athena_output},
-                WorkGroup=self._settings.athena_workgroup,
-            )
+                try:
+                    retired = self._swap_in(build)
+                except ExternalServiceError as exc:
+                    state, job.reason = "FAILED", str(exc)
+                    # Some partitions may already read from a partitioned build, and the table
+                    # may already point at a whole-table build; either way its data stays.
+                    retired = [] if build.partitioned or self._is_live(build) else [build.location]
+                else:
+                    # Until this is recorded the shadow table stays, so a retry swaps again harmlessly.
+                    self._mark_swapped(job.job_id, retired)
+                    self._drop_shadow(build)
+        elif build is not None and state in _TERMINAL_STATES:
+            retired = self._discard(build)
+
+        job.state = state
+        if job.state == "SUCCEEDED":
+            job.output_rows, job.output_bytes = self._output_statistics(job.query_execution_id)
+        if job.state != previous or job.state in _TERMINAL_STATES:
+            self._save_progress(job, retired)
+        return job
+
+    def finalize(self) -> Dict[str, int]:
+        """Reads the status of every unfinished job; returns how many ended in each state.
+
+        Run on a schedule, so a job nobody polls still has its data swapped in (or its
+        build discarded) soon after its query finishes.
+        """
+        if self._jobs is None:
+            return {}
+        try:
+            with phase("dynamodb"):
+                items = self._jobs.scan_items(
+                    filter="#state IN (:queued, :running)",
+                    names={"#state": "state"},
+                    values={":queued": {"S": "QUEUED"}, ":running": {"S": "RUNNING"}},
+                )
+        except ClientError as exc:
+            _LOGGER.error("Failed to list materialize jobs", exc_info=True)
+            raise ExternalServiceError("Failed to list materialize jobs") from exc
+        counts: Dict[str, int] = {}
+        for item in items:
+            try:
+                state = self.status(item["jobId"]["S"]).state
+            except DomainError as exc:
+                # Left for the next run; one bad job does not hold up the rest.
+                _LOGGER.warning("Failed to finalize materialize job", extra={"jobId": item["jobId"]["S"], "error": str(exc)})
+                state = "ERROR"
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def _submit(
+        self, sql: str, database: str, table: str, mode: str, principals: Sequence[str], build: Optional[_Build]
+    ) -> MaterializeJob:
+        lease = None
+        if self._admission is not None:
+            with phase("admission"):
+                lease = self._admission.acquire(self._pool, principals[0] if principals else "route:materialize")
+            if lease is None:
+                raise AthenaBusyError(_BUSY_RETRY_AFTER_SECONDS)
+        try:
+            query_id = self._start(sql, database)
+        except DomainError:
+            if self._admission is not None:
+                self._admission.release(lease)
+            raise
+
+        now = int(time.time())
+        job = MaterializeJob(
+            job_id=uuid.uuid4().hex,
+            state="QUEUED",
+            table=table,
+            mode=mode,
+            query_execution_id=query_id,
+            created_at=now,
+            updated_at=now,
+        )
+        add_log_context(jobId=job.job_id)
+        item = self._job_item(job, principals)
+        if build is not None:
+            item["shadowTable"] = {"S": build.shadow}
+            item["buildLocation"] = {"S": build.location}
+        try:
+            with phase("dynamodb"):
+                self._jobs.put_item(item)
+        except ClientError as exc:
+            # An untracked job could never be polled: stop it rather than leave it running blind.
+            _LOGGER.error("Failed to record materialize job", exc_info=True)
+            self._stop(query_id)
+            if self._admission is not None:
+                self._admission.release(lease)
+            if build is not None:
+                # Nothing tracks the stopped build now: drop its shadow table and hand its
+                # partial output to the cleanup job, as for a failed synchronous run.
+                self._retire(table, mode, None, principals, self._discard(build))
+            raise ExternalServiceError("Failed to record materialize job") from exc
+        if self._admission is not None:
+            # Nobody waits for the job: its slot is held until the query finishes.
+            self._admission.attach(lease, query_id)
+        return job
+
+    def _retire(self, table: str, mode: str, query_id: Optional[str], principals: Sequence[str], retired: List[str]) -> None:
+        """Records a synchronous run's replaced data as a finished job for the cleanup job."""
+        if not retired:
+            return
+        if self._jobs is None:
+            # Without a jobs table there is nowhere to schedule the cleanup from.
+            _LOGGER.warning("Replaced table data left in place", extra={"locations": retired})
+            return
+        now = int(time.time())
+        job = MaterializeJob(
+            job_id=uuid.uuid4().hex,
+            state="SUCCEEDED" if query_id else "FAILED",
+            table=table,
+            mode=mode,
+            query_execution_id=query_id,
+            created_at=now,
+            updated_at=now,
+        )
+        item = self._job_item(job, principals)
+        item["retiredLocations"] = {"SS": sorted(set(retired))}
+        item["retireAfter"] = {"N": str(now + self._settings.retire_after_seconds)}
+        try:
+            with phase("dynamodb"):
+                self._jobs.put_item(item)
+        except ClientError:
+            _LOGGER.warning("Failed to record replaced table data; left in place", exc_info=True, extra={"locations": retired})
+
+    def _job_item(self, job: MaterializeJob, principals: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        item = {
+            "jobId": {"S": job.job_id},
+            "state": {"S": job.state},
+            "table": {"S": job.table},
+            "mode": {"S": job.mode},
+            "createdAt": {"N": str(job.created_at)},
+            "updatedAt": {"N": str(job.updated_at)},
+            "expiresAt": {"N": str(job.created_at + self._settings.job_ttl_seconds)},
+        }
+        if job.query_execution_id:
+            item["queryExecutionId"] = {"S": job.query_execution_id}
+        if principals:
+            item["principal"] = {"S": principals[0]}
+        return item
+
+    def _save_progress(self, job: MaterializeJob, retired: Sequence[str] = ()) -> None:
+        values = {":state": {"S": job.state}, ":updated": {"N": str(job.updated_at)}}
+        names = {"#state": "state"}
+        expression = "SET #state = :state, updatedAt = :updated"
+        if retired:
+            # The data cleanup job deletes these once readers have moved off them.
+            expression += ", retiredLocations = :retired, retireAfter = :retireAfter"
+            values[":retired"] = {"SS": sorted(set(retired))}
+            values[":retireAfter"] = {"N": str(job.updated_at + self._settings.retire_after_seconds)}
+        for attribute, value in (
+            ("scannedBytes", job.scanned_bytes),
+            ("executionTimeMs", job.execution_time_ms),
+            ("outputRows", job.output_rows),
+            ("outputBytes", job.output_bytes),
+        ):
+            if value is not None:
+                expression += f", {attribute} = :{attribute}"
+                values[f":{attribute}"] = {"N": str(value)}
+        if job.reason:
+            names["#reason"] = "reason"
+            expression += ", #reason = :reason"
+            values[":reason"] = {"S": job.reason}
+        try:
+            with phase("dynamodb"):
+                self._jobs.update_item({"jobId": {"S": job.job_id}}, expression, names=names, values=values)
+        except ClientError:
+            # The next poll reads Athena again; the answer is still right.
+            _LOGGER.warning("Failed to record materialize job progress", exc_info=True)
+
+    def _output_statistics(self, query_id: str):
+        try:
+            with phase("athena-statistics"):
+                rows = self._athena.get_query_runtime_statistics(QueryExecutionId=query_id)["QueryRuntimeStatistics"].get("Rows") or {}
+        except (ClientError, KeyError):
+            _LOGGER.warning("No runtime statistics for the job's query", exc_info=True)
+            return None, None
+        return rows.get("OutputRows"), rows.get("OutputBytes")
+
+    def _stop(self, query_id: str) -> None:
+        try:
+            self._athena.stop_query_execution(QueryExecutionId=query_id)
+        except ClientError:
+            _LOGGER.error("Failed to stop Athena query", exc_info=True)
+
+    def _compose_sql(
+        self, mode: str, select_sql: str, database: str, table: str, props: Dict[str, object], keys: object
+    ) -> Tuple[str, Optional[_Build]]:
+        if mode == "append":
+            return f"INSERT INTO {database}.{table} {select_sql}", None
+        if mode == "replace":
+            build = self._plan_build(database, table, mode)
+            return f"CREATE TABLE {database}.{build.shadow} WITH ({_table_properties(props, build.location)}) AS {select_sql}", build
+
+        # The incremental modes write into the existing table's layout, read from Glue.
+        current = self._target_table(database, table)
+        columns = [column["Name"] for column in (current.get("StorageDescriptor") or {}).get("Columns") or []]
+        partition_keys = [key["Name"] for key in current.get("PartitionKeys") or []]
+        iceberg = str((current.get("Parameters") or {}).get("table_type", "")).upper() == "ICEBERG"
+        if mode == "merge":
+            if not iceberg:
+                raise ValidationError("merge requires an Iceberg table", code="BadParam")
+            return _merge_sql(database, table, select_sql, columns, _merge_keys(keys, columns)), None
+
+        if iceberg or not partition_keys:
+            raise ValidationError("overwrite_partitions requires a partitioned Hive-format table; use merge for Iceberg", code="BadParam")
+        build = self._plan_build(database, table, mode)
+        properties = _table_properties({"format": _storage_format(current), **props}, build.location, partition_keys)
+        # CTAS wants the partition columns last; selecting the table's columns in order also
+        # makes the new partitions match its schema.
+        projection = ", ".join(_identifier(column) for column in columns + partition_keys)
+        return f"CREATE TABLE {database}.{build.shadow} WITH ({properties}) AS SELECT {projection} FROM ({select_sql})", build
+
+    def _plan_build(self, database: str, table: str, mode: str) -> _Build:
+        """Names a fresh shadow table and data location for one build."""
+        if not self._settings.build_location:
+            raise ValidationError(f"{mode} mode is not configured", code="ModeUnavailable", status_code=501)
+        token = uuid.uuid4().hex[:12]
+        location = f"{self._settings.build_location.rstrip('/')}/{database}/{table}/{token}/"
+        return _Build(
+            database=database,
+            table=table,
+            shadow=f"{table}__build_{token}",
+            location=location,
+            partitioned=mode == "overwrite_partitions",
+        )
+
+    def _target_table(self, database: str, table: str) -> Dict[str, Any]:
+        try:
+            with phase("glue"):
+                current = self._catalog().table(database, table)
+        except ClientError as exc:
+            _LOGGER.error("Failed to read the target table", exc_info=True)
+            raise ExternalServiceError("Failed to read the target table") from exc
+        if current is None:
+            raise NotFoundError(f"Table {database}.{table} not found")
+        return current
+
+    def _swap_in(self, build: _Build) -> List[str]:
+        """Swaps the built data in under the target; returns the replaced locations to retire.
+
+        The shadow table is dropped on failure; after a successful swap that is the caller's
+        job. The build's own location is never returned, even when the target already read
+        from it (a repeated swap). A whole-table build whose shadow is gone while the target
+        reads its location was already swapped in.
+        """
+        try:
+            with phase("glue-swap"):
+                if build.partitioned:
+                    previous = self._catalog().swap_partitions(build.database, build.table, build.shadow)
+                else:
+                    previous = [self._catalog().swap(build.database, build.table, build.shadow)]
+        except (ClientError, LookupError) as exc:
+            if isinstance(exc, LookupError) and not build.partitioned and self._is_live(build):
+                return []
+            _LOGGER.error("Failed to swap the built data in", exc_info=True)
+            self._drop_shadow(build)
+            raise ExternalServiceError(f"Failed to swap in {build.database}.{build.table}") from exc
+        return [location for location in previous if self._retirable(location) and not _within(location, build.location)]
+
+    def _is_live(self, build: _Build) -> bool:
+        """Whether the target already reads from the build's location; True when that cannot be told."""
+        try:
+            with phase("glue"):
+                current = self._catalog().table(build.database, build.table)
+        except ClientError:
+            _LOGGER.warning("Failed to read the target table; keeping the build's data", exc_info=True)
+            return True
+        return _within(((current or {}).get("StorageDescriptor") or {}).get("Location"), build.location)
+
+    def _discard(self, build: _Build) -> List[str]:
+        """Drops a build that will not be swapped in; returns its (possibly partial) data location."""
+        self._drop_shadow(build)
+        return [build.location]
+
+    def _drop_shadow(self, build: _Build) -> None:
+        try:
+            with phase("glue-drop"):
+                self._catalog().drop(build.database, build.shadow)
+        except ClientError:
+            _LOGGER.warning("Failed to drop the shadow table", exc_info=True, extra={"table": build.shadow})
+
+    def _retirable(self, location: Optional[str]) -> bool:
+        # Only data written under the build prefix is ours to delete; a table created some
+        # other way keeps its original files.
+        if location and location.startswith(self._settings.build_location.rstrip("/") + "/"):
+            return True
+        if location:
+            _LOGGER.info("Replaced data is outside the build location; left in place", extra={"location": location})
+        return False
+
+    def _catalog(self) -> GlueCatalog:
+        if self._glue_catalog is None:
+            self._glue_catalog = GlueCatalog(self._clients.glue())
+        return self._glue_catalog
+
+    def _claim_swap(self, job_id: str) -> bool:
+        now = int(time.time())
+        try:
+            with phase("dynamodb"):
+                self._jobs.update_item(
+                    {"jobId": {"S": job_id}},
+                    "SET swapUntil = :until",
+                    condition="attribute_not_exists(swapUntil) OR swapUntil < :now",
+                    values={":until": {"N": str(now + _SWAP_CLAIM_SECONDS)}, ":now": {"N": str(now)}},
+                )
+        except ConditionalCheckFailedError:
+            return False
         except ClientError as exc:
+            _LOGGER.error("Failed to claim the materialize job's swap", exc_info=True)
+            raise ExternalServiceError("Failed to update materialize job") from exc
+        return True
+
+    def _mark_swapped(self, job_id: str, retired: Sequence[str]) -> None:
+        now = int(time.time())
+        expression, values = "SET swappedAt = :now", {":now": {"N": str(now)}}
+        if retired:
+            expression += ", retiredLocations = :retired, retireAfter = :retireAfter"
+            values[":retired"] = {"SS": sorted(set(retired))}
+            values[":retireAfter"] = {"N": str(now + self._settings.retire_after_seconds)}
+        try:
+            with phase("dynamodb"):
+                self._jobs.update_item(
+                    {"jobId": {"S": job_id}}, expression, condition="attribute_not_exists(swappedAt)", values=values
+                )
+        except ConditionalCheckFailedError:
+            pass  # a read whose claim lapsed got here first and recorded what it replaced
+        except ClientError as exc:
+            _LOGGER.error("Failed to record the materialize job's swap", exc_info=True)
+            raise ExternalServiceError("Failed to update materialize job") from exc
+
+    def _run(self, sql: str, database: str, principals: Sequence[str]) -> str:
+        if self._admission is None:
+            return self._start_and_wait(sql, database)
+        with phase("admission"):
+            lease = self._admission.acquire(self._pool, principals[0] if principals else "route:materialize")
+        if lease is None:
+            raise AthenaBusyError(_BUSY_RETRY_AFTER_SECONDS)
+        try:
+            return self._start_and_wait(sql, database, lease)
+        finally:
+            self._admission.release(lease)
+
+    def _start_and_wait(self, sql: str, database: str, lease: Optional[Lease] = None) -> str:
+        query_id = self._start(sql, database)
+        renew_at = self._hold(lease, query_id)
+        with phase("athena-wait"):
+            while True:
+                execution = self._athena.get_query_execution(QueryExecutionId=query_id)
+                state = execution["QueryExecution"]["Status"]["State"]
+                if state in _TERMINAL_STATES:
+                    break
+                if lease is not None and time.time() >= renew_at:
+                    renew_at = self._hold(lease, query_id)
+                time.sleep(0.5)
+        if state != "SUCCEEDED":
+            reason = execution["QueryExecution"]["Status"].get("StateChangeReason", "")
+            raise ExternalServiceError(f"Athena {state}: {reason}")
+        return query_id
+
+    def _hold(self, lease: Optional[Lease], query_id: str) -> float:
+        """Renews ``lease`` for the running query and returns when to renew it next.
+
+        The lease is attached to the query as well, so the finalizer's sweep keeps it while
+        the query runs should this invocation end before the query does.
+        """
+        if lease is None:
+            return float("inf")
+        self._admission.attach(lease, query_id)
+        return time.time() + self._admission.lease_seconds / 2
+
+    def _start(self, sql: str, database: str) -> str:
+        try:
+            with phase("athena-start"):
+                response = self._athena.start_query_execution(
+                    QueryString=sql,
+                    QueryExecutionContext={"Database": database},
+                    ResultConfiguration={"OutputLocation": self._settings.athena_output},
+                    WorkGroup=self._settings.athena_workgroup,
+                )
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") == "TooManyRequestsException":
+                _LOGGER.warning("Athena refused the query: too many running")
+                raise AthenaBusyError(_BUSY_RETRY_AFTER_SECONDS) from exc
             _LOGGER.error("Failed to start Athena query", exc_info=True)
             raise ExternalServiceError("Failed to start Athena query") from exc
 
         query_id = response["QueryExecutionId"]
-        while True:
-            execution = self._athena.get_query_execution(QueryExecutionId=query_id)
-            state = execution["QueryExecution"]["Status"]["State"]
-            if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
-                if state != "SUCCEEDED":
-                    reason = execution["QueryExecution"]["Status"].get("StateChangeReason", "")
-                    raise ExternalServiceError(f"Athena {state}: {reason}")
-                return query_id
-            time.sleep(0.5)
-
-    def _is_select_statement(self, sql: str) -> bool:
-        statement = sql.strip().lower()
-        if not statement.startswith("select"):
-            return False
-        banned = [";create ", ";drop ", ";alter ", " insert ", " merge ", " delete ", " update "]
-        return not any(token in statement for token in banned)
+        add_log_context(queryExecutionId=query_id)
+        return query_id
+
+
+def _to_job(item: Dict[str, Dict[str, str]]) -> MaterializeJob:
+    return MaterializeJob(
+        job_id=item["jobId"]["S"],
+        state=_string(item.get("state")) or "QUEUED",
+        table=_string(item.get("table")) or "",
+        mode=_string(item.get("mode")) or "",
+        query_execution_id=_string(item.get("queryExecutionId")),
+        created_at=_number(item.get("createdAt")),
+        updated_at=_number(item.get("updatedAt")),
+        scanned_bytes=_number(item.get("scannedBytes")),
+        execution_time_ms=_number(item.get("executionTimeMs")),
+        output_rows=_number(item.get("outputRows")),
+        output_bytes=_number(item.get("outputBytes")),
+        reason=_string(item.get("reason")),
+    )
+
+
+def _to_build(item: Dict[str, Dict[str, str]]) -> Optional[_Build]:
+    shadow, location = _string(item.get("shadowTable")), _string(item.get("buildLocation"))
+    if not shadow or not location:
+        return None
+    database, _, table = (_string(item.get("table")) or "").rpartition(".")
+    partitioned = _string(item.get("mode")) == "overwrite_partitions"
+    return _Build(database=database, table=table, shadow=shadow, location=location, partitioned=partitioned)
+
+
+def _within(location: Optional[str], prefix: str) -> bool:
+    return bool(location) and (location.rstrip("/") + "/").startswith(prefix.rstrip("/") + "/")
+
+
+def _table_properties(props: Dict[str, object], location: str, partition_keys: Sequence[str] = ()) -> str:
+    """The CTAS ``WITH`` list for a build: the caller's properties plus the build location.
+
+    With ``partition_keys`` the build is partitioned like the table it overwrites.
+    """
+    props = {str(key).lower(): value for key, value in props.items()} or dict(_DEFAULT_PROPERTIES)
+    for key in props:
+        if not _PROPERTY_NAME.match(key):
+            raise ValidationError(f"Invalid table property: {key}", code="BadParam")
+    if "location" in props or "external_location" in props:
+        raise ValidationError("the build chooses the table location", code="BadParam")
+    iceberg = str(props.get("table_type", "")).upper() == "ICEBERG"
+    if partition_keys:
+        if iceberg or "partitioned_by" in props:
+            raise ValidationError("overwrite_partitions takes the partitioning from the table", code="BadParam")
+        props["partitioned_by"] = list(partition_keys)
+    elif props.get("partitioned_by") and not iceberg:
+        # Hive partitions are registered on the shadow table and would not move with the swap.
+        raise ValidationError("partitioned replace requires table_type ICEBERG", code="BadParam")
+    if iceberg:
+        props["location"] = location
+        props.setdefault("is_external", False)
+    else:
+        props["external_location"] = location
+    return ", ".join(f"{key} = {_property_value(value)}" for key, value in props.items())
+
+
+def _property_value(value: object) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (list, tuple)):
+        return "ARRAY[" + ", ".join(_property_value(item) for item in value) + "]"
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _merge_sql(database: str, table: str, select_sql: str, columns: Sequence[str], keys: Sequence[str]) -> str:
+    """One MERGE that updates the rows whose keys the SELECT produces and inserts the rest."""
+    matched = " AND ".join(f"t.{_identifier(key)} = s.{_identifier(key)}" for key in keys)
+    names = ", ".join(_identifier(column) for column in columns)
+    values = ", ".join(f"s.{_identifier(column)}" for column in columns)
+    sql = f"MERGE INTO {database}.{table} t USING ({select_sql}) s ON ({matched})"
+    updates = ", ".join(f"{_identifier(column)} = s.{_identifier(column)}" for column in columns if column not in keys)
+    if updates:
+        sql += f" WHEN MATCHED THEN UPDATE SET {updates}"
+    return sql + f" WHEN NOT MATCHED THEN INSERT ({names}) VALUES ({values})"
+
+
+def _merge_keys(keys: object, columns: Sequence[str]) -> List[str]:
+    if isinstance(keys, str):
+        keys = [keys]
+    if not keys or not isinstance(keys, list):
+        raise ValidationError("merge requires keys: the columns that identify a row", code="MissingParam")
+    resolved = [str(key).lower() for key in keys]
+    unknown = [key for key in resolved if key not in columns]
+    if unknown:
+        raise ValidationError(f"Unknown key columns: {', '.join(unknown)}", code="BadParam")
+    return resolved
+
+
+def _storage_format(table: Dict[str, Any]) -> str:
+    """The table's file format as a CTAS ``format``, from the classification Athena and crawlers set."""
+    classification = str((table.get("Parameters") or {}).get("classification", "")).upper()
+    return classification if classification in ("PARQUET", "ORC", "AVRO", "JSON", "TEXTFILE") else "PARQUET"
+
+
+def _identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _string(attr: Optional[Dict[str, str]]) -> Optional[str]:
+    if not attr:
+        return None
+    return attr.get("S")
+
+
+def _number(attr: Optional[Dict[str, str]]) -> Optional[int]:
+    if not attr or "N" not in attr:
+        return None
+    return int(attr["N"])
@@ -1,46 +1,106 @@
 ﻿from __future__ import annotations
 
 import time
-from typing import Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Dict, List, Optional, Sequence
+from urllib.parse import quote, unquote
 
 from botocore.exceptions import ClientError
 
 from ..config.settings import QuerySettings
-from ..domain.errors import ExternalServiceError, ValidationError
-from ..domain.models import QueryResultPage, QueryStatistics
+from ..domain.errors import AthenaBusyError, DomainError, ExternalServiceError, NotFoundError, QueryTimeoutError, ScanBudgetExceededError, ValidationError
+from ..domain.models import QueryBatch, QueryBatchResult, QueryCancellation, QueryResultPage, QueryStatistics, ScanEstimate
+from ..domain.sql import SqlStatement, validate_read_only
+from ..infrastructure.admission import INTERACTIVE, AthenaAdmission, Lease
 from ..infrastructure.aws_clients import AwsClients
-from ..presentation.logging import get_logger
+from ..presentation.logging import add_log_context, get_logger
+from ..presentation.timing import phase
+from .scan_estimator import ScanEstimator
 
 
 _LOGGER = get_logger("sewingmachine.query")
 
+_POLL_SECONDS = 0.4
+_TERMINAL_STATES = ("SUCCEEDED", "FAILED", "CANCELLED")
+_BUSY_RETRY_AFTER_SECONDS = 2
+_BATCH_MAX_STATEMENTS = 20
+_BATCH_GET_MAX_IDS = 50  # BatchGetQueryExecution limit
+_BATCH_WORKERS = 8
+# Without a deadline (no Lambda context) a batch still stops polling after the longest
+# a Lambda can run; an id Athena never reports back would otherwise be polled forever.
+_BATCH_MAX_POLLS = int(900 / _POLL_SECONDS)
+# First line of every query this API starts: who started it, so only they can cancel it.
+# Athena has no per-query tags, but returns the query text with the execution.
+_OWNER_TAG = "-- sewingmachine:principal="
+
 
 class QueryService:
-    def __init__(self, settings: QuerySettings, clients: AwsClients) -> None:
+    def __init__(self, settings: QuerySettings, clients: AwsClients, admission: Optional[AthenaAdmission] = None) -> None:
         self._settings = settings
         self._athena = clients.athena()
+        self._admission = admission
+        budgeted = settings.scan_budget_bytes or settings.user_scan_budgets
+        self._estimator = ScanEstimator(clients.glue()) if budgeted else None
+
+    def execute(
+        self, payload: Dict[str, object], principals: Sequence[str] = (), deadline: Optional[float] = None
+    ) -> QueryResultPage:
+        """Starts (or resumes) a query and returns one page. ``principals`` selects the scan budget.
 
-    def execute(self, payload: Dict[str, object]) -> Dict[str, object]:
-        sql = payload.get("sql")
-        query_execution_id = payload.get("queryExecutionId")
-        next_token = payload.get("nextPageToken")
-        max_rows = self._sanitize_max_rows(payload.get("maxRows"))
-        database = self._select_database(payload)
+        ``deadline`` (a ``time.monotonic()`` value) bounds the wait for Athena. A new query still
+        running then is stopped, unless ``async`` was requested: that query, like a resumed one,
+        keeps running and its page comes back empty with ``state`` set for the client to poll.
+        """
+        with phase("validate"):
+            sql = payload.get("sql")
+            query_execution_id = payload.get("queryExecutionId")
+            next_token = payload.get("nextPageToken")
+            max_rows = self._sanitize_max_rows(payload.get("maxRows"))
+            database = self._select_database(payload)
+            asynchronous = _flag(payload.get("async"))
 
-        if not (sql or query_execution_id):
-            raise ValidationError("sql or queryExecutionId required", code="MissingParam")
+            if not (sql or query_execution_id):
+                raise ValidationError("sql or queryExecutionId required", code="MissingParam")
+            statement = validate_read_only(str(sql)) if sql and not query_execution_id else None
 
         stats = QueryStatistics(scanned_bytes=None, execution_time_ms=None)
+        scan_estimate: Optional[ScanEstimate] = None
         query_id = str(query_execution_id) if query_execution_id else None
+        add_log_context(queryExecutionId=query_id)
 
-        if not next_token and query_id is None:
-            query_id, execution = self._start_query(str(sql), database)
+        execution = None
+        if not next_token and query_id is None and statement is not None:
+            scan_estimate = self._check_scan_budget(statement, database, principals)
+            workgroup = (scan_estimate and scan_estimate.workgroup) or self._settings.athena_workgroup
+            lease = self._admit(principals)
+            try:
+                query_id = self._start_query(statement.text, database, workgroup, principals)
+                add_log_context(queryExecutionId=query_id)
+                execution = self._wait(query_id, deadline, cancel=not asynchronous)
+            finally:
+                # An async query still running keeps its slot until it finishes.
+                finished = execution is None or execution["Status"]["State"] in _TERMINAL_STATES
+                if self._admission is not None and finished:
+                    self._admission.release(lease)
+                elif self._admission is not None:
+                    self._admission.attach(lease, query_id)
+        elif not next_token and query_id is not None:
+            execution = self._wait(query_id, deadline, cancel=False)
+
+        if execution is not None:
             status = execution.get("Status", {})
-            statistics = execution.get("Statistics", {})
-            stats = QueryStatistics(
-                scanned_bytes=statistics.get("DataScannedInBytes"),
-                execution_time_ms=statistics.get("EngineExecutionTimeInMillis"),
-            )
+            stats = _statistics(execution)
+            if status.get("State") not in _TERMINAL_STATES:
+                return QueryResultPage(
+                    columns=[],
+                    rows=[],
+                    stats=stats,
+                    query_execution_id=str(query_id),
+                    next_page_token=None,
+                    scan_estimate=scan_estimate,
+                    state=status.get("State"),
+                )
             if status.get("State") != "SUCCEEDED":
                 reason = status.get("StateChangeReason", "")
                 raise ExternalServiceError(f"Athena {status.get('State')}: {reason}")
@@ -56,8 +116,174 @@ class QueryService:
             stats=stats,
             query_execution_id=read_query_id,
             next_page_token=next_page_token,
+            scan_estimate=scan_estimate,
+        )
+        # Returned as the model: the response codec encodes it without a dict copy.
+        return result_page
+
+    def execute_batch(
+        self, payload: Dict[str, object], principals: Sequence[str] = (), deadline: Optional[float] = None
+    ) -> QueryBatch:
+        """Starts every statement in ``queries`` at once and returns each one's first page.
+
+        The running queries are polled together with ``BatchGetQueryExecution``, so the batch
+        waits as long as its slowest query rather than the sum. Each statement succeeds or fails
+        on its own; ``async`` and ``deadline`` behave as in :meth:`execute`.
+        """
+        with phase("validate"):
+            queries = payload.get("queries")
+            if not isinstance(queries, list) or not queries:
+                raise ValidationError("queries must be a non-empty list", code="MissingParam")
+            if len(queries) > _BATCH_MAX_STATEMENTS:
+                raise ValidationError(f"At most {_BATCH_MAX_STATEMENTS} queries per batch", code="BadParam")
+            asynchronous = _flag(payload.get("async"))
+            statements = [self._prepare_batch_statement(index, query, payload) for index, query in enumerate(queries)]
+
+        admitted = True
+        for item in statements:
+            if item.error is not None:
+                continue
+            try:
+                item.scan_estimate = self._check_scan_budget(item.statement, item.database, principals)
+                # Once one statement is refused the rest are too; only the first one waits.
+                item.lease = self._admit(principals, None if admitted else 0.0)
+            except DomainError as exc:
+                admitted = admitted and not isinstance(exc, AthenaBusyError)
+                item.fail(exc)
+
+        try:
+            startable = [item for item in statements if item.error is None]
+            with phase("batch-start"):
+                _run_each(lambda item: self._start_batch_statement(item, principals), startable)
+            started = [item for item in statements if item.query_id is not None]
+            add_log_context(queryExecutionIds=[item.query_id for item in started])
+
+            self._wait_batch(started, deadline)
+            readable = []
+            for item in started:
+                state = item.execution["Status"]["State"]
+                if state == "SUCCEEDED":
+                    readable.append(item)
+                elif state in _TERMINAL_STATES:
+                    item.fail(ExternalServiceError(f"Athena {state}: {item.execution['Status'].get('StateChangeReason', '')}"))
+                elif asynchronous:
+                    item.result = self._pending_page(item, state)
+                else:
+                    item.fail(QueryTimeoutError(item.query_id, cancelled=self._stop(item.query_id)))
+            with phase("batch-read"):
+                _run_each(self._read_batch_statement, readable)
+        finally:
+            if self._admission is not None:
+                for item in statements:
+                    # Async queries still running keep their slots until they finish.
+                    if item.result is None or item.result.state is None:
+                        self._admission.release(item.lease)
+                    else:
+                        self._admission.attach(item.lease, item.query_id)
+
+        return QueryBatch(results=[item.to_result() for item in statements])
+
+    def cancel(self, query_execution_id: str, principals: Sequence[str] = ()) -> QueryCancellation:
+        """Stops a query the caller started through this API; finished queries are left as they are.
+
+        Queries of other callers, other workgroups or other routes answer as not found.
+        """
+        add_log_context(queryExecutionId=query_execution_id)
+        try:
+            execution = self._athena.get_query_execution(QueryExecutionId=query_execution_id)["QueryExecution"]
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") == "InvalidRequestException":
+                raise NotFoundError(f"Query {query_execution_id} not found") from exc
+            raise ExternalServiceError("Failed to read Athena query") from exc
+        workgroups = {self._settings.athena_workgroup, self._settings.capped_workgroup}
+        if execution.get("WorkGroup") not in workgroups or _owner(execution) != _principal(principals):
+            raise NotFoundError(f"Query {query_execution_id} not found")
+
+        state = execution["Status"]["State"]
+        if state not in _TERMINAL_STATES:
+            if not self._stop(query_execution_id):
+                raise ExternalServiceError("Failed to stop Athena query")
+            state = "CANCELLED"
+        return QueryCancellation(query_execution_id=query_execution_id, state=state)
+
+    def _prepare_batch_statement(self, index: int, query: object, payload: Dict[str, object]) -> "_BatchStatement":
+        query = query if isinstance(query, dict) else {"sql": query}
+        item = _BatchStatement(str(query.get("id") or index))
+        try:
+            if not query.get("sql"):
+                raise ValidationError("sql required", code="MissingParam")
+            item.statement = validate_read_only(str(query["sql"]))
+            item.max_rows = self._sanitize_max_rows(query.get("maxRows") or payload.get("maxRows"))
+            item.database = self._select_database(query if query.get("catalog") or query.get("database") else payload)
+        except DomainError as exc:
+            item.fail(exc)
+        return item
+
+    def _start_batch_statement(self, item: "_BatchStatement", principals: Sequence[str]) -> None:
+        workgroup = (item.scan_estimate and item.scan_estimate.workgroup) or self._settings.athena_workgroup
+        try:
+            item.query_id = self._start_query(item.statement.text, item.database, workgroup, principals)
+        except DomainError as exc:
+            item.fail(exc)
+
+    def _wait_batch(self, items: List["_BatchStatement"], deadline: Optional[float]) -> None:
+        """Polls all ``items`` with one ``BatchGetQueryExecution`` per 50 ids until they finish or ``deadline``.
+
+        When Athena cannot be read, the queries still running are stopped, since nobody would
+        read their results, and the batch fails with :class:`ExternalServiceError`.
+        """
+        pending = {item.query_id: item for item in items}
+        with phase("athena-wait"):
+            for _ in range(_BATCH_MAX_POLLS):
+                ids = list(pending)
+                for start in range(0, len(ids), _BATCH_GET_MAX_IDS):
+                    try:
+                        response = self._athena.batch_get_query_execution(QueryExecutionIds=ids[start:start + _BATCH_GET_MAX_IDS])
+                    except ClientError as exc:
+                        _LOGGER.error("Failed to poll Athena queries", exc_info=True)
+                        for query_id in pending:
+                            self._stop(query_id)
+                        raise ExternalServiceError("Failed to read Athena queries") from exc
+                    for execution in response.get("QueryExecutions", []):
+                        item = pending.get(execution["QueryExecutionId"])
+                        if item is None:
+                            continue
+                        item.execution = execution
+                        if execution["Status"]["State"] in _TERMINAL_STATES:
+                            del pending[item.query_id]
+                if not pending or (deadline is not None and time.monotonic() + _POLL_SECONDS >= deadline):
+                    break
+                time.sleep(_POLL_SECONDS)
+        for item in pending.values():
+            # Never reported back (unprocessed ids): treat as still queued.
+            item.execution = item.execution or {"QueryExecutionId": item.query_id, "Status": {"State": "QUEUED"}}
+
+    def _read_batch_statement(self, item: "_BatchStatement") -> None:
+        try:
+            columns, rows, next_page_token = self._read_page(item.query_id, None, item.max_rows)
+        except ClientError:
+            _LOGGER.error("Failed to read Athena results", exc_info=True, extra={"queryExecutionId": item.query_id})
+            item.fail(ExternalServiceError("Failed to read Athena results"))
+            return
+        item.result = QueryResultPage(
+            columns=columns,
+            rows=rows,
+            stats=_statistics(item.execution),
+            query_execution_id=item.query_id,
+            next_page_token=next_page_token,
+            scan_estimate=item.scan_estimate,
+        )
+
+    def _pending_page(self, item: "_BatchStatement", state: str) -> QueryResultPage:
+        return QueryResultPage(
+            columns=[],
+            rows=[],
+            stats=_statistics(item.execution),
+            query_execution_id=item.query_id,
+            next_page_token=None,
+            scan_estimate=item.scan_estimate,
+            state=state,
         )
-        return result_page.to_dict()
 
     def _sanitize_max_rows(self, value: object) -> int:
         try:
@@ -72,34 +298,92 @@ class QueryService:
             return database
         return self._settings.default_database
 
-    def _start_query(self, sql: str, database: Optional[str]):
+    def _check_scan_budget(self, statement: SqlStatement, database: Optional[str], principals: Sequence[str]) -> Optional[ScanEstimate]:
+        budget = next(
+            (self._settings.user_scan_budgets[p] for p in principals if p in self._settings.user_scan_budgets),
+            self._settings.scan_budget_bytes,
+        )
+        if self._estimator is None or not budget:
+            return None
+        with phase("estimate"):
+            tables = self._estimator.estimate(statement, database)
+        estimate = ScanEstimate(estimated_bytes=sum(t.estimated_bytes or 0 for t in tables), budget_bytes=budget, tables=tables)
+        if estimate.estimated_bytes <= budget:
+            return estimate
+
+        action = self._settings.scan_budget_action
+        _LOGGER.warning(
+            "Query over scan budget",
+            extra={"estimatedBytes": estimate.estimated_bytes, "budgetBytes": budget, "action": action, "tables": list(statement.tables)},
+        )
+        if action == "route" and self._settings.capped_workgroup:
+            estimate.action, estimate.workgroup = "route", self._settings.capped_workgroup
+        elif action == "warn":
+            estimate.action = "warn"
+        else:
+            raise ScanBudgetExceededError(estimate.estimated_bytes, budget, [table.to_dict() for table in tables])
+        return estimate
+
+    def _admit(self, principals: Sequence[str], wait_seconds: Optional[float] = None) -> Optional[Lease]:
+        if self._admission is None:
+            return None
+        with phase("admission"):
+            lease = self._admission.acquire(INTERACTIVE, principals[0] if principals else "route:query", wait_seconds)
+        if lease is None:
+            raise AthenaBusyError(_BUSY_RETRY_AFTER_SECONDS)
+        return lease
+
+    def _start_query(self, sql: str, database: Optional[str], workgroup: str, principals: Sequence[str]) -> str:
         context = {"Catalog": self._settings.athena_catalog}
         if database:
             context["Database"] = database
         try:
-            response = self._athena.start_query_execution(
-                QueryString=sql,
-                QueryExecutionContext=context,
-                ResultConfiguration={"OutputLocation": self._settings.athena_output},
-                WorkGroup=self._settings.athena_workgroup,
-            )
+            with phase("athena-start"):
+                response = self._athena.start_query_execution(
+                    QueryString=f"{_OWNER_TAG}{quote(_principal(principals), safe='')}\n{sql}",
+                    QueryExecutionContext=context,
+                    ResultConfiguration={"OutputLocation": self._settings.athena_output},
+                    WorkGroup=workgroup,
+                )
         except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") == "TooManyRequestsException":
+                _LOGGER.warning("Athena refused the query: too many running")
+                raise AthenaBusyError(_BUSY_RETRY_AFTER_SECONDS) from exc
             _LOGGER.error("Failed to start Athena query", exc_info=True)
             raise ExternalServiceError("Failed to start Athena query") from exc
 
-        query_id = response["QueryExecutionId"]
-        while True:
-            execution = self._athena.get_query_execution(QueryExecutionId=query_id)["QueryExecution"]
-            state = execution["Status"]["State"]
-            if state in ("SUCCEEDED", "FAILED", "CANCELLED"):
-                return query_id, execution
-            time.sleep(0.4)
+        return response["QueryExecutionId"]
+
+    def _wait(self, query_id: str, deadline: Optional[float], *, cancel: bool) -> Dict[str, object]:
+        """Polls until the query finishes or ``deadline`` is one poll away; then stops it when ``cancel``."""
+        with phase("athena-wait"):
+            while True:
+                execution = self._athena.get_query_execution(QueryExecutionId=query_id)["QueryExecution"]
+                if execution["Status"]["State"] in _TERMINAL_STATES:
+                    return execution
+                if deadline is not None and time.monotonic() + _POLL_SECONDS >= deadline:
+                    break
+                time.sleep(_POLL_SECONDS)
+        if not cancel:
+            return execution
+        _LOGGER.warning("Stopping query at the invocation deadline", extra={"state": execution["Status"]["State"]})
+        raise QueryTimeoutError(query_id, cancelled=self._stop(query_id))
+
+    def _stop(self, query_id: str) -> bool:
+        try:
+            with phase("athena-stop"):
+                self._athena.stop_query_execution(QueryExecutionId=query_id)
+        except ClientError:
+            _LOGGER.error("Failed to stop Athena query", exc_info=True)
+            return False
+        return True
 
     def _read_page(self, query_id: str, token: Optional[str], max_rows: int):
         kwargs = {"QueryExecutionId": query_id, "MaxResults": max_rows}
         if token:
             kwargs["NextToken"] = token
-        out = self._athena.get_query_results(**kwargs)
+        with phase("athena-read"):
+            out = self._athena.get_query_results(**kwargs)
         columns = [col.get("Label") or col.get("Name") for col in out["ResultSet"]["ResultSetMetadata"]["ColumnInfo"]]
         rows: List[List[Optional[str]]] = []
         result_rows = out["ResultSet"].get("Rows", [])
@@ -107,3 +391,60 @@ class QueryService:
         for row in result_rows[start_idx:]:
             rows.append([cell.get("VarCharValue") if "VarCharValue" in cell else None for cell in row.get("Data", [])])
         return columns, rows, out.get("NextToken")
+
+
+class _BatchStatement:
+    __slots__ = ("id", "statement", "database", "max_rows", "scan_estimate", "lease", "query_id", "execution", "result", "error", "status")
+
+    def __init__(self, statement_id: str) -> None:
+        self.id = statement_id
+        self.statement: Optional[SqlStatement] = None
+        self.database: Optional[str] = None
+        self.max_rows = 500
+        self.scan_estimate: Optional[ScanEstimate] = None
+        self.lease: Optional[Lease] = None
+        self.query_id: Optional[str] = None
+        self.execution: Optional[Dict[str, Any]] = None
+        self.result: Optional[QueryResultPage] = None
+        self.error: Optional[Dict[str, Any]] = None
+        self.status = 200
+
+    def fail(self, exc: DomainError) -> None:
+        details = {key: value for key, value in exc.payload.items() if key != "error"}
+        self.error = {**exc.payload.get("error", {"code": exc.code, "message": str(exc)}), **details}
+        self.status = exc.status_code
+        self.result = None
+
+    def to_result(self) -> QueryBatchResult:
+        status = 202 if self.result is not None and self.result.state else self.status
+        return QueryBatchResult(id=self.id, status=status, result=self.result, error=self.error)
+
+
+def _statistics(execution: Optional[Dict[str, Any]]) -> QueryStatistics:
+    statistics = (execution or {}).get("Statistics", {})
+    return QueryStatistics(scanned_bytes=statistics.get("DataScannedInBytes"), execution_time_ms=statistics.get("EngineExecutionTimeInMillis"))
+
+
+def _run_each(function, items: List["_BatchStatement"]) -> None:
+    """Calls ``function`` on every item side by side, each in a copy of the caller's context.
+
+    The copy carries the request's log context and phase timings into the worker threads;
+    one copy per call keeps what a statement adds to its log context out of the others.
+    """
+    with ThreadPoolExecutor(max_workers=min(_BATCH_WORKERS, len(items) or 1)) as pool:
+        for future in [pool.submit(copy_context().run, function, item) for item in items]:
+            future.result()
+
+
+def _principal(principals: Sequence[str]) -> str:
+    return principals[0] if principals else ""
+
+
+def _owner(execution: Dict[str, Any]) -> Optional[str]:
+    """The principal that started the query, from its owner tag; None for queries started elsewhere."""
+    first_line = str(execution.get("Query") or "").split("\n", 1)[0]
+    return unquote(first_line[len(_OWNER_TAG):]) if first_line.startswith(_OWNER_TAG) else None
+
+
+def _flag(value: object) -> bool:
+    return str(value or "").lower() in ("1", "true", "yes")
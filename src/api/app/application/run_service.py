@@ -5,13 +5,14 @@ import json
 import time
 import uuid
 from typing import Dict, Optional
-from botocore.exceptions import ClientError
 
 from ..config.settings import RunSettings
 from ..domain.errors import CooldownActiveError, ValidationError
 from ..domain.models import DirectoryDescriptor, FileDescriptor, LayerSnapshot
 from ..infrastructure.aws_clients import AwsClients
-from ..presentation.logging import get_logger
+from ..infrastructure.dynamodb import ConditionalCheckFailedError, DynamoTable
+from ..presentation.logging import add_log_context, get_logger
+from ..presentation.timing import phase
 
 
 _LOGGER = get_logger("sewingmachine.run")
@@ -20,7 +21,7 @@ _LOGGER = get_logger("sewingmachine.run")
 class RunService:
     def __init__(self, settings: RunSettings, clients: AwsClients) -> None:
         self._settings = settings
-        self._ddb = clients.dynamodb()
+        self._cooldowns = DynamoTable(clients.dynamodb(), settings.cooldown_table_name)
         self._lambda = clients.lambda_()
         self._s3 = clients.s3()
 
@@ -28,40 +29,41 @@ class RunService:
         run_value = (payload or {}).get("run") or datetime.date.today().isoformat()
         now = int(time.time())
         allow_after = now + self._settings.cooldown_seconds
+        run_id = str(uuid.uuid4())
+        add_log_context(runId=run_id, run=run_value)
 
-        self._acquire_cooldown(now, allow_after, run_value)
-        self._invoke_orchestrator(run_value)
+        self._acquire_cooldown(now, allow_after, run_value, run_id)
+        with phase("lambda-invoke"):
+            self._invoke_orchestrator(run_value, run_id)
         layers = self._build_layers(run_value)
 
         return {
             "status": "accepted",
             "run": run_value,
+            "runId": run_id,
             "cooldownSeconds": self._settings.cooldown_seconds,
             "layers": layers,
         }
 
-    def _acquire_cooldown(self, now: int, allow_after: int, run_value: str) -> None:
+    def _acquire_cooldown(self, now: int, allow_after: int, run_value: str, run_id: str) -> None:
         try:
-            self._ddb.put_item(
-                TableName=self._settings.cooldown_table_name,
-                Item={
-                    "resource": {"S": self._settings.resource_key},
-                    "allowAfter": {"N": str(allow_after)},
-                    "lastRun": {"N": str(now)},
-                    "runId": {"S": str(uuid.uuid4())},
-                    "expiresAt": {"N": str(allow_after + 3600)},
-                },
-                ConditionExpression="attribute_not_exists(#res) OR allowAfter <= :now",
-                ExpressionAttributeNames={"#res": "resource"},
-                ExpressionAttributeValues={":now": {"N": str(now)}},
-            )
-        except ClientError as exc:
-            if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
-                raise
-            current = self._ddb.get_item(
-                TableName=self._settings.cooldown_table_name,
-                Key={"resource": {"S": self._settings.resource_key}},
-            ).get("Item", {})
+            # ALL_OLD hands back the blocking item on conflict, so no follow-up GetItem is needed.
+            with phase("dynamodb"):
+                self._cooldowns.put_item(
+                    {
+                        "resource": {"S": self._settings.resource_key},
+                        "allowAfter": {"N": str(allow_after)},
+                        "lastRun": {"N": str(now)},
+                        "runId": {"S": run_id},
+                        "expiresAt": {"N": str(allow_after + 3600)},
+                    },
+                    condition="attribute_not_exists(#res) OR allowAfter <= :now",
+                    names={"#res": "resource"},
+                    values={":now": {"N": str(now)}},
+                    return_old_on_failure=True,
+                )
+        except ConditionalCheckFailedError as exc:
+            current = exc.item
             allow_after_existing = int(current.get("allowAfter", {}).get("N", str(allow_after)))
             retry_after = max(0, allow_after_existing - now)
             layers = self._build_layers(run_value)
@@ -69,21 +71,27 @@ class RunService:
                 "Cooldown active",
                 extra={"retryAfterSeconds": retry_after, "resource": self._settings.resource_key},
             )
-            raise CooldownActiveError(retry_after_seconds=retry_after, run=run_value, layers=layers) from exc
-
-    def _invoke_orchestrator(self, run_value: str) -> None:
-        payload = {"run": run_value, "triggeredAt": datetime.datetime.now(datetime.UTC).isoformat() + "Z"}
+            raise CooldownActiveError(
+                retry_after_seconds=retry_after,
+                run=run_value,
+                layers=layers,
+                active_run_id=current.get("runId", {}).get("S"),
+            ) from exc
+
+    def _invoke_orchestrator(self, run_value: str, run_id: str) -> None:
+        payload = {"run": run_value, "runId": run_id, "triggeredAt": datetime.datetime.now(datetime.UTC).isoformat() + "Z"}
         self._lambda.invoke(
             FunctionName=self._settings.orchestrator_function,
             InvocationType="Event",
             Payload=json.dumps(payload).encode("utf-8"),
         )
 
-    def _build_layers(self, run_value: str) -> Dict[str, Dict]:
+    def _build_layers(self, run_value: str) -> Dict[str, object]:
+        # Snapshots stay models; the response codec encodes them without a dict copy.
         return {
-            "bronze": self._layer_snapshot(self._settings.bronze_prefix, run_value).to_dict(),
-            "silver": self._layer_snapshot(self._settings.silver_prefix, run_value).to_dict(),
-            "gold": self._layer_snapshot(self._settings.gold_prefix, run_value).to_dict(),
+            "bronze": self._layer_snapshot(self._settings.bronze_prefix, run_value),
+            "silver": self._layer_snapshot(self._settings.silver_prefix, run_value),
+            "gold": self._layer_snapshot(self._settings.gold_prefix, run_value),
             "ttlSeconds": self._settings.presign_ttl_seconds,
         }
 
@@ -94,10 +102,12 @@ class RunService:
         expanded_uri = template.format(run=run_value)
         bucket, prefix = self._parse_s3_uri(expanded_uri)
 
-        subdirs, truncated_dirs = self._list_immediate_subdirs(bucket, prefix, self._settings.max_dirs_per_layer)
+        with phase("s3-list"):
+            subdirs, truncated_dirs = self._list_immediate_subdirs(bucket, prefix, self._settings.max_dirs_per_layer)
 
         if not subdirs:
-            files, files_truncated = self._list_parquet_recursive(bucket, prefix, self._settings.max_files_per_dir)
+            with phase("s3-list"):
+                files, files_truncated = self._list_parquet_recursive(bucket, prefix, self._settings.max_files_per_dir)
             file_descriptors = [self._decorate_file(bucket, f) for f in files]
             base_name = prefix.rstrip("/").split("/")[-1] + "/" if prefix else "/"
             directory = DirectoryDescriptor(
@@ -111,7 +121,8 @@ class RunService:
 
         directories: list[DirectoryDescriptor] = []
         for dir_prefix in subdirs:
-            files, files_truncated = self._list_parquet_recursive(bucket, dir_prefix, self._settings.max_files_per_dir)
+            with phase("s3-list"):
+                files, files_truncated = self._list_parquet_recursive(bucket, dir_prefix, self._settings.max_files_per_dir)
             file_descriptors = [self._decorate_file(bucket, f) for f in files]
             relative_name = dir_prefix[len(prefix):]
             directories.append(
@@ -133,11 +144,12 @@ class RunService:
 
     def _decorate_file(self, bucket: str, file_info: Dict[str, Optional[str]]) -> FileDescriptor:
         key = file_info.get("key") or ""
-        url = self._s3.generate_presigned_url(
-            ClientMethod="get_object",
-            Params={"Bucket": bucket, "Key": key},
-            ExpiresIn=self._settings.presign_ttl_seconds,
-        )
+        with phase("presign"):
+            url = self._s3.generate_presigned_url(
+                ClientMethod="get_object",
+                Params={"Bucket": bucket, "Key": key},
+                ExpiresIn=self._settings.presign_ttl_seconds,
+            )
         return FileDescriptor(
             key=key,
             size=file_info.get("size"),
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from ..config.settings import RunStatusSettings
+from ..domain.errors import ExternalServiceError, NotFoundError, ValidationError
+from ..domain.models import RunProgress, StepProgress, TaskProgress
+from ..infrastructure.aws_clients import AwsClients
+from ..infrastructure.dynamodb import DynamoTable
+from ..presentation.logging import add_log_context, get_logger
+from ..presentation.timing import phase
+
+
+_LOGGER = get_logger("sewingmachine.run_status")
+
+
+class RunStatusService:
+    def __init__(self, settings: RunStatusSettings, clients: AwsClients) -> None:
+        self._settings = settings
+        self._progress = DynamoTable(clients.dynamodb(), settings.progress_table_name)
+
+    def execute(self, run_id: Optional[str]) -> Dict[str, object]:
+        if not run_id:
+            raise ValidationError("runId required", code="MissingParam")
+        add_log_context(runId=str(run_id))
+
+        try:
+            with phase("dynamodb"):
+                item = self._progress.get_item({"runId": {"S": str(run_id)}})
+        except ClientError as exc:
+            _LOGGER.error("Failed to read run progress", exc_info=True)
+            raise ExternalServiceError("Failed to read run progress") from exc
+
+        if not item:
+            raise NotFoundError(f"Run {run_id} not found")
+        return self._to_progress(str(run_id), item).to_dict()
+
+    def _to_progress(self, run_id: str, item: Dict[str, Dict]) -> RunProgress:
+        steps: List[tuple[int, StepProgress]] = []
+        for name, value in (item.get("steps", {}).get("M") or {}).items():
+            attrs = value.get("M", {})
+            step = StepProgress(
+                name=name,
+                state=_string(attrs.get("state")),
+                query_execution_id=_string(attrs.get("queryExecutionId")),
+                scanned_bytes=_number(attrs.get("scannedBytes")),
+                execution_time_ms=_number(attrs.get("executionTimeMs")),
+            )
+            steps.append((_number(attrs.get("order")) or 0, step))
+        steps.sort(key=lambda entry: entry[0])
+
+        tasks = [
+            TaskProgress(
+                task_arn=arn,
+                state=_string(value.get("M", {}).get("state")),
+                tables=sorted(value.get("M", {}).get("tables", {}).get("SS", [])),
+            )
+            for arn, value in sorted((item.get("tasks", {}).get("M") or {}).items())
+        ]
+
+        return RunProgress(
+            run_id=run_id,
+            run=_string(item.get("run")),
+            job_id=_string(item.get("jobId")),
+            status=_string(item.get("status")),
+            dms_state=_string(item.get("dmsState")),
+            current_step=_string(item.get("currentStep")),
+            tasks=tasks,
+            steps=[step for _, step in steps],
+            updated_at=_number(item.get("updatedAt")),
+        )
+
+
+def _string(attr: Optional[Dict[str, str]]) -> Optional[str]:
+    if not attr:
+        return None
+    return attr.get("S")
+
+
+def _number(attr: Optional[Dict[str, str]]) -> Optional[int]:
+    if not attr or "N" not in attr:
+        return None
+    return int(attr["N"])
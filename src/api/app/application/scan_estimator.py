@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from botocore.exceptions import ClientError
+
+from ..domain.models import TableScanEstimate
+from ..domain.sql import SqlStatement
+from ..presentation.logging import get_logger
+
+
+_LOGGER = get_logger("sewingmachine.scan_estimator")
+
+# Table/partition parameters that carry a size, in the order they are trusted. Crawlers
+# write sizeKey/recordCount/averageRecordSize; Hive-style and CTAS tables write totalSize.
+_SIZE_KEYS = ("totalSize", "sizeKey", "rawDataSize")
+_QUOTED_TYPES = ("string", "varchar", "char", "date", "timestamp")
+# Literals a numeric partition key can be compared with; anything else would make Glue
+# reject the whole expression.
+_NUMERIC = re.compile(r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
+_BOOLEANS = ("true", "false")
+
+
+class _TableMetadata:
+    __slots__ = ("size", "partition_keys", "partition_count", "loaded_at")
+
+    def __init__(self, size: Optional[int], partition_keys: List[Dict[str, str]], partition_count: Optional[int]) -> None:
+        self.size = size
+        self.partition_keys = partition_keys
+        self.partition_count = partition_count
+        self.loaded_at = time.monotonic()
+
+
+class ScanEstimator:
+    """Estimates the bytes a query will scan from Glue table and partition metadata.
+
+    Each referenced table contributes its catalog size. For a partitioned table with
+    equality/IN predicates on its partition columns, only the matching partitions count:
+    their own sizes when the catalog has them, otherwise the table size scaled by the
+    matching share of partitions. Table metadata is cached for ``ttl_seconds``. Tables
+    without size metadata are reported with ``estimated_bytes=None``.
+
+    Partitions are only counted up to ``max_partitions``; past that the total is unknown
+    and a match without partition sizes falls back to the whole table size.
+    """
+
+    def __init__(
+        self, glue: Any, *, catalog_id: Optional[str] = None, ttl_seconds: int = 300, max_partitions: int = 10_000
+    ) -> None:
+        self._glue = glue
+        self._catalog = {"CatalogId": catalog_id} if catalog_id else {}
+        self._ttl_seconds = ttl_seconds
+        self._max_partitions = max_partitions
+        self._tables: Dict[Tuple[str, str], _TableMetadata] = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, statement: SqlStatement, default_database: Optional[str]) -> List[TableScanEstimate]:
+        estimates = []
+        for reference in statement.tables:
+            database, _, table = reference.rpartition(".")
+            database = database.split(".")[-1] if database else default_database
+            if not database:
+                estimates.append(TableScanEstimate(table=reference, estimated_bytes=None))
+                continue
+            estimates.append(self._estimate_table(database, table, statement))
+        return estimates
+
+    def _estimate_table(self, database: str, table: str, statement: SqlStatement) -> TableScanEstimate:
+        name = f"{database}.{table}"
+        metadata = self._metadata(database, table)
+        if metadata is None:
+            return TableScanEstimate(table=name, estimated_bytes=None)
+
+        whole = TableScanEstimate(table=name, estimated_bytes=metadata.size, partitions_total=metadata.partition_count)
+        expression = self._partition_expression(metadata.partition_keys, statement)
+        if expression is None or metadata.partition_count == 0:
+            return whole
+
+        try:
+            matched = self._partitions(database, table, expression)
+        except ClientError as exc:
+            # An expression Glue cannot evaluate narrows nothing: count the whole table.
+            _LOGGER.warning("Partition lookup failed for %s", name, extra={"errorCode": exc.response.get("Error", {}).get("Code")})
+            return whole
+        sizes = [_size(partition.get("Parameters") or {}) for partition in matched]
+        if matched and all(size is not None for size in sizes):
+            estimated: Optional[int] = sum(sizes)
+        elif metadata.size is not None and metadata.partition_count:
+            estimated = metadata.size * len(matched) // metadata.partition_count
+        else:
+            estimated = metadata.size
+        return TableScanEstimate(
+            table=name,
+            estimated_bytes=estimated,
+            partitions_scanned=len(matched),
+            partitions_total=metadata.partition_count,
+        )
+
+    def _metadata(self, database: str, table: str) -> Optional[_TableMetadata]:
+        key = (database, table)
+        with self._lock:
+            cached = self._tables.get(key)
+        if cached is not None and time.monotonic() - cached.loaded_at < self._ttl_seconds:
+            return cached
+        try:
+            response = self._glue.get_table(DatabaseName=database, Name=table, **self._catalog)
+        except ClientError as exc:
+            # Views, missing tables and permission gaps: Athena reports those itself.
+            _LOGGER.warning("No catalog metadata for %s.%s", database, table, extra={"errorCode": exc.response.get("Error", {}).get("Code")})
+            return None
+        descriptor = response.get("Table") or {}
+        partition_keys = descriptor.get("PartitionKeys") or []
+        size = _size(descriptor.get("Parameters") or {})
+        if size is None:
+            size = _size((descriptor.get("StorageDescriptor") or {}).get("Parameters") or {})
+        partition_count = self._count_partitions(database, table) if partition_keys else None
+        metadata = _TableMetadata(size, partition_keys, partition_count)
+        with self._lock:
+            self._tables[key] = metadata
+        return metadata
+
+    def _count_partitions(self, database: str, table: str) -> Optional[int]:
+        """The table's partition count; None past ``max_partitions`` or when Glue refuses the listing."""
+        count = 0
+        try:
+            for page in self._pages(database, table, None):
+                count += len(page.get("Partitions") or [])
+                if count > self._max_partitions:
+                    return None
+        except ClientError as exc:
+            _LOGGER.warning("Cannot list partitions of %s.%s", database, table, extra={"errorCode": exc.response.get("Error", {}).get("Code")})
+            return None
+        return count
+
+    def _partitions(self, database: str, table: str, expression: Optional[str]) -> List[Dict[str, Any]]:
+        partitions: List[Dict[str, Any]] = []
+        for page in self._pages(database, table, expression):
+            partitions.extend(page.get("Partitions") or [])
+        return partitions
+
+    def _pages(self, database: str, table: str, expression: Optional[str]) -> Any:
+        kwargs: Dict[str, Any] = {"DatabaseName": database, "TableName": table, "ExcludeColumnSchema": True, **self._catalog}
+        if expression:
+            kwargs["Expression"] = expression
+        return self._glue.get_paginator("get_partitions").paginate(**kwargs)
+
+    def _partition_expression(self, partition_keys: List[Dict[str, str]], statement: SqlStatement) -> Optional[str]:
+        clauses = []
+        for key in partition_keys:
+            column = key["Name"].lower()
+            values = statement.predicate_values(column)
+            if not values:
+                continue
+            rendered = _rendered(values, (key.get("Type") or "string").lower())
+            if not rendered:
+                # No literal fits the key's type: leave the key unconstrained.
+                continue
+            clauses.append(f"{column} = {rendered[0]}" if len(rendered) == 1 else f"{column} IN ({', '.join(rendered)})")
+        return " AND ".join(clauses) or None
+
+
+def _rendered(values: Tuple[str, ...], key_type: str) -> List[str]:
+    if key_type.startswith(_QUOTED_TYPES):
+        return ["'" + value.replace("'", "''") + "'" for value in values]
+    if key_type == "boolean":
+        return [value.lower() for value in values if value.lower() in _BOOLEANS]
+    return [value for value in values if _NUMERIC.match(value)]
+
+
+def _size(parameters: Dict[str, str]) -> Optional[int]:
+    for key in _SIZE_KEYS:
+        value = parameters.get(key)
+        if value is not None and str(value).isdigit():
+            return int(value)
+    records, average = parameters.get("recordCount"), parameters.get("averageRecordSize")
+    if records and average and str(records).isdigit() and str(average).isdigit():
+        return int(records) * int(average)
+    return None
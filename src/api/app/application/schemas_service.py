@@ -6,6 +6,7 @@ from ..config.settings import SchemasSettings
 from ..domain.models import DatabaseSummary
 from ..infrastructure.aws_clients import AwsClients
 from ..presentation.logging import get_logger
+from ..presentation.timing import phase
 
 
 _LOGGER = get_logger("sewingmachine.schemas")
@@ -19,11 +20,12 @@ class SchemasService:
     def execute(self) -> Dict[str, List[Dict[str, object]]]:
         databases: List[DatabaseSummary] = []
         paginator = self._glue.get_paginator("get_databases")
-        for page in paginator.paginate():
-            for db in page.get("DatabaseList", []) or []:
-                name = db["Name"]
-                tables = self._collect_tables(name)
-                databases.append(DatabaseSummary(name=name, tables=tables))
+        with phase("glue-list"):
+            for page in paginator.paginate():
+                for db in page.get("DatabaseList", []) or []:
+                    name = db["Name"]
+                    tables = self._collect_tables(name)
+                    databases.append(DatabaseSummary(name=name, tables=tables))
         return {"databases": [db.to_dict() for db in databases]}
 
     def _collect_tables(self, database: str) -> List[str]:
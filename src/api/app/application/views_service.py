@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from typing import Any, Dict, Iterable, List, Optional
+
+from botocore.exceptions import ClientError
+
+from ..config.settings import ViewSettings
+from ..domain.errors import DomainError, ExternalServiceError, NotFoundError, ValidationError
+from ..domain.models import MaterializedView, ViewRefreshResult
+from ..domain.sql import validate_select
+from ..domain.views import refresh_levels
+from ..infrastructure.aws_clients import AwsClients
+from ..infrastructure.dynamodb import ConditionalCheckFailedError, DynamoTable
+from ..infrastructure.glue_catalog import GlueCatalog
+from ..presentation.logging import get_logger
+from ..presentation.timing import phase
+from .materialize_service import MaterializeService
+
+
+_LOGGER = get_logger("sewingmachine.views")
+
+_NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# Append would add the same rows again on every refresh.
+_VIEW_MODES = ("replace", "overwrite_partitions", "merge")
+
+
+class ViewsService:
+    """Registered materialized views and their refresh after each load.
+
+    A view is a SELECT kept materialized in its target table through
+    :class:`MaterializeService`. Its inputs are the tables the SELECT reads; a view reading
+    another view's target refreshes after it.
+    """
+
+    def __init__(self, settings: ViewSettings, clients: AwsClients, materialize: Optional[MaterializeService] = None) -> None:
+        self._settings = settings
+        self._table = DynamoTable(clients.dynamodb(), settings.table_name) if settings.table_name else None
+        self._clients = clients
+        self._materialize = materialize
+        self._glue_catalog: Optional[GlueCatalog] = None
+
+    def list(self) -> List[MaterializedView]:
+        return sorted(self._load_views(), key=lambda view: view.name)
+
+    def register(self, payload: Dict[str, object]) -> MaterializedView:
+        """Creates the view, or redefines it when ``name`` is already registered."""
+        with phase("validate"):
+            name = str(payload.get("name") or "")
+            target = payload.get("target") or {}
+            sql = payload.get("sql")
+            mode = str(payload.get("mode") or "replace").lower()
+            properties = payload.get("properties") or {}
+            keys = payload.get("keys") or []
+
+            if not isinstance(target, dict):
+                raise ValidationError("target must be an object")
+            database, table = target.get("db"), target.get("table")
+            if not name or not database or not table or not sql:
+                raise ValidationError("name, target.db, target.table and sql are required", code="MissingParam")
+            if not _NAME.match(name):
+                raise ValidationError("name must be 1-64 letters, digits, '_' or '-'", code="BadParam")
+            if mode not in _VIEW_MODES:
+                raise ValidationError("mode must be replace, overwrite_partitions or merge", code="BadParam")
+            if not isinstance(properties, dict):
+                raise ValidationError("properties must be an object", code="BadParam")
+            if isinstance(keys, str):
+                keys = [keys]
+            if not isinstance(keys, list) or (mode == "merge" and not keys):
+                raise ValidationError("merge requires keys: the columns that identify a row", code="MissingParam")
+            statement = validate_select(str(sql))
+
+            database, table = str(database).lower(), str(table).lower()
+            inputs = sorted({_qualified(reference, database) for reference in statement.tables})
+            if f"{database}.{table}" in inputs:
+                raise ValidationError("a view cannot read its own target", code="BadParam")
+
+        now = int(time.time())
+        registered = self._load_views()
+        views = [view for view in registered if view.name != name]
+        existing = next((view for view in registered if view.name == name), None)
+        view = MaterializedView(
+            name=name,
+            database=database,
+            table=table,
+            sql=statement.text,
+            mode=mode,
+            inputs=inputs,
+            properties=dict(properties),
+            keys=[str(key).lower() for key in keys],
+            created_at=existing.created_at if existing else now,
+            updated_at=now,
+        )
+        owner = next((other.name for other in views if other.target == view.target), None)
+        if owner:
+            raise ValidationError(f"{view.target} is already maintained by view {owner}", code="TargetTaken", status_code=409)
+        _, cyclic = refresh_levels(views + [view])
+        if any(other.name == name for other in cyclic):
+            raise ValidationError(f"view {name} would depend on itself", code="CyclicViews", status_code=409)
+
+        try:
+            with phase("dynamodb"):
+                self._views().put_item(_to_item(view))
+        except ClientError as exc:
+            _LOGGER.error("Failed to record view", exc_info=True)
+            raise ExternalServiceError("Failed to record view") from exc
+        return view
+
+    def delete(self, name: Optional[str]) -> None:
+        """Unregisters the view; its target table and data are left as they are."""
+        if not name:
+            raise ValidationError("name required", code="MissingParam")
+        try:
+            with phase("dynamodb"):
+                self._views().delete_item({"name": {"S": name}}, condition="attribute_exists(#name)", names={"#name": "name"})
+        except ConditionalCheckFailedError:
+            raise NotFoundError(f"View {name} not found")
+        except ClientError as exc:
+            _LOGGER.error("Failed to delete view", exc_info=True)
+            raise ExternalServiceError("Failed to delete view") from exc
+
+    def refresh(self, changed: Iterable[str] = (), force: bool = False) -> List[ViewRefreshResult]:
+        """Rebuilds the views whose inputs changed, a dependency level at a time.
+
+        ``changed`` lists the tables a load just wrote. A view is also rebuilt when an input's
+        catalog version moved since its last refresh (so writes made elsewhere are noticed),
+        when its last refresh did not succeed, or when a view it reads was rebuilt in this
+        pass. Views downstream of a failed one are skipped and stay due.
+        """
+        levels, cyclic = refresh_levels(self._load_views())
+        results = [ViewRefreshResult(view.name, "skipped", error="dependency cycle") for view in cyclic]
+        rebuilt = {_qualified(table, "") for table in changed}
+        failed: set = set()
+        versions: Dict[str, Optional[str]] = {}
+        for level in levels:
+            due = []
+            for view in level:
+                if failed.intersection(view.inputs):
+                    result = ViewRefreshResult(view.name, "skipped", error="an input view failed to refresh")
+                    self._record(view, result, {})
+                    failed.add(view.target)
+                    results.append(result)
+                    continue
+                current = {table: self._version(table, versions) for table in view.inputs}
+                if force or view.last_status != "refreshed" or rebuilt.intersection(view.inputs) or current != view.input_versions:
+                    due.append((view, current))
+                else:
+                    results.append(ViewRefreshResult(view.name, "unchanged"))
+            if not due:
+                continue
+            with ThreadPoolExecutor(max_workers=min(self._settings.refresh_workers, len(due))) as pool:
+                # Each view runs in its own copy of the invocation's context: its log lines keep
+                # the run's fields and its query id does not leak into the other views' lines.
+                futures = [pool.submit(copy_context().run, self._refresh_view, view, current) for view, current in due]
+                refreshed = [future.result() for future in futures]
+            for (view, _), result in zip(due, refreshed):
+                (rebuilt if result.status == "refreshed" else failed).add(view.target)
+                versions.pop(view.target, None)
+                results.append(result)
+        return results
+
+    def _refresh_view(self, view: MaterializedView, input_versions: Dict[str, str]) -> ViewRefreshResult:
+        payload = {
+            "target": {"db": view.database, "table": view.table},
+            "sql": view.sql,
+            "mode": view.mode,
+            "properties": view.properties,
+            "keys": view.keys,
+        }
+        try:
+            outcome = self._materialize.execute(payload, principals=(f"view:{view.name}",), wait=True)
+        except DomainError as exc:
+            _LOGGER.warning("View refresh failed", extra={"view": view.name, "error": str(exc)})
+            result = ViewRefreshResult(view.name, "failed", error=str(exc))
+        else:
+            result = ViewRefreshResult(view.name, "refreshed", query_execution_id=outcome.get("qid"))
+        self._record(view, result, input_versions)
+        return result
+
+    def _record(self, view: MaterializedView, result: ViewRefreshResult, input_versions: Dict[str, str]) -> None:
+        values = {":at": {"N": str(int(time.time()))}, ":status": {"S": result.status}}
+        expression = "SET lastRefreshedAt = :at, lastStatus = :status"
+        if result.query_execution_id:
+            expression += ", lastQueryExecutionId = :qid"
+            values[":qid"] = {"S": result.query_execution_id}
+        if result.status == "refreshed":
+            expression += ", inputVersions = :versions REMOVE lastError"
+            values[":versions"] = {"M": {table: {"S": version} for table, version in input_versions.items() if version}}
+        else:
+            expression += ", lastError = :error"
+            values[":error"] = {"S": result.error or result.status}
+        try:
+            with phase("dynamodb"):
+                # A view deleted during the refresh stays deleted.
+                self._views().update_item(
+                    {"name": {"S": view.name}}, expression, condition="attribute_exists(#name)", names={"#name": "name"}, values=values
+                )
+        except ConditionalCheckFailedError:
+            pass
+        except ClientError:
+            # The view just stays due and is rebuilt again next time.
+            _LOGGER.warning("Failed to record view refresh", exc_info=True, extra={"view": view.name})
+
+    def _version(self, table: str, cache: Dict[str, Optional[str]]) -> Optional[str]:
+        """A marker that changes whenever ``table``'s data is rewritten; None when unreadable.
+
+        Iceberg tables move their metadata location on every write. Other tables only report
+        catalog updates, which partition swaps do not make; those rely on ``changed``.
+        """
+        if table not in cache:
+            database, _, name = table.partition(".")
+            try:
+                with phase("glue"):
+                    entry = self._catalog().table(database, name)
+            except ClientError:
+                _LOGGER.warning("Failed to read input table version", exc_info=True, extra={"table": table})
+                entry = {}
+            if entry is None:
+                cache[table] = "missing"
+            elif not entry:
+                cache[table] = None
+            else:
+                parameters = entry.get("Parameters") or {}
+                cache[table] = parameters.get("metadata_location") or f"{entry.get('VersionId')}:{entry.get('UpdateTime')}"
+        return cache[table]
+
+    def _load_views(self) -> List[MaterializedView]:
+        try:
+            with phase("dynamodb"):
+                return [_to_view(item) for item in self._views().scan_items()]
+        except ClientError as exc:
+            _LOGGER.error("Failed to read views", exc_info=True)
+            raise ExternalServiceError("Failed to read views") from exc
+
+    def _views(self) -> DynamoTable:
+        if self._table is None:
+            raise ValidationError("materialized views are not configured", code="ViewsUnavailable", status_code=501)
+        return self._table
+
+    def _catalog(self) -> GlueCatalog:
+        if self._glue_catalog is None:
+            self._glue_catalog = GlueCatalog(self._clients.glue())
+        return self._glue_catalog
+
+
+def _qualified(reference: str, database: str) -> str:
+    """``database.table`` for a table reference; a catalog prefix is dropped."""
+    parts = reference.lower().split(".")
+    return ".".join(parts[-2:]) if len(parts) > 1 else f"{database}.{parts[0]}"
+
+
+def _to_item(view: MaterializedView) -> Dict[str, Dict[str, Any]]:
+    return {
+        "name": {"S": view.name},
+        "database": {"S": view.database},
+        "table": {"S": view.table},
+        "sql": {"S": view.sql},
+        "mode": {"S": view.mode},
+        "inputs": {"L": [{"S": table} for table in view.inputs]},
+        "keys": {"L": [{"S": key} for key in view.keys]},
+        "properties": {"S": json.dumps(view.properties, sort_keys=True)},
+        "createdAt": {"N": str(view.created_at)},
+        "updatedAt": {"N": str(view.updated_at)},
+    }
+
+
+def _to_view(item: Dict[str, Dict[str, Any]]) -> MaterializedView:
+    return MaterializedView(
+        name=item["name"]["S"],
+        database=_string(item.get("database")) or "",
+        table=_string(item.get("table")) or "",
+        sql=_string(item.get("sql")) or "",
+        mode=_string(item.get("mode")) or "replace",
+        inputs=_strings(item.get("inputs")),
+        properties=json.loads(_string(item.get("properties")) or "{}"),
+        keys=_strings(item.get("keys")),
+        created_at=_number(item.get("createdAt")),
+        updated_at=_number(item.get("updatedAt")),
+        last_refreshed_at=_number(item.get("lastRefreshedAt")),
+        last_status=_string(item.get("lastStatus")),
+        last_error=_string(item.get("lastError")),
+        last_query_execution_id=_string(item.get("lastQueryExecutionId")),
+        input_versions={table: value["S"] for table, value in (item.get("inputVersions") or {}).get("M", {}).items()},
+    )
+
+
+def _strings(attr: Optional[Dict[str, Any]]) -> List[str]:
+    return [entry["S"] for entry in (attr or {}).get("L", [])]
+
+
+def _string(attr: Optional[Dict[str, str]]) -> Optional[str]:
+    if not attr:
+        return None
+    return attr.get("S")
+
+
+def _number(attr: Optional[Dict[str, str]]) -> Optional[int]:
+    if not attr or "N" not in attr:
+        return None
+    return int(attr["N"])
@@ -1,9 +1,10 @@
 ﻿from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import lru_cache
+import json
 import os
-from typing import Optional
+from typing import Dict, Optional
 
 
 @dataclass(frozen=True)
@@ -24,12 +25,34 @@ class RunSettings(BaseSettings):
     presign_ttl_seconds: int
     max_dirs_per_layer: int
     max_files_per_dir: int
+    # Bucket that receives responses too large to return inline; unset disables spilling.
+    response_spill_bucket: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RunStatusSettings(BaseSettings):
+    progress_table_name: str
 
 
 @dataclass(frozen=True)
 class MaterializeSettings(BaseSettings):
     athena_workgroup: str
     athena_output: str
+    # Job tracking table; when set, /materialize returns a job at once instead of waiting.
+    jobs_table_name: Optional[str] = None
+    job_ttl_seconds: int = 7 * 24 * 3600
+    # S3 prefix replace mode builds each new table version under; unset disables replace.
+    build_location: Optional[str] = None
+    # How long a replaced table's data is kept for queries still reading it.
+    retire_after_seconds: int = 3600
+
+
+@dataclass(frozen=True)
+class ViewSettings(BaseSettings):
+    # Registered materialized views; unset disables /views and the post-run refresh.
+    table_name: Optional[str] = None
+    # Views of one dependency level refreshed side by side.
+    refresh_workers: int = 4
 
 
 @dataclass(frozen=True)
@@ -38,6 +61,27 @@ class QuerySettings(BaseSettings):
     athena_output: str
     athena_catalog: str
     default_database: Optional[str]
+    response_spill_bucket: Optional[str] = None
+    # Scan budget: unset disables estimation. Over budget the query is rejected ("reject"),
+    # runs with a warning ("warn"), or runs in capped_workgroup ("route").
+    scan_budget_bytes: Optional[int] = None
+    scan_budget_action: str = "reject"
+    capped_workgroup: Optional[str] = None
+    # Cognito username or group -> budget, overriding scan_budget_bytes for that principal.
+    user_scan_budgets: Dict[str, int] = field(default_factory=dict)
+    # Seconds kept back from the invocation deadline to stop the query and answer.
+    cancel_reserve_seconds: float = 1.5
+
+
+@dataclass(frozen=True)
+class AdmissionSettings:
+    # Athena admission control; off unless both a table and a capacity are set.
+    table_name: Optional[str]
+    capacity: int
+    refresh_reserved: int = 0
+    per_principal: int = 0
+    wait_seconds: float = 5.0
+    lease_seconds: float = 120.0
 
 
 @dataclass(frozen=True)
@@ -72,6 +116,16 @@ def get_run_settings() -> RunSettings:
         presign_ttl_seconds=int(_get_env("PRESIGN_TTL_SECONDS", "900")),
         max_dirs_per_layer=int(_get_env("MAX_DIRS_PER_LAYER", "25")),
         max_files_per_dir=int(_get_env("MAX_FILES_PER_DIR", "50")),
+        response_spill_bucket=_get_env("RESPONSE_SPILL_BUCKET") or None,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_run_status_settings() -> RunStatusSettings:
+    return RunStatusSettings(
+        region=_get_env("AWS_REGION", "us-west-1"),
+        allowed_origin=_get_env("ALLOWED_ORIGIN", "*"),
+        progress_table_name=_get_env("PROGRESS_TABLE", ""),
     )
 
 
@@ -82,6 +136,19 @@ def get_materialize_settings() -> MaterializeSettings:
         allowed_origin=_get_env("ALLOWED_ORIGIN", "*"),
         athena_workgroup=_get_env("ATHENA_WG", "primary"),
         athena_output=_get_env("ATHENA_OUTPUT", ""),
+        jobs_table_name=_get_env("MATERIALIZE_JOBS_TABLE") or None,
+        build_location=_get_env("MATERIALIZE_LOCATION") or None,
+        retire_after_seconds=int(_get_env("MATERIALIZE_RETIRE_AFTER_SECONDS") or 3600),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_view_settings() -> ViewSettings:
+    return ViewSettings(
+        region=_get_env("AWS_REGION", "us-west-1"),
+        allowed_origin=_get_env("ALLOWED_ORIGIN", "*"),
+        table_name=_get_env("MATERIALIZED_VIEWS_TABLE") or None,
+        refresh_workers=int(_get_env("VIEW_REFRESH_WORKERS") or 4),
     )
 
 
@@ -94,6 +161,24 @@ def get_query_settings() -> QuerySettings:
         athena_output=_get_env("ATHENA_OUTPUT", ""),
         athena_catalog=_get_env("ATHENA_CATALOG", "AwsDataCatalog"),
         default_database=_get_env("ATHENA_DEFAULT_DB"),
+        response_spill_bucket=_get_env("RESPONSE_SPILL_BUCKET") or None,
+        scan_budget_bytes=int(_get_env("QUERY_SCAN_BUDGET_BYTES") or 0) or None,
+        scan_budget_action=(_get_env("QUERY_SCAN_BUDGET_ACTION") or "reject").lower(),
+        capped_workgroup=_get_env("ATHENA_CAPPED_WG") or None,
+        user_scan_budgets={str(k): int(v) for k, v in json.loads(_get_env("QUERY_USER_SCAN_BUDGETS") or "{}").items()},
+        cancel_reserve_seconds=float(_get_env("QUERY_CANCEL_RESERVE_SECONDS") or 1.5),
+    )
+
+
+@lru_cache(maxsize=1)
+def get_admission_settings() -> AdmissionSettings:
+    return AdmissionSettings(
+        table_name=_get_env("ADMISSION_TABLE") or None,
+        capacity=int(_get_env("ATHENA_MAX_CONCURRENCY") or 0),
+        refresh_reserved=int(_get_env("ATHENA_REFRESH_RESERVED") or 0),
+        per_principal=int(_get_env("ATHENA_PRINCIPAL_CONCURRENCY") or 0),
+        wait_seconds=float(_get_env("ADMISSION_WAIT_SECONDS") or 5),
+        lease_seconds=float(_get_env("ADMISSION_LEASE_SECONDS") or 120),
     )
 
 
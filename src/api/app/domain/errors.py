@@ -9,7 +9,7 @@
 
 
 class CooldownActiveError(DomainError):
-    def __init__(self, retry_after_seconds: int, run: str, layers: dict):
+    def __init__(self, retry_after_seconds: int, run: str, layers: dict, active_run_id: str | None = None):
         payload = {
             "error": {
                 "code": "CooldownActive",
@@ -19,6 +19,8 @@ class CooldownActiveError(DomainError):
             "run": run,
             "layers": layers,
         }
+        if active_run_id:
+            payload["activeRunId"] = active_run_id
         super().__init__(code="CooldownActive", message="Cooldown active", status_code=429, payload=payload)
 
 
@@ -28,7 +30,52 @@ class ValidationError(DomainError):
         super().__init__(code=code, message=message, status_code=status_code, payload=payload)
 
 
+class ScanBudgetExceededError(DomainError):
+    def __init__(self, estimated_bytes: int, budget_bytes: int, tables: list):
+        payload = {
+            "error": {
+                "code": "ScanBudgetExceeded",
+                "message": "Query would scan more data than allowed; filter on partition columns or select fewer tables.",
+            },
+            "estimatedBytes": estimated_bytes,
+            "budgetBytes": budget_bytes,
+            "tables": tables,
+        }
+        super().__init__(code="ScanBudgetExceeded", message="Scan budget exceeded", status_code=400, payload=payload)
+
+
+class QueryTimeoutError(DomainError):
+    def __init__(self, query_execution_id: str, cancelled: bool):
+        payload = {
+            "error": {
+                "code": "QueryTimeout",
+                "message": "Query did not finish in time; resend with async=true to keep it running.",
+            },
+            "queryExecutionId": query_execution_id,
+            "cancelled": cancelled,
+        }
+        super().__init__(code="QueryTimeout", message="Query timed out", status_code=504, payload=payload)
+
+
+class AthenaBusyError(DomainError):
+    def __init__(self, retry_after_seconds: int):
+        payload = {
+            "error": {
+                "code": "AthenaBusy",
+                "message": "Too many queries are running; retry shortly.",
+            },
+            "retryAfterSeconds": retry_after_seconds,
+        }
+        super().__init__(code="AthenaBusy", message="Athena at capacity", status_code=429, payload=payload)
+
+
 class ExternalServiceError(DomainError):
     def __init__(self, message: str, code: str = "ExternalServiceError", status_code: int = 502):
         payload = {"error": {"code": code, "message": message}}
         super().__init__(code=code, message=message, status_code=status_code, payload=payload)
+
+
+class NotFoundError(DomainError):
+    def __init__(self, message: str, code: str = "NotFound", status_code: int = 404):
+        payload = {"error": {"code": code, "message": message}}
+        super().__init__(code=code, message=message, status_code=status_code, payload=payload)
@@ -1,6 +1,6 @@
 ﻿from __future__ import annotations
 
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, field
 from typing import Any, Dict, List, Optional
 
 
@@ -51,6 +51,36 @@ class QueryStatistics:
         return asdict(self)
 
 
+@dataclass
+class TableScanEstimate:
+    table: str
+    estimated_bytes: Optional[int]
+    partitions_scanned: Optional[int] = None
+    partitions_total: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ScanEstimate:
+    estimated_bytes: int
+    budget_bytes: Optional[int]
+    tables: List[TableScanEstimate]
+    # None when within budget; "warn" or "route" when over it and the query still ran.
+    action: Optional[str] = None
+    workgroup: Optional[str] = None
+
+    @property
+    def unknown_tables(self) -> List[str]:
+        return [table.table for table in self.tables if table.estimated_bytes is None]
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        payload["tables"] = [table.to_dict() for table in self.tables]
+        return payload
+
+
 @dataclass
 class QueryResultPage:
     columns: List[str]
@@ -58,13 +88,50 @@ class QueryResultPage:
     stats: QueryStatistics
     query_execution_id: str
     next_page_token: Optional[str]
+    scan_estimate: Optional[ScanEstimate] = None
+    # "QUEUED"/"RUNNING" while an async query is still going (no rows yet); None once it has succeeded.
+    state: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
         payload = asdict(self)
         payload["stats"] = self.stats.to_dict()
+        payload["scan_estimate"] = self.scan_estimate.to_dict() if self.scan_estimate else None
         return payload
 
 
+@dataclass
+class QueryBatchResult:
+    """One statement of a batch: ``status`` is what ``/query`` would have answered for it alone."""
+
+    id: str
+    status: int
+    result: Optional[QueryResultPage] = None
+    # The error code and message, plus any details (retryAfterSeconds, estimatedBytes, ...).
+    error: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        payload["result"] = self.result.to_dict() if self.result else None
+        return payload
+
+
+@dataclass
+class QueryBatch:
+    results: List[QueryBatchResult]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"results": [result.to_dict() for result in self.results]}
+
+
+@dataclass
+class QueryCancellation:
+    query_execution_id: str
+    state: Optional[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
 @dataclass
 class DatabaseSummary:
     name: str
@@ -72,3 +139,105 @@ class DatabaseSummary:
 
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
+
+
+@dataclass
+class StepProgress:
+    name: str
+    state: Optional[str]
+    query_execution_id: Optional[str]
+    scanned_bytes: Optional[int]
+    execution_time_ms: Optional[int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class TaskProgress:
+    task_arn: str
+    state: Optional[str]
+    tables: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class MaterializeJob:
+    job_id: str
+    state: str
+    table: str
+    mode: str
+    query_execution_id: Optional[str]
+    created_at: Optional[int] = None
+    updated_at: Optional[int] = None
+    scanned_bytes: Optional[int] = None
+    execution_time_ms: Optional[int] = None
+    # From Athena's runtime statistics once the job has succeeded.
+    output_rows: Optional[int] = None
+    output_bytes: Optional[int] = None
+    reason: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class MaterializedView:
+    """A registered SELECT kept materialized in ``database.table`` and refreshed after each run."""
+
+    name: str
+    database: str
+    table: str
+    sql: str
+    mode: str
+    # Tables the SQL reads, as ``database.table``; other views' targets make the dependency graph.
+    inputs: List[str]
+    properties: Dict[str, Any] = field(default_factory=dict)
+    keys: List[str] = field(default_factory=list)
+    created_at: Optional[int] = None
+    updated_at: Optional[int] = None
+    last_refreshed_at: Optional[int] = None
+    last_status: Optional[str] = None
+    last_error: Optional[str] = None
+    last_query_execution_id: Optional[str] = None
+    # Input table -> catalog version seen by the last successful refresh.
+    input_versions: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def target(self) -> str:
+        return f"{self.database}.{self.table}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class ViewRefreshResult:
+    name: str
+    status: str  # refreshed, unchanged, failed or skipped
+    query_execution_id: Optional[str] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class RunProgress:
+    run_id: str
+    run: Optional[str]
+    job_id: Optional[str]
+    status: Optional[str]
+    dms_state: Optional[str]
+    current_step: Optional[str]
+    tasks: List[TaskProgress]
+    steps: List[StepProgress]
+    updated_at: Optional[int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload = asdict(self)
+        payload["tasks"] = [t.to_dict() for t in self.tasks]
+        payload["steps"] = [s.to_dict() for s in self.steps]
+        return payload
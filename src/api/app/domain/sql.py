@@ -0,0 +1,478 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from .errors import ValidationError
+
+
+# Statement kinds that only read. EXPLAIN/DESCRIBE/SHOW are allowed on /query only.
+SELECT_KINDS = frozenset({"SELECT", "VALUES", "TABLE"})
+READ_ONLY_KINDS = SELECT_KINDS | {"SHOW", "DESCRIBE", "EXPLAIN"}
+
+# Keywords that start a statement which writes or changes the catalog. They are only
+# rejected where a statement can start (top level, a CTE body, a parenthesized query), so
+# identifiers such as ``update_ts`` or ``deleted`` are not mistaken for them.
+_WRITE_KEYWORDS = frozenset(
+    {
+        "INSERT", "UPDATE", "DELETE", "MERGE", "CREATE", "DROP", "ALTER", "TRUNCATE", "GRANT",
+        "REVOKE", "CALL", "MSCK", "UNLOAD", "OPTIMIZE", "VACUUM", "REFRESH", "PREPARE", "EXECUTE",
+        "DEALLOCATE", "SET", "RESET", "USE", "COMMENT", "START", "COMMIT", "ROLLBACK",
+    }
+)
+_RELATION_KEYWORDS = frozenset({"FROM", "JOIN"})
+_QUERY_STARTS = frozenset({"SELECT", "WITH", "VALUES", "TABLE"})
+# Keywords that can follow a relation and so are never its alias.
+_CLAUSE_KEYWORDS = frozenset(
+    {
+        "WHERE", "GROUP", "ORDER", "HAVING", "LIMIT", "OFFSET", "UNION", "INTERSECT", "EXCEPT", "JOIN",
+        "INNER", "LEFT", "RIGHT", "FULL", "CROSS", "NATURAL", "ON", "USING", "WINDOW", "FETCH", "TABLESAMPLE",
+        "FOR", "WITH",
+    }
+)
+_PREDICATE_KEYWORDS = frozenset({"NOT", "AND", "WHERE", "ON", "HAVING", "WHEN", "THEN", "ELSE", "CASE", "SELECT", "IS"})
+_NOT_TABLES = frozenset({"UNNEST", "LATERAL", "TABLE", "SELECT", "VALUES", "WITH"})
+# Keywords that end a WHERE clause at its own nesting level.
+_AFTER_WHERE = frozenset({"GROUP", "ORDER", "HAVING", "LIMIT", "OFFSET", "UNION", "INTERSECT", "EXCEPT", "WINDOW", "FETCH"})
+
+_TOKEN = re.compile(
+    r"""
+      (?P<ws>\s+)
+    | (?P<line_comment>--[^\n]*)
+    | (?P<block_comment>/\*.*?\*/)
+    | (?P<string>'(?:[^']|'')*')
+    | (?P<quoted>"(?:[^"]|"")*"|`(?:[^`]|``)*`)
+    | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+    | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+    | (?P<op><>|!=|<=|>=|\|\||=>|->|::|[(),.;=<>+\-*/%\[\]{}?:|&^~@])
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+
+@dataclass(frozen=True)
+class Token:
+    kind: str  # word, quoted, string, number, op
+    value: str
+    end: int
+
+    @property
+    def keyword(self) -> Optional[str]:
+        return self.value.upper() if self.kind == "word" else None
+
+    @property
+    def identifier(self) -> Optional[str]:
+        if self.kind == "word":
+            return self.value.lower()
+        if self.kind == "quoted":
+            # Athena folds quoted identifiers to lower case as well.
+            return self.value[1:-1].replace(self.value[0] * 2, self.value[0]).lower()
+        return None
+
+
+@dataclass(frozen=True)
+class SqlStatement:
+    """One parsed statement: its kind, the tables it reads and a whitespace/comment-insensitive fingerprint."""
+
+    text: str
+    kind: str
+    tables: Tuple[str, ...]
+    ctes: Tuple[str, ...]
+    statement_count: int
+    writes: bool
+    fingerprint: str
+    # column -> literal values from ``col = 'x'`` / ``col IN (...)`` in the WHERE of a
+    # single-table query; empty for joins, subqueries, CTEs, set operations and any OR.
+    predicates: Tuple[Tuple[str, Tuple[str, ...]], ...] = ()
+
+    def predicate_values(self, column: str) -> Optional[Tuple[str, ...]]:
+        for name, values in self.predicates:
+            if name == column:
+                return values
+        return None
+
+    @property
+    def read_only(self) -> bool:
+        return self.statement_count == 1 and not self.writes and self.kind in READ_ONLY_KINDS
+
+    @property
+    def is_select(self) -> bool:
+        return self.read_only and self.kind in SELECT_KINDS
+
+
+def tokenize(sql: str) -> List[Token]:
+    tokens: List[Token] = []
+    position = 0
+    while position < len(sql):
+        matched = _TOKEN.match(sql, position)
+        if matched is None:
+            raise ValidationError(f"Unexpected character {sql[position]!r} at offset {position}", code="BadSql")
+        kind = matched.lastgroup
+        if kind not in ("ws", "line_comment", "block_comment"):
+            tokens.append(Token(kind, matched.group(), matched.end()))
+        position = matched.end()
+    return tokens
+
+
+@lru_cache(maxsize=512)
+def parse_sql(sql: str) -> SqlStatement:
+    """Parses ``sql`` once; repeated calls with the same text are served from the cache."""
+    tokens = tokenize(_reject_unterminated(sql))
+    statements = _split_statements(tokens)
+    if not statements:
+        raise ValidationError("sql is empty", code="BadSql")
+
+    first = statements[0]
+    ctes, body = _split_ctes(first)
+    tables = _referenced_tables(first, set(ctes))
+    kind = _statement_kind(body)
+    writes = _statement_kind(_explained(body)) in _WRITE_KEYWORDS or any(_starts_write(statement) for statement in statements)
+    fingerprint = hashlib.sha256(" ".join(_normal(token) for token in first).encode("utf-8")).hexdigest()
+    return SqlStatement(
+        # Up to the first statement's last token: drops the terminator and trailing comments.
+        text=sql[:first[-1].end].strip(),
+        kind=kind,
+        tables=tables,
+        ctes=tuple(ctes),
+        statement_count=len(statements),
+        writes=writes,
+        fingerprint=fingerprint,
+        predicates=_equality_predicates(first, tables) if kind in SELECT_KINDS and not ctes else (),
+    )
+
+
+def validate_select(sql: str) -> SqlStatement:
+    """A single read-only SELECT (``WITH``/``VALUES`` included), as /materialize requires."""
+    statement = _validated(sql)
+    if not statement.is_select:
+        raise ValidationError("sql must be a SELECT statement", code="UnsafeSql")
+    return statement
+
+
+def validate_read_only(sql: str) -> SqlStatement:
+    """A single statement that only reads (SELECT, SHOW, DESCRIBE, EXPLAIN), as /query requires."""
+    statement = _validated(sql)
+    if not statement.read_only:
+        raise ValidationError(f"{statement.kind} statements are not allowed", code="UnsafeSql")
+    return statement
+
+
+def _validated(sql: str) -> SqlStatement:
+    statement = parse_sql(sql)
+    if statement.statement_count > 1:
+        raise ValidationError("sql must contain a single statement", code="MultipleStatements")
+    return statement
+
+
+def _reject_unterminated(sql: str) -> str:
+    # The tokenizer would otherwise read an unterminated quote as operators and words.
+    quote: Optional[str] = None
+    index = 0
+    while index < len(sql):
+        char = sql[index]
+        if quote:
+            if char == quote:
+                if sql[index + 1:index + 2] == quote:
+                    index += 1
+                else:
+                    quote = None
+        elif char in "'\"`":
+            quote = char
+        elif sql.startswith("--", index):
+            newline = sql.find("\n", index)
+            index = len(sql) if newline < 0 else newline
+        elif sql.startswith("/*", index):
+            close = sql.find("*/", index + 2)
+            if close < 0:
+                raise ValidationError("Unterminated comment", code="BadSql")
+            index = close + 1
+        index += 1
+    if quote:
+        raise ValidationError("Unterminated quoted string or identifier", code="BadSql")
+    return sql
+
+
+def _split_statements(tokens: List[Token]) -> List[List[Token]]:
+    statements: List[List[Token]] = [[]]
+    for token in tokens:
+        if token.value == ";":
+            statements.append([])
+        else:
+            statements[-1].append(token)
+    return [statement for statement in statements if statement]
+
+
+def _split_ctes(tokens: List[Token]) -> Tuple[List[str], List[Token]]:
+    if not tokens or tokens[0].keyword != "WITH":
+        return [], tokens
+    position = 1
+    if position < len(tokens) and tokens[position].keyword == "RECURSIVE":
+        position += 1
+    names: List[str] = []
+    while position < len(tokens):
+        name = tokens[position].identifier
+        if name is None:
+            break
+        names.append(name)
+        position += 1
+        if position < len(tokens) and tokens[position].value == "(":
+            position = _skip_group(tokens, position)
+        if position < len(tokens) and tokens[position].keyword == "AS":
+            position += 1
+        while position < len(tokens) and tokens[position].keyword in ("NOT", "MATERIALIZED"):
+            position += 1
+        if position < len(tokens) and tokens[position].value == "(":
+            position = _skip_group(tokens, position)
+        if position < len(tokens) and tokens[position].value == ",":
+            position += 1
+            continue
+        break
+    return names, tokens[position:]
+
+
+def _skip_group(tokens: List[Token], position: int) -> int:
+    """Index just past the parenthesis group opened at ``position``."""
+    depth = 0
+    for index in range(position, len(tokens)):
+        if tokens[index].value == "(":
+            depth += 1
+        elif tokens[index].value == ")":
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    raise ValidationError("Unbalanced parentheses", code="BadSql")
+
+
+def _statement_kind(tokens: List[Token]) -> str:
+    for token in tokens:
+        if token.value == "(":
+            continue
+        keyword = token.keyword or token.value
+        if keyword == "DESC":
+            return "DESCRIBE"
+        return keyword
+    return "UNKNOWN"
+
+
+def _explained(tokens: List[Token]) -> List[Token]:
+    """The statement an EXPLAIN [ANALYZE] [VERBOSE] [(options)] wraps; ``tokens`` otherwise."""
+    if not tokens or tokens[0].keyword != "EXPLAIN":
+        return tokens
+    position = 1
+    while position < len(tokens) and tokens[position].keyword in ("ANALYZE", "VERBOSE"):
+        position += 1
+    if position < len(tokens) and tokens[position].value == "(" and position + 1 < len(tokens) and tokens[position + 1].keyword in ("TYPE", "FORMAT"):
+        position = _skip_group(tokens, position)
+    return _split_ctes(tokens[position:])[1]
+
+
+def _starts_write(tokens: List[Token]) -> bool:
+    # A write keyword where a statement can begin: first token or right after "(".
+    previous: Optional[Token] = None
+    for token in tokens:
+        if token.keyword in _WRITE_KEYWORDS and (previous is None or previous.value == "("):
+            return True
+        previous = token
+    return False
+
+
+def _referenced_tables(tokens: List[Token], ctes: set) -> Tuple[str, ...]:
+    tables: List[str] = []
+    # One entry per open parenthesis: does it hold a query? FROM inside EXTRACT(... FROM x)
+    # or TRIM(... FROM x) is not a relation.
+    in_query = [True]
+    index = 0
+    while index < len(tokens):
+        token = tokens[index]
+        if token.value == "(":
+            following = tokens[index + 1] if index + 1 < len(tokens) else None
+            in_query.append(following is not None and (following.keyword in _QUERY_STARTS or following.value == "("))
+        elif token.value == ")" and len(in_query) > 1:
+            in_query.pop()
+        elif (token.keyword in _RELATION_KEYWORDS or _is_table_query(tokens, index)) and in_query[-1]:
+            index = _read_relations(tokens, index + 1, ctes, tables)
+            continue
+        index += 1
+    return tuple(dict.fromkeys(tables))
+
+
+def _is_table_query(tokens: List[Token], index: int) -> bool:
+    """``TABLE t`` used as a query (short for ``SELECT * FROM t``), not ``CREATE TABLE`` and the like."""
+    if tokens[index].keyword != "TABLE":
+        return False
+    previous = tokens[index - 1] if index else None
+    return previous is None or previous.value in ("(", ")") or previous.keyword in ("UNION", "INTERSECT", "EXCEPT", "ALL", "DISTINCT")
+
+
+def _read_relations(tokens: List[Token], index: int, ctes: set, tables: List[str]) -> int:
+    while index < len(tokens):
+        name, index = _qualified_name(tokens, index)
+        if name and name not in ctes and name.split(".")[-1].upper() not in _NOT_TABLES:
+            if not (index < len(tokens) and tokens[index].value == "("):  # table function
+                tables.append(name)
+        # Skip an alias ([AS] alias [(columns)]) and continue a comma-separated FROM list.
+        if index < len(tokens) and tokens[index].keyword == "AS":
+            index += 1
+        if index < len(tokens) and tokens[index].identifier and tokens[index].keyword not in _CLAUSE_KEYWORDS:
+            index += 1
+        if index < len(tokens) and tokens[index].value == ",":
+            index += 1
+            continue
+        return index
+    return index
+
+
+def _qualified_name(tokens: List[Token], index: int) -> Tuple[Optional[str], int]:
+    parts: List[str] = []
+    while index < len(tokens):
+        part = tokens[index].identifier
+        if part is None:
+            break
+        parts.append(part)
+        index += 1
+        if index < len(tokens) and tokens[index].value == ".":
+            index += 1
+            continue
+        break
+    return (".".join(parts) if parts else None), index
+
+
+def _equality_predicates(tokens: List[Token], tables: Tuple[str, ...]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    # With a join or a subquery a bare column could belong to another relation, and with a
+    # set operation each branch filters on its own: claim nothing then.
+    if len(tables) != 1:
+        return ()
+    where = _top_level_where(tokens)
+    # Only conjunctive filters narrow the scan; with any OR, claim nothing.
+    if where is None or any(token.keyword == "OR" for token in where):
+        return ()
+    qualifiers = _relation_names(tokens, tables[0])
+    if qualifiers is None:
+        return ()
+    found: dict = {}
+    index = 0
+    while index < len(where):
+        token = where[index]
+        if token.identifier is None or token.keyword in _PREDICATE_KEYWORDS or (index and where[index - 1].value == "."):
+            index += 1
+            continue
+        name, after = _qualified_name(where, index)
+        qualifier = name.rpartition(".")[0]
+        if qualifier and qualifier not in qualifiers:
+            # A struct field or another relation's column.
+            index = after
+            continue
+        negated = index > 0 and where[index - 1].keyword == "NOT"
+        following = where[after] if after < len(where) else None
+        values: List[str] = []
+        end = after
+        if following is not None and not negated and _starts_term(where, index):
+            if following.value == "=":
+                value, end = _literal(where, after + 1)
+                values = [value] if value is not None else []
+            elif following.keyword == "IN":
+                values, end = _literal_list(where, after + 1)
+        # ``dt = 5 + 1`` or ``dt = '5' || 'x'`` compares with an expression, not the literal.
+        if values and _ends_term(where, end):
+            found.setdefault(name.split(".")[-1], set()).update(values)
+        index = max(end, after)
+    return tuple((column, tuple(sorted(values))) for column, values in sorted(found.items()))
+
+
+def _starts_term(tokens: List[Token], index: int) -> bool:
+    previous = tokens[index - 1] if index else None
+    return previous is None or previous.keyword in ("AND", "NOT") or previous.value == "("
+
+
+def _ends_term(tokens: List[Token], index: int) -> bool:
+    return index >= len(tokens) or tokens[index].keyword == "AND" or tokens[index].value == ")"
+
+
+def _top_level_where(tokens: List[Token]) -> Optional[List[Token]]:
+    """The WHERE condition of a single-level query; None without one, or with a subquery or set operation."""
+    where: Optional[List[Token]] = None
+    depth = 0
+    for index, token in enumerate(tokens):
+        if token.value == "(":
+            following = tokens[index + 1] if index + 1 < len(tokens) else None
+            if following is not None and following.keyword in _QUERY_STARTS:
+                return None
+            depth += 1
+        elif token.value == ")":
+            depth -= 1
+        elif depth == 0 and token.keyword in ("UNION", "INTERSECT", "EXCEPT"):
+            return None
+        elif depth == 0 and token.keyword == "WHERE" and where is None:
+            where = []
+            continue
+        elif depth == 0 and token.keyword in _AFTER_WHERE and where is not None:
+            break
+        if where is not None:
+            where.append(token)
+    return where
+
+
+def _relation_names(tokens: List[Token], table: str) -> Optional[set]:
+    """The qualifiers that name ``table``: its full and bare names and its alias.
+
+    None when the query reads more than one relation (a self-join included).
+    """
+    names = {table, table.split(".")[-1]}
+    relations = 0
+    depth = 0
+    for index, token in enumerate(tokens):
+        # Without subqueries, a FROM in parentheses belongs to EXTRACT(... FROM x) or the like.
+        depth += (token.value == "(") - (token.value == ")")
+        if depth or token.keyword not in _RELATION_KEYWORDS:
+            continue
+        if token.keyword == "JOIN":
+            return None
+        name, after = _qualified_name(tokens, index + 1)
+        relations += 1
+        if after < len(tokens) and tokens[after].keyword == "AS":
+            after += 1
+        if after < len(tokens) and tokens[after].identifier and tokens[after].keyword not in _CLAUSE_KEYWORDS:
+            names.add(tokens[after].identifier)
+            after += 1
+        if name != table or relations > 1 or (after < len(tokens) and tokens[after].value == ","):
+            return None
+    return names
+
+
+def _literal(tokens: List[Token], index: int) -> Tuple[Optional[str], int]:
+    if index < len(tokens) and tokens[index].keyword in ("DATE", "TIMESTAMP"):
+        index += 1
+    if index >= len(tokens):
+        return None, index
+    token = tokens[index]
+    if token.kind == "string":
+        return token.value[1:-1].replace("''", "'"), index + 1
+    if token.kind == "number":
+        return token.value, index + 1
+    return None, index
+
+
+def _literal_list(tokens: List[Token], index: int) -> Tuple[List[str], int]:
+    if index >= len(tokens) or tokens[index].value != "(":
+        return [], index
+    values: List[str] = []
+    index += 1
+    while index < len(tokens):
+        value, index = _literal(tokens, index)
+        if value is None:
+            return [], index
+        values.append(value)
+        if index < len(tokens) and tokens[index].value == ",":
+            index += 1
+            continue
+        if index < len(tokens) and tokens[index].value == ")":
+            return values, index + 1
+        return [], index
+    return [], index
+
+
+def _normal(token: Token) -> str:
+    return token.value.upper() if token.kind == "word" else token.value
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .models import MaterializedView
+
+
+def refresh_levels(views: Iterable[MaterializedView]) -> Tuple[List[List[MaterializedView]], List[MaterializedView]]:
+    """Orders ``views`` for a refresh: each level only reads views of earlier levels.
+
+    A view depends on another when one of its inputs is that view's target. Views of one
+    level are independent of each other and can be refreshed side by side. Views caught in
+    a dependency cycle (or downstream of one) are returned apart and belong in no level.
+    """
+    views = list(views)
+    producers = {view.target: view.name for view in views}
+    upstream: Dict[str, Set[str]] = {
+        view.name: {producers[table] for table in view.inputs if table in producers and producers[table] != view.name}
+        for view in views
+    }
+    by_name = {view.name: view for view in views}
+    levels: List[List[MaterializedView]] = []
+    done: Set[str] = set()
+    remaining = dict(upstream)
+    while remaining:
+        ready = sorted(name for name, needs in remaining.items() if needs <= done)
+        if not ready:
+            break
+        levels.append([by_name[name] for name in ready])
+        done.update(ready)
+        for name in ready:
+            del remaining[name]
+    return levels, [by_name[name] for name in sorted(remaining)]
+
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import random
+import threading
+from abc import ABC, abstractmethod
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from botocore.exceptions import ClientError
+
+from ..config.settings import AdmissionSettings
+from ..presentation.logging import get_logger
+from .dynamodb import ConditionalCheckFailedError, DynamoTable
+
+
+_LOGGER = get_logger("sewingmachine.admission")
+
+INTERACTIVE = "interactive"
+REFRESH = "refresh"
+
+# The slot protocol, shared with the Athena runner's ``RefreshSlots`` (src/jobs), which
+# cannot import this package; change both together.
+#
+# - Keys: ``resource`` is ``athena-slot#<N>`` for the ``capacity`` shared slots (the last
+#   ``reserved`` of them refresh-only) and ``athena-principal#<principal>#<N>`` for the
+#   per-user slots.
+# - A claim puts ``holder`` (a fresh uuid per lease), ``pool`` and ``expiresAt`` (epoch
+#   seconds) on condition ``attribute_not_exists(resource) OR expiresAt <= :now``: an
+#   expired lease is free, so a crashed holder needs no cleanup.
+# - Release deletes the item, and renewal updates it, on condition ``holder = :holder``,
+#   so neither touches a slot that expired and was taken by someone else.
+# - An attached lease also carries ``queryExecutionId`` and ``leaseKeys`` (every key of the
+#   lease); only those are swept. The runner holds its slot while it waits on the
+#   statement, so it never attaches and leases for the statement's full timeout instead.
+_SLOT_PREFIX = "athena-slot#"
+_PRINCIPAL_PREFIX = "athena-principal#"
+_MAX_BACKOFF_SECONDS = 1.0
+_BATCH_GET_MAX_IDS = 50  # BatchGetQueryExecution limit
+_RUNNING_STATES = ("QUEUED", "RUNNING")
+
+
+@dataclass(frozen=True)
+class Lease:
+    holder: str
+    pool: str
+    keys: Tuple[str, ...]
+    expires_at: float
+
+
+class AthenaAdmission(ABC):
+    """Lease-based counting semaphore over Athena's concurrent-query quota.
+
+    ``capacity`` slots are shared by every caller; the last ``reserved`` of them only
+    admit the ``refresh`` pool, so interactive bursts cannot starve the refresh MERGEs.
+    With ``per_principal`` set, each user (or route) also holds one of its own
+    ``per_principal`` slots, so no single caller takes the whole interactive pool.
+    Waiters retry with jittered backoff. A lease expires after ``lease_seconds``, so a
+    crashed holder frees its slot without cleanup. A query left running after its request
+    ends is :meth:`attach`-ed to its lease, and :meth:`sweep` keeps that lease for exactly
+    as long as the query runs.
+
+    Subclasses store the slots: :class:`DynamoAdmission` across containers,
+    :class:`InMemoryAdmission` within one process (tests, local runs).
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        *,
+        reserved: int = 0,
+        per_principal: int = 0,
+        lease_seconds: float = 120.0,
+        wait_seconds: float = 0.0,
+    ) -> None:
+        if not 0 <= reserved < capacity:
+            raise ValueError("reserved must be smaller than capacity")
+        self.capacity = capacity
+        self.reserved = reserved
+        self.per_principal = per_principal
+        self.lease_seconds = lease_seconds
+        self.wait_seconds = wait_seconds
+
+    def acquire(self, pool: str, principal: Optional[str] = None, wait_seconds: Optional[float] = None) -> Optional[Lease]:
+        """Claims a slot in ``pool``, waiting up to ``wait_seconds`` (default: the controller's); None if none freed up."""
+        wait_seconds = self.wait_seconds if wait_seconds is None else wait_seconds
+        slots = self._pool_slots(pool)
+        owned = [f"{_PRINCIPAL_PREFIX}{principal}#{index}" for index in range(self.per_principal)] if principal and pool == INTERACTIVE else []
+        holder = uuid.uuid4().hex
+        deadline = time.monotonic() + wait_seconds
+        backoff = 0.05
+        while True:
+            now = time.time()
+            held = self._held(slots + owned, now)
+            slot = next((key for key in slots if key not in held), None)
+            own = next((key for key in _shuffled(owned) if key not in held), None)
+            if slot is not None and (own is not None or not owned):
+                lease = Lease(holder=holder, pool=pool, keys=tuple(k for k in (own, slot) if k), expires_at=now + self.lease_seconds)
+                if self._claim_all(lease, now):
+                    return lease
+            if time.monotonic() + backoff > deadline:
+                _LOGGER.info("Athena admission refused", extra={"pool": pool, "principal": principal, "held": len(held)})
+                return None
+            time.sleep(backoff * random.uniform(0.5, 1.5))
+            backoff = min(backoff * 2, _MAX_BACKOFF_SECONDS)
+
+    def release(self, lease: Optional[Lease]) -> None:
+        """Frees every key of ``lease``; a key that cannot be freed is logged and left to expire."""
+        if lease is None:
+            return
+        for key in lease.keys:
+            self._free(key, lease.holder)
+
+    def attach(self, lease: Optional[Lease], query_execution_id: str) -> None:
+        """Hands ``lease`` over to the running query ``query_execution_id`` instead of releasing it.
+
+        :meth:`sweep` renews the lease while the query runs and releases it once the query
+        finishes; without sweeps it simply expires.
+        """
+        if lease is None:
+            return
+        lease = replace(lease, expires_at=time.time() + self.lease_seconds)
+        for key in lease.keys:
+            self._tag(key, lease, query_execution_id)
+
+    def sweep(self, athena: Any) -> Dict[str, int]:
+        """Releases the attached leases whose query finished and renews the rest; returns the counts."""
+        # Every lease holds exactly one shared slot, so reading those finds each attached lease once.
+        attached = self._tagged([f"{_SLOT_PREFIX}{index}" for index in range(self.capacity)], time.time())
+        ids = sorted(attached)
+        states: Dict[str, str] = {}
+        for start in range(0, len(ids), _BATCH_GET_MAX_IDS):
+            try:
+                response = athena.batch_get_query_execution(QueryExecutionIds=ids[start:start + _BATCH_GET_MAX_IDS])
+            except ClientError:
+                _LOGGER.warning("Failed to read attached queries; their leases run on", exc_info=True)
+                continue
+            for execution in response.get("QueryExecutions", []):
+                states[execution["QueryExecutionId"]] = execution["Status"]["State"]
+
+        counts = {"released": 0, "renewed": 0}
+        for query_id, lease in attached.items():
+            state = states.get(query_id)
+            if state is None:
+                continue  # unknown to Athena just now: the lease runs out on its own
+            if state in _RUNNING_STATES:
+                self.attach(lease, query_id)
+                counts["renewed"] += 1
+            else:
+                self.release(lease)
+                counts["released"] += 1
+        return counts
+
+    @contextmanager
+    def admitted(self, pool: str, principal: Optional[str] = None, wait_seconds: Optional[float] = None) -> Iterator[Optional[Lease]]:
+        """Holds a lease (or None when refused) for the enclosed block and releases it after."""
+        lease = self.acquire(pool, principal, wait_seconds)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    def _pool_slots(self, pool: str) -> List[str]:
+        shared = _shuffled(f"{_SLOT_PREFIX}{index}" for index in range(self.capacity - self.reserved))
+        if pool != REFRESH:
+            return shared
+        # Refresh work fills its reserved slots first and leaves the shared ones to users.
+        return _shuffled(f"{_SLOT_PREFIX}{index}" for index in range(self.capacity - self.reserved, self.capacity)) + shared
+
+    def _claim_all(self, lease: Lease, now: float) -> bool:
+        claimed = []
+        for key in lease.keys:
+            if not self._claim(key, lease, now):
+                for taken in claimed:
+                    self._free(taken, lease.holder)
+                return False
+            claimed.append(key)
+        return True
+
+    @abstractmethod
+    def _held(self, keys: Sequence[str], now: float) -> set:
+        """Keys among ``keys`` whose lease has not expired."""
+
+    @abstractmethod
+    def _claim(self, key: str, lease: Lease, now: float) -> bool:
+        """Takes ``key`` for ``lease`` unless a live lease holds it."""
+
+    @abstractmethod
+    def _free(self, key: str, holder: str) -> None:
+        """Frees ``key`` if ``holder`` still holds it."""
+
+    @abstractmethod
+    def _tag(self, key: str, lease: Lease, query_execution_id: str) -> None:
+        """Records the query and the lease's keys on ``key`` and extends it, while ``lease`` still holds it."""
+
+    @abstractmethod
+    def _tagged(self, keys: Sequence[str], now: float) -> Dict[str, Lease]:
+        """The live leases on ``keys`` that carry a query, by query execution id."""
+
+
+class DynamoAdmission(AthenaAdmission):
+    """Slots are items of a ``resource``-keyed table (the cooldown table) with an ``expiresAt`` TTL."""
+
+    def __init__(self, table: DynamoTable, capacity: int, **kwargs) -> None:
+        if capacity + kwargs.get("per_principal", 0) > 100:
+            raise ValueError("capacity and per_principal slots must fit one BatchGetItem (100 keys)")
+        super().__init__(capacity, **kwargs)
+        self._table = table
+
+    def _held(self, keys: Sequence[str], now: float) -> set:
+        items = self._table.batch_get_items([{"resource": {"S": key}} for key in keys], consistent_read=True)
+        return {item["resource"]["S"] for item in items if float(item.get("expiresAt", {}).get("N", 0)) > now}
+
+    def _claim(self, key: str, lease: Lease, now: float) -> bool:
+        try:
+            self._table.put_item(
+                {
+                    "resource": {"S": key},
+                    "holder": {"S": lease.holder},
+                    "pool": {"S": lease.pool},
+                    "expiresAt": {"N": str(int(lease.expires_at))},
+                },
+                condition="attribute_not_exists(#res) OR expiresAt <= :now",
+                names={"#res": "resource"},
+                values={":now": {"N": str(int(now))}},
+            )
+        except ConditionalCheckFailedError:
+            return False
+        return True
+
+    def _free(self, key: str, holder: str) -> None:
+        try:
+            self._table.delete_item({"resource": {"S": key}}, condition="holder = :holder", values={":holder": {"S": holder}})
+        except ConditionalCheckFailedError:
+            pass  # expired and already taken by someone else
+        except ClientError:
+            # Callers release in ``finally`` after the query's work is done; a throttled
+            # delete must not fail the request, and the slot still frees when it expires.
+            _LOGGER.warning("Failed to release Athena slot %s", key, exc_info=True)
+
+    def _tag(self, key: str, lease: Lease, query_execution_id: str) -> None:
+        try:
+            self._table.update_item(
+                {"resource": {"S": key}},
+                "SET queryExecutionId = :qid, leaseKeys = :keys, expiresAt = :until",
+                condition="holder = :holder",
+                values={
+                    ":qid": {"S": query_execution_id},
+                    ":keys": {"L": [{"S": other} for other in lease.keys]},
+                    ":until": {"N": str(int(lease.expires_at))},
+                    ":holder": {"S": lease.holder},
+                },
+            )
+        except ConditionalCheckFailedError:
+            pass  # expired and already taken by someone else
+        except ClientError:
+            _LOGGER.warning("Failed to attach Athena slot %s to query %s", key, query_execution_id, exc_info=True)
+
+    def _tagged(self, keys: Sequence[str], now: float) -> Dict[str, Lease]:
+        items = self._table.batch_get_items([{"resource": {"S": key}} for key in keys], consistent_read=True)
+        return {
+            item["queryExecutionId"]["S"]: Lease(
+                holder=item["holder"]["S"],
+                pool=item.get("pool", {}).get("S", INTERACTIVE),
+                keys=tuple(entry["S"] for entry in item.get("leaseKeys", {}).get("L", [])) or (item["resource"]["S"],),
+                expires_at=float(item["expiresAt"]["N"]),
+            )
+            for item in items
+            if "queryExecutionId" in item and float(item.get("expiresAt", {}).get("N", 0)) > now
+        }
+
+
+class InMemoryAdmission(AthenaAdmission):
+    def __init__(self, capacity: int, **kwargs) -> None:
+        super().__init__(capacity, **kwargs)
+        # Per key: the lease holding it and the query it is attached to, if any.
+        self._slots: Dict[str, Tuple[Lease, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    def _held(self, keys: Sequence[str], now: float) -> set:
+        with self._lock:
+            return {key for key in keys if key in self._slots and self._slots[key][0].expires_at > now}
+
+    def _claim(self, key: str, lease: Lease, now: float) -> bool:
+        with self._lock:
+            current = self._slots.get(key)
+            if current is not None and current[0].expires_at > now:
+                return False
+            self._slots[key] = (lease, None)
+            return True
+
+    def _free(self, key: str, holder: str) -> None:
+        with self._lock:
+            current = self._slots.get(key)
+            if current is not None and current[0].holder == holder:
+                del self._slots[key]
+
+    def _tag(self, key: str, lease: Lease, query_execution_id: str) -> None:
+        with self._lock:
+            current = self._slots.get(key)
+            if current is not None and current[0].holder == lease.holder:
+                self._slots[key] = (lease, query_execution_id)
+
+    def _tagged(self, keys: Sequence[str], now: float) -> Dict[str, Lease]:
+        with self._lock:
+            entries = [self._slots[key] for key in keys if key in self._slots]
+        return {query_id: lease for lease, query_id in entries if query_id and lease.expires_at > now}
+
+
+def build_admission(settings: AdmissionSettings, clients) -> Optional[AthenaAdmission]:
+    """The configured controller, or None when admission control is off (no capacity or table)."""
+    if not settings.capacity or not settings.table_name:
+        return None
+    return DynamoAdmission(
+        DynamoTable(clients.dynamodb(), settings.table_name),
+        settings.capacity,
+        reserved=settings.refresh_reserved,
+        per_principal=settings.per_principal,
+        lease_seconds=settings.lease_seconds,
+        wait_seconds=settings.wait_seconds,
+    )
+
+
+def _shuffled(keys: Iterable[str]) -> List[str]:
+    keys = list(keys)
+    random.shuffle(keys)
+    return keys
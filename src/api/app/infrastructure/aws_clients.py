@@ -1,18 +1,84 @@
 from __future__ import annotations
 
+import copy
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from typing import Any
-import boto3
-from botocore.config import Config
-DEFAULT_CLIENT_CONFIG = Config(connect_timeout=3, read_timeout=10)
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from .aws_metrics import AWS_CALL_METRICS, AwsCallMetrics
+
+if TYPE_CHECKING:  # pragma: no cover
+    from botocore.config import Config
+
+# boto3/botocore are imported when the first client or config is built, not at module
+# load, so code paths that never call AWS (health, preflight, tests) skip their import cost.
+
+# Sized for the widest fan-out in the services (concurrent S3 listing/presigning,
+# Glue paging) so threads never queue on botocore's default 10-connection pool.
+MAX_POOL_CONNECTIONS = 32
+
+_DEFAULT_OPTIONS: Dict[str, Any] = {
+    "connect_timeout": 3,
+    "read_timeout": 10,
+    "max_pool_connections": MAX_POOL_CONNECTIONS,
+    "tcp_keepalive": True,
+    "retries": {"mode": "adaptive", "max_attempts": 5},
+}
+# DynamoDB calls are small and latency-sensitive: short timeouts, kept-alive pooled
+# connections and bounded standard-mode retries.
+_SERVICE_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "dynamodb": {
+        "connect_timeout": 1,
+        "read_timeout": 3,
+        "max_pool_connections": 25,
+        "tcp_keepalive": True,
+        "retries": {"mode": "standard", "max_attempts": 3},
+    },
+}
+_CONFIG_ALIASES = {"DEFAULT_CLIENT_CONFIG": (), "DYNAMODB_CLIENT_CONFIG": ("dynamodb",)}
+
+
+@lru_cache(maxsize=None)
+def client_config(service: Optional[str] = None) -> Config:
+    """Default client config, or the per-service override when ``service`` has one."""
+    from botocore.config import Config
+
+    options = _SERVICE_OPTIONS.get(service) if service else _DEFAULT_OPTIONS
+    # Copied because botocore mutates the retries dict when a client is created.
+    return Config(**copy.deepcopy(options or _DEFAULT_OPTIONS))
+
+
+def __getattr__(name: str):
+    # DEFAULT_CLIENT_CONFIG / DYNAMODB_CLIENT_CONFIG stay importable without loading botocore eagerly.
+    if name in _CONFIG_ALIASES:
+        return client_config(*_CONFIG_ALIASES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 class AwsClients:
-    """Lazy boto3 clients scoped by region."""
+    """boto3 clients scoped by region, built from one shared session.
 
-    def __init__(self, region: str, *, config: Config | None = None) -> None:
+    Clients are created lazily on first use, or up front with :meth:`warm` so the
+    endpoint/model loading cost is paid once, in parallel, during Lambda init. Every
+    client reports its calls to ``metrics`` (the container-wide recorder by default).
+    """
+
+    def __init__(
+        self,
+        region: str,
+        *,
+        config: Config | None = None,
+        session: Any = None,
+        metrics: AwsCallMetrics | None = None,
+    ) -> None:
         self._region = region
-        self._config = config or DEFAULT_CLIENT_CONFIG
+        self._config = config or client_config()
+        self.metrics = metrics or AWS_CALL_METRICS
+        if session is None:
+            import boto3
+
+            session = boto3.session.Session(region_name=region)
+        self._session = session
         self._clients: dict[str, Any] = {}
 
     def dynamodb(self):
@@ -30,11 +96,35 @@ class AwsClients:
     def glue(self):
         return self._get_client("glue")
 
+    def warm(self, *services: str) -> AwsClients:
+        missing = [service for service in dict.fromkeys(services) if service not in self._clients]
+        if not missing:
+            return self
+        # The first client resolves credentials and endpoint data on the shared session;
+        # after that, client creation is safe to run concurrently.
+        first, rest = missing[0], missing[1:]
+        self._get_client(first)
+        if rest:
+            with ThreadPoolExecutor(max_workers=len(rest)) as pool:
+                created = pool.map(self._create_client, rest)
+                for service, client in zip(rest, created):
+                    self._clients.setdefault(service, client)
+        return self
+
     def _get_client(self, service: str):
         if service not in self._clients:
-            self._clients[service] = boto3.client(service, region_name=self._region, config=self._config)
+            self._clients[service] = self._create_client(service)
         return self._clients[service]
 
+    def _create_client(self, service: str):
+        client = self._session.client(service, region_name=self._region, config=self._config_for(service))
+        return self.metrics.attach(client)
+
+    def _config_for(self, service: str) -> Config:
+        if service not in _SERVICE_OPTIONS:
+            return self._config
+        return self._config.merge(client_config(service))
+
 
 @lru_cache(maxsize=4)
 def get_clients(region: str, *, config: Config | None = None) -> AwsClients:
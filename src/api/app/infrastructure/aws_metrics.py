@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..presentation.logging import get_logger
+
+
+_LOGGER = get_logger("sewingmachine.metrics")
+# Metric lines are the point of this module; keep them when LOG_LEVEL is raised.
+_LOGGER.setLevel(logging.INFO)
+
+DEFAULT_NAMESPACE = "SewingMachine/Api"
+
+# Error codes AWS services use for throttling (including S3's SlowDown and DynamoDB's
+# throughput errors); counted per attempt, so throttles that were retried away still show.
+THROTTLE_CODES = frozenset(
+    {
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "RequestThrottled",
+        "RequestThrottledException",
+        "TooManyRequestsException",
+        "ProvisionedThroughputExceededException",
+        "RequestLimitExceeded",
+        "BandwidthLimitExceeded",
+        "LimitExceededException",
+        "SlowDown",
+        "PriorRequestNotComplete",
+    }
+)
+_ATHENA_TERMINAL = frozenset({"SUCCEEDED", "FAILED", "CANCELLED"})
+_STARTED = "sewingmachine_started"
+
+
+class _OperationStats:
+    __slots__ = ("latencies", "retries", "throttles", "errors")
+
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.retries = 0
+        self.throttles = 0
+        self.errors = 0
+
+
+class _AthenaQueryStats:
+    __slots__ = ("polls", "queue_ms", "execution_ms")
+
+    def __init__(self) -> None:
+        self.polls = 0
+        self.queue_ms: Optional[int] = None
+        self.execution_ms: Optional[int] = None
+
+
+class AwsCallMetrics:
+    """Times every AWS API call made through attached clients, per service and operation.
+
+    :meth:`attach` registers botocore event hooks on a client: the latency of each call
+    (all retry attempts included), its retries, throttled attempts and error responses
+    are recorded. Athena ``GetQueryExecution``/``BatchGetQueryExecution`` responses also
+    yield polls per query and, once a query finishes, its queue and engine execution time.
+
+    Metrics accumulate until :meth:`flush`, which logs them as CloudWatch Embedded Metric
+    Format documents (one per operation, plus one for Athena) and starts over. The handler
+    runtime flushes at the end of every invocation.
+    """
+
+    def __init__(self, namespace: Optional[str] = None) -> None:
+        self.namespace = namespace or os.environ.get("METRICS_NAMESPACE") or DEFAULT_NAMESPACE
+        self._lock = threading.Lock()
+        self._operations: Dict[Tuple[str, str], _OperationStats] = defaultdict(_OperationStats)
+        self._queries: Dict[str, _AthenaQueryStats] = defaultdict(_AthenaQueryStats)
+
+    def attach(self, client: Any) -> Any:
+        events = client.meta.events
+        # First, so calls answered early by another before-call handler are still timed.
+        events.register_first("before-call.*.*", self._before_call)
+        events.register("after-call.*.*", self._after_call)
+        events.register("after-call-error.*.*", self._after_call_error)
+        events.register("needs-retry.*.*", self._needs_retry)
+        return client
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current totals: ``{"calls": {"service.Operation": {...}}, "athena": {queryId: {...}}}``."""
+        with self._lock:
+            calls = {
+                f"{service}.{operation}": {
+                    "count": len(stats.latencies),
+                    "latency_ms": list(stats.latencies),
+                    "retries": stats.retries,
+                    "throttles": stats.throttles,
+                    "errors": stats.errors,
+                }
+                for (service, operation), stats in self._operations.items()
+            }
+            athena = {
+                query_id: {"polls": stats.polls, "queue_ms": stats.queue_ms, "execution_ms": stats.execution_ms}
+                for query_id, stats in self._queries.items()
+            }
+        return {"calls": calls, "athena": athena}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._operations.clear()
+            self._queries.clear()
+
+    def flush(self, **dimensions: Optional[str]) -> List[Dict[str, Any]]:
+        """Logs the accumulated metrics as EMF documents, resets, and returns the documents."""
+        with self._lock:
+            operations, self._operations = self._operations, defaultdict(_OperationStats)
+            queries, self._queries = self._queries, defaultdict(_AthenaQueryStats)
+        dims = {key: value for key, value in dimensions.items() if value}
+        documents = [self._operation_document(key, stats, dims) for key, stats in operations.items() if stats.latencies]
+        if queries:
+            documents.append(self._athena_document(queries, dims))
+        for document in documents:
+            _LOGGER.info("aws metrics", extra=document)
+        return documents
+
+    # botocore event handlers -------------------------------------------------------------
+
+    def _before_call(self, context: Dict[str, Any], **_kwargs: Any) -> None:
+        context[_STARTED] = time.perf_counter()
+
+    def _after_call(self, event_name: str, parsed: Dict[str, Any], context: Dict[str, Any], **_kwargs: Any) -> None:
+        key = _operation_key(event_name)
+        elapsed = _elapsed_ms(context)
+        metadata = parsed.get("ResponseMetadata") or {}
+        with self._lock:
+            stats = self._operations[key]
+            stats.latencies.append(elapsed)
+            stats.retries += metadata.get("RetryAttempts") or 0
+            if "Error" in parsed or (metadata.get("HTTPStatusCode") or 200) >= 300:
+                stats.errors += 1
+            if key[0] == "athena":
+                self._record_athena(key[1], parsed)
+
+    def _after_call_error(self, event_name: str, exception: BaseException, context: Dict[str, Any], **_kwargs: Any) -> None:
+        key = _operation_key(event_name)
+        elapsed = _elapsed_ms(context)
+        metadata = (getattr(exception, "response", None) or {}).get("ResponseMetadata") or {}
+        with self._lock:
+            stats = self._operations[key]
+            stats.latencies.append(elapsed)
+            stats.retries += metadata.get("RetryAttempts") or 0
+            stats.errors += 1
+
+    def _needs_retry(self, event_name: str, response: Any = None, **_kwargs: Any) -> None:
+        # Runs once per attempt; returning None leaves the retry decision to botocore.
+        if not response:
+            return None
+        error_code = ((response[1] or {}).get("Error") or {}).get("Code")
+        if error_code in THROTTLE_CODES:
+            with self._lock:
+                self._operations[_operation_key(event_name)].throttles += 1
+        return None
+
+    def _record_athena(self, operation: str, parsed: Dict[str, Any]) -> None:
+        if operation == "GetQueryExecution":
+            executions = [parsed.get("QueryExecution") or {}]
+        elif operation == "BatchGetQueryExecution":
+            executions = parsed.get("QueryExecutions") or []
+        else:
+            return
+        for execution in executions:
+            query_id = execution.get("QueryExecutionId")
+            if not query_id:
+                continue
+            stats = self._queries[query_id]
+            stats.polls += 1
+            if (execution.get("Status") or {}).get("State") in _ATHENA_TERMINAL:
+                statistics = execution.get("Statistics") or {}
+                stats.queue_ms = statistics.get("QueryQueueTimeInMillis")
+                stats.execution_ms = statistics.get("EngineExecutionTimeInMillis")
+
+    # EMF documents -----------------------------------------------------------------------
+
+    def _operation_document(self, key: Tuple[str, str], stats: _OperationStats, dims: Dict[str, str]) -> Dict[str, Any]:
+        service, operation = key
+        dimensions = {**dims, "Service": service, "Operation": operation}
+        metrics = {
+            "AwsCallLatency": ("Milliseconds", [round(value, 2) for value in stats.latencies]),
+            "AwsCalls": ("Count", len(stats.latencies)),
+            "AwsRetries": ("Count", stats.retries),
+            "AwsThrottles": ("Count", stats.throttles),
+            "AwsErrors": ("Count", stats.errors),
+        }
+        return self._emf(dimensions, metrics)
+
+    def _athena_document(self, queries: Dict[str, _AthenaQueryStats], dims: Dict[str, str]) -> Dict[str, Any]:
+        finished = [stats for stats in queries.values() if stats.queue_ms is not None]
+        metrics = {"AthenaPollsPerQuery": ("Count", [stats.polls for stats in queries.values()])}
+        if finished:
+            metrics["AthenaQueueTime"] = ("Milliseconds", [stats.queue_ms for stats in finished])
+            metrics["AthenaExecutionTime"] = ("Milliseconds", [stats.execution_ms or 0 for stats in finished])
+        document = self._emf({**dims, "Service": "athena"}, metrics)
+        document["queryExecutionIds"] = sorted(queries)
+        return document
+
+    def _emf(self, dimensions: Dict[str, str], metrics: Dict[str, Tuple[str, Any]]) -> Dict[str, Any]:
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [list(dimensions)],
+                        "Metrics": [{"Name": name, "Unit": unit} for name, (unit, _value) in metrics.items()],
+                    }
+                ],
+            },
+            **dimensions,
+            **{name: value for name, (_unit, value) in metrics.items()},
+        }
+
+
+def _operation_key(event_name: str) -> Tuple[str, str]:
+    # "after-call.athena.GetQueryExecution" -> ("athena", "GetQueryExecution")
+    _event, service, operation = event_name.split(".", 2)
+    return service, operation
+
+
+def _elapsed_ms(context: Dict[str, Any]) -> float:
+    started = context.get(_STARTED)
+    return (time.perf_counter() - started) * 1000 if started is not None else 0.0
+
+
+# Shared by every AwsClients in the container unless one is given its own.
+AWS_CALL_METRICS = AwsCallMetrics()
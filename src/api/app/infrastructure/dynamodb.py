@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from botocore.exceptions import ClientError
+
+from ..domain.errors import ExternalServiceError
+from ..presentation.logging import get_logger
+
+
+_LOGGER = get_logger("sewingmachine.dynamodb")
+
+Item = Dict[str, Dict[str, Any]]
+
+# Unprocessed keys mean the table is throttling: retry with capped, jittered backoff.
+_BATCH_GET_ATTEMPTS = 6
+_BATCH_GET_BACKOFF_SECONDS = 0.05
+_BATCH_GET_MAX_BACKOFF_SECONDS = 1.0
+
+
+class ConditionalCheckFailedError(Exception):
+    """Raised when a conditional write is rejected; carries the existing item when requested."""
+
+    def __init__(self, item: Optional[Item] = None) -> None:
+        super().__init__("Conditional check failed")
+        self.item = item or {}
+
+
+class DynamoTable:
+    """Low-level DynamoDB table accessor shared by the cooldown, progress and cache tables.
+
+    Every call is timed and logged with its operation, table and latency.
+    """
+
+    def __init__(self, client, table_name: str) -> None:
+        self._client = client
+        self._table_name = table_name
+
+    @property
+    def name(self) -> str:
+        return self._table_name
+
+    def get_item(self, key: Item, *, consistent_read: bool = False) -> Optional[Item]:
+        kwargs: Dict[str, Any] = {"Key": key}
+        if consistent_read:
+            kwargs["ConsistentRead"] = True
+        return self._call("get_item", **kwargs).get("Item")
+
+    def batch_get_items(self, keys: List[Item], *, consistent_read: bool = False) -> List[Item]:
+        """Items for up to 100 ``keys`` (missing ones are skipped), retrying unprocessed keys.
+
+        Raises :class:`ExternalServiceError` when keys are still unprocessed after
+        ``_BATCH_GET_ATTEMPTS`` calls.
+        """
+        request: Dict[str, Any] = {"Keys": keys}
+        if consistent_read:
+            request["ConsistentRead"] = True
+        items: List[Item] = []
+        pending = {self._table_name: request}
+        for attempt in range(_BATCH_GET_ATTEMPTS):
+            if attempt:
+                time.sleep(random.uniform(0, min(_BATCH_GET_MAX_BACKOFF_SECONDS, _BATCH_GET_BACKOFF_SECONDS * 2 ** attempt)))
+            response = self._timed("batch_get_item", RequestItems=pending)
+            items.extend(response.get("Responses", {}).get(self._table_name, []))
+            pending = response.get("UnprocessedKeys") or {}
+            if not pending:
+                return items
+        _LOGGER.error("DynamoDB left keys unprocessed on %s", self._table_name)
+        raise ExternalServiceError(f"DynamoDB table {self._table_name} is throttling reads")
+
+    def scan_items(
+        self, *, filter: Optional[str] = None, names: Optional[Dict[str, str]] = None, values: Optional[Item] = None
+    ) -> List[Item]:
+        """Every item in the table (matching ``filter``), following pagination; meant for small tables."""
+        items: List[Item] = []
+        kwargs: Dict[str, Any] = {}
+        if filter:
+            kwargs["FilterExpression"] = filter
+        if names:
+            kwargs["ExpressionAttributeNames"] = names
+        if values:
+            kwargs["ExpressionAttributeValues"] = values
+        while True:
+            response = self._call("scan", **kwargs)
+            items.extend(response.get("Items", []))
+            if not response.get("LastEvaluatedKey"):
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def put_item(
+        self,
+        item: Item,
+        *,
+        condition: Optional[str] = None,
+        names: Optional[Dict[str, str]] = None,
+        values: Optional[Item] = None,
+        return_old_on_failure: bool = False,
+    ) -> None:
+        kwargs: Dict[str, Any] = {"Item": item}
+        kwargs.update(_condition_kwargs(condition, names, values))
+        if return_old_on_failure:
+            kwargs["ReturnValuesOnConditionCheckFailure"] = "ALL_OLD"
+        self._call("put_item", **kwargs)
+
+    def update_item(
+        self,
+        key: Item,
+        expression: str,
+        *,
+        condition: Optional[str] = None,
+        names: Optional[Dict[str, str]] = None,
+        values: Optional[Item] = None,
+        return_values: str = "NONE",
+    ) -> Item:
+        kwargs: Dict[str, Any] = {"Key": key, "UpdateExpression": expression, "ReturnValues": return_values}
+        kwargs.update(_condition_kwargs(condition, names, values))
+        return self._call("update_item", **kwargs).get("Attributes", {})
+
+    def delete_item(
+        self,
+        key: Item,
+        *,
+        condition: Optional[str] = None,
+        names: Optional[Dict[str, str]] = None,
+        values: Optional[Item] = None,
+    ) -> None:
+        kwargs: Dict[str, Any] = {"Key": key}
+        kwargs.update(_condition_kwargs(condition, names, values))
+        self._call("delete_item", **kwargs)
+
+    def _call(self, operation: str, **kwargs) -> Dict[str, Any]:
+        return self._timed(operation, TableName=self._table_name, **kwargs)
+
+    def _timed(self, operation: str, **kwargs) -> Dict[str, Any]:
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return getattr(self._client, operation)(**kwargs) or {}
+        except ClientError as exc:
+            outcome = exc.response.get("Error", {}).get("Code", "ClientError")
+            if outcome == "ConditionalCheckFailedException":
+                raise ConditionalCheckFailedError(exc.response.get("Item")) from exc
+            raise
+        finally:
+            _LOGGER.debug(
+                "DynamoDB %s on %s took %.1f ms (%s)",
+                operation,
+                self._table_name,
+                (time.perf_counter() - started) * 1000,
+                outcome,
+            )
+
+
+def _condition_kwargs(condition: Optional[str], names: Optional[Dict[str, str]], values: Optional[Item]) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {}
+    if condition:
+        kwargs["ConditionExpression"] = condition
+    if names:
+        kwargs["ExpressionAttributeNames"] = names
+    if values:
+        kwargs["ExpressionAttributeValues"] = values
+    return kwargs
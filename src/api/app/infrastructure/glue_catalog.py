@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from botocore.exceptions import ClientError
+
+
+_SWAP_ATTEMPTS = 3
+_PARTITION_WRITE_BATCH = 100  # BatchCreatePartition / BatchUpdatePartition limit
+_PARTITION_READ_BATCH = 1000  # BatchGetPartition limit
+_PARTITION_INPUT_KEYS = ("Values", "StorageDescriptor", "Parameters")
+# Unprocessed keys mean Glue is throttling: retry with capped, jittered backoff.
+_PARTITION_READ_ATTEMPTS = 6
+_PARTITION_READ_BACKOFF_SECONDS = 0.05
+_PARTITION_READ_MAX_BACKOFF_SECONDS = 1.0
+
+# GetTable returns read-only fields (CreateTime, VersionId, ...) that TableInput rejects.
+_TABLE_INPUT_KEYS = (
+    "Description",
+    "Owner",
+    "Retention",
+    "StorageDescriptor",
+    "PartitionKeys",
+    "TableType",
+    "Parameters",
+)
+
+
+class GlueCatalog:
+    """Table-definition moves for swapping a freshly built table in under a live name.
+
+    Only catalog entries change here. Deleting a definition never touches its data, so
+    readers that already planned against the old location keep reading it.
+    """
+
+    def __init__(self, glue: Any, *, catalog_id: Optional[str] = None) -> None:
+        self._glue = glue
+        self._catalog = {"CatalogId": catalog_id} if catalog_id else {}
+
+    def table(self, database: str, table: str) -> Optional[Dict[str, Any]]:
+        """The table's definition, or None when the catalog has no such table."""
+        try:
+            return self._glue.get_table(DatabaseName=database, Name=table, **self._catalog)["Table"]
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") == "EntityNotFoundException":
+                return None
+            raise
+
+    def swap(self, database: str, table: str, source: str) -> Optional[str]:
+        """Points ``table`` at ``source``'s definition; returns the data location it had before.
+
+        The switch is one UpdateTable call (CreateTable when ``table`` is new), so a reader
+        sees either the old or the new definition, never a missing table. The update is
+        conditional on the version read, so two swaps racing on one table cannot both
+        report the same previous location. ``source``'s own entry is left for the caller
+        to drop.
+        """
+        built = self.table(database, source)
+        if built is None:
+            raise LookupError(f"{database}.{source} is not in the catalog")
+        table_input = {key: built[key] for key in _TABLE_INPUT_KEYS if key in built}
+        table_input["Name"] = table
+
+        attempt = 1
+        while True:
+            current = self.table(database, table)
+            try:
+                if current is None:
+                    self._glue.create_table(DatabaseName=database, TableInput=table_input, **self._catalog)
+                else:
+                    version = {"VersionId": current["VersionId"]} if current.get("VersionId") else {}
+                    self._glue.update_table(DatabaseName=database, TableInput=table_input, SkipArchive=True, **version, **self._catalog)
+            except ClientError as exc:
+                code = exc.response.get("Error", {}).get("Code")
+                if code not in ("ConcurrentModificationException", "AlreadyExistsException") or attempt >= _SWAP_ATTEMPTS:
+                    raise
+                attempt += 1
+                continue
+            return _location(current)
+
+    def swap_partitions(self, database: str, table: str, source: str) -> List[str]:
+        """Points ``table``'s partitions at the ones ``source`` holds, adding those it lacks.
+
+        Each partition switches in a single update, so readers see either its old or its
+        new files. Partitions switch a batch at a time rather than all together. Returns the
+        locations of the partitions that were replaced.
+        """
+        built = self.partitions(database, source)
+        current = {tuple(p["Values"]): p for p in self._batch_get_partitions(database, table, [p["Values"] for p in built])}
+        creates, updates, previous = [], [], []
+        for partition in built:
+            partition_input = {key: partition[key] for key in _PARTITION_INPUT_KEYS if key in partition}
+            old = current.get(tuple(partition["Values"]))
+            if old is None:
+                creates.append(partition_input)
+            else:
+                updates.append({"PartitionValueList": partition["Values"], "PartitionInput": partition_input})
+                previous.append(_location(old))
+        for batch in _batches(creates, _PARTITION_WRITE_BATCH):
+            response = self._glue.batch_create_partition(DatabaseName=database, TableName=table, PartitionInputList=batch, **self._catalog)
+            _raise_partition_errors(response, "BatchCreatePartition")
+        for batch in _batches(updates, _PARTITION_WRITE_BATCH):
+            response = self._glue.batch_update_partition(DatabaseName=database, TableName=table, Entries=batch, **self._catalog)
+            _raise_partition_errors(response, "BatchUpdatePartition")
+        return [location for location in previous if location]
+
+    def partitions(self, database: str, table: str) -> List[Dict[str, Any]]:
+        partitions: List[Dict[str, Any]] = []
+        for page in self._glue.get_paginator("get_partitions").paginate(DatabaseName=database, TableName=table, **self._catalog):
+            partitions.extend(page.get("Partitions") or [])
+        return partitions
+
+    def _batch_get_partitions(self, database: str, table: str, values: Sequence[List[str]]) -> List[Dict[str, Any]]:
+        found: List[Dict[str, Any]] = []
+        for batch in _batches(list(values), _PARTITION_READ_BATCH):
+            pending = [{"Values": partition_values} for partition_values in batch]
+            for attempt in range(_PARTITION_READ_ATTEMPTS):
+                if attempt:
+                    time.sleep(random.uniform(0, min(_PARTITION_READ_MAX_BACKOFF_SECONDS, _PARTITION_READ_BACKOFF_SECONDS * 2 ** attempt)))
+                response = self._glue.batch_get_partition(DatabaseName=database, TableName=table, PartitionsToGet=pending, **self._catalog)
+                found.extend(response.get("Partitions") or [])
+                pending = response.get("UnprocessedKeys") or []
+                if not pending:
+                    break
+            else:
+                message = f"{len(pending)} partitions of {database}.{table} left unprocessed"
+                raise ClientError({"Error": {"Code": "ThrottlingException", "Message": message}}, "BatchGetPartition")
+        return found
+
+    def drop(self, database: str, table: str) -> None:
+        """Removes the catalog entry only; a table already gone is not an error."""
+        try:
+            self._glue.delete_table(DatabaseName=database, Name=table, **self._catalog)
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") != "EntityNotFoundException":
+                raise
+
+
+def _location(entry: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not entry:
+        return None
+    return (entry.get("StorageDescriptor") or {}).get("Location") or None
+
+
+def _batches(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _raise_partition_errors(response: Dict[str, Any], operation: str) -> None:
+    errors = response.get("Errors") or []
+    if errors:
+        detail = errors[0].get("ErrorDetail") or {}
+        raise ClientError({"Error": {"Code": detail.get("ErrorCode", "PartitionError"), "Message": detail.get("ErrorMessage", "")}}, operation)
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import uuid
+from typing import Optional
+
+from .aws_clients import AwsClients
+
+
+class S3ResponseSpill:
+    """Parks response bodies too large to return inline in S3 and hands back a presigned GET URL.
+
+    Objects are written under ``prefix``; expire them with a bucket lifecycle rule on that prefix.
+    """
+
+    def __init__(self, clients: AwsClients, bucket: str, *, prefix: str = "api-responses/", ttl_seconds: int = 300) -> None:
+        self._clients = clients
+        self._bucket = bucket
+        self._prefix = prefix
+        self._ttl_seconds = ttl_seconds
+
+    def __call__(self, body: bytes, content_type: str, content_encoding: Optional[str]) -> str:
+        # The S3 client is only created when a response actually spills.
+        s3 = self._clients.s3()
+        key = f"{self._prefix}{uuid.uuid4()}.json"
+        extra = {"ContentEncoding": content_encoding} if content_encoding else {}
+        s3.put_object(Bucket=self._bucket, Key=key, Body=body, ContentType=content_type, **extra)
+        return s3.generate_presigned_url(
+            ClientMethod="get_object",
+            Params={"Bucket": self._bucket, "Key": key},
+            ExpiresIn=self._ttl_seconds,
+        )
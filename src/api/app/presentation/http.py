@@ -1,11 +1,88 @@
 ﻿from __future__ import annotations
 
+import base64
+import dataclasses
+import gzip
 import json
-from typing import Any, Iterable, Sequence
+from functools import lru_cache
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Sequence, Tuple
+
+from .timing import current_timings, phase
+
+try:
+    import brotli
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    orjson = None
 
 
 _DEFAULT_ALLOWED_HEADERS = "Content-Type,Authorization"
 
+# Bodies smaller than this are sent as-is; compressing them costs more than it saves.
+COMPRESSION_MIN_BYTES = 1024
+# Lambda caps synchronous responses at 6 MB (API Gateway at 10 MB); keep headroom for headers.
+MAX_INLINE_BODY_BYTES = 5_500_000
+
+# Receives (body bytes, content type, content encoding) and returns a URL serving them.
+SpillFn = Callable[[bytes, str, Optional[str]], str]
+
+
+class JsonCodec:
+    """Stdlib JSON codec. Dataclass models are encoded field by field, without ``to_dict``."""
+
+    name = "json"
+
+    def dumps(self, payload: Any) -> bytes:
+        return json.dumps(payload, default=_encode_model).encode("utf-8")
+
+    def loads(self, data: str | bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson-backed codec; serializes dataclasses natively."""
+
+    name = "orjson"
+
+    def dumps(self, payload: Any) -> bytes:
+        return orjson.dumps(payload, default=_encode_model, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: str | bytes) -> Any:
+        return orjson.loads(data)
+
+
+def available_codecs() -> Dict[str, JsonCodec]:
+    codecs: Dict[str, JsonCodec] = {"json": JsonCodec()}
+    if orjson is not None:
+        codecs["orjson"] = OrjsonCodec()
+    return codecs
+
+
+_codec: JsonCodec = OrjsonCodec() if orjson is not None else JsonCodec()
+
+
+def get_codec() -> JsonCodec:
+    return _codec
+
+
+def set_codec(codec: JsonCodec | str) -> JsonCodec:
+    """Swaps the codec used for request and response bodies; returns the previous one."""
+    global _codec
+    previous = _codec
+    _codec = available_codecs()[codec] if isinstance(codec, str) else codec
+    return previous
+
+
+def _encode_model(value: Any) -> Any:
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        # Shallow on purpose: nested models come back through this hook.
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
 
 def build_json_response(
     status_code: int,
@@ -14,18 +91,96 @@ def build_json_response(
     allowed_methods: Iterable[str],
     allowed_headers: str = _DEFAULT_ALLOWED_HEADERS,
     request_origin: str | None = None,
+    accept_encoding: str | None = None,
+    spill: SpillFn | None = None,
 ) -> dict:
-    origin_header = _resolve_origin(allowed_origin, request_origin)
-    return {
-        "statusCode": status_code,
-        "headers": {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": origin_header,
-            "Access-Control-Allow-Headers": allowed_headers,
-            "Access-Control-Allow-Methods": _format_methods(allowed_methods),
-        },
-        "body": json.dumps(payload),
-    }
+    """Builds a JSON proxy response.
+
+    With ``accept_encoding`` the body is gzip/br compressed (base64 for API Gateway) once it
+    passes ``COMPRESSION_MIN_BYTES``. With ``spill``, a body still over ``MAX_INLINE_BODY_BYTES``
+    is handed to it and the client is redirected (303) to the returned URL.
+
+    During a timed request (see ``app.presentation.timing``) the phases recorded so far are
+    returned in a ``Server-Timing`` header, and in a ``timings`` field when the caller asked.
+    """
+    headers = _policy_for(allowed_origin, allowed_methods, allowed_headers).response_headers(request_origin)
+    timings = current_timings()
+    if timings is not None and timings.include_in_body:
+        payload = _with_timings(payload, timings.to_dict())
+    with phase("serialize"):
+        raw = _codec.dumps(payload)
+    if accept_encoding is None and spill is None:
+        response = {"statusCode": status_code, "headers": headers, "body": raw.decode("utf-8")}
+    else:
+        with phase("encode"):
+            response = _encode_response(status_code, headers, raw, accept_encoding, spill)
+    if timings is not None:
+        response["headers"]["Server-Timing"] = timings.header()
+        # Lets the browser expose the entries to cross-origin pages (PerformanceServerTiming).
+        if "Access-Control-Allow-Origin" in response["headers"]:
+            response["headers"]["Timing-Allow-Origin"] = response["headers"]["Access-Control-Allow-Origin"]
+    return response
+
+
+def _with_timings(payload: Any, timings: Dict[str, Any]) -> Any:
+    if isinstance(payload, dict):
+        return {**payload, "timings": timings}
+    if dataclasses.is_dataclass(payload) and not isinstance(payload, type):
+        return {**_encode_model(payload), "timings": timings}
+    return payload
+
+
+def _encode_response(status_code: int, headers: dict, raw: bytes, accept_encoding: str | None, spill: SpillFn | None) -> dict:
+    encoding = negotiate_encoding(accept_encoding) if len(raw) >= COMPRESSION_MIN_BYTES else None
+    if accept_encoding is not None:
+        headers["Vary"] = "Accept-Encoding"
+    response = {"statusCode": status_code, "headers": headers, "body": raw.decode("utf-8")}
+    if encoding:
+        raw = _compress(raw, encoding)
+        headers["Content-Encoding"] = encoding
+        response["body"] = base64.b64encode(raw).decode("ascii")
+        response["isBase64Encoded"] = True
+
+    if spill is not None and len(response["body"]) > MAX_INLINE_BODY_BYTES:
+        location = spill(raw, headers["Content-Type"], encoding)
+        redirect_headers = {key: value for key, value in headers.items() if key.startswith("Access-Control-")}
+        redirect_headers["Location"] = location
+        return {"statusCode": 303, "headers": redirect_headers, "body": ""}
+    return response
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Picks ``br`` or ``gzip`` from an ``Accept-Encoding`` header, honouring q-values."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        weights[token] = quality
+
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_quality = None, 0.0
+    for candidate in supported:
+        quality = weights.get(candidate, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = candidate, quality
+    return best
+
+
+def _compress(raw: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(raw, quality=5)
+    return gzip.compress(raw, compresslevel=5)
 
 
 def build_preflight_response(
@@ -34,40 +189,91 @@ def build_preflight_response(
     allowed_headers: str = _DEFAULT_ALLOWED_HEADERS,
     request_origin: str | None = None,
 ) -> dict:
-    origin_header = _resolve_origin(allowed_origin, request_origin)
     return {
         "statusCode": 200,
-        "headers": {
-            "Access-Control-Allow-Origin": origin_header,
-            "Access-Control-Allow-Headers": allowed_headers,
-            "Access-Control-Allow-Methods": _format_methods(allowed_methods),
-        },
+        "headers": _policy_for(allowed_origin, allowed_methods, allowed_headers).preflight_headers(request_origin),
         "body": "",
     }
 
 
-def parse_json(body: str | None, default: Any) -> Any:
-    if body is None or body == "":
-        return default
-    return json.loads(body)
+class CorsPolicy:
+    """CORS headers precomputed for one origin/method/header configuration.
 
+    Built once per settings (see :func:`cors_policy`); answering a request is a set lookup
+    plus a copy of a prebuilt header dict.
+    """
 
-def extract_origin(event: dict | None) -> str | None:
+    __slots__ = ("origins", "default_origin", "methods", "_preflight", "_response")
+
+    def __init__(self, allowed_origin: str | Sequence[str], allowed_methods: Iterable[str], allowed_headers: str) -> None:
+        ordered = _normalize_origins(allowed_origin)
+        wildcard = not ordered or "*" in ordered
+        self.origins: FrozenSet[str] = frozenset() if wildcard else frozenset(ordered)
+        self.default_origin = "*" if wildcard else ordered[0]
+        self.methods = _format_methods(allowed_methods)
+        base = {"Access-Control-Allow-Headers": allowed_headers, "Access-Control-Allow-Methods": self.methods}
+        self._preflight = {
+            origin: {"Access-Control-Allow-Origin": origin, **base} for origin in self.origins | {self.default_origin}
+        }
+        self._response = {
+            origin: {"Content-Type": "application/json", **headers} for origin, headers in self._preflight.items()
+        }
+
+    def allow_origin(self, request_origin: str | None) -> str:
+        return request_origin if request_origin in self.origins else self.default_origin
+
+    def preflight_headers(self, request_origin: str | None) -> dict:
+        return dict(self._preflight[self.allow_origin(request_origin)])
+
+    def response_headers(self, request_origin: str | None) -> dict:
+        return dict(self._response[self.allow_origin(request_origin)])
+
+
+@lru_cache(maxsize=64)
+def cors_policy(allowed_origin: str | Tuple[str, ...], allowed_methods: Tuple[str, ...], allowed_headers: str = _DEFAULT_ALLOWED_HEADERS) -> CorsPolicy:
+    return CorsPolicy(allowed_origin, allowed_methods, allowed_headers)
+
+
+def _policy_for(allowed_origin: str | Sequence[str], allowed_methods: Iterable[str], allowed_headers: str) -> CorsPolicy:
+    origin_key = allowed_origin if isinstance(allowed_origin, str) else tuple(allowed_origin)
+    methods_key = allowed_methods if isinstance(allowed_methods, tuple) else tuple(allowed_methods)
+    return cors_policy(origin_key, methods_key, allowed_headers)
+
+
+def extract_header(event: dict | None, name: str) -> str | None:
     if not event:
         return None
+    value = _header_value(event.get("headers"), name)
+    if value:
+        return value
+    return _header_value(event.get("multiValueHeaders"), name)
 
-    origin = _origin_from_headers(event.get("headers"))
-    if origin:
-        return origin
 
-    return _origin_from_multi_headers(event.get("multiValueHeaders"))
+def extract_principals(event: dict | None) -> list[str]:
+    """Cognito username followed by its groups, from the authorizer claims; empty when unauthenticated."""
+    claims = (((event or {}).get("requestContext") or {}).get("authorizer") or {}).get("claims") or {}
+    username = claims.get("cognito:username") or claims.get("username") or claims.get("sub")
+    groups = claims.get("cognito:groups") or []
+    if isinstance(groups, str):
+        # REST API authorizers flatten list claims to "[a, b]" or "a,b".
+        groups = [group.strip() for group in groups.strip("[]").replace(",", " ").split()]
+    return ([username] if username else []) + [group for group in groups if group]
 
 
-def _origin_from_multi_headers(headers: Any) -> str | None:
+def _header_value(headers: Any, name: str) -> str | None:
     if not isinstance(headers, dict):
         return None
+    # API Gateway passes header names as sent: canonical over HTTP/1.1, lowercase over HTTP/2.
+    wanted = name.lower()
+    value = headers.get(name)
+    if value is None:
+        value = headers.get(wanted)
+    if value is not None:
+        if isinstance(value, list):
+            return value[0] if value else None
+        return value
     for key, value in headers.items():
-        if key.lower() != "origin":
+        if key.lower() != wanted:
             continue
         if isinstance(value, list):
             return value[0] if value else None
@@ -75,25 +281,15 @@ def _origin_from_multi_headers(headers: Any) -> str | None:
     return None
 
 
-def _origin_from_headers(headers: Any) -> str | None:
-    if isinstance(headers, dict):
-        for key, value in headers.items():
-            if key.lower() == "origin":
-                if isinstance(value, list):
-                    return value[0] if value else None
-                return value
-    return None
+def parse_json(body: str | None, default: Any) -> Any:
+    if body is None or body == "":
+        return default
+    with phase("parse"):
+        return _codec.loads(body)
 
 
-def _resolve_origin(allowed_origin: str | Sequence[str], request_origin: str | None) -> str:
-    origins = _normalize_origins(allowed_origin)
-    if not origins:
-        return "*"
-    if "*" in origins:
-        return "*"
-    if request_origin and request_origin in origins:
-        return request_origin
-    return origins[0]
+def extract_origin(event: dict | None) -> str | None:
+    return extract_header(event, "Origin")
 
 
 def _normalize_origins(value: str | Sequence[str]) -> list[str]:
@@ -114,11 +310,15 @@ def _format_methods(methods: Iterable[str]) -> str:
 def prepare_request(event: dict | str | None, allowed_methods: Iterable[str], allowed_origin: str | Sequence[str]) -> tuple[dict, str | None, dict | None]:
     evt: dict
     if isinstance(event, str):
-        evt = json.loads(event)
+        evt = _codec.loads(event)
     elif isinstance(event, dict):
         evt = event
     else:
         evt = {}
+    if evt.get("isBase64Encoded") and evt.get("body"):
+        # The API treats */* as binary (so compressed responses pass through), which
+        # also base64-encodes request bodies.
+        evt = {**evt, "body": base64.b64decode(evt["body"]).decode("utf-8"), "isBase64Encoded": False}
     origin = extract_origin(evt)
     method = (evt.get("httpMethod") or "").upper()
     if method == "OPTIONS":
@@ -1,16 +1,155 @@
-﻿import logging
+﻿import datetime
+import json
+import logging
+import os
+import random
+import sys
+from contextvars import ContextVar
 from functools import lru_cache
+from typing import Any, Dict, List, Optional, TextIO
 
 
-@lru_cache(maxsize=1)
-def get_logger(name: str = "sewingmachine") -> logging.Logger:
-    logger = logging.getLogger(name)
-    if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(
-            "%(asctime)s [%(levelname)s] %(name)s %(message)s"
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
-    return logger
+ROOT_LOGGER = "sewingmachine"
+
+# Attributes every LogRecord carries; anything else on a record came from ``extra=``.
+_RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "context"}
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("sewingmachine_log_context", default={})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: level, logger, message, request context and ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", None) or {})
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class BufferedHandler(logging.Handler):
+    """Holds records during an invocation and writes them in one batch when flushed.
+
+    Records are only formatted at flush time. Outside an invocation, and for records at
+    ``flush_level`` or above, the buffer is flushed immediately so nothing important waits.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None, capacity: int = 500, flush_level: int = logging.ERROR) -> None:
+        super().__init__()
+        self.stream = stream or sys.stdout
+        self.capacity = capacity
+        self.flush_level = flush_level
+        self.buffering = False
+        self._records: List[logging.LogRecord] = []
+        self.addFilter(_capture_context)
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self._records.append(record)
+        if not self.buffering or record.levelno >= self.flush_level or len(self._records) >= self.capacity:
+            self.flush()
+
+    def flush(self) -> None:
+        self.acquire()
+        try:
+            records, self._records = self._records, []
+            if not records:
+                return
+            lines = []
+            for record in records:
+                try:
+                    lines.append(self.format(record))
+                except Exception:  # pragma: no cover - defensive
+                    self.handleError(record)
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        finally:
+            self.release()
+
+
+def _capture_context(record: logging.LogRecord) -> bool:
+    # Snapshot now: formatting is deferred until the buffer flushes.
+    record.context = _context.get()
+    return True
+
+
+class _LoggingState:
+    handler: Optional[BufferedHandler] = None
+    level: int = logging.INFO
+    debug_sample_rate: float = 0.0
+
+
+_state = _LoggingState()
+
+
+def configure_logging(
+    stream: Optional[TextIO] = None,
+    level: Optional[str] = None,
+    debug_sample_rate: Optional[float] = None,
+) -> BufferedHandler:
+    """(Re)installs the JSON handler on the ``sewingmachine`` logger tree.
+
+    ``LOG_LEVEL`` sets the base level and ``LOG_DEBUG_SAMPLE_RATE`` the share of invocations
+    that log at DEBUG.
+    """
+    root = logging.getLogger(ROOT_LOGGER)
+    if _state.handler is not None:
+        _state.handler.flush()
+        root.removeHandler(_state.handler)
+
+    handler = BufferedHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    root.addHandler(handler)
+    # Lambda's runtime attaches its own root handler; don't emit every line twice.
+    root.propagate = False
+
+    _state.handler = handler
+    _state.level = logging.getLevelName((level or os.environ.get("LOG_LEVEL") or "INFO").upper())
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.environ.get("LOG_DEBUG_SAMPLE_RATE") or 0.0)
+    _state.debug_sample_rate = debug_sample_rate
+    root.setLevel(_state.level)
+    return handler
+
+
+@lru_cache(maxsize=None)
+def get_logger(name: str = ROOT_LOGGER) -> logging.Logger:
+    if _state.handler is None:
+        configure_logging()
+    return logging.getLogger(name)
+
+
+def begin_request(**context: Any) -> None:
+    """Binds request context, decides debug sampling and starts buffering for one invocation."""
+    if _state.handler is None:
+        configure_logging()
+    sampled = _state.level > logging.DEBUG and random.random() < _state.debug_sample_rate
+    if sampled:
+        context["debugSampled"] = True
+    # The level, not a filter, gates debug lines: unsampled debug calls stop at isEnabledFor.
+    logging.getLogger(ROOT_LOGGER).setLevel(logging.DEBUG if sampled else _state.level)
+    _context.set({key: value for key, value in context.items() if value is not None})
+    _state.handler.buffering = True
+
+
+def add_log_context(**fields: Any) -> None:
+    """Adds fields (e.g. runId, queryExecutionId) to every later line of this invocation."""
+    _context.set({**_context.get(), **{key: value for key, value in fields.items() if value is not None}})
+
+
+def end_request() -> None:
+    """Flushes the invocation's buffered lines and clears its context."""
+    handler = _state.handler
+    if handler is not None:
+        handler.buffering = False
+        handler.flush()
+    logging.getLogger(ROOT_LOGGER).setLevel(_state.level)
+    _context.set({})
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import functools
+import signal
+import threading
+import time
+from typing import Any, Callable, Generic, List, Optional, TypeVar
+
+from ..infrastructure.aws_clients import get_clients
+from ..infrastructure.aws_metrics import AWS_CALL_METRICS
+from .http import extract_header
+from .logging import begin_request as begin_request_logging, end_request as end_request_logging, get_logger
+from .timing import begin_timings, end_timings
+
+
+_LOGGER = get_logger("sewingmachine.runtime")
+
+# API Gateway answers 504 after 29 s whatever the Lambda timeout is.
+API_GATEWAY_TIMEOUT_SECONDS = 29.0
+
+S = TypeVar("S")
+RequestHook = Callable[[dict, Any], None]
+Handler = Callable[[Any, Any], dict]
+ShutdownHook = Callable[[Any], None]
+
+_RUNTIMES: List["HandlerRuntime"] = []
+_sigterm_installed = False
+
+
+class HandlerRuntime(Generic[S]):
+    """Owns a route's service for the lifetime of the Lambda container.
+
+    ``init`` builds the service on first use and the instance is reused by every
+    warm invocation. ``on_request`` hooks run before each invocation,
+    ``on_request_end`` hooks after it, and ``on_shutdown`` hooks run once when the
+    container is shut down (SIGTERM). Wrap the entry point with :meth:`entrypoint`.
+    """
+
+    def __init__(self, init: Callable[[], S]) -> None:
+        self._init = init
+        self._service: Optional[S] = None
+        self._lock = threading.Lock()
+        self._request_hooks: List[RequestHook] = []
+        self._request_end_hooks: List[RequestHook] = []
+        self._shutdown_hooks: List[ShutdownHook] = []
+        _RUNTIMES.append(self)
+        _install_sigterm_handler()
+
+    @property
+    def initialized(self) -> bool:
+        return self._service is not None
+
+    def on_request(self, hook: RequestHook) -> RequestHook:
+        self._request_hooks.append(hook)
+        return hook
+
+    def on_request_end(self, hook: RequestHook) -> RequestHook:
+        self._request_end_hooks.append(hook)
+        return hook
+
+    def on_shutdown(self, hook: ShutdownHook) -> ShutdownHook:
+        self._shutdown_hooks.append(hook)
+        return hook
+
+    def warm_clients(self, region: str, *services: str, **optional: object) -> None:
+        """Builds the route's AWS clients during Lambda init instead of on its first request.
+
+        Call it at module level. ``services`` are always built; an ``optional`` one (e.g.
+        ``glue=budgeted``) only when its value is truthy, i.e. the feature using it is on.
+        """
+        get_clients(region).warm(*services, *(service for service, wanted in optional.items() if wanted))
+
+    def service(self) -> S:
+        if self._service is None:
+            with self._lock:
+                if self._service is None:
+                    self._service = self._init()
+        return self._service
+
+    def begin_request(self, event: dict, context: Any) -> None:
+        for hook in self._request_hooks:
+            hook(event, context)
+
+    def end_request(self, event: dict, context: Any) -> None:
+        for hook in self._request_end_hooks:
+            try:
+                hook(event, context)
+            except Exception:  # pragma: no cover - defensive
+                _LOGGER.exception("Request end hook failed")
+
+    def entrypoint(self, handler: Handler) -> Handler:
+        """Wraps a Lambda handler with the per-invocation logging context, phase timings, end hooks and AWS call metrics."""
+
+        @functools.wraps(handler)
+        def invoke(event, context):
+            event_obj = event if isinstance(event, dict) else {}
+            route = event_obj.get("resource")
+            begin_request_logging(
+                requestId=getattr(context, "aws_request_id", None),
+                apiRequestId=(event_obj.get("requestContext") or {}).get("requestId"),
+                route=route,
+                method=event_obj.get("httpMethod"),
+            )
+            begin_timings(include_in_body=_wants_timings(event_obj))
+            try:
+                return handler(event, context)
+            finally:
+                self.end_request(event_obj, context)
+                AWS_CALL_METRICS.flush(Route=route)
+                end_timings()
+                end_request_logging()
+
+        return invoke
+
+    def shutdown(self) -> None:
+        service, self._service = self._service, None
+        if service is None:
+            return
+        for hook in self._shutdown_hooks:
+            try:
+                hook(service)
+            except Exception:  # pragma: no cover - defensive
+                _LOGGER.exception("Shutdown hook failed")
+
+    def reset(self) -> None:
+        self._service = None
+
+
+def invocation_deadline(context: Any, reserve_seconds: float = 0.0) -> Optional[float]:
+    """``time.monotonic()`` value ``reserve_seconds`` before this invocation (or API Gateway) gives up.
+
+    None without a Lambda context, e.g. when a handler is called directly.
+    """
+    remaining_ms = getattr(context, "get_remaining_time_in_millis", None)
+    if remaining_ms is None:
+        return None
+    remaining = min(remaining_ms() / 1000, API_GATEWAY_TIMEOUT_SECONDS)
+    return time.monotonic() + remaining - reserve_seconds
+
+
+def _wants_timings(event: dict) -> bool:
+    # ``?timings=1`` or ``X-Debug-Timings: 1`` adds a ``timings`` field to the response body.
+    requested = (event.get("queryStringParameters") or {}).get("timings") or extract_header(event, "X-Debug-Timings")
+    return str(requested or "").strip().lower() in {"1", "true", "yes", "on"}
+
+
+def reset_runtimes() -> None:
+    """Drops every cached service so the next invocation rebuilds it. Intended for tests."""
+    for runtime in _RUNTIMES:
+        runtime.reset()
+
+
+def shutdown_runtimes() -> None:
+    for runtime in _RUNTIMES:
+        runtime.shutdown()
+
+
+def _install_sigterm_handler() -> None:
+    global _sigterm_installed
+    if _sigterm_installed:
+        return
+    try:
+        previous = signal.getsignal(signal.SIGTERM)
+    except ValueError:  # pragma: no cover - not on the main thread
+        return
+
+    def _handle_sigterm(signum, frame):
+        shutdown_runtimes()
+        if callable(previous):
+            previous(signum, frame)
+        else:
+            raise SystemExit(0)
+
+    try:
+        signal.signal(signal.SIGTERM, _handle_sigterm)
+    except ValueError:  # pragma: no cover - not on the main thread
+        return
+    _sigterm_installed = True
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+
+_timings: ContextVar[Optional["RequestTimings"]] = ContextVar("sewingmachine_request_timings", default=None)
+
+
+class RequestTimings:
+    """Wall-clock time spent per phase of one request (parse, validate, athena-wait, ...).
+
+    A phase entered several times (e.g. one S3 listing per layer) accumulates its
+    duration and count, also from worker threads running in a copy of the request's
+    context. ``include_in_body`` asks for a ``timings`` field in the response.
+    """
+
+    __slots__ = ("started", "include_in_body", "_phases", "_lock")
+
+    def __init__(self, include_in_body: bool = False) -> None:
+        self.started = time.perf_counter()
+        self.include_in_body = include_in_body
+        self._phases: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            entry = self._phases.get(name)
+            if entry is None:
+                self._phases[name] = [elapsed_ms, 1]
+            else:
+                entry[0] += elapsed_ms
+                entry[1] += 1
+
+    def total_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def header(self) -> str:
+        """``Server-Timing`` value: one ``name;dur=ms`` entry per phase, then ``total``."""
+        entries = [
+            f"{name};dur={elapsed:.1f}" + (f';desc="x{int(count)}"' if count > 1 else "")
+            for name, (elapsed, count) in self._phases.items()
+        ]
+        entries.append(f"total;dur={self.total_ms():.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "totalMs": round(self.total_ms(), 1),
+            "phases": {name: {"ms": round(elapsed, 1), "count": int(count)} for name, (elapsed, count) in self._phases.items()},
+        }
+
+
+@lru_cache(maxsize=1)
+def server_timing_enabled() -> bool:
+    """``SERVER_TIMING=off`` turns the header (and per-phase bookkeeping) off."""
+    return (os.environ.get("SERVER_TIMING") or "on").strip().lower() not in {"0", "off", "false", "no"}
+
+
+def begin_timings(include_in_body: bool = False) -> Optional[RequestTimings]:
+    timings = RequestTimings(include_in_body) if server_timing_enabled() else None
+    _timings.set(timings)
+    return timings
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _timings.get()
+
+
+def end_timings() -> None:
+    _timings.set(None)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Times the enclosed block as ``name`` on the current request; a no-op outside one."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, (time.perf_counter() - started) * 1000)
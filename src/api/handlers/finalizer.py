@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Tuple
+
+from app.application.materialize_service import MaterializeService
+from app.config.settings import get_admission_settings, get_materialize_settings
+from app.domain.errors import DomainError
+from app.infrastructure.admission import AthenaAdmission, build_admission
+from app.infrastructure.aws_clients import get_clients
+from app.presentation.logging import get_logger
+from app.presentation.runtime import HandlerRuntime
+
+
+_LOGGER = get_logger("sewingmachine.finalizer.handler")
+
+# Not an API route: a schedule runs it every minute to finish work nobody is polling.
+# An async replace or overwrite_partitions job is swapped in (or its build discarded)
+# here when no client reads its status, and the admission leases of async queries
+# (/query, /query/batch, /materialize) are renewed while they run and released after.
+
+
+def _build_service() -> Tuple[MaterializeService, Optional[AthenaAdmission], Any]:
+    settings = get_materialize_settings()
+    clients = get_clients(settings.region)
+    return MaterializeService(settings, clients), build_admission(get_admission_settings(), clients), clients.athena()
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+_RUNTIME.warm_clients(get_materialize_settings().region, "athena", "glue", "dynamodb")
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
+    _RUNTIME.begin_request(event if isinstance(event, dict) else {}, context)
+    materialize, admission, athena = _RUNTIME.service()
+
+    # Jobs first: a job finalized here has its query finished, so its lease goes in the same run.
+    try:
+        jobs = materialize.finalize()
+    except DomainError as exc:
+        _LOGGER.error("Finalizing materialize jobs failed", extra={"error": str(exc)})
+        jobs = None
+    leases = admission.sweep(athena) if admission is not None else {}
+    _LOGGER.info("Finalized", extra={"jobs": jobs, "leases": leases})
+    return {"ok": jobs is not None, "jobs": jobs or {}, "leases": leases}
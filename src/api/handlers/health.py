@@ -3,14 +3,22 @@
 from app.application.health_service import HealthService
 from app.config.settings import get_health_settings
 from app.presentation.http import prepare_request, build_json_response, build_preflight_response, extract_origin
+from app.presentation.runtime import HandlerRuntime
 
 
-def lambda_handler(event, _context):
+ALLOWED_METHODS = ["OPTIONS", "GET"]
+
+_RUNTIME = HandlerRuntime(lambda: HealthService(get_health_settings()))
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
     settings = get_health_settings()
-    event_obj, origin, preflight = prepare_request(event, ["OPTIONS", "GET"], settings.allowed_origin)
+    event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
     if preflight:
         return preflight
+    _RUNTIME.begin_request(event_obj, context)
 
-    service = HealthService(settings)
+    service = _RUNTIME.service()
     payload = service.execute()
-    return build_json_response(200, payload, settings.allowed_origin, ["OPTIONS", "GET"], request_origin=origin)
+    return build_json_response(200, payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
@@ -1,22 +1,44 @@
 ﻿from __future__ import annotations
 
 from app.application.materialize_service import MaterializeService
-from app.config.settings import get_materialize_settings
+from app.config.settings import get_admission_settings, get_materialize_settings
 from app.domain.errors import DomainError
+from app.domain.models import MaterializeJob
+from app.infrastructure.admission import build_admission
 from app.infrastructure.aws_clients import get_clients
-from app.presentation.http import prepare_request, build_json_response, build_preflight_response, extract_origin, parse_json
+from app.presentation.http import prepare_request, build_json_response, build_preflight_response, extract_origin, parse_json, extract_principals
 from app.presentation.logging import get_logger
+from app.presentation.runtime import HandlerRuntime
 
 
 _LOGGER = get_logger("sewingmachine.materialize.handler")
 ALLOWED_METHODS = ["OPTIONS", "POST"]
 
 
-def lambda_handler(event, _context):
+def _build_service() -> MaterializeService:
+    settings = get_materialize_settings()
+    clients = get_clients(settings.region)
+    return MaterializeService(settings, clients, admission=build_admission(get_admission_settings(), clients))
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+# Glue describes the incremental modes' targets and swaps built tables in; DynamoDB holds
+# the job items and the admission-control leases when those are on.
+_RUNTIME.warm_clients(
+    get_materialize_settings().region,
+    "athena",
+    "glue",
+    dynamodb=get_materialize_settings().jobs_table_name or (get_admission_settings().capacity and get_admission_settings().table_name),
+)
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
     settings = get_materialize_settings()
     event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
     if preflight:
         return preflight
+    _RUNTIME.begin_request(event_obj, context)
 
 
     try:
@@ -25,11 +47,13 @@ def lambda_handler(event, _context):
         error_payload = {"error": {"code": "BadJson", "message": "Invalid JSON"}}
         return build_json_response(400, error_payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
 
-    service = MaterializeService(settings, get_clients(settings.region))
+    service = _RUNTIME.service()
 
     try:
-        result = service.execute(body)
-        return build_json_response(200, result, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+        result = service.execute(body, principals=extract_principals(event_obj))
+        # A tracked job has only been started: 202, then poll GET /materialize/{jobId}.
+        status_code = 202 if isinstance(result, MaterializeJob) else 200
+        return build_json_response(status_code, result, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
     except DomainError as exc:
         return build_json_response(exc.status_code, exc.payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
     except Exception:  # pragma: no cover
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from app.application.materialize_service import MaterializeService
+from app.config.settings import get_materialize_settings
+from app.domain.errors import DomainError
+from app.infrastructure.aws_clients import get_clients
+from app.presentation.http import prepare_request, build_json_response
+from app.presentation.logging import get_logger
+from app.presentation.runtime import HandlerRuntime
+
+
+_LOGGER = get_logger("sewingmachine.materialize_status.handler")
+ALLOWED_METHODS = ["OPTIONS", "GET"]
+
+
+def _build_service() -> MaterializeService:
+    settings = get_materialize_settings()
+    return MaterializeService(settings, get_clients(settings.region))
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+# Glue swaps a finished replace job's table in.
+_RUNTIME.warm_clients(get_materialize_settings().region, "athena", "dynamodb", glue=get_materialize_settings().build_location)
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
+    settings = get_materialize_settings()
+    event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
+    if preflight:
+        return preflight
+    _RUNTIME.begin_request(event_obj, context)
+
+    job_id = (event_obj.get("pathParameters") or {}).get("jobId")
+    service = _RUNTIME.service()
+
+    try:
+        result = service.status(job_id)
+        return build_json_response(200, result, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except DomainError as exc:
+        return build_json_response(exc.status_code, exc.payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except Exception:  # pragma: no cover - defensive
+        _LOGGER.exception("Unhandled error while reading materialize job status")
+        payload = {"error": {"code": "InternalError", "message": "Unexpected failure"}}
+        return build_json_response(500, payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
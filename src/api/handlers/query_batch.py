@@ -0,0 +1,69 @@
+﻿from __future__ import annotations
+
+from app.application.query_service import QueryService
+from app.config.settings import get_admission_settings, get_query_settings
+from app.domain.errors import DomainError
+from app.infrastructure.admission import build_admission
+from app.infrastructure.aws_clients import get_clients
+from app.infrastructure.response_spill import S3ResponseSpill
+from app.presentation.http import prepare_request, build_json_response, parse_json, extract_header, extract_principals
+from app.presentation.logging import get_logger
+from app.presentation.runtime import HandlerRuntime, invocation_deadline
+
+
+_LOGGER = get_logger("sewingmachine.query_batch.handler")
+ALLOWED_METHODS = ["OPTIONS", "POST"]
+
+
+def _build_service() -> QueryService:
+    settings = get_query_settings()
+    clients = get_clients(settings.region)
+    return QueryService(settings, clients, admission=build_admission(get_admission_settings(), clients))
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+# Glue only estimates scans against a budget; DynamoDB only backs admission control.
+_RUNTIME.warm_clients(
+    get_query_settings().region,
+    "athena",
+    glue=get_query_settings().scan_budget_bytes or get_query_settings().user_scan_budgets,
+    dynamodb=get_admission_settings().capacity and get_admission_settings().table_name,
+)
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
+    settings = get_query_settings()
+    event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
+    if preflight:
+        return preflight
+    _RUNTIME.begin_request(event_obj, context)
+
+    try:
+        body = parse_json(event_obj.get("body"), default={})
+    except ValueError:
+        error_payload = {"error": {"code": "BadJson", "message": "Invalid JSON body"}}
+        return build_json_response(400, error_payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+
+    service = _RUNTIME.service()
+
+    try:
+        deadline = invocation_deadline(context, settings.cancel_reserve_seconds)
+        result = service.execute_batch(body, principals=extract_principals(event_obj), deadline=deadline)
+        spill = S3ResponseSpill(get_clients(settings.region), settings.response_spill_bucket) if settings.response_spill_bucket else None
+        # Statements fail on their own (see each result's status); 202 when any is still running.
+        return build_json_response(
+            202 if any(item.status == 202 for item in result.results) else 200,
+            result,
+            settings.allowed_origin,
+            ALLOWED_METHODS,
+            request_origin=origin,
+            accept_encoding=extract_header(event_obj, "Accept-Encoding"),
+            spill=spill,
+        )
+    except DomainError as exc:
+        return build_json_response(exc.status_code, exc.payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except Exception:  # pragma: no cover
+        _LOGGER.exception("Unhandled query batch error")
+        payload = {"error": {"code": "InternalError", "message": "Unexpected failure"}}
+        return build_json_response(500, payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from app.application.query_service import QueryService
+from app.config.settings import get_query_settings
+from app.domain.errors import DomainError
+from app.infrastructure.aws_clients import get_clients
+from app.presentation.http import prepare_request, build_json_response, extract_principals
+from app.presentation.logging import get_logger
+from app.presentation.runtime import HandlerRuntime
+
+
+_LOGGER = get_logger("sewingmachine.query_cancel.handler")
+ALLOWED_METHODS = ["OPTIONS", "DELETE"]
+
+
+def _build_service() -> QueryService:
+    settings = get_query_settings()
+    return QueryService(settings, get_clients(settings.region))
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+_RUNTIME.warm_clients(get_query_settings().region, "athena")
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
+    settings = get_query_settings()
+    event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
+    if preflight:
+        return preflight
+    _RUNTIME.begin_request(event_obj, context)
+
+    query_execution_id = (event_obj.get("pathParameters") or {}).get("queryExecutionId")
+    if not query_execution_id:
+        payload = {"error": {"code": "MissingParam", "message": "queryExecutionId required"}}
+        return build_json_response(400, payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    service = _RUNTIME.service()
+
+    try:
+        result = service.cancel(query_execution_id, extract_principals(event_obj))
+        return build_json_response(200, result, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except DomainError as exc:
+        return build_json_response(exc.status_code, exc.payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except Exception:  # pragma: no cover - defensive
+        _LOGGER.exception("Unhandled error while cancelling query")
+        payload = {"error": {"code": "InternalError", "message": "Unexpected failure"}}
+        return build_json_response(500, payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import re
+from importlib import import_module
+from typing import Dict, Optional, Tuple
+
+from app.config.settings import get_health_settings
+from app.presentation.http import build_json_response, extract_origin, parse_json
+
+
+# One Lambda can serve every API route: dispatch on the API Gateway resource to the
+# per-route handler modules. Those modules stay deployable on their own; here they are
+# imported on first use and share this container's settings, clients and runtimes.
+ROUTES: Dict[str, str] = {
+    "/health": "handlers.health",
+    "/run": "handlers.run",
+    "/run/{runId}": "handlers.run_status",
+    "/query": "handlers.query",
+    "/query/batch": "handlers.query_batch",
+    "/query/{queryExecutionId}": "handlers.query_cancel",
+    "/schemas": "handlers.schemas",
+    "/materialize": "handlers.materialize",
+    "/materialize/{jobId}": "handlers.materialize_status",
+    "/views": "handlers.views",
+    "/views/{name}": "handlers.views",
+}
+ALLOWED_METHODS = ["OPTIONS", "GET", "POST", "DELETE"]
+
+_PATTERNS = [
+    (re.compile("^" + re.sub(r"\\\{(\w+)\\\}", r"(?P<\1>[^/]+)", re.escape(resource)) + "/?$"), resource)
+    for resource in ROUTES
+]
+_HANDLERS: Dict[str, object] = {}
+
+
+def lambda_handler(event, context):
+    event_obj = parse_json(event, default={}) if isinstance(event, str) else (event or {})
+    resource, path_parameters = _match(event_obj)
+    if resource is None:
+        return _error(event_obj, 404, "NotFound", "Route not found")
+
+    handler = _load(ROUTES[resource])
+    method = (event_obj.get("httpMethod") or "").upper()
+    if method not in getattr(handler, "ALLOWED_METHODS", ALLOWED_METHODS):
+        return _error(event_obj, 405, "MethodNotAllowed", f"{method or 'Request'} not allowed on {resource}")
+
+    if path_parameters and not event_obj.get("pathParameters"):
+        event_obj = {**event_obj, "pathParameters": path_parameters}
+    return handler.lambda_handler(event_obj, context)
+
+
+def _match(event: dict) -> Tuple[Optional[str], Dict[str, str]]:
+    resource = event.get("resource")
+    if resource in ROUTES:
+        return resource, {}
+    # Proxy ({proxy+}) integrations and direct invocations only carry the concrete path.
+    path = event.get("path") or ""
+    for pattern, candidate in _PATTERNS:
+        matched = pattern.match(path)
+        if matched:
+            return candidate, matched.groupdict()
+    return None, {}
+
+
+def _load(module_name: str):
+    handler = _HANDLERS.get(module_name)
+    if handler is None:
+        handler = _HANDLERS[module_name] = import_module(module_name)
+    return handler
+
+
+def _error(event: dict, status_code: int, code: str, message: str) -> dict:
+    settings = get_health_settings()
+    payload = {"error": {"code": code, "message": message}}
+    return build_json_response(status_code, payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=extract_origin(event))
@@ -4,19 +4,32 @@ from app.application.run_service import RunService
 from app.config.settings import get_run_settings
 from app.domain.errors import CooldownActiveError, DomainError
 from app.infrastructure.aws_clients import get_clients
-from app.presentation.http import prepare_request, build_json_response, build_preflight_response, extract_origin, parse_json
+from app.infrastructure.response_spill import S3ResponseSpill
+from app.presentation.http import prepare_request, build_json_response, build_preflight_response, extract_origin, parse_json, extract_header
 from app.presentation.logging import get_logger
+from app.presentation.runtime import HandlerRuntime
 
 
 _LOGGER = get_logger("sewingmachine.run.handler")
 ALLOWED_METHODS = ["OPTIONS", "POST"]
 
 
-def lambda_handler(event, _context):
+def _build_service() -> RunService:
+    settings = get_run_settings()
+    return RunService(settings, get_clients(settings.region))
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+_RUNTIME.warm_clients(get_run_settings().region, "dynamodb", "lambda", "s3")
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
     settings = get_run_settings()
     event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
     if preflight:
         return preflight
+    _RUNTIME.begin_request(event_obj, context)
 
 
     try:
@@ -25,11 +38,20 @@ def lambda_handler(event, _context):
         error_payload = {"error": {"code": "BadJson", "message": "Invalid JSON body"}}
         return build_json_response(400, error_payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
 
-    service = RunService(settings, get_clients(settings.region))
+    service = _RUNTIME.service()
 
     try:
         result = service.execute(body)
-        return build_json_response(202, result, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+        spill = S3ResponseSpill(get_clients(settings.region), settings.response_spill_bucket) if settings.response_spill_bucket else None
+        return build_json_response(
+            202,
+            result,
+            settings.allowed_origin,
+            ALLOWED_METHODS,
+            request_origin=origin,
+            accept_encoding=extract_header(event_obj, "Accept-Encoding"),
+            spill=spill,
+        )
     except CooldownActiveError as exc:
         return build_json_response(exc.status_code, exc.payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
     except DomainError as exc:
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from app.application.run_status_service import RunStatusService
+from app.config.settings import get_run_status_settings
+from app.domain.errors import DomainError
+from app.infrastructure.aws_clients import get_clients
+from app.presentation.http import prepare_request, build_json_response
+from app.presentation.logging import get_logger
+from app.presentation.runtime import HandlerRuntime
+
+
+_LOGGER = get_logger("sewingmachine.run_status.handler")
+ALLOWED_METHODS = ["OPTIONS", "GET"]
+
+
+def _build_service() -> RunStatusService:
+    settings = get_run_status_settings()
+    return RunStatusService(settings, get_clients(settings.region))
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+_RUNTIME.warm_clients(get_run_status_settings().region, "dynamodb")
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
+    settings = get_run_status_settings()
+    event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
+    if preflight:
+        return preflight
+    _RUNTIME.begin_request(event_obj, context)
+
+    run_id = (event_obj.get("pathParameters") or {}).get("runId")
+    service = _RUNTIME.service()
+
+    try:
+        result = service.execute(run_id)
+        return build_json_response(200, result, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except DomainError as exc:
+        return build_json_response(exc.status_code, exc.payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except Exception:  # pragma: no cover - defensive
+        _LOGGER.exception("Unhandled error while reading run status")
+        payload = {"error": {"code": "InternalError", "message": "Unexpected failure"}}
+        return build_json_response(500, payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
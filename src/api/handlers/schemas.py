@@ -3,18 +3,37 @@
 from app.application.schemas_service import SchemasService
 from app.config.settings import get_schemas_settings
 from app.infrastructure.aws_clients import get_clients
-from app.presentation.http import prepare_request, build_json_response, build_preflight_response, extract_origin
+from app.presentation.http import prepare_request, build_json_response, build_preflight_response, extract_origin, extract_header
+from app.presentation.runtime import HandlerRuntime
 
 
 ALLOWED_METHODS = ["OPTIONS", "GET"]
 
 
-def lambda_handler(event, _context):
+def _build_service() -> SchemasService:
+    settings = get_schemas_settings()
+    return SchemasService(settings, get_clients(settings.region))
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+_RUNTIME.warm_clients(get_schemas_settings().region, "glue")
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
     settings = get_schemas_settings()
     event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
     if preflight:
         return preflight
+    _RUNTIME.begin_request(event_obj, context)
 
-    service = SchemasService(settings, get_clients(settings.region))
+    service = _RUNTIME.service()
     result = service.execute()
-    return build_json_response(200, result, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    return build_json_response(
+        200,
+        result,
+        settings.allowed_origin,
+        ALLOWED_METHODS,
+        request_origin=origin,
+        accept_encoding=extract_header(event_obj, "Accept-Encoding"),
+    )
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from app.application.materialize_service import MaterializeService
+from app.application.views_service import ViewsService
+from app.config.settings import get_admission_settings, get_materialize_settings, get_view_settings
+from app.domain.errors import DomainError
+from app.infrastructure.admission import REFRESH, build_admission
+from app.infrastructure.aws_clients import get_clients
+from app.presentation.logging import add_log_context, get_logger
+from app.presentation.runtime import HandlerRuntime
+
+
+_LOGGER = get_logger("sewingmachine.view_refresh.handler")
+
+# Not an API route: the Athena runner's "Tables Refreshed" event (or a direct invocation
+# with ``tables`` and ``force``) triggers it. Views are rebuilt with the admission
+# controller's refresh slots, like the runner's own statements.
+
+
+def _build_service() -> ViewsService:
+    settings = get_view_settings()
+    clients = get_clients(settings.region)
+    materialize = MaterializeService(
+        get_materialize_settings(), clients, admission=build_admission(get_admission_settings(), clients), pool=REFRESH
+    )
+    return ViewsService(settings, clients, materialize)
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+_RUNTIME.warm_clients(get_view_settings().region, "athena", "glue", "dynamodb")
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
+    event_obj = event if isinstance(event, dict) else {}
+    _RUNTIME.begin_request(event_obj, context)
+    detail = event_obj.get("detail") or event_obj
+    add_log_context(run=detail.get("run"), runId=detail.get("runId"))
+
+    try:
+        results = _RUNTIME.service().refresh(detail.get("tables") or (), force=bool(detail.get("force")))
+    except DomainError as exc:
+        _LOGGER.error("View refresh failed", extra={"error": str(exc)})
+        return {"ok": False, "error": exc.payload.get("error")}
+    _LOGGER.info("Views refreshed", extra={"views": {result.name: result.status for result in results}})
+    return {"ok": not any(result.status == "failed" for result in results), "views": [result.to_dict() for result in results]}
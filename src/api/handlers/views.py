@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from app.application.views_service import ViewsService
+from app.config.settings import get_view_settings
+from app.domain.errors import DomainError
+from app.infrastructure.aws_clients import get_clients
+from app.presentation.http import prepare_request, build_json_response, parse_json
+from app.presentation.logging import get_logger
+from app.presentation.runtime import HandlerRuntime
+
+
+_LOGGER = get_logger("sewingmachine.views.handler")
+ALLOWED_METHODS = ["OPTIONS", "GET", "POST", "DELETE"]
+
+
+def _build_service() -> ViewsService:
+    settings = get_view_settings()
+    return ViewsService(settings, get_clients(settings.region))
+
+
+_RUNTIME = HandlerRuntime(_build_service)
+_RUNTIME.warm_clients(get_view_settings().region, "dynamodb")
+
+
+@_RUNTIME.entrypoint
+def lambda_handler(event, context):
+    """GET /views lists the views, POST /views registers one, DELETE /views/{name} removes one."""
+    settings = get_view_settings()
+    event_obj, origin, preflight = prepare_request(event, ALLOWED_METHODS, settings.allowed_origin)
+    if preflight:
+        return preflight
+    _RUNTIME.begin_request(event_obj, context)
+
+    method = (event_obj.get("httpMethod") or "GET").upper()
+    body = {}
+    if method == "POST":
+        try:
+            body = parse_json(event_obj.get("body"), default={})
+        except ValueError:
+            error_payload = {"error": {"code": "BadJson", "message": "Invalid JSON"}}
+            return build_json_response(400, error_payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+
+    service = _RUNTIME.service()
+
+    try:
+        if method == "POST":
+            result = service.register(body)
+        elif method == "DELETE":
+            name = (event_obj.get("pathParameters") or {}).get("name")
+            service.delete(name)
+            result = {"deleted": name}
+        else:
+            result = {"views": service.list()}
+        return build_json_response(200, result, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except DomainError as exc:
+        return build_json_response(exc.status_code, exc.payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
+    except Exception:  # pragma: no cover - defensive
+        _LOGGER.exception("Unhandled views error")
+        payload = {"error": {"code": "InternalError", "message": "Unexpected failure"}}
+        return build_json_response(500, payload, settings.allowed_origin, ALLOWED_METHODS, request_origin=origin)
@@ -1,18 +1,45 @@
 from __future__ import annotations
 
 import json
+import logging
 import os
+import random
+import threading
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Callable, Iterable, Mapping
 
 import boto3
 from botocore.config import Config
+from botocore.exceptions import ClientError
 
 CLIENT_CONFIG = Config(connect_timeout=3, read_timeout=10)
 
-athena = boto3.client('athena', config=CLIENT_CONFIG)
-events = boto3.client('events', config=CLIENT_CONFIG)
+athena = None
+events = None
+dynamodb = None
+
+_LOGGER = logging.getLogger(__name__)
+
+_TERMINAL_STATES = frozenset({'SUCCEEDED', 'FAILED', 'CANCELLED'})
+_BATCH_GET_MAX_IDS = 50  # BatchGetQueryExecution limit
+_MAX_POLL_ERRORS = 5
+_EVENT_SOURCE = 'sewingmachine.athena-runner'
+
+
+def _client(name: str):
+    """Returns the module-level client for ``name``, creating it on first use.
+
+    Clients are not built at import so a cold start (and the tests) load this module
+    without AWS configuration; tests can still swap the module attributes directly.
+    """
+    client = globals()[name]
+    if client is None:
+        client = boto3.client(name, config=CLIENT_CONFIG)
+        globals()[name] = client
+    return client
 
 
 @dataclass(frozen=True)
@@ -21,26 +48,383 @@ class AthenaRunnerConfig:
     workgroup: str
     catalog: str
     event_bus: str
+    progress_table: str | None = None
+    jobs_table: str | None = None
+    admission_table: str | None = None
+    max_concurrency: int = 0
+    refresh_reserved: int = 0
+    # Publish a "Tables Refreshed" event once gold steps ran, for the view refresh to follow.
+    publish_refreshed: bool = False
 
 
 @dataclass(frozen=True)
 class RefreshRequest:
     run: str
     cleanup_rule: str | None = None
+    run_id: str | None = None
+    job_id: str | None = None
+    task_arn: str | None = None
+    tables: tuple[str, ...] = ()
+
+
+class PendingJobStore:
+    """Resolves DMS completion events to the job the orchestrator recorded for the task."""
+
+    def __init__(self, dynamodb_client, table_name: str) -> None:
+        self._ddb = dynamodb_client
+        self._table = table_name
+
+    def lookup(self, task_arn: str) -> dict[str, str] | None:
+        item = self._ddb.get_item(
+            TableName=self._table,
+            Key={"taskArn": {"S": task_arn}},
+            ConsistentRead=True,
+        ).get('Item')
+        if not item:
+            return None
+        job = {name: value['S'] for name, value in item.items() if 'S' in value}
+        job['tables'] = tuple(item.get('tables', {}).get('SS', []))
+        return job
+
+    def release(self, task_arn: str, job_id: str) -> None:
+        try:
+            self._ddb.delete_item(
+                TableName=self._table,
+                Key={"taskArn": {"S": task_arn}},
+                ConditionExpression="jobId = :job",
+                ExpressionAttributeValues={":job": {"S": job_id}},
+            )
+        except ClientError as exc:
+            # A newer job already replaced the record; leave it for that job's event.
+            if exc.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+
+class RefreshSlots:
+    """Claims an Athena admission slot per statement.
+
+    Follows the slot protocol written down in the API's ``app/infrastructure/admission.py``
+    (keys, ``holder``, ``expiresAt`` and the claim and release conditions); this package
+    cannot import it, so keep the two in step. Refresh work tries the ``reserved`` slots,
+    which interactive callers never take, before the shared ones.
+    """
+
+    def __init__(self, dynamodb_client, table_name: str, capacity: int, reserved: int,
+                 lease_seconds: int = 900, wait_seconds: float = 60.0) -> None:
+        self._ddb = dynamodb_client
+        self._table = table_name
+        self._capacity = capacity
+        self._reserved = reserved
+        self._lease_seconds = lease_seconds
+        self._wait_seconds = wait_seconds
+
+    def acquire(self) -> tuple[str, str] | None:
+        """Returns ``(slot, holder)``, or None when no slot freed up within the wait."""
+        holder = uuid.uuid4().hex
+        shared = list(range(self._capacity - self._reserved))
+        reserved = list(range(self._capacity - self._reserved, self._capacity))
+        random.shuffle(shared)
+        random.shuffle(reserved)
+        waited, backoff = 0.0, 0.1
+        while True:
+            now = int(time.time())
+            for index in reserved + shared:
+                slot = f"athena-slot#{index}"
+                if self._claim(slot, holder, now):
+                    return slot, holder
+            if waited >= self._wait_seconds:
+                return None
+            time.sleep(backoff)
+            waited += backoff
+            backoff = min(backoff * 2, 2.0)
+
+    def release(self, claim: tuple[str, str]) -> None:
+        slot, holder = claim
+        try:
+            self._ddb.delete_item(
+                TableName=self._table,
+                Key={"resource": {"S": slot}},
+                ConditionExpression="holder = :holder",
+                ExpressionAttributeValues={":holder": {"S": holder}},
+            )
+        except ClientError as exc:
+            if exc.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                _LOGGER.warning("Failed to release Athena slot %s", slot, exc_info=True)
+
+    def _claim(self, slot: str, holder: str, now: int) -> bool:
+        try:
+            self._ddb.put_item(
+                TableName=self._table,
+                Item={
+                    "resource": {"S": slot},
+                    "holder": {"S": holder},
+                    "pool": {"S": "refresh"},
+                    "expiresAt": {"N": str(now + self._lease_seconds)},
+                },
+                ConditionExpression="attribute_not_exists(#res) OR expiresAt <= :now",
+                ExpressionAttributeNames={"#res": "resource"},
+                ExpressionAttributeValues={":now": {"N": str(now)}},
+            )
+        except ClientError as exc:
+            if exc.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+        return True
+
+
+class ExecutionWaiter:
+    """Waits on many Athena executions with one poller and ``BatchGetQueryExecution``.
+
+    Callers :meth:`watch` an execution with a callback or block in :meth:`wait`. While
+    anything is pending, a daemon thread fetches every pending execution, 50 ids per call,
+    and runs the callbacks of those that finished. Concurrent statements therefore cost one
+    stream of control-plane calls instead of one ``GetQueryExecution`` loop each.
+    """
+
+    def __init__(self, athena_client, poll_seconds: float = 2.0) -> None:
+        self._athena = athena_client
+        self._poll_seconds = poll_seconds
+        self._pending: dict[str, list[Callable[[dict], None]]] = {}
+        self._lock = threading.Lock()
+        self._poller: threading.Thread | None = None
+
+    def watch(self, execution_id: str, callback: Callable[[dict], None]) -> None:
+        """Calls ``callback(execution)`` from the poller once ``execution_id`` reaches a terminal state."""
+        with self._lock:
+            self._pending.setdefault(execution_id, []).append(callback)
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._run, name='athena-waiter', daemon=True)
+                self._poller.start()
+
+    def wait(self, execution_id: str) -> dict:
+        """Blocks until ``execution_id`` finishes and returns its ``QueryExecution``."""
+        finished = threading.Event()
+        result: dict = {}
+
+        def done(execution: dict) -> None:
+            result.update(execution)
+            finished.set()
+
+        self.watch(execution_id, done)
+        finished.wait()
+        return result
+
+    def poll(self) -> None:
+        """One round: fetches every pending execution and dispatches the finished ones."""
+        with self._lock:
+            ids = list(self._pending)
+        for start in range(0, len(ids), _BATCH_GET_MAX_IDS):
+            response = self._athena.batch_get_query_execution(QueryExecutionIds=ids[start:start + _BATCH_GET_MAX_IDS])
+            for execution in response.get('QueryExecutions', []):
+                if execution['Status']['State'] in _TERMINAL_STATES:
+                    self._dispatch(execution)
+
+    def _run(self) -> None:
+        errors = 0
+        while True:
+            try:
+                self.poll()
+                errors = 0
+            except Exception:
+                errors += 1
+                _LOGGER.warning("Failed to poll Athena executions", exc_info=True)
+                if errors >= _MAX_POLL_ERRORS:
+                    # Never leave a waiter blocked on a poller that gave up.
+                    with self._lock:
+                        ids = list(self._pending)
+                    for execution_id in ids:
+                        self._dispatch({
+                            'QueryExecutionId': execution_id,
+                            'Status': {'State': 'FAILED', 'StateChangeReason': 'Polling Athena failed'},
+                        })
+            with self._lock:
+                if not self._pending:
+                    self._poller = None
+                    return
+            time.sleep(self._poll_seconds)
+
+    def _dispatch(self, execution: dict) -> None:
+        with self._lock:
+            callbacks = self._pending.pop(execution['QueryExecutionId'], [])
+        for callback in callbacks:
+            try:
+                callback(execution)
+            except Exception:
+                _LOGGER.exception("Completion callback failed for %s", execution['QueryExecutionId'])
+
+
+class RunProgressTracker:
+    """Records the refresh pipeline's progress on the run's progress item.
+
+    Steps of independent chains run on separate threads, so the current step is per thread.
+    """
+
+    def __init__(self, dynamodb_client, table_name: str, run_id: str, task_arn: str | None = None) -> None:
+        self._ddb = dynamodb_client
+        self._table = table_name
+        self._run_id = run_id
+        self._task_arn = task_arn
+        self._current = threading.local()
+        self.expected_tables: set[str] = set()
+
+    def start(self, run: str) -> None:
+        self._update(
+            "SET #status = :status, #dms = :dms, #run = :run, #steps = if_not_exists(#steps, :empty), #updated = :now",
+            {"#status": "status", "#dms": "dmsState", "#run": "run", "#steps": "steps", "#updated": "updatedAt"},
+            {
+                ":status": {"S": "refreshing"},
+                ":dms": {"S": "full-load-completed"},
+                ":run": {"S": run},
+                ":empty": {"M": {}},
+            },
+        )
+        self.task_state('full-load-completed')
+
+    def task_state(self, state: str) -> None:
+        if not self._task_arn:
+            return
+        self._update(
+            "SET #tasks.#arn.#state = :state, #updated = :now",
+            {"#tasks": "tasks", "#arn": self._task_arn, "#state": "state", "#updated": "updatedAt"},
+            {":state": {"S": state}},
+        )
+
+    def complete_tables(self, tables: Iterable[str]) -> set[str] | None:
+        """Atomically adds ``tables`` to the run's completed set and returns the whole set."""
+        response = self._update(
+            "ADD #completed :tables SET #updated = :now",
+            {"#completed": "completedTables", "#updated": "updatedAt"},
+            {":tables": {"SS": sorted(tables)}},
+            return_values='ALL_NEW',
+        )
+        if response is None:
+            return None
+        attributes = response.get('Attributes', {})
+        self.expected_tables = set(attributes.get('tables', {}).get('SS', []))
+        return set(attributes.get('completedTables', {}).get('SS', []))
+
+    def begin_step(self, name: str, order: int) -> None:
+        self._current.step = name
+        self._current.order = order
+
+    def query_started(self, execution_id: str) -> None:
+        step = getattr(self._current, 'step', None)
+        if step is None:
+            return
+        self._update(
+            "SET #current = :step, #steps.#name = :entry, #updated = :now",
+            {"#current": "currentStep", "#steps": "steps", "#name": step, "#updated": "updatedAt"},
+            {
+                ":step": {"S": step},
+                ":entry": {"M": self._step_entry("RUNNING", execution_id, {})},
+            },
+        )
+
+    def query_finished(self, execution: dict) -> None:
+        step = getattr(self._current, 'step', None)
+        if step is None:
+            return
+        status = execution.get('Status', {})
+        self._update(
+            "SET #steps.#name = :entry, #updated = :now",
+            {"#steps": "steps", "#name": step, "#updated": "updatedAt"},
+            {
+                ":entry": {
+                    "M": self._step_entry(
+                        status.get('State', 'UNKNOWN'),
+                        execution.get('QueryExecutionId', ''),
+                        execution.get('Statistics', {}),
+                    )
+                },
+            },
+        )
+
+    def finish(self, status: str) -> None:
+        self._update(
+            "SET #status = :status, #updated = :now",
+            {"#status": "status", "#updated": "updatedAt"},
+            {":status": {"S": status}},
+        )
+
+    def _step_entry(self, state: str, execution_id: str, statistics: dict) -> dict:
+        entry = {
+            "state": {"S": state},
+            "queryExecutionId": {"S": execution_id},
+            "order": {"N": str(getattr(self._current, 'order', 0))},
+        }
+        if statistics.get('DataScannedInBytes') is not None:
+            entry["scannedBytes"] = {"N": str(statistics['DataScannedInBytes'])}
+        if statistics.get('TotalExecutionTimeInMillis') is not None:
+            entry["executionTimeMs"] = {"N": str(statistics['TotalExecutionTimeInMillis'])}
+        return entry
+
+    def _update(self, expression: str, names: dict, values: dict, return_values: str = 'NONE') -> dict | None:
+        values = dict(values, **{":now": {"N": str(int(time.time()))}})
+        try:
+            return self._ddb.update_item(
+                TableName=self._table,
+                Key={"runId": {"S": self._run_id}},
+                UpdateExpression=expression,
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values,
+                ReturnValues=return_values,
+            )
+        except ClientError:
+            # Progress is informational; never fail the refresh because of it.
+            _LOGGER.warning("Failed to record progress for run %s", self._run_id, exc_info=True)
+            return None
 
 
 class AthenaRunnerService:
-    def __init__(self, athena_client, events_client, config: AthenaRunnerConfig) -> None:
+    def __init__(self, athena_client, events_client, config: AthenaRunnerConfig, slots: RefreshSlots | None = None) -> None:
         self._athena = athena_client
         self._events = events_client
         self._config = config
+        self._slots = slots
+        self._waiter = ExecutionWaiter(athena_client)
+        self._progress: RunProgressTracker | None = None
+
+    def run_refresh(self, request: RefreshRequest, progress: RunProgressTracker | None = None) -> dict[str, str | bool]:
+        tables = tuple(request.tables) or tuple(_TABLE_PIPELINES)
+        if progress is None and set(tables) != set(_TABLE_PIPELINES):
+            # Shared gold steps wait for the other tasks' tables, which only the run's
+            # progress item records.
+            raise ValueError("A refresh of a subset of the tables needs a progress table and a run id")
+
+        self._progress = progress
+        if progress:
+            progress.start(request.run)
+
+        try:
+            self._run_chains([
+                [(step, statement.replace(':RUN', request.run), database) for step, statement, database in _TABLE_PIPELINES[table]]
+                for table in tables
+            ])
 
-    def run_refresh(self, request: RefreshRequest) -> dict[str, str | bool]:
-        self._run_sql(RESIDENT_CTAS.replace(':RUN', request.run), 'staging')
-        self._run_sql(VISIT_CTAS.replace(':RUN', request.run), 'staging')
+            # Each gold step runs in the invocation that completes its last input table.
+            completed = progress.complete_tables(tables) if progress else set(tables)
+            if completed is None:
+                raise RuntimeError(f"Could not record the completed tables of run {request.run_id}")
+            gold = [
+                [(step, statement, database)]
+                for step, statement, database, inputs in _GOLD_PIPELINE
+                if inputs <= completed and inputs & set(tables)
+            ]
+            self._run_chains(gold)
+        except Exception:
+            if progress:
+                progress.task_state('failed')
+                progress.finish('failed')
+            raise
 
-        for statement, database in _MERGE_PIPELINE:
-            self._run_sql(statement, database)
+        if progress:
+            progress.task_state('refreshed')
+            expected = progress.expected_tables or set(_TABLE_PIPELINES)
+            progress.finish('succeeded' if completed >= expected else 'refreshing')
+
+        if gold and self._config.publish_refreshed:
+            steps = [step for table in tables for step, _, _ in _TABLE_PIPELINES[table]] + [chain[0][0] for chain in gold]
+            self._publish_refreshed(request, sorted({_STEP_WRITES[step] for step in steps}))
 
         if request.cleanup_rule:
             self._events.remove_targets(
@@ -56,7 +440,52 @@ class AthenaRunnerService:
 
         return {"ok": True, "run": request.run}
 
+    def _publish_refreshed(self, request: RefreshRequest, written: list[str]) -> None:
+        try:
+            self._events.put_events(Entries=[{
+                'Source': _EVENT_SOURCE,
+                'DetailType': 'Tables Refreshed',
+                'Detail': json.dumps({"run": request.run, "runId": request.run_id, "tables": written}),
+                'EventBusName': self._config.event_bus,
+            }])
+        except ClientError:
+            # The views catch up from the catalog versions on the next run's refresh.
+            _LOGGER.warning("Failed to publish refreshed tables for run %s", request.run, exc_info=True)
+
+    def _run_chains(self, chains: list[list[tuple[str, str, str]]]) -> None:
+        """Runs each chain's steps in order and independent chains side by side.
+
+        Their statements share one :class:`ExecutionWaiter`. A failed chain stops at its
+        failing step; the others finish before the first failure is raised.
+        """
+        if len(chains) <= 1:
+            for chain in chains:
+                self._run_chain(chain)
+            return
+        with ThreadPoolExecutor(max_workers=len(chains)) as pool:
+            list(pool.map(self._run_chain, chains))
+
+    def _run_chain(self, chain: list[tuple[str, str, str]]) -> None:
+        for step, sql, database in chain:
+            self._run_step(step, sql, database)
+
+    def _run_step(self, step: str, sql: str, database: str) -> str:
+        if self._progress:
+            self._progress.begin_step(step, _STEP_ORDER[step])
+        return self._run_sql(sql, database)
+
     def _run_sql(self, sql: str, database: str) -> str:
+        claim = self._slots.acquire() if self._slots else None
+        if self._slots and claim is None:
+            # Refresh work must not be dropped: run anyway and let Athena queue it.
+            _LOGGER.warning("No Athena slot freed up; running the statement unadmitted")
+        try:
+            return self._start_and_wait(sql, database)
+        finally:
+            if claim:
+                self._slots.release(claim)
+
+    def _start_and_wait(self, sql: str, database: str) -> str:
         response = self._athena.start_query_execution(
             QueryString=sql,
             QueryExecutionContext={"Database": database, "Catalog": self._config.catalog},
@@ -64,13 +493,15 @@ class AthenaRunnerService:
             WorkGroup=self._config.workgroup,
         )
         execution_id = response['QueryExecutionId']
-        while True:
-            status = self._athena.get_query_execution(QueryExecutionId=execution_id)['QueryExecution']['Status']['State']
-            if status in {'SUCCEEDED', 'FAILED', 'CANCELLED'}:
-                if status != 'SUCCEEDED':
-                    raise RuntimeError(f"Athena failed: {status}")
-                return execution_id
-            time.sleep(2)
+        if self._progress:
+            self._progress.query_started(execution_id)
+        execution = self._waiter.wait(execution_id)
+        if self._progress:
+            self._progress.query_finished(execution)
+        status = execution['Status']['State']
+        if status != 'SUCCEEDED':
+            raise RuntimeError(f"Athena failed: {status}")
+        return execution_id
 
 
 def _load_config() -> AthenaRunnerConfig:
@@ -79,17 +510,56 @@ def _load_config() -> AthenaRunnerConfig:
         workgroup=os.environ.get('ATHENA_WG', 'primary'),
         catalog=os.environ.get('ATHENA_CATALOG', 'AwsDataCatalog'),
         event_bus=os.environ.get('EVENTBUS_NAME', 'default'),
+        progress_table=os.environ.get('PROGRESS_TABLE') or None,
+        jobs_table=os.environ.get('JOBS_TABLE') or None,
+        admission_table=os.environ.get('ADMISSION_TABLE') or None,
+        max_concurrency=int(os.environ.get('ATHENA_MAX_CONCURRENCY') or 0),
+        refresh_reserved=int(os.environ.get('ATHENA_REFRESH_RESERVED') or 0),
+        publish_refreshed=os.environ.get('PUBLISH_REFRESHED_TABLES', '').lower() == 'true',
+    )
+
+
+def _build_request(payload: dict, jobs: PendingJobStore | None) -> RefreshRequest | None:
+    if payload.get('source') != 'aws.dms':
+        return RefreshRequest(
+            run=payload.get('run', '2025-08-13'),
+            cleanup_rule=payload.get('cleanupRule'),
+            run_id=payload.get('runId') or payload.get('jobId'),
+        )
+
+    detail = payload.get('detail') or {}
+    task_arn = detail.get('ReplicationTaskArn') or next(iter(payload.get('resources') or []), None)
+    job = jobs.lookup(task_arn) if jobs and task_arn else None
+    if not job:
+        _LOGGER.warning("No pending job recorded for DMS task %s", task_arn)
+        return None
+    return RefreshRequest(
+        run=job['run'],
+        run_id=job.get('runId') or job['jobId'],
+        job_id=job['jobId'],
+        task_arn=task_arn,
+        tables=job['tables'],
     )
 
 
 def lambda_handler(event, ctx):
     payload = event if isinstance(event, dict) else json.loads(event)
-    request = RefreshRequest(
-        run=payload.get('run', '2025-08-13'),
-        cleanup_rule=payload.get('cleanupRule'),
-    )
-    service = AthenaRunnerService(athena, events, _load_config())
-    result = service.run_refresh(request)
+    config = _load_config()
+    jobs = PendingJobStore(_client('dynamodb'), config.jobs_table) if config.jobs_table else None
+    request = _build_request(payload, jobs)
+    if request is None:
+        return {"ok": False, "skipped": True}
+
+    progress = None
+    if config.progress_table and request.run_id:
+        progress = RunProgressTracker(_client('dynamodb'), config.progress_table, request.run_id, task_arn=request.task_arn)
+    slots = None
+    if config.admission_table and config.max_concurrency:
+        slots = RefreshSlots(_client('dynamodb'), config.admission_table, config.max_concurrency, config.refresh_reserved)
+    service = AthenaRunnerService(_client('athena'), _client('events'), config, slots=slots)
+    result = service.run_refresh(request, progress=progress)
+    if jobs and request.task_arn and request.job_id:
+        jobs.release(request.task_arn, request.job_id)
     return result
 
 
@@ -245,11 +715,43 @@ WHEN NOT MATCHED THEN INSERT (
 );
 """
 
-_MERGE_PIPELINE: Iterable[tuple[str, str]] = (
-    (RESIDENT_MERGE, 'silver'),
-    (VISIT_MERGE, 'silver'),
-    (RESIDENT_SOFT_DELETE, 'silver'),
-    (VISIT_SOFT_DELETE, 'silver'),
-    (DIM_RESIDENT_MERGE, 'gold'),
-    (FACT_VISIT_MERGE, 'gold'),
+# Staging + silver chain per source table; a DMS task's tables run as soon as its load completes.
+_TABLE_PIPELINES: Mapping[str, tuple[tuple[str, str, str], ...]] = {
+    'resident': (
+        ('resident_staging', RESIDENT_CTAS, 'staging'),
+        ('resident_merge', RESIDENT_MERGE, 'silver'),
+        ('resident_soft_delete', RESIDENT_SOFT_DELETE, 'silver'),
+    ),
+    'visit': (
+        ('visit_staging', VISIT_CTAS, 'staging'),
+        ('visit_merge', VISIT_MERGE, 'silver'),
+        ('visit_soft_delete', VISIT_SOFT_DELETE, 'silver'),
+    ),
+}
+
+# Gold steps and the source tables whose silver chains they read.
+_GOLD_PIPELINE: Iterable[tuple[str, str, str, frozenset[str]]] = (
+    ('dim_resident_merge', DIM_RESIDENT_MERGE, 'gold', frozenset({'resident'})),
+    ('fact_visit_merge', FACT_VISIT_MERGE, 'gold', frozenset({'resident', 'visit'})),
 )
+
+# The table each step writes, as named in the "Tables Refreshed" event.
+_STEP_WRITES: Mapping[str, str] = {
+    'resident_staging': 'staging.dbo_resident_latest',
+    'resident_merge': 'silver.src_sqlserver__dbo_resident',
+    'resident_soft_delete': 'silver.src_sqlserver__dbo_resident',
+    'visit_staging': 'staging.dbo_visit_latest',
+    'visit_merge': 'silver.src_sqlserver__dbo_visit',
+    'visit_soft_delete': 'silver.src_sqlserver__dbo_visit',
+    'dim_resident_merge': 'gold.dim_resident',
+    'fact_visit_merge': 'gold.fact_visit',
+}
+
+_STEP_ORDER: Mapping[str, int] = {
+    step: index
+    for index, step in enumerate(
+        [step for chain in _TABLE_PIPELINES.values() for step, _, _ in chain]
+        + [step for step, _, _, _ in _GOLD_PIPELINE],
+        start=1,
+    )
+}
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+import boto3
+from botocore.config import Config
+from botocore.exceptions import ClientError
+
+CLIENT_CONFIG = Config(connect_timeout=3, read_timeout=10)
+
+dynamodb = None
+s3 = None
+
+_LOGGER = logging.getLogger(__name__)
+
+_DELETE_BATCH = 1000  # DeleteObjects limit
+
+
+def _client(name: str):
+    """Returns the module-level client for ``name``, creating it on first use.
+
+    Clients are not built at import so a cold start (and the tests) load this module
+    without AWS configuration; tests can still swap the module attributes directly.
+    """
+    client = globals()[name]
+    if client is None:
+        client = boto3.client(name, config=CLIENT_CONFIG)
+        globals()[name] = client
+    return client
+
+
+@dataclass(frozen=True)
+class RetiredDataConfig:
+    jobs_table: str
+    build_location: str
+
+
+class RetiredDataCollector:
+    """Deletes the table and partition data that materialize jobs swapped out.
+
+    A replace or overwrite_partitions job records the table or partition locations it
+    retired on its item in the jobs table, with a ``retireAfter`` time that leaves queries
+    planned against the old data time to finish. Once that has passed, the objects under
+    each location are deleted and the attributes cleared. Only locations under the build
+    prefix are ever deleted, whatever the item says.
+    """
+
+    def __init__(self, dynamodb_client, s3_client, config: RetiredDataConfig) -> None:
+        self._ddb = dynamodb_client
+        self._s3 = s3_client
+        self._config = config
+
+    def collect(self, now: int | None = None) -> dict:
+        now = int(time.time()) if now is None else now
+        collected = skipped = objects = 0
+        for item in self._due(now):
+            job_id, locations = item['jobId']['S'], item['retiredLocations']['SS']
+            try:
+                for location in locations:
+                    if not self._owned(location):
+                        _LOGGER.warning("Retired location %s is outside %s; not deleting", location, self._config.build_location)
+                        skipped += 1
+                        continue
+                    objects += self._delete_prefix(location)
+                    collected += 1
+            except ClientError:
+                # Deletes are idempotent: the whole item is retried on the next run.
+                _LOGGER.exception("Failed to delete retired data of job %s; retrying next run", job_id)
+                continue
+            self._clear(job_id, locations)
+        return {"ok": True, "collected": collected, "skipped": skipped, "objects": objects}
+
+    def _due(self, now: int):
+        kwargs = {
+            'TableName': self._config.jobs_table,
+            'FilterExpression': "retireAfter <= :now",
+            'ProjectionExpression': "jobId, retiredLocations",
+            'ExpressionAttributeValues': {":now": {"N": str(now)}},
+        }
+        while True:
+            page = self._ddb.scan(**kwargs)
+            yield from page.get('Items', [])
+            if not page.get('LastEvaluatedKey'):
+                return
+            kwargs['ExclusiveStartKey'] = page['LastEvaluatedKey']
+
+    def _owned(self, location: str) -> bool:
+        return location.startswith(self._config.build_location.rstrip('/') + '/')
+
+    def _delete_prefix(self, location: str) -> int:
+        parsed = urlparse(location)
+        bucket, prefix = parsed.netloc, parsed.path.lstrip('/')
+        if not prefix.endswith('/'):
+            prefix += '/'  # partition locations have no trailing slash; day=1 must not match day=10
+        deleted = 0
+        batch: list[dict] = []
+        for page in self._s3.get_paginator('list_objects_v2').paginate(Bucket=bucket, Prefix=prefix):
+            for entry in page.get('Contents', []):
+                batch.append({'Key': entry['Key']})
+                if len(batch) == _DELETE_BATCH:
+                    deleted += self._delete_objects(bucket, batch)
+                    batch = []
+        if batch:
+            deleted += self._delete_objects(bucket, batch)
+        return deleted
+
+    def _delete_objects(self, bucket: str, keys: list[dict]) -> int:
+        response = self._s3.delete_objects(Bucket=bucket, Delete={'Objects': keys, 'Quiet': True})
+        errors = response.get('Errors') or []
+        if errors:
+            raise ClientError({'Error': {'Code': errors[0].get('Code'), 'Message': errors[0].get('Message')}}, 'DeleteObjects')
+        return len(keys)
+
+    def _clear(self, job_id: str, locations: list[str]) -> None:
+        try:
+            self._ddb.update_item(
+                TableName=self._config.jobs_table,
+                Key={"jobId": {"S": job_id}},
+                UpdateExpression="REMOVE retiredLocations, retireAfter",
+                ConditionExpression="retiredLocations = :locations",
+                ExpressionAttributeValues={":locations": {"SS": locations}},
+            )
+        except ClientError as exc:
+            # A newer retirement on the same item replaced this one; the next run takes it.
+            if exc.response.get('Error', {}).get('Code') != 'ConditionalCheckFailedException':
+                raise
+
+
+def _load_config() -> RetiredDataConfig:
+    return RetiredDataConfig(
+        jobs_table=os.environ['MATERIALIZE_JOBS_TABLE'],
+        build_location=os.environ['MATERIALIZE_LOCATION'],
+    )
+
+
+def lambda_handler(event, ctx):
+    collector = RetiredDataCollector(_client('dynamodb'), _client('s3'), _load_config())
+    return collector.collect()
@@ -3,7 +3,9 @@ from __future__ import annotations
 import datetime
 import json
 import os
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Optional
 
@@ -13,99 +15,164 @@ from botocore.config import Config
 CLIENT_CONFIG = Config(connect_timeout=3, read_timeout=10)
 
 
-dms = boto3.client('dms', config=CLIENT_CONFIG)
-events = boto3.client('events', config=CLIENT_CONFIG)
-lambda_ = boto3.client('lambda', config=CLIENT_CONFIG)
+dms = None
+dynamodb = None
+
+PROGRESS_TTL_SECONDS = 7 * 24 * 3600
+JOB_TTL_SECONDS = 24 * 3600
+START_FAILED = 'start-failed'
+
+
+def _client(name: str):
+    """Returns the module-level client for ``name``, creating it on first use.
+
+    Clients are not built at import so a cold start (and the tests) load this module
+    without AWS configuration; tests can still swap the module attributes directly.
+    """
+    client = globals()[name]
+    if client is None:
+        client = boto3.client(name, config=CLIENT_CONFIG)
+        globals()[name] = client
+    return client
+
+
+@dataclass(frozen=True)
+class DmsTask:
+    arn: str
+    # Source tables the task loads; empty means the whole pipeline.
+    tables: tuple[str, ...] = ()
 
 
 @dataclass(frozen=True)
 class OrchestratorConfig:
-    task_arn: str
-    event_bus: str
-    runner_function_arn: str
+    tasks: tuple[DmsTask, ...]
+    jobs_table: str
     default_run: str
+    progress_table: Optional[str] = None
 
 
 @dataclass(frozen=True)
 class TriggerRunCommand:
     run: Optional[str]
+    run_id: Optional[str] = None
 
 
 @dataclass(frozen=True)
 class TriggerRunResult:
     job_id: str
     run: str
-    rule_name: str
+    run_id: str
+    task_states: dict[str, str]
 
 
 class OrchestratorService:
-    def __init__(self, dms_client, events_client, lambda_client, config: OrchestratorConfig) -> None:
+    """Starts the DMS full loads and records which job each completion event belongs to.
+
+    A single, long-lived EventBridge rule (managed in Terraform) routes each task's
+    completion event to the Athena runner, which looks the job up by task ARN.
+    """
+
+    def __init__(self, dms_client, dynamodb_client, config: OrchestratorConfig) -> None:
         self._dms = dms_client
-        self._events = events_client
-        self._lambda = lambda_client
+        self._ddb = dynamodb_client
         self._config = config
 
     def trigger_full_load(self, command: TriggerRunCommand) -> TriggerRunResult:
         job_id = str(uuid.uuid4())
         run_value = command.run or self._config.default_run
-
-        self._dms.start_replication_task(
-            ReplicationTaskArn=self._config.task_arn,
-            StartReplicationTaskType='reload-target',
-        )
-
-        rule_name = f"sewingmachine-dms-finished-{job_id}"
-        pattern = {
-            "source": ["aws.dms"],
-            "detail-type": ["DMS Replication Task State Change"],
-            "detail": {
-                "ReplicationTaskArn": [self._config.task_arn],
-                "ReplicationTaskState": ["full-load-completed"],
-            },
+        run_id = command.run_id or job_id
+        tasks = self._config.tasks
+
+        def start(task: DmsTask) -> str:
+            # Record the correlation before starting DMS so the completion event can never outrun it.
+            self._record_job(task, job_id, run_id, run_value)
+            response = self._dms.start_replication_task(
+                ReplicationTaskArn=task.arn,
+                StartReplicationTaskType='reload-target',
+            )
+            return ((response or {}).get('ReplicationTask') or {}).get('Status', 'starting')
+
+        with ThreadPoolExecutor(max_workers=max(1, len(tasks))) as pool:
+            futures = {task.arn: pool.submit(start, task) for task in tasks}
+        task_states: dict[str, str] = {}
+        error: Exception | None = None
+        for arn, future in futures.items():
+            try:
+                task_states[arn] = future.result()
+            except Exception as exc:
+                task_states[arn] = START_FAILED
+                error = error or exc
+        # Recorded even when a start failed: the tasks that did start are loading, and their
+        # completion events and the run status read this item.
+        self._record_progress(run_id, job_id, run_value, task_states)
+        if error is not None:
+            raise error
+
+        return TriggerRunResult(job_id=job_id, run=run_value, run_id=run_id, task_states=task_states)
+
+    def _record_job(self, task: DmsTask, job_id: str, run_id: str, run_value: str) -> None:
+        now = int(time.time())
+        item = {
+            "taskArn": {"S": task.arn},
+            "jobId": {"S": job_id},
+            "runId": {"S": run_id},
+            "run": {"S": run_value},
+            "triggeredAt": {"S": datetime.datetime.now(datetime.UTC).isoformat()},
+            "expiresAt": {"N": str(now + JOB_TTL_SECONDS)},
         }
-        response = self._events.put_rule(
-            Name=rule_name,
-            EventPattern=json.dumps(pattern),
-            State='ENABLED',
-            EventBusName=self._config.event_bus,
-        )
-        rule_arn = response.get('RuleArn')
-
-        target_input = json.dumps({
-            "jobId": job_id,
-            "run": run_value,
-            "cleanupRule": rule_name,
-            "timestamp": datetime.datetime.now(datetime.UTC).isoformat(),
-        })
-        self._events.put_targets(
-            Rule=rule_name,
-            EventBusName=self._config.event_bus,
-            Targets=[
-                {
-                    "Id": "athena-runner",
-                    "Arn": self._config.runner_function_arn,
-                    "Input": target_input,
-                }
-            ],
-        )
-
-        self._lambda.add_permission(
-            FunctionName=self._config.runner_function_arn,
-            StatementId=f"eb-invoke-{job_id}",
-            Action="lambda:InvokeFunction",
-            Principal="events.amazonaws.com",
-            SourceArn=rule_arn,
-        )
-
-        return TriggerRunResult(job_id=job_id, run=run_value, rule_name=rule_name)
+        if task.tables:
+            item["tables"] = {"SS": list(task.tables)}
+        self._ddb.put_item(TableName=self._config.jobs_table, Item=item)
+
+    def _record_progress(self, run_id: str, job_id: str, run_value: str, task_states: dict[str, str]) -> None:
+        if not self._config.progress_table:
+            return
+        now = int(time.time())
+        tasks = {}
+        for task in self._config.tasks:
+            entry = {"state": {"S": task_states[task.arn]}}
+            if task.tables:
+                entry["tables"] = {"SS": list(task.tables)}
+            tasks[task.arn] = {"M": entry}
+        item = {
+            "runId": {"S": run_id},
+            "jobId": {"S": job_id},
+            "run": {"S": run_value},
+            "status": {"S": "failed" if START_FAILED in task_states.values() else "loading"},
+            "dmsState": {"S": _overall_state(task_states.values())},
+            "tasks": {"M": tasks},
+            "steps": {"M": {}},
+            "createdAt": {"N": str(now)},
+            "updatedAt": {"N": str(now)},
+            "expiresAt": {"N": str(now + PROGRESS_TTL_SECONDS)},
+        }
+        if all(task.tables for task in self._config.tasks):
+            item["tables"] = {"SS": sorted({table for task in self._config.tasks for table in task.tables})}
+        self._ddb.put_item(TableName=self._config.progress_table, Item=item)
+
+
+def _overall_state(states) -> str:
+    distinct = set(states)
+    return distinct.pop() if len(distinct) == 1 else 'mixed'
+
+
+def _parse_tasks(raw_tasks: str | None, single_task_arn: str | None) -> tuple[DmsTask, ...]:
+    """Reads ``DMS_TASKS`` (JSON object of task ARN -> source tables), falling back to ``DMS_TASK_ARN``."""
+    if raw_tasks:
+        mapping = json.loads(raw_tasks)
+        if mapping:
+            return tuple(DmsTask(arn=arn, tables=tuple(tables or ())) for arn, tables in mapping.items())
+    if not single_task_arn:
+        raise KeyError('DMS_TASKS or DMS_TASK_ARN must be set')
+    return (DmsTask(arn=single_task_arn),)
 
 
 def _load_config() -> OrchestratorConfig:
     return OrchestratorConfig(
-        task_arn=os.environ['DMS_TASK_ARN'],
-        event_bus=os.environ.get('EVENTBUS_NAME', 'default'),
-        runner_function_arn=os.environ['ATHENA_RUNNER_FUNCTION_ARN'],
+        tasks=_parse_tasks(os.environ.get('DMS_TASKS'), os.environ.get('DMS_TASK_ARN')),
+        jobs_table=os.environ['JOBS_TABLE'],
         default_run=os.environ.get('FIXED_RUN', '2025-08-13'),
+        progress_table=os.environ.get('PROGRESS_TABLE') or None,
     )
 
 
@@ -113,17 +180,19 @@ def _parse_command(event: dict | None) -> TriggerRunCommand:
     payload = event or {}
     if isinstance(payload, str):
         payload = json.loads(payload)
-    return TriggerRunCommand(run=payload.get('run'))
+    return TriggerRunCommand(run=payload.get('run'), run_id=payload.get('runId'))
 
 
 def lambda_handler(event, ctx):
-    service = OrchestratorService(dms, events, lambda_, _load_config())
+    service = OrchestratorService(_client('dms'), _client('dynamodb'), _load_config())
     command = _parse_command(event)
     result = service.trigger_full_load(command)
     body = {
         "jobId": result.job_id,
+        "runId": result.run_id,
         "status": "accepted",
         "run": result.run,
+        "tasks": result.task_states,
     }
     return {
         "statusCode": 202,
@@ -4,11 +4,17 @@ locals {
   cors_allow_headers = "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
   cors_allow_origin  = format("'%s'", var.allowed_origin)
   cors_allow_methods = {
-    health      = "'GET,OPTIONS'"
-    run         = "'OPTIONS,POST'"
-    query       = "'OPTIONS,POST'"
-    schemas     = "'GET,OPTIONS'"
-    materialize = "'OPTIONS,POST'"
+    health             = "'GET,OPTIONS'"
+    run                = "'OPTIONS,POST'"
+    run_status         = "'GET,OPTIONS'"
+    query              = "'OPTIONS,POST'"
+    query_cancel       = "'DELETE,OPTIONS'"
+    query_batch        = "'OPTIONS,POST'"
+    schemas            = "'GET,OPTIONS'"
+    materialize        = "'OPTIONS,POST'"
+    materialize_status = "'GET,OPTIONS'"
+    views              = "'GET,OPTIONS,POST'"
+    view               = "'DELETE,OPTIONS'"
   }
   create_custom_domain = var.custom_domain_name != "" && var.certificate_arn != ""
   custom_domain_is_edge = upper(var.custom_domain_endpoint_type) == "EDGE"
@@ -24,7 +30,9 @@ resource "aws_api_gateway_rest_api" "api" {
   api_key_source = "HEADER"
   endpoint_configuration { types = ["REGIONAL"] }
   disable_execute_api_endpoint = false
-  tags                         = var.tags
+  # Lets handlers return gzip/br bodies as base64; request bodies then arrive base64-encoded too.
+  binary_media_types = ["*/*"]
+  tags               = var.tags
 }
 
 resource "aws_api_gateway_authorizer" "cognito" {
@@ -55,12 +63,30 @@ resource "aws_api_gateway_resource" "run" {
   path_part   = "run"
 }
 
+resource "aws_api_gateway_resource" "run_status" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_resource.run.id
+  path_part   = "{runId}"
+}
+
 resource "aws_api_gateway_resource" "query" {
   rest_api_id = aws_api_gateway_rest_api.api.id
   parent_id   = aws_api_gateway_rest_api.api.root_resource_id
   path_part   = "query"
 }
 
+resource "aws_api_gateway_resource" "query_cancel" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_resource.query.id
+  path_part   = "{queryExecutionId}"
+}
+
+resource "aws_api_gateway_resource" "query_batch" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_resource.query.id
+  path_part   = "batch"
+}
+
 resource "aws_api_gateway_resource" "schemas" {
   rest_api_id = aws_api_gateway_rest_api.api.id
   parent_id   = aws_api_gateway_rest_api.api.root_resource_id
@@ -73,6 +99,24 @@ resource "aws_api_gateway_resource" "materialize" {
   path_part   = "materialize"
 }
 
+resource "aws_api_gateway_resource" "materialize_status" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_resource.materialize.id
+  path_part   = "{jobId}"
+}
+
+resource "aws_api_gateway_resource" "views" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_rest_api.api.root_resource_id
+  path_part   = "views"
+}
+
+resource "aws_api_gateway_resource" "view" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  parent_id   = aws_api_gateway_resource.views.id
+  path_part   = "{name}"
+}
+
 # Primary methods
 resource "aws_api_gateway_method" "health_get" {
   rest_api_id   = aws_api_gateway_rest_api.api.id
@@ -90,6 +134,17 @@ resource "aws_api_gateway_method" "run_post" {
   authorizer_id = aws_api_gateway_authorizer.cognito.id
 }
 
+resource "aws_api_gateway_method" "run_status_get" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.run_status.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+  request_parameters = {
+    "method.request.path.runId" = true
+  }
+}
+
 resource "aws_api_gateway_method" "query_post" {
   rest_api_id   = aws_api_gateway_rest_api.api.id
   resource_id   = aws_api_gateway_resource.query.id
@@ -98,6 +153,25 @@ resource "aws_api_gateway_method" "query_post" {
   authorizer_id = aws_api_gateway_authorizer.cognito.id
 }
 
+resource "aws_api_gateway_method" "query_cancel_delete" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.query_cancel.id
+  http_method   = "DELETE"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+  request_parameters = {
+    "method.request.path.queryExecutionId" = true
+  }
+}
+
+resource "aws_api_gateway_method" "query_batch_post" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.query_batch.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
 resource "aws_api_gateway_method" "schemas_get" {
   rest_api_id   = aws_api_gateway_rest_api.api.id
   resource_id   = aws_api_gateway_resource.schemas.id
@@ -114,6 +188,44 @@ resource "aws_api_gateway_method" "materialize_post" {
   authorizer_id = aws_api_gateway_authorizer.cognito.id
 }
 
+resource "aws_api_gateway_method" "materialize_status_get" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.materialize_status.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+  request_parameters = {
+    "method.request.path.jobId" = true
+  }
+}
+
+resource "aws_api_gateway_method" "views_get" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.views.id
+  http_method   = "GET"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
+resource "aws_api_gateway_method" "views_post" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.views.id
+  http_method   = "POST"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+}
+
+resource "aws_api_gateway_method" "view_delete" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.view.id
+  http_method   = "DELETE"
+  authorization = "COGNITO_USER_POOLS"
+  authorizer_id = aws_api_gateway_authorizer.cognito.id
+  request_parameters = {
+    "method.request.path.name" = true
+  }
+}
+
 # Method responses
 resource "aws_api_gateway_method_response" "health_200" {
   rest_api_id     = aws_api_gateway_rest_api.api.id
@@ -143,6 +255,20 @@ resource "aws_api_gateway_method_response" "run_200" {
   }
 }
 
+resource "aws_api_gateway_method_response" "run_status_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.run_status.id
+  http_method     = aws_api_gateway_method.run_status_get.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
 resource "aws_api_gateway_method_response" "query_200" {
   rest_api_id     = aws_api_gateway_rest_api.api.id
   resource_id     = aws_api_gateway_resource.query.id
@@ -157,6 +283,34 @@ resource "aws_api_gateway_method_response" "query_200" {
   }
 }
 
+resource "aws_api_gateway_method_response" "query_cancel_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.query_cancel.id
+  http_method     = aws_api_gateway_method.query_cancel_delete.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
+resource "aws_api_gateway_method_response" "query_batch_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.query_batch.id
+  http_method     = aws_api_gateway_method.query_batch_post.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
 resource "aws_api_gateway_method_response" "schemas_200" {
   rest_api_id     = aws_api_gateway_rest_api.api.id
   resource_id     = aws_api_gateway_resource.schemas.id
@@ -185,6 +339,62 @@ resource "aws_api_gateway_method_response" "materialize_200" {
   }
 }
 
+resource "aws_api_gateway_method_response" "materialize_status_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.materialize_status.id
+  http_method     = aws_api_gateway_method.materialize_status_get.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
+resource "aws_api_gateway_method_response" "views_get_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.views.id
+  http_method     = aws_api_gateway_method.views_get.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
+resource "aws_api_gateway_method_response" "views_post_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.views.id
+  http_method     = aws_api_gateway_method.views_post.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
+resource "aws_api_gateway_method_response" "view_delete_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.view.id
+  http_method     = aws_api_gateway_method.view_delete.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Origin" = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
 # Integrations
 resource "aws_api_gateway_integration" "health" {
   rest_api_id             = aws_api_gateway_rest_api.api.id
@@ -204,6 +414,15 @@ resource "aws_api_gateway_integration" "run" {
   uri = var.lambda_run_invoke_arn
 }
 
+resource "aws_api_gateway_integration" "run_status" {
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = aws_api_gateway_resource.run_status.id
+  http_method             = aws_api_gateway_method.run_status_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri = var.lambda_run_status_invoke_arn
+}
+
 resource "aws_api_gateway_integration" "query" {
   rest_api_id             = aws_api_gateway_rest_api.api.id
   resource_id             = aws_api_gateway_resource.query.id
@@ -213,6 +432,24 @@ resource "aws_api_gateway_integration" "query" {
   uri = var.lambda_query_invoke_arn
 }
 
+resource "aws_api_gateway_integration" "query_cancel" {
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = aws_api_gateway_resource.query_cancel.id
+  http_method             = aws_api_gateway_method.query_cancel_delete.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri = var.lambda_query_cancel_invoke_arn
+}
+
+resource "aws_api_gateway_integration" "query_batch" {
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = aws_api_gateway_resource.query_batch.id
+  http_method             = aws_api_gateway_method.query_batch_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri = var.lambda_query_batch_invoke_arn
+}
+
 resource "aws_api_gateway_integration" "schemas" {
   rest_api_id             = aws_api_gateway_rest_api.api.id
   resource_id             = aws_api_gateway_resource.schemas.id
@@ -231,6 +468,42 @@ resource "aws_api_gateway_integration" "materialize" {
   uri = var.lambda_materialize_invoke_arn
 }
 
+resource "aws_api_gateway_integration" "materialize_status" {
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = aws_api_gateway_resource.materialize_status.id
+  http_method             = aws_api_gateway_method.materialize_status_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri = var.lambda_materialize_status_invoke_arn
+}
+
+resource "aws_api_gateway_integration" "views_list" {
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = aws_api_gateway_resource.views.id
+  http_method             = aws_api_gateway_method.views_get.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri = var.lambda_views_invoke_arn
+}
+
+resource "aws_api_gateway_integration" "views_register" {
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = aws_api_gateway_resource.views.id
+  http_method             = aws_api_gateway_method.views_post.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri = var.lambda_views_invoke_arn
+}
+
+resource "aws_api_gateway_integration" "view_delete" {
+  rest_api_id             = aws_api_gateway_rest_api.api.id
+  resource_id             = aws_api_gateway_resource.view.id
+  http_method             = aws_api_gateway_method.view_delete.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri = var.lambda_views_invoke_arn
+}
+
 # OPTIONS methods
 resource "aws_api_gateway_method" "health_options" {
   rest_api_id   = aws_api_gateway_rest_api.api.id
@@ -252,6 +525,16 @@ resource "aws_api_gateway_method" "run_options" {
   }
 }
 
+resource "aws_api_gateway_method" "run_status_options" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.run_status.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+  request_parameters = {
+    "method.request.header.Origin" = false
+  }
+}
+
 resource "aws_api_gateway_method" "query_options" {
   rest_api_id   = aws_api_gateway_rest_api.api.id
   resource_id   = aws_api_gateway_resource.query.id
@@ -262,6 +545,26 @@ resource "aws_api_gateway_method" "query_options" {
   }
 }
 
+resource "aws_api_gateway_method" "query_cancel_options" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.query_cancel.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+  request_parameters = {
+    "method.request.header.Origin" = false
+  }
+}
+
+resource "aws_api_gateway_method" "query_batch_options" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.query_batch.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+  request_parameters = {
+    "method.request.header.Origin" = false
+  }
+}
+
 resource "aws_api_gateway_method" "schemas_options" {
   rest_api_id   = aws_api_gateway_rest_api.api.id
   resource_id   = aws_api_gateway_resource.schemas.id
@@ -282,6 +585,36 @@ resource "aws_api_gateway_method" "materialize_options" {
   }
 }
 
+resource "aws_api_gateway_method" "materialize_status_options" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.materialize_status.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+  request_parameters = {
+    "method.request.header.Origin" = false
+  }
+}
+
+resource "aws_api_gateway_method" "views_options" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.views.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+  request_parameters = {
+    "method.request.header.Origin" = false
+  }
+}
+
+resource "aws_api_gateway_method" "view_options" {
+  rest_api_id   = aws_api_gateway_rest_api.api.id
+  resource_id   = aws_api_gateway_resource.view.id
+  http_method   = "OPTIONS"
+  authorization = "NONE"
+  request_parameters = {
+    "method.request.header.Origin" = false
+  }
+}
+
 # OPTIONS responses
 resource "aws_api_gateway_method_response" "health_options_200" {
   rest_api_id     = aws_api_gateway_rest_api.api.id
@@ -315,6 +648,22 @@ resource "aws_api_gateway_method_response" "run_options_200" {
   }
 }
 
+resource "aws_api_gateway_method_response" "run_status_options_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.run_status.id
+  http_method     = aws_api_gateway_method.run_status_options.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = false
+    "method.response.header.Access-Control-Allow-Methods" = false
+    "method.response.header.Access-Control-Allow-Origin"  = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
 resource "aws_api_gateway_method_response" "query_options_200" {
   rest_api_id     = aws_api_gateway_rest_api.api.id
   resource_id     = aws_api_gateway_resource.query.id
@@ -331,6 +680,38 @@ resource "aws_api_gateway_method_response" "query_options_200" {
   }
 }
 
+resource "aws_api_gateway_method_response" "query_cancel_options_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.query_cancel.id
+  http_method     = aws_api_gateway_method.query_cancel_options.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = false
+    "method.response.header.Access-Control-Allow-Methods" = false
+    "method.response.header.Access-Control-Allow-Origin"  = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
+resource "aws_api_gateway_method_response" "query_batch_options_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.query_batch.id
+  http_method     = aws_api_gateway_method.query_batch_options.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = false
+    "method.response.header.Access-Control-Allow-Methods" = false
+    "method.response.header.Access-Control-Allow-Origin"  = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
 resource "aws_api_gateway_method_response" "schemas_options_200" {
   rest_api_id     = aws_api_gateway_rest_api.api.id
   resource_id     = aws_api_gateway_resource.schemas.id
@@ -363,6 +744,54 @@ resource "aws_api_gateway_method_response" "materialize_options_200" {
   }
 }
 
+resource "aws_api_gateway_method_response" "materialize_status_options_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.materialize_status.id
+  http_method     = aws_api_gateway_method.materialize_status_options.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = false
+    "method.response.header.Access-Control-Allow-Methods" = false
+    "method.response.header.Access-Control-Allow-Origin"  = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
+resource "aws_api_gateway_method_response" "views_options_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.views.id
+  http_method     = aws_api_gateway_method.views_options.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = false
+    "method.response.header.Access-Control-Allow-Methods" = false
+    "method.response.header.Access-Control-Allow-Origin"  = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
+resource "aws_api_gateway_method_response" "view_options_200" {
+  rest_api_id     = aws_api_gateway_rest_api.api.id
+  resource_id     = aws_api_gateway_resource.view.id
+  http_method     = aws_api_gateway_method.view_options.http_method
+  status_code     = "200"
+  response_models = { "application/json" = "Empty" }
+  response_parameters = {
+    "method.response.header.Access-Control-Allow-Headers" = false
+    "method.response.header.Access-Control-Allow-Methods" = false
+    "method.response.header.Access-Control-Allow-Origin"  = false
+  }
+  lifecycle {
+    ignore_changes = [response_models]
+  }
+}
+
 # OPTIONS integrations
 resource "aws_api_gateway_integration" "health_options" {
   rest_api_id = aws_api_gateway_rest_api.api.id
@@ -382,6 +811,15 @@ resource "aws_api_gateway_integration" "run_options" {
   uri                     = var.lambda_run_invoke_arn
 }
 
+resource "aws_api_gateway_integration" "run_status_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.run_status.id
+  http_method = aws_api_gateway_method.run_status_options.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.lambda_run_status_invoke_arn
+}
+
 resource "aws_api_gateway_integration" "query_options" {
   rest_api_id = aws_api_gateway_rest_api.api.id
   resource_id = aws_api_gateway_resource.query.id
@@ -391,6 +829,24 @@ resource "aws_api_gateway_integration" "query_options" {
   uri                     = var.lambda_query_invoke_arn
 }
 
+resource "aws_api_gateway_integration" "query_cancel_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.query_cancel.id
+  http_method = aws_api_gateway_method.query_cancel_options.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.lambda_query_cancel_invoke_arn
+}
+
+resource "aws_api_gateway_integration" "query_batch_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.query_batch.id
+  http_method = aws_api_gateway_method.query_batch_options.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.lambda_query_batch_invoke_arn
+}
+
 resource "aws_api_gateway_integration" "schemas_options" {
   rest_api_id = aws_api_gateway_rest_api.api.id
   resource_id = aws_api_gateway_resource.schemas.id
@@ -409,6 +865,33 @@ resource "aws_api_gateway_integration" "materialize_options" {
   uri                     = var.lambda_materialize_invoke_arn
 }
 
+resource "aws_api_gateway_integration" "materialize_status_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.materialize_status.id
+  http_method = aws_api_gateway_method.materialize_status_options.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.lambda_materialize_status_invoke_arn
+}
+
+resource "aws_api_gateway_integration" "views_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.views.id
+  http_method = aws_api_gateway_method.views_options.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.lambda_views_invoke_arn
+}
+
+resource "aws_api_gateway_integration" "view_options" {
+  rest_api_id = aws_api_gateway_rest_api.api.id
+  resource_id = aws_api_gateway_resource.view.id
+  http_method = aws_api_gateway_method.view_options.http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = var.lambda_views_invoke_arn
+}
+
 # OPTIONS integration responses
 // Integration responses are not used with Lambda proxy integrations for OPTIONS
 
@@ -418,28 +901,54 @@ resource "aws_api_gateway_deployment" "this" {
     redeploy = sha1(join(",", [
       jsonencode(aws_api_gateway_integration.health),
       jsonencode(aws_api_gateway_integration.run),
+      jsonencode(aws_api_gateway_integration.run_status),
       jsonencode(aws_api_gateway_integration.query),
+      jsonencode(aws_api_gateway_integration.query_cancel),
+      jsonencode(aws_api_gateway_integration.query_batch),
       jsonencode(aws_api_gateway_integration.schemas),
       jsonencode(aws_api_gateway_integration.materialize),
+      jsonencode(aws_api_gateway_integration.materialize_status),
+      jsonencode(aws_api_gateway_integration.views_list),
+      jsonencode(aws_api_gateway_integration.views_register),
+      jsonencode(aws_api_gateway_integration.view_delete),
       jsonencode(aws_api_gateway_integration.health_options),
       jsonencode(aws_api_gateway_integration.run_options),
+      jsonencode(aws_api_gateway_integration.run_status_options),
       jsonencode(aws_api_gateway_integration.query_options),
+      jsonencode(aws_api_gateway_integration.query_cancel_options),
+      jsonencode(aws_api_gateway_integration.query_batch_options),
       jsonencode(aws_api_gateway_integration.schemas_options),
-      jsonencode(aws_api_gateway_integration.materialize_options)
+      jsonencode(aws_api_gateway_integration.materialize_options),
+      jsonencode(aws_api_gateway_integration.materialize_status_options),
+      jsonencode(aws_api_gateway_integration.views_options),
+      jsonencode(aws_api_gateway_integration.view_options)
     ]))
   }
   lifecycle { create_before_destroy = true }
   depends_on = [
     aws_api_gateway_integration.health,
     aws_api_gateway_integration.run,
+    aws_api_gateway_integration.run_status,
     aws_api_gateway_integration.query,
+    aws_api_gateway_integration.query_cancel,
+    aws_api_gateway_integration.query_batch,
     aws_api_gateway_integration.schemas,
     aws_api_gateway_integration.materialize,
+    aws_api_gateway_integration.materialize_status,
+    aws_api_gateway_integration.views_list,
+    aws_api_gateway_integration.views_register,
+    aws_api_gateway_integration.view_delete,
     aws_api_gateway_integration.health_options,
     aws_api_gateway_integration.run_options,
+    aws_api_gateway_integration.run_status_options,
     aws_api_gateway_integration.query_options,
+    aws_api_gateway_integration.query_cancel_options,
+    aws_api_gateway_integration.query_batch_options,
     aws_api_gateway_integration.schemas_options,
-    aws_api_gateway_integration.materialize_options
+    aws_api_gateway_integration.materialize_options,
+    aws_api_gateway_integration.materialize_status_options,
+    aws_api_gateway_integration.views_options,
+    aws_api_gateway_integration.view_options
   ]
 }
 
@@ -487,6 +996,14 @@ resource "aws_lambda_permission" "run" {
   source_arn    = format("%s/*/*/*", aws_api_gateway_rest_api.api.execution_arn)
 }
 
+resource "aws_lambda_permission" "run_status" {
+  statement_id  = "apigw-sewingmachine-run-status-31866"
+  action        = "lambda:InvokeFunction"
+  function_name = var.lambda_run_status_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = format("%s/*/*/*", aws_api_gateway_rest_api.api.execution_arn)
+}
+
 resource "aws_lambda_permission" "query" {
   statement_id  = "apigw-sewingmachine-query-31866"
   action        = "lambda:InvokeFunction"
@@ -495,6 +1012,22 @@ resource "aws_lambda_permission" "query" {
   source_arn    = format("%s/*/*/*", aws_api_gateway_rest_api.api.execution_arn)
 }
 
+resource "aws_lambda_permission" "query_cancel" {
+  statement_id  = "apigw-sewingmachine-query-cancel-31866"
+  action        = "lambda:InvokeFunction"
+  function_name = var.lambda_query_cancel_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = format("%s/*/*/*", aws_api_gateway_rest_api.api.execution_arn)
+}
+
+resource "aws_lambda_permission" "query_batch" {
+  statement_id  = "apigw-sewingmachine-query-batch-31866"
+  action        = "lambda:InvokeFunction"
+  function_name = var.lambda_query_batch_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = format("%s/*/*/*", aws_api_gateway_rest_api.api.execution_arn)
+}
+
 resource "aws_lambda_permission" "schemas" {
   statement_id  = "apigw-sewingmachine-schemas-31866"
   action        = "lambda:InvokeFunction"
@@ -511,6 +1044,22 @@ resource "aws_lambda_permission" "materialize" {
   source_arn    = format("%s/*/*/*", aws_api_gateway_rest_api.api.execution_arn)
 }
 
+resource "aws_lambda_permission" "materialize_status" {
+  statement_id  = "apigw-sewingmachine-materialize-status-31866"
+  action        = "lambda:InvokeFunction"
+  function_name = var.lambda_materialize_status_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = format("%s/*/*/*", aws_api_gateway_rest_api.api.execution_arn)
+}
+
+resource "aws_lambda_permission" "views" {
+  statement_id  = "apigw-sewingmachine-views-31866"
+  action        = "lambda:InvokeFunction"
+  function_name = var.lambda_views_name
+  principal     = "apigateway.amazonaws.com"
+  source_arn    = format("%s/*/*/*", aws_api_gateway_rest_api.api.execution_arn)
+}
+
 # Optional custom domain
 resource "aws_api_gateway_domain_name" "custom" {
   count = local.create_custom_domain ? 1 : 0
@@ -17,13 +17,23 @@ variable "custom_domain_endpoint_type" {
 
 variable "lambda_health_invoke_arn" { type = string }
 variable "lambda_run_invoke_arn" { type = string }
+variable "lambda_run_status_invoke_arn" { type = string }
 variable "lambda_query_invoke_arn" { type = string }
+variable "lambda_query_cancel_invoke_arn" { type = string }
+variable "lambda_query_batch_invoke_arn" { type = string }
 variable "lambda_schemas_invoke_arn" { type = string }
 variable "lambda_materialize_invoke_arn" { type = string }
+variable "lambda_materialize_status_invoke_arn" { type = string }
+variable "lambda_views_invoke_arn" { type = string }
 
 variable "lambda_health_name" { type = string }
 variable "lambda_run_name" { type = string }
+variable "lambda_run_status_name" { type = string }
 variable "lambda_query_name" { type = string }
+variable "lambda_query_cancel_name" { type = string }
+variable "lambda_query_batch_name" { type = string }
 variable "lambda_schemas_name" { type = string }
 variable "lambda_materialize_name" { type = string }
+variable "lambda_materialize_status_name" { type = string }
+variable "lambda_views_name" { type = string }
 
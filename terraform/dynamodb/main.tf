@@ -16,6 +16,81 @@ resource "aws_dynamodb_table" "cooldowns" {
   tags = var.tags
 }
 
+resource "aws_dynamodb_table" "run_progress" {
+  name         = var.progress_table_name
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "runId"
+
+  attribute {
+    name = "runId"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = var.tags
+}
+
+resource "aws_dynamodb_table" "dms_jobs" {
+  name         = var.jobs_table_name
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "taskArn"
+
+  attribute {
+    name = "taskArn"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = var.tags
+}
+
+resource "aws_dynamodb_table" "materialize_jobs" {
+  name         = var.materialize_jobs_table_name
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "jobId"
+
+  attribute {
+    name = "jobId"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expiresAt"
+    enabled        = true
+  }
+
+  tags = var.tags
+}
+
+resource "aws_dynamodb_table" "materialized_views" {
+  name         = var.views_table_name
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "name"
+
+  attribute {
+    name = "name"
+    type = "S"
+  }
+
+  tags = var.tags
+}
+
 output "table_name" { value = aws_dynamodb_table.cooldowns.name }
 output "table_arn"  { value = aws_dynamodb_table.cooldowns.arn }
+output "progress_table_name" { value = aws_dynamodb_table.run_progress.name }
+output "progress_table_arn"  { value = aws_dynamodb_table.run_progress.arn }
+output "jobs_table_name" { value = aws_dynamodb_table.dms_jobs.name }
+output "jobs_table_arn"  { value = aws_dynamodb_table.dms_jobs.arn }
+output "materialize_jobs_table_name" { value = aws_dynamodb_table.materialize_jobs.name }
+output "materialize_jobs_table_arn"  { value = aws_dynamodb_table.materialize_jobs.arn }
+output "views_table_name" { value = aws_dynamodb_table.materialized_views.name }
+output "views_table_arn"  { value = aws_dynamodb_table.materialized_views.arn }
 
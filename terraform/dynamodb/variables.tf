@@ -1,3 +1,7 @@
 variable "ddb_table_name" { type = string }
+variable "progress_table_name" { type = string }
+variable "jobs_table_name" { type = string }
+variable "materialize_jobs_table_name" { type = string }
+variable "views_table_name" { type = string }
 variable "tags" { type = map(string) }
 
@@ -23,36 +23,36 @@ data "aws_iam_policy_document" "lambda_permissions" {
   statement {
     effect   = "Allow"
     actions  = ["dynamodb:*"]
-    resources = [var.ddb_table_arn]
+    resources = [var.ddb_table_arn, var.progress_table_arn, var.jobs_table_arn, var.materialize_jobs_table_arn, var.views_table_arn]
   }
   statement {
     effect   = "Allow"
-    actions  = ["lambda:InvokeFunction","lambda:AddPermission"]
+    actions  = ["lambda:InvokeFunction"]
     resources = ["*"]
   }
   statement {
     effect   = "Allow"
-    actions  = ["s3:GetObject","s3:PutObject","s3:ListBucket"]
+    actions  = ["s3:GetObject","s3:PutObject","s3:DeleteObject","s3:ListBucket"]
     resources = ["*"]
   }
   statement {
     effect   = "Allow"
-    actions  = ["athena:StartQueryExecution","athena:GetQueryExecution","athena:GetQueryResults"]
+    actions  = ["athena:StartQueryExecution","athena:GetQueryExecution","athena:BatchGetQueryExecution","athena:GetQueryResults","athena:GetQueryRuntimeStatistics","athena:StopQueryExecution"]
     resources = ["*"]
   }
   statement {
     effect   = "Allow"
-    actions  = ["events:PutRule","events:PutTargets","events:RemoveTargets","events:DeleteRule"]
+    actions  = ["events:RemoveTargets","events:DeleteRule","events:PutEvents"]
     resources = ["*"]
   }
   statement {
     effect   = "Allow"
     actions  = ["dms:StartReplicationTask"]
-    resources = [var.dms_task_arn]
+    resources = distinct(concat([var.dms_task_arn], keys(var.dms_tasks)))
   }
   statement {
     effect   = "Allow"
-    actions  = ["glue:GetDatabases","glue:GetTables"]
+    actions  = ["glue:GetDatabases","glue:GetTables","glue:GetTable","glue:GetPartitions","glue:CreateTable","glue:UpdateTable","glue:DeleteTable","glue:BatchGetPartition","glue:BatchCreatePartition","glue:BatchUpdatePartition"]
     resources = ["*"]
   }
 }
@@ -1,5 +1,10 @@
 variable "project_name" { type = string }
 variable "tags" { type = map(string) }
 variable "dms_task_arn" { type = string }
+variable "dms_tasks" { type = map(list(string)) }
 variable "ddb_table_arn" { type = string }
+variable "progress_table_arn" { type = string }
+variable "jobs_table_arn" { type = string }
+variable "materialize_jobs_table_arn" { type = string }
+variable "views_table_arn" { type = string }
 
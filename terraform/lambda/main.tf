@@ -43,15 +43,37 @@ resource "aws_lambda_function" "run" {
 
   environment {
     variables = {
-      DDB_TABLE           = var.ddb_table_name
-      ORCHESTRATOR_FN     = aws_lambda_function.orchestrator.function_name
-      BRONZE_PREFIX_S3    = var.bronze_prefix_s3
-      SILVER_PREFIX_S3    = var.silver_prefix_s3
-      GOLD_PREFIX_S3      = var.gold_prefix_s3
-      PRESIGN_TTL_SECONDS = "900"
-      MAX_DIRS_PER_LAYER  = "25"
-      MAX_FILES_PER_DIR   = "50"
-      ALLOWED_ORIGIN      = var.allowed_origin
+      DDB_TABLE             = var.ddb_table_name
+      ORCHESTRATOR_FN       = aws_lambda_function.orchestrator.function_name
+      BRONZE_PREFIX_S3      = var.bronze_prefix_s3
+      SILVER_PREFIX_S3      = var.silver_prefix_s3
+      GOLD_PREFIX_S3        = var.gold_prefix_s3
+      PRESIGN_TTL_SECONDS   = "900"
+      MAX_DIRS_PER_LAYER    = "25"
+      MAX_FILES_PER_DIR     = "50"
+      ALLOWED_ORIGIN        = var.allowed_origin
+      RESPONSE_SPILL_BUCKET = var.response_spill_bucket
+    }
+  }
+
+  tags = var.tags
+}
+
+resource "aws_lambda_function" "run_status" {
+  function_name    = "${var.project_name}-run-status"
+  role             = var.lambda_role_arn
+  handler          = "handlers.run_status.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.api_zip.output_path
+  source_code_hash = data.archive_file.api_zip.output_base64sha256
+  timeout          = 10
+  memory_size      = 256
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      PROGRESS_TABLE = var.progress_table_name
+      ALLOWED_ORIGIN = var.allowed_origin
     }
   }
 
@@ -71,10 +93,11 @@ resource "aws_lambda_function" "orchestrator" {
 
   environment {
     variables = {
-      DMS_TASK_ARN               = var.dms_task_arn
-      FIXED_RUN                  = var.fixed_run
-      EVENTBUS_NAME              = var.event_bus_name
-      ATHENA_RUNNER_FUNCTION_ARN = aws_lambda_function.athena_runner.arn
+      DMS_TASK_ARN   = var.dms_task_arn
+      DMS_TASKS      = jsonencode(var.dms_tasks)
+      FIXED_RUN      = var.fixed_run
+      JOBS_TABLE     = var.jobs_table_name
+      PROGRESS_TABLE = var.progress_table_name
     }
   }
 
@@ -84,7 +107,7 @@ resource "aws_lambda_function" "orchestrator" {
 resource "aws_lambda_function" "athena_runner" {
   function_name    = "${var.project_name}-athena-runner"
   role             = var.lambda_role_arn
-  handler          = "athena_runner.handler"
+  handler          = "athena_runner.lambda_handler"
   runtime          = "python3.11"
   filename         = data.archive_file.jobs_zip.output_path
   source_code_hash = data.archive_file.jobs_zip.output_base64sha256
@@ -94,16 +117,53 @@ resource "aws_lambda_function" "athena_runner" {
 
   environment {
     variables = {
-      ATHENA_OUTPUT  = var.athena_output
-      ATHENA_WG      = var.athena_wg
-      ATHENA_CATALOG = var.athena_catalog
-      EVENTBUS_NAME  = var.event_bus_name
+      ATHENA_OUTPUT            = var.athena_output
+      ATHENA_WG                = var.athena_wg
+      ATHENA_CATALOG           = var.athena_catalog
+      EVENTBUS_NAME            = var.event_bus_name
+      PROGRESS_TABLE           = var.progress_table_name
+      JOBS_TABLE               = var.jobs_table_name
+      ADMISSION_TABLE          = var.ddb_table_name
+      ATHENA_MAX_CONCURRENCY   = tostring(var.athena_max_concurrency)
+      ATHENA_REFRESH_RESERVED  = tostring(var.athena_refresh_reserved)
+      PUBLISH_REFRESHED_TABLES = "true"
     }
   }
 
   tags = var.tags
 }
 
+# One long-lived rule routes every DMS full-load completion to the runner; the
+# runner resolves the job from the jobs table instead of a per-job rule.
+resource "aws_cloudwatch_event_rule" "dms_full_load_completed" {
+  name           = "${var.project_name}-dms-full-load-completed"
+  event_bus_name = var.event_bus_name
+  event_pattern = jsonencode({
+    source        = ["aws.dms"]
+    "detail-type" = ["DMS Replication Task State Change"]
+    detail = {
+      ReplicationTaskArn   = distinct(concat([var.dms_task_arn], keys(var.dms_tasks)))
+      ReplicationTaskState = ["full-load-completed"]
+    }
+  })
+  tags = var.tags
+}
+
+resource "aws_cloudwatch_event_target" "athena_runner" {
+  rule           = aws_cloudwatch_event_rule.dms_full_load_completed.name
+  event_bus_name = var.event_bus_name
+  target_id      = "athena-runner"
+  arn            = aws_lambda_function.athena_runner.arn
+}
+
+resource "aws_lambda_permission" "athena_runner_events" {
+  statement_id  = "eventbridge-dms-full-load-completed"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.athena_runner.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.dms_full_load_completed.arn
+}
+
 resource "aws_lambda_function" "query" {
   function_name    = "${var.project_name}-query"
   role             = var.lambda_role_arn
@@ -117,10 +177,74 @@ resource "aws_lambda_function" "query" {
 
   environment {
     variables = {
-      ATHENA_OUTPUT  = var.athena_output
-      ATHENA_WG      = var.athena_wg
-      ATHENA_CATALOG = var.athena_catalog
-      ALLOWED_ORIGIN = var.allowed_origin
+      ATHENA_OUTPUT                = var.athena_output
+      ATHENA_WG                    = var.athena_wg
+      ATHENA_CATALOG               = var.athena_catalog
+      ALLOWED_ORIGIN               = var.allowed_origin
+      RESPONSE_SPILL_BUCKET        = var.response_spill_bucket
+      QUERY_SCAN_BUDGET_BYTES      = tostring(var.query_scan_budget_bytes)
+      QUERY_SCAN_BUDGET_ACTION     = var.query_scan_budget_action
+      ATHENA_CAPPED_WG             = var.athena_capped_wg
+      QUERY_USER_SCAN_BUDGETS      = jsonencode(var.query_user_scan_budgets)
+      ADMISSION_TABLE              = var.ddb_table_name
+      ATHENA_MAX_CONCURRENCY       = tostring(var.athena_max_concurrency)
+      ATHENA_REFRESH_RESERVED      = tostring(var.athena_refresh_reserved)
+      ATHENA_PRINCIPAL_CONCURRENCY = tostring(var.athena_principal_concurrency)
+    }
+  }
+
+  tags = var.tags
+}
+
+resource "aws_lambda_function" "query_cancel" {
+  function_name    = "${var.project_name}-query-cancel"
+  role             = var.lambda_role_arn
+  handler          = "handlers.query_cancel.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.api_zip.output_path
+  source_code_hash = data.archive_file.api_zip.output_base64sha256
+  timeout          = 10
+  memory_size      = 256
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      ATHENA_WG        = var.athena_wg
+      ATHENA_CAPPED_WG = var.athena_capped_wg
+      ALLOWED_ORIGIN   = var.allowed_origin
+    }
+  }
+
+  tags = var.tags
+}
+
+# Waits on up to 20 queries at once, so it gets the whole API Gateway window.
+resource "aws_lambda_function" "query_batch" {
+  function_name    = "${var.project_name}-query-batch"
+  role             = var.lambda_role_arn
+  handler          = "handlers.query_batch.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.api_zip.output_path
+  source_code_hash = data.archive_file.api_zip.output_base64sha256
+  timeout          = 29
+  memory_size      = 512
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      ATHENA_OUTPUT                = var.athena_output
+      ATHENA_WG                    = var.athena_wg
+      ATHENA_CATALOG               = var.athena_catalog
+      ALLOWED_ORIGIN               = var.allowed_origin
+      RESPONSE_SPILL_BUCKET        = var.response_spill_bucket
+      QUERY_SCAN_BUDGET_BYTES      = tostring(var.query_scan_budget_bytes)
+      QUERY_SCAN_BUDGET_ACTION     = var.query_scan_budget_action
+      ATHENA_CAPPED_WG             = var.athena_capped_wg
+      QUERY_USER_SCAN_BUDGETS      = jsonencode(var.query_user_scan_budgets)
+      ADMISSION_TABLE              = var.ddb_table_name
+      ATHENA_MAX_CONCURRENCY       = tostring(var.athena_max_concurrency)
+      ATHENA_REFRESH_RESERVED      = tostring(var.athena_refresh_reserved)
+      ATHENA_PRINCIPAL_CONCURRENCY = tostring(var.athena_principal_concurrency)
     }
   }
 
@@ -160,33 +284,296 @@ resource "aws_lambda_function" "materialize" {
 
   environment {
     variables = {
-      ALLOWED_ORIGIN = var.allowed_origin
-      ATHENA_OUTPUT  = var.athena_output
-      ATHENA_WG      = var.athena_wg
+      ALLOWED_ORIGIN               = var.allowed_origin
+      ATHENA_OUTPUT                = var.athena_output
+      ATHENA_WG                    = var.athena_wg
+      MATERIALIZE_JOBS_TABLE       = var.materialize_jobs_table_name
+      MATERIALIZE_LOCATION         = var.materialize_location
+      ADMISSION_TABLE              = var.ddb_table_name
+      ATHENA_MAX_CONCURRENCY       = tostring(var.athena_max_concurrency)
+      ATHENA_REFRESH_RESERVED      = tostring(var.athena_refresh_reserved)
+      ATHENA_PRINCIPAL_CONCURRENCY = tostring(var.athena_principal_concurrency)
     }
   }
 
   tags = var.tags
 }
 
-output "invoke_arns" {
-  value = {
-    health      = aws_lambda_function.health.invoke_arn
-    run         = aws_lambda_function.run.invoke_arn
-    query       = aws_lambda_function.query.invoke_arn
-    schemas     = aws_lambda_function.schemas.invoke_arn
-    materialize = aws_lambda_function.materialize.invoke_arn
+resource "aws_lambda_function" "materialize_status" {
+  function_name    = "${var.project_name}-materialize-status"
+  role             = var.lambda_role_arn
+  handler          = "handlers.materialize_status.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.api_zip.output_path
+  source_code_hash = data.archive_file.api_zip.output_base64sha256
+  timeout          = 10
+  memory_size      = 256
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      MATERIALIZE_JOBS_TABLE = var.materialize_jobs_table_name
+      MATERIALIZE_LOCATION   = var.materialize_location
+      ALLOWED_ORIGIN         = var.allowed_origin
+    }
+  }
+
+  tags = var.tags
+}
+
+# Deletes the data of table versions that replace-mode materializations swapped out,
+# once the grace period recorded on their job has passed.
+resource "aws_lambda_function" "materialize_gc" {
+  function_name    = "${var.project_name}-materialize-gc"
+  role             = var.lambda_role_arn
+  handler          = "materialize_gc.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.jobs_zip.output_path
+  source_code_hash = data.archive_file.jobs_zip.output_base64sha256
+  timeout          = 300
+  memory_size      = 256
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      MATERIALIZE_JOBS_TABLE = var.materialize_jobs_table_name
+      MATERIALIZE_LOCATION   = var.materialize_location
+    }
   }
+
+  tags = var.tags
+}
+
+resource "aws_cloudwatch_event_rule" "materialize_gc" {
+  name                = "${var.project_name}-materialize-gc"
+  schedule_expression = "rate(1 hour)"
+  tags                = var.tags
+}
+
+resource "aws_cloudwatch_event_target" "materialize_gc" {
+  rule      = aws_cloudwatch_event_rule.materialize_gc.name
+  target_id = "materialize-gc"
+  arn       = aws_lambda_function.materialize_gc.arn
+}
+
+resource "aws_lambda_permission" "materialize_gc_events" {
+  statement_id  = "eventbridge-materialize-gc-schedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.materialize_gc.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.materialize_gc.arn
+}
+
+# Finishes async work nobody polls: swaps finished materialize builds in (or discards
+# failed ones) and holds async queries' admission slots until those queries finish.
+resource "aws_lambda_function" "finalizer" {
+  function_name    = "${var.project_name}-finalizer"
+  role             = var.lambda_role_arn
+  handler          = "handlers.finalizer.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.api_zip.output_path
+  source_code_hash = data.archive_file.api_zip.output_base64sha256
+  timeout          = 60
+  memory_size      = 256
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      MATERIALIZE_JOBS_TABLE       = var.materialize_jobs_table_name
+      MATERIALIZE_LOCATION         = var.materialize_location
+      ADMISSION_TABLE              = var.ddb_table_name
+      ATHENA_MAX_CONCURRENCY       = tostring(var.athena_max_concurrency)
+      ATHENA_REFRESH_RESERVED      = tostring(var.athena_refresh_reserved)
+      ATHENA_PRINCIPAL_CONCURRENCY = tostring(var.athena_principal_concurrency)
+    }
+  }
+
+  tags = var.tags
+}
+
+resource "aws_cloudwatch_event_rule" "finalizer" {
+  name                = "${var.project_name}-finalizer"
+  schedule_expression = "rate(1 minute)"
+  tags                = var.tags
+}
+
+resource "aws_cloudwatch_event_target" "finalizer" {
+  rule      = aws_cloudwatch_event_rule.finalizer.name
+  target_id = "finalizer"
+  arn       = aws_lambda_function.finalizer.arn
+}
+
+resource "aws_lambda_permission" "finalizer_events" {
+  statement_id  = "eventbridge-finalizer-schedule"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.finalizer.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.finalizer.arn
+}
+
+resource "aws_lambda_function" "views" {
+  function_name    = "${var.project_name}-views"
+  role             = var.lambda_role_arn
+  handler          = "handlers.views.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.api_zip.output_path
+  source_code_hash = data.archive_file.api_zip.output_base64sha256
+  timeout          = 10
+  memory_size      = 256
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      MATERIALIZED_VIEWS_TABLE = var.views_table_name
+      ALLOWED_ORIGIN           = var.allowed_origin
+    }
+  }
+
+  tags = var.tags
+}
+
+# Rebuilds the registered views whose inputs a run changed. Views wait on their
+# materializations synchronously, so it gets the full Lambda timeout.
+resource "aws_lambda_function" "view_refresh" {
+  function_name    = "${var.project_name}-view-refresh"
+  role             = var.lambda_role_arn
+  handler          = "handlers.view_refresh.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.api_zip.output_path
+  source_code_hash = data.archive_file.api_zip.output_base64sha256
+  timeout          = 900
+  memory_size      = 256
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      MATERIALIZED_VIEWS_TABLE     = var.views_table_name
+      ATHENA_OUTPUT                = var.athena_output
+      ATHENA_WG                    = var.athena_wg
+      MATERIALIZE_JOBS_TABLE       = var.materialize_jobs_table_name
+      MATERIALIZE_LOCATION         = var.materialize_location
+      ADMISSION_TABLE              = var.ddb_table_name
+      ATHENA_MAX_CONCURRENCY       = tostring(var.athena_max_concurrency)
+      ATHENA_REFRESH_RESERVED      = tostring(var.athena_refresh_reserved)
+      ATHENA_PRINCIPAL_CONCURRENCY = tostring(var.athena_principal_concurrency)
+    }
+  }
+
+  tags = var.tags
+}
+
+resource "aws_cloudwatch_event_rule" "tables_refreshed" {
+  name           = "${var.project_name}-tables-refreshed"
+  event_bus_name = var.event_bus_name
+  event_pattern = jsonencode({
+    source        = ["sewingmachine.athena-runner"]
+    "detail-type" = ["Tables Refreshed"]
+  })
+  tags = var.tags
+}
+
+resource "aws_cloudwatch_event_target" "view_refresh" {
+  rule           = aws_cloudwatch_event_rule.tables_refreshed.name
+  event_bus_name = var.event_bus_name
+  target_id      = "view-refresh"
+  arn            = aws_lambda_function.view_refresh.arn
+}
+
+resource "aws_lambda_permission" "view_refresh_events" {
+  statement_id  = "eventbridge-tables-refreshed"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.view_refresh.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.tables_refreshed.arn
+}
+
+# Optional single entry point: one function serves every API route so warm containers,
+# clients and caches are shared across routes. The per-route functions stay deployed;
+# the API integrations switch to the router when var.single_router is true.
+resource "aws_lambda_function" "api_router" {
+  count            = var.single_router ? 1 : 0
+  function_name    = "${var.project_name}-api-router"
+  role             = var.lambda_role_arn
+  handler          = "handlers.router.lambda_handler"
+  runtime          = "python3.11"
+  filename         = data.archive_file.api_zip.output_path
+  source_code_hash = data.archive_file.api_zip.output_base64sha256
+  timeout          = 10
+  memory_size      = 256
+  architectures    = ["x86_64"]
+
+  environment {
+    variables = {
+      ALLOWED_ORIGIN               = var.allowed_origin
+      DDB_TABLE                    = var.ddb_table_name
+      PROGRESS_TABLE               = var.progress_table_name
+      ORCHESTRATOR_FN              = aws_lambda_function.orchestrator.function_name
+      BRONZE_PREFIX_S3             = var.bronze_prefix_s3
+      SILVER_PREFIX_S3             = var.silver_prefix_s3
+      GOLD_PREFIX_S3               = var.gold_prefix_s3
+      PRESIGN_TTL_SECONDS          = "900"
+      MAX_DIRS_PER_LAYER           = "25"
+      MAX_FILES_PER_DIR            = "50"
+      ATHENA_OUTPUT                = var.athena_output
+      ATHENA_WG                    = var.athena_wg
+      ATHENA_CATALOG               = var.athena_catalog
+      RESPONSE_SPILL_BUCKET        = var.response_spill_bucket
+      QUERY_SCAN_BUDGET_BYTES      = tostring(var.query_scan_budget_bytes)
+      QUERY_SCAN_BUDGET_ACTION     = var.query_scan_budget_action
+      ATHENA_CAPPED_WG             = var.athena_capped_wg
+      QUERY_USER_SCAN_BUDGETS      = jsonencode(var.query_user_scan_budgets)
+      MATERIALIZE_JOBS_TABLE       = var.materialize_jobs_table_name
+      MATERIALIZE_LOCATION         = var.materialize_location
+      MATERIALIZED_VIEWS_TABLE     = var.views_table_name
+      ADMISSION_TABLE              = var.ddb_table_name
+      ATHENA_MAX_CONCURRENCY       = tostring(var.athena_max_concurrency)
+      ATHENA_REFRESH_RESERVED      = tostring(var.athena_refresh_reserved)
+      ATHENA_PRINCIPAL_CONCURRENCY = tostring(var.athena_principal_concurrency)
+    }
+  }
+
+  tags = var.tags
+}
+
+locals {
+  api_routes = ["health", "run", "run_status", "query", "query_cancel", "query_batch", "schemas", "materialize", "materialize_status", "views"]
+  route_invoke_arns = {
+    health             = aws_lambda_function.health.invoke_arn
+    run                = aws_lambda_function.run.invoke_arn
+    run_status         = aws_lambda_function.run_status.invoke_arn
+    query              = aws_lambda_function.query.invoke_arn
+    query_cancel       = aws_lambda_function.query_cancel.invoke_arn
+    query_batch        = aws_lambda_function.query_batch.invoke_arn
+    schemas            = aws_lambda_function.schemas.invoke_arn
+    materialize        = aws_lambda_function.materialize.invoke_arn
+    materialize_status = aws_lambda_function.materialize_status.invoke_arn
+    views              = aws_lambda_function.views.invoke_arn
+  }
+  route_names = {
+    health             = aws_lambda_function.health.function_name
+    run                = aws_lambda_function.run.function_name
+    run_status         = aws_lambda_function.run_status.function_name
+    query              = aws_lambda_function.query.function_name
+    query_cancel       = aws_lambda_function.query_cancel.function_name
+    query_batch        = aws_lambda_function.query_batch.function_name
+    schemas            = aws_lambda_function.schemas.function_name
+    materialize        = aws_lambda_function.materialize.function_name
+    materialize_status = aws_lambda_function.materialize_status.function_name
+    views              = aws_lambda_function.views.function_name
+  }
+  router_invoke_arns = { for route in local.api_routes : route => aws_lambda_function.api_router[0].invoke_arn if var.single_router }
+  router_names       = { for route in local.api_routes : route => aws_lambda_function.api_router[0].function_name if var.single_router }
+}
+
+output "invoke_arns" {
+  value = merge(local.route_invoke_arns, local.router_invoke_arns)
 }
 
 output "names" {
-  value = {
-    health        = aws_lambda_function.health.function_name
-    run           = aws_lambda_function.run.function_name
-    query         = aws_lambda_function.query.function_name
-    schemas       = aws_lambda_function.schemas.function_name
-    materialize   = aws_lambda_function.materialize.function_name
+  value = merge(local.route_names, local.router_names, {
     orchestrator  = aws_lambda_function.orchestrator.function_name
     athena_runner = aws_lambda_function.athena_runner.function_name
-  }
+    view_refresh  = aws_lambda_function.view_refresh.function_name
+    finalizer     = aws_lambda_function.finalizer.function_name
+  })
 }
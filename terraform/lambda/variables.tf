@@ -2,13 +2,31 @@ variable "project_name" { type = string }
 variable "lambda_role_arn" { type = string }
 variable "allowed_origin" { type = string }
 variable "ddb_table_name" { type = string }
+variable "progress_table_name" { type = string }
+variable "jobs_table_name" { type = string }
+variable "materialize_jobs_table_name" { type = string }
+variable "materialize_location" { type = string }
+variable "views_table_name" { type = string }
 variable "bronze_prefix_s3" { type = string }
 variable "silver_prefix_s3" { type = string }
 variable "gold_prefix_s3" { type = string }
 variable "dms_task_arn" { type = string }
+variable "dms_tasks" { type = map(list(string)) }
 variable "fixed_run" { type = string }
 variable "event_bus_name" { type = string }
 variable "athena_output" { type = string }
 variable "athena_wg" { type = string }
 variable "athena_catalog" { type = string }
 variable "tags" { type = map(string) }
+variable "response_spill_bucket" { type = string }
+variable "query_scan_budget_bytes" { type = number }
+variable "query_scan_budget_action" { type = string }
+variable "athena_capped_wg" { type = string }
+variable "query_user_scan_budgets" { type = map(number) }
+variable "athena_max_concurrency" { type = number }
+variable "athena_refresh_reserved" { type = number }
+variable "athena_principal_concurrency" { type = number }
+variable "single_router" {
+  type    = bool
+  default = false
+}
@@ -20,59 +20,93 @@ locals {
 }
 
 module "iam" {
-  source        = "./iam"
-  project_name  = local.project_name
-  tags          = local.tags
-  dms_task_arn  = var.dms_task_arn
-  ddb_table_arn = module.dynamodb.table_arn
+  source                     = "./iam"
+  project_name               = local.project_name
+  tags                       = local.tags
+  dms_task_arn               = var.dms_task_arn
+  dms_tasks                  = var.dms_tasks
+  ddb_table_arn              = module.dynamodb.table_arn
+  progress_table_arn         = module.dynamodb.progress_table_arn
+  jobs_table_arn             = module.dynamodb.jobs_table_arn
+  materialize_jobs_table_arn = module.dynamodb.materialize_jobs_table_arn
+  views_table_arn            = module.dynamodb.views_table_arn
 }
 
 module "dynamodb" {
-  source         = "./dynamodb"
-  ddb_table_name = var.ddb_table_name
-  tags           = local.tags
+  source                      = "./dynamodb"
+  ddb_table_name              = var.ddb_table_name
+  progress_table_name         = var.progress_table_name
+  jobs_table_name             = var.jobs_table_name
+  materialize_jobs_table_name = var.materialize_jobs_table_name
+  views_table_name            = var.views_table_name
+  tags                        = local.tags
 }
 
 module "lambda" {
-  source           = "./lambda"
-  project_name     = local.project_name
-  lambda_role_arn  = module.iam.lambda_role_arn
-  allowed_origin   = var.allowed_origin
-  ddb_table_name   = module.dynamodb.table_name
-  bronze_prefix_s3 = var.bronze_prefix_s3
-  silver_prefix_s3 = var.silver_prefix_s3
-  gold_prefix_s3   = var.gold_prefix_s3
-  dms_task_arn     = var.dms_task_arn
-  fixed_run        = var.fixed_run
-  event_bus_name   = var.event_bus_name
-  athena_output    = var.athena_output
-  athena_wg        = var.athena_wg
-  athena_catalog   = var.athena_catalog
-  tags             = local.tags
+  source                       = "./lambda"
+  project_name                 = local.project_name
+  lambda_role_arn              = module.iam.lambda_role_arn
+  allowed_origin               = var.allowed_origin
+  ddb_table_name               = module.dynamodb.table_name
+  progress_table_name          = module.dynamodb.progress_table_name
+  jobs_table_name              = module.dynamodb.jobs_table_name
+  materialize_jobs_table_name  = module.dynamodb.materialize_jobs_table_name
+  materialize_location         = var.materialize_location
+  views_table_name             = module.dynamodb.views_table_name
+  bronze_prefix_s3             = var.bronze_prefix_s3
+  silver_prefix_s3             = var.silver_prefix_s3
+  gold_prefix_s3               = var.gold_prefix_s3
+  dms_task_arn                 = var.dms_task_arn
+  dms_tasks                    = var.dms_tasks
+  fixed_run                    = var.fixed_run
+  event_bus_name               = var.event_bus_name
+  athena_output                = var.athena_output
+  athena_wg                    = var.athena_wg
+  athena_catalog               = var.athena_catalog
+  single_router                = var.single_router
+  response_spill_bucket        = var.response_spill_bucket
+  query_scan_budget_bytes      = var.query_scan_budget_bytes
+  query_scan_budget_action     = var.query_scan_budget_action
+  athena_capped_wg             = var.athena_capped_wg
+  query_user_scan_budgets      = var.query_user_scan_budgets
+  athena_max_concurrency       = var.athena_max_concurrency
+  athena_refresh_reserved      = var.athena_refresh_reserved
+  athena_principal_concurrency = var.athena_principal_concurrency
+  tags                         = local.tags
 }
 
 module "apigw" {
-  source                        = "./apigw"
-  project_name                  = local.project_name
-  rest_api_name                 = var.rest_api_name
-  allowed_origin                = var.allowed_origin
-  cloudwatch_role_arn           = var.apigw_cloudwatch_role_arn
-  aws_region                    = var.aws_region
-  cognito_user_pool_id          = var.cognito_user_pool_id
-  tags                          = local.tags
-  custom_domain_name            = var.custom_domain_name
-  certificate_arn               = var.certificate_arn
-  custom_domain_endpoint_type   = var.custom_domain_endpoint_type
-  lambda_health_invoke_arn      = module.lambda.invoke_arns["health"]
-  lambda_run_invoke_arn         = module.lambda.invoke_arns["run"]
-  lambda_query_invoke_arn       = module.lambda.invoke_arns["query"]
-  lambda_schemas_invoke_arn     = module.lambda.invoke_arns["schemas"]
-  lambda_materialize_invoke_arn = module.lambda.invoke_arns["materialize"]
-  lambda_health_name            = module.lambda.names["health"]
-  lambda_run_name               = module.lambda.names["run"]
-  lambda_query_name             = module.lambda.names["query"]
-  lambda_schemas_name           = module.lambda.names["schemas"]
-  lambda_materialize_name       = module.lambda.names["materialize"]
+  source                               = "./apigw"
+  project_name                         = local.project_name
+  rest_api_name                        = var.rest_api_name
+  allowed_origin                       = var.allowed_origin
+  cloudwatch_role_arn                  = var.apigw_cloudwatch_role_arn
+  aws_region                           = var.aws_region
+  cognito_user_pool_id                 = var.cognito_user_pool_id
+  tags                                 = local.tags
+  custom_domain_name                   = var.custom_domain_name
+  certificate_arn                      = var.certificate_arn
+  custom_domain_endpoint_type          = var.custom_domain_endpoint_type
+  lambda_health_invoke_arn             = module.lambda.invoke_arns["health"]
+  lambda_run_invoke_arn                = module.lambda.invoke_arns["run"]
+  lambda_run_status_invoke_arn         = module.lambda.invoke_arns["run_status"]
+  lambda_query_invoke_arn              = module.lambda.invoke_arns["query"]
+  lambda_query_cancel_invoke_arn       = module.lambda.invoke_arns["query_cancel"]
+  lambda_query_batch_invoke_arn        = module.lambda.invoke_arns["query_batch"]
+  lambda_schemas_invoke_arn            = module.lambda.invoke_arns["schemas"]
+  lambda_materialize_invoke_arn        = module.lambda.invoke_arns["materialize"]
+  lambda_materialize_status_invoke_arn = module.lambda.invoke_arns["materialize_status"]
+  lambda_views_invoke_arn              = module.lambda.invoke_arns["views"]
+  lambda_health_name                   = module.lambda.names["health"]
+  lambda_run_name                      = module.lambda.names["run"]
+  lambda_run_status_name               = module.lambda.names["run_status"]
+  lambda_query_name                    = module.lambda.names["query"]
+  lambda_query_cancel_name             = module.lambda.names["query_cancel"]
+  lambda_query_batch_name              = module.lambda.names["query_batch"]
+  lambda_schemas_name                  = module.lambda.names["schemas"]
+  lambda_materialize_name              = module.lambda.names["materialize"]
+  lambda_materialize_status_name       = module.lambda.names["materialize_status"]
+  lambda_views_name                    = module.lambda.names["views"]
 }
 module "ssm" {
   source               = "./ssm"
@@ -84,6 +118,7 @@ module "ssm" {
   silver_prefix_s3     = var.silver_prefix_s3
   gold_prefix_s3       = var.gold_prefix_s3
   ddb_table_name       = module.dynamodb.table_name
+  progress_table_name  = module.dynamodb.progress_table_name
   fixed_run            = var.fixed_run
   event_bus_name       = var.event_bus_name
   cognito_user_pool_id = var.cognito_user_pool_id
@@ -46,6 +46,12 @@ resource "aws_ssm_parameter" "ddb_table"      {
   value = var.ddb_table_name
 }
 
+resource "aws_ssm_parameter" "progress_table" {
+  name  = "/sewingmachine/PROGRESS_TABLE"
+  type  = "String"
+  value = var.progress_table_name
+}
+
 resource "aws_ssm_parameter" "fixed_run"      {
   name  = "/sewingmachine/FIXED_RUN"
   type  = "String"
@@ -6,6 +6,7 @@ variable "bronze_prefix_s3" { type = string }
 variable "silver_prefix_s3" { type = string }
 variable "gold_prefix_s3" { type = string }
 variable "ddb_table_name" { type = string }
+variable "progress_table_name" { type = string }
 variable "fixed_run" { type = string }
 variable "event_bus_name" { type = string }
 variable "cognito_user_pool_id" { type = string }
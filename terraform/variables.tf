@@ -23,6 +23,32 @@ variable "ddb_table_name" {
   default = "sewingmachine-cooldowns"
 }
 
+variable "progress_table_name" {
+  type    = string
+  default = "sewingmachine-run-progress"
+}
+
+variable "jobs_table_name" {
+  type    = string
+  default = "sewingmachine-dms-jobs"
+}
+
+variable "materialize_jobs_table_name" {
+  type    = string
+  default = "sewingmachine-materialize-jobs"
+}
+
+variable "views_table_name" {
+  type    = string
+  default = "sewingmachine-materialized-views"
+}
+
+# Replace-mode materializations build each table version under this prefix.
+variable "materialize_location" {
+  type    = string
+  default = "s3://fabric-aws-poc/materialized/"
+}
+
 variable "bronze_prefix_s3" {
   type    = string
   default = "s3://fabric-aws-poc/bronze/"
@@ -91,6 +117,68 @@ variable "dms_task_arn" {
   type = string
 }
 
+# Optional fan-out: DMS task ARN -> source tables it loads (e.g. "resident", "visit").
+# When set, each task is started concurrently and refreshed as soon as it completes.
+variable "dms_tasks" {
+  type    = map(list(string))
+  default = {}
+}
+
+# Bucket for /run and /query responses too large to return inline (served via a
+# presigned redirect). Empty disables spilling; expire the api-responses/ prefix with a lifecycle rule.
+variable "response_spill_bucket" {
+  type    = string
+  default = ""
+}
+
+# /query scan budget: estimated bytes (from Glue table/partition metadata) a query may scan.
+# 0 disables the check. Over budget a query is rejected, run with a warning ("warn"), or
+# routed to athena_capped_wg ("route"), whose own bytes-scanned cutoff then applies.
+variable "query_scan_budget_bytes" {
+  type    = number
+  default = 0
+}
+
+variable "query_scan_budget_action" {
+  type    = string
+  default = "reject"
+}
+
+variable "athena_capped_wg" {
+  type    = string
+  default = ""
+}
+
+# Cognito username or group -> scan budget in bytes, overriding query_scan_budget_bytes.
+variable "query_user_scan_budgets" {
+  type    = map(number)
+  default = {}
+}
+
+# Athena admission control: leases on the cooldown table cap the queries this stack runs
+# at once. 0 disables it. athena_refresh_reserved of those slots are kept for the refresh
+# runner; athena_principal_concurrency (0 = no limit) caps each user's share.
+variable "athena_max_concurrency" {
+  type    = number
+  default = 0
+}
+
+variable "athena_refresh_reserved" {
+  type    = number
+  default = 2
+}
+
+variable "athena_principal_concurrency" {
+  type    = number
+  default = 0
+}
+
+# Serve every API route from one router Lambda instead of one function per route.
+variable "single_router" {
+  type    = bool
+  default = false
+}
+
 variable "default_tags" {
   type    = map(string)
   default = {}
@@ -0,0 +1,38 @@
+import src.api.handlers.finalizer as handler
+from app.domain.errors import ExternalServiceError
+
+
+def _patch(monkeypatch, finalize, admission=None):
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+    DummyService.finalize = staticmethod(finalize)
+    clients = type("Clients", (), {"athena": lambda self: "athena"})()
+    monkeypatch.setattr(handler, "get_clients", lambda region: clients)
+    monkeypatch.setattr(handler, "MaterializeService", DummyService)
+    monkeypatch.setattr(handler, "build_admission", lambda settings, clients: admission)
+
+
+def test_finalizer_handler_finalizes_jobs_and_sweeps_leases(monkeypatch):
+    class Admission:
+        def sweep(self, athena):
+            assert athena == "athena"
+            return {"released": 1, "renewed": 2}
+
+    _patch(monkeypatch, lambda: {"SUCCEEDED": 2, "RUNNING": 1}, Admission())
+
+    assert handler.lambda_handler({"source": "aws.events"}, None) == {
+        "ok": True,
+        "jobs": {"SUCCEEDED": 2, "RUNNING": 1},
+        "leases": {"released": 1, "renewed": 2},
+    }
+
+
+def test_finalizer_handler_still_sweeps_when_listing_jobs_fails(monkeypatch):
+    def finalize():
+        raise ExternalServiceError("Failed to list materialize jobs")
+
+    _patch(monkeypatch, finalize)
+
+    assert handler.lambda_handler({}, None) == {"ok": False, "jobs": {}, "leases": {}}
@@ -35,3 +35,15 @@ def test_health_handler_success(monkeypatch):
     assert body["status"] == "ok"
     assert body["service"] == "sewingmachine"
     assert response["headers"]["Access-Control-Allow-Origin"] == "http://localhost:5173"
+
+
+def test_health_handler_does_not_import_boto3():
+    # Cold-start guard: /health makes no AWS calls, so it must not pay boto3's import cost.
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    api_dir = Path(__file__).resolve().parents[2] / "src" / "api"
+    code = "import sys, handlers.health; print(sorted(m for m in ('boto3', 'botocore') if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", code], cwd=api_dir, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "[]"
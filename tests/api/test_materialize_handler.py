@@ -5,6 +5,7 @@ import pytest
 
 import src.api.handlers.materialize as handler
 from app.domain.errors import ValidationError
+from app.domain.models import MaterializeJob
 
 
 def _event(method="POST", body=None, origin="http://localhost:5173"):
@@ -54,7 +55,7 @@ def test_materialize_handler_success(monkeypatch):
         def __init__(self, *_a, **_k):
             pass
 
-        def execute(self, payload):
+        def execute(self, payload, principals=()):
             return {"status": "ok", "payload": payload}
 
     _patch_basics(monkeypatch, DummyService)
@@ -66,12 +67,27 @@ def test_materialize_handler_success(monkeypatch):
     assert response["headers"]["Access-Control-Allow-Origin"] == "http://localhost:5173"
 
 
+def test_materialize_handler_accepts_tracked_jobs(monkeypatch):
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def execute(self, payload, principals=()):
+            return MaterializeJob(job_id="job-1", state="QUEUED", table="db.t", mode="append", query_execution_id="qid-1")
+
+    _patch_basics(monkeypatch, DummyService)
+
+    response = handler.lambda_handler(_event(body={"mode": "append"}), None)
+    assert response["statusCode"] == 202
+    assert json.loads(response["body"])["job_id"] == "job-1"
+
+
 def test_materialize_handler_domain_error(monkeypatch):
     class FailingService:
         def __init__(self, *_a, **_k):
             pass
 
-        def execute(self, _payload):
+        def execute(self, _payload, principals=()):
             raise ValidationError("invalid", code="Bad")
 
     _patch_basics(monkeypatch, FailingService)
@@ -88,7 +104,7 @@ def test_materialize_handler_unexpected(monkeypatch):
         def __init__(self, *_a, **_k):
             pass
 
-        def execute(self, _payload):
+        def execute(self, _payload, principals=()):
             raise RuntimeError("boom")
 
     _patch_basics(monkeypatch, FailingService)
@@ -0,0 +1,64 @@
+import json
+from types import SimpleNamespace
+
+import src.api.handlers.materialize_status as handler
+from app.domain.errors import NotFoundError
+from app.domain.models import MaterializeJob
+
+
+def _event(method="GET", job_id="job-1", origin="http://localhost:5173"):
+    payload = {"httpMethod": method, "pathParameters": {"jobId": job_id} if job_id else None}
+    if origin:
+        payload["headers"] = {"Origin": origin}
+    return payload
+
+
+def _patch_basics(monkeypatch, service_factory):
+    settings = SimpleNamespace(allowed_origin="https://awssewingmachine.com,http://localhost:5173", region="us-west-1")
+    monkeypatch.setattr(handler, "get_materialize_settings", lambda: settings)
+    monkeypatch.setattr(handler, "get_clients", lambda region: object())
+    monkeypatch.setattr(handler, "MaterializeService", service_factory)
+
+
+def test_materialize_status_handler_options(monkeypatch):
+    def factory(*_a, **_k):
+        raise AssertionError("service should not be created")
+
+    _patch_basics(monkeypatch, factory)
+
+    response = handler.lambda_handler(_event(method="OPTIONS"), None)
+    assert response["statusCode"] == 200
+    assert response["headers"]["Access-Control-Allow-Methods"] == "GET,OPTIONS"
+
+
+def test_materialize_status_handler_success(monkeypatch):
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def status(self, job_id):
+            return MaterializeJob(job_id=job_id, state="RUNNING", table="db.t", mode="append", query_execution_id="qid-1")
+
+    _patch_basics(monkeypatch, DummyService)
+
+    response = handler.lambda_handler(_event(), None)
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert (body["job_id"], body["state"], body["query_execution_id"]) == ("job-1", "RUNNING", "qid-1")
+    assert response["headers"]["Access-Control-Allow-Origin"] == "http://localhost:5173"
+
+
+def test_materialize_status_handler_not_found(monkeypatch):
+    class FailingService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def status(self, job_id):
+            raise NotFoundError(f"Job {job_id} not found")
+
+    _patch_basics(monkeypatch, FailingService)
+
+    response = handler.lambda_handler(_event(job_id="nope"), None)
+    assert response["statusCode"] == 404
+    body = json.loads(response["body"])
+    assert body["error"]["code"] == "NotFound"
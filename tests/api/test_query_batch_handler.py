@@ -0,0 +1,82 @@
+import json
+from types import SimpleNamespace
+
+import src.api.handlers.query_batch as handler
+from app.domain.errors import ValidationError
+from app.domain.models import QueryBatch, QueryBatchResult, QueryResultPage, QueryStatistics
+
+
+def _event(method="POST", body=None, origin="http://localhost:5173"):
+    payload = {"httpMethod": method, "body": json.dumps(body) if body is not None else body}
+    if origin:
+        payload["headers"] = {"Origin": origin}
+    return payload
+
+
+def _patch_basics(monkeypatch, service_factory):
+    settings = SimpleNamespace(
+        allowed_origin="https://awssewingmachine.com,http://localhost:5173",
+        region="us-west-1",
+        response_spill_bucket=None,
+        cancel_reserve_seconds=1.5,
+    )
+    monkeypatch.setattr(handler, "get_query_settings", lambda: settings)
+    monkeypatch.setattr(handler, "get_clients", lambda region: object())
+    monkeypatch.setattr(handler, "QueryService", service_factory)
+
+
+def _page(query_id, state=None):
+    stats = QueryStatistics(scanned_bytes=1, execution_time_ms=2)
+    return QueryResultPage(columns=[], rows=[], stats=stats, query_execution_id=query_id, next_page_token=None, state=state)
+
+
+def test_query_batch_handler_returns_per_statement_results(monkeypatch):
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def execute_batch(self, payload, principals=(), deadline=None):
+            return QueryBatch(
+                results=[
+                    QueryBatchResult(id="a", status=200, result=_page("qid-a")),
+                    QueryBatchResult(id="b", status=400, error={"code": "ReadOnly", "message": "no"}),
+                ]
+            )
+
+    _patch_basics(monkeypatch, DummyService)
+
+    response = handler.lambda_handler(_event(body={"queries": ["SELECT 1", "DROP TABLE t"]}), None)
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert [item["status"] for item in body["results"]] == [200, 400]
+    assert body["results"][0]["result"]["query_execution_id"] == "qid-a"
+    assert body["results"][1]["error"]["code"] == "ReadOnly"
+
+
+def test_query_batch_handler_returns_202_while_queries_run(monkeypatch):
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def execute_batch(self, payload, principals=(), deadline=None):
+            return QueryBatch(results=[QueryBatchResult(id="a", status=202, result=_page("qid-a", state="RUNNING"))])
+
+    _patch_basics(monkeypatch, DummyService)
+
+    response = handler.lambda_handler(_event(body={"queries": ["SELECT 1"], "async": True}), None)
+    assert response["statusCode"] == 202
+
+
+def test_query_batch_handler_rejects_bad_batches(monkeypatch):
+    class FailingService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def execute_batch(self, payload, principals=(), deadline=None):
+            raise ValidationError("queries must be a non-empty list", code="MissingParam")
+
+    _patch_basics(monkeypatch, FailingService)
+
+    response = handler.lambda_handler(_event(body={}), None)
+    assert response["statusCode"] == 400
+    assert json.loads(response["body"])["error"]["code"] == "MissingParam"
@@ -0,0 +1,64 @@
+import json
+from types import SimpleNamespace
+
+import src.api.handlers.query_cancel as handler
+from app.domain.errors import NotFoundError
+from app.domain.models import QueryCancellation
+
+
+def _event(method="DELETE", query_id="qid-1", origin="http://localhost:5173"):
+    payload = {"httpMethod": method, "pathParameters": {"queryExecutionId": query_id} if query_id else None}
+    if origin:
+        payload["headers"] = {"Origin": origin}
+    return payload
+
+
+def _patch_basics(monkeypatch, service_factory):
+    settings = SimpleNamespace(allowed_origin="https://awssewingmachine.com,http://localhost:5173", region="us-west-1")
+    monkeypatch.setattr(handler, "get_query_settings", lambda: settings)
+    monkeypatch.setattr(handler, "get_clients", lambda region: object())
+    monkeypatch.setattr(handler, "QueryService", service_factory)
+
+
+def test_query_cancel_handler_options(monkeypatch):
+    def factory(*_a, **_k):
+        raise AssertionError("service should not be created")
+
+    _patch_basics(monkeypatch, factory)
+
+    response = handler.lambda_handler(_event(method="OPTIONS"), None)
+    assert response["statusCode"] == 200
+    assert response["headers"]["Access-Control-Allow-Methods"] == "DELETE,OPTIONS"
+
+
+def test_query_cancel_handler_success(monkeypatch):
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def cancel(self, query_id, principals):
+            assert principals == ["alice"]
+            return QueryCancellation(query_execution_id=query_id, state="CANCELLED")
+
+    _patch_basics(monkeypatch, DummyService)
+
+    event = _event()
+    event["requestContext"] = {"authorizer": {"claims": {"cognito:username": "alice"}}}
+    response = handler.lambda_handler(event, None)
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"]) == {"query_execution_id": "qid-1", "state": "CANCELLED"}
+
+
+def test_query_cancel_handler_not_found(monkeypatch):
+    class FailingService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def cancel(self, query_id, principals):
+            raise NotFoundError(f"Query {query_id} not found")
+
+    _patch_basics(monkeypatch, FailingService)
+
+    response = handler.lambda_handler(_event(query_id="nope"), None)
+    assert response["statusCode"] == 404
+    assert json.loads(response["body"])["error"]["code"] == "NotFound"
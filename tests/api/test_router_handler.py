@@ -0,0 +1,85 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import src.api.handlers.router as router
+
+
+@pytest.fixture
+def routes(monkeypatch):
+    calls = []
+    loaded = []
+
+    def make(name, methods):
+        def handle(event, context):
+            calls.append((name, event, context))
+            return {"statusCode": 200, "body": name}
+
+        return SimpleNamespace(lambda_handler=handle, ALLOWED_METHODS=methods)
+
+    modules = {
+        "handlers.health": make("health", ["OPTIONS", "GET"]),
+        "handlers.run": make("run", ["OPTIONS", "POST"]),
+        "handlers.run_status": make("run_status", ["OPTIONS", "GET"]),
+        "handlers.query_batch": make("query_batch", ["OPTIONS", "POST"]),
+        "handlers.query_cancel": make("query_cancel", ["OPTIONS", "DELETE"]),
+    }
+
+    def fake_import(name):
+        loaded.append(name)
+        return modules[name]
+
+    settings = SimpleNamespace(allowed_origin="http://localhost:5173")
+    monkeypatch.setattr(router, "_HANDLERS", {})
+    monkeypatch.setattr(router, "import_module", fake_import)
+    monkeypatch.setattr(router, "get_health_settings", lambda: settings)
+    return SimpleNamespace(calls=calls, loaded=loaded)
+
+
+def test_router_dispatches_on_resource(routes):
+    response = router.lambda_handler({"resource": "/run", "httpMethod": "POST"}, "ctx")
+
+    assert response["body"] == "run"
+    assert routes.calls[0][2] == "ctx"
+
+
+def test_router_loads_each_route_once(routes):
+    router.lambda_handler({"resource": "/health", "httpMethod": "GET"}, None)
+    router.lambda_handler({"resource": "/health", "httpMethod": "GET"}, None)
+
+    assert routes.loaded == ["handlers.health"]
+
+
+def test_router_matches_concrete_path_and_fills_path_parameters(routes):
+    response = router.lambda_handler({"path": "/run/abc-123", "httpMethod": "GET"}, None)
+
+    assert response["body"] == "run_status"
+    assert routes.calls[0][1]["pathParameters"] == {"runId": "abc-123"}
+
+
+def test_router_prefers_static_paths_over_path_parameters(routes):
+    assert router.lambda_handler({"path": "/query/batch", "httpMethod": "POST"}, None)["body"] == "query_batch"
+    assert router.lambda_handler({"path": "/query/qid-1", "httpMethod": "DELETE"}, None)["body"] == "query_cancel"
+    assert "pathParameters" not in routes.calls[0][1]
+
+
+def test_router_passes_preflight_to_route(routes):
+    response = router.lambda_handler({"resource": "/run/{runId}", "httpMethod": "OPTIONS"}, None)
+    assert response["body"] == "run_status"
+
+
+def test_router_rejects_unknown_route(routes):
+    response = router.lambda_handler({"path": "/nope", "httpMethod": "GET"}, None)
+
+    assert response["statusCode"] == 404
+    assert json.loads(response["body"])["error"]["code"] == "NotFound"
+    assert routes.loaded == []
+
+
+def test_router_rejects_unsupported_method(routes):
+    response = router.lambda_handler({"resource": "/health", "httpMethod": "DELETE"}, None)
+
+    assert response["statusCode"] == 405
+    assert json.loads(response["body"])["error"]["code"] == "MethodNotAllowed"
+    assert routes.calls == []
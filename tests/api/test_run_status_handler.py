@@ -0,0 +1,99 @@
+import json
+from types import SimpleNamespace
+
+import src.api.handlers.run_status as handler
+from app.domain.errors import NotFoundError
+
+
+def _event(method="GET", run_id="run-1", origin="http://localhost:5173"):
+    payload = {"httpMethod": method, "pathParameters": {"runId": run_id} if run_id else None}
+    if origin:
+        payload["headers"] = {"Origin": origin}
+    return payload
+
+
+def _patch_basics(monkeypatch, service_factory):
+    settings = SimpleNamespace(allowed_origin="https://awssewingmachine.com,http://localhost:5173", region="us-west-1")
+    monkeypatch.setattr(handler, "get_run_status_settings", lambda: settings)
+    monkeypatch.setattr(handler, "get_clients", lambda region: object())
+    monkeypatch.setattr(handler, "RunStatusService", service_factory)
+
+
+def test_run_status_handler_options(monkeypatch):
+    def factory(*_a, **_k):
+        raise AssertionError("service should not be created")
+
+    _patch_basics(monkeypatch, factory)
+
+    response = handler.lambda_handler(_event(method="OPTIONS"), None)
+    assert response["statusCode"] == 200
+    assert response["headers"]["Access-Control-Allow-Methods"] == "GET,OPTIONS"
+
+
+def test_run_status_handler_success(monkeypatch):
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def execute(self, run_id):
+            return {"run_id": run_id, "status": "loading"}
+
+    _patch_basics(monkeypatch, DummyService)
+
+    response = handler.lambda_handler(_event(), None)
+    assert response["statusCode"] == 200
+    body = json.loads(response["body"])
+    assert body == {"run_id": "run-1", "status": "loading"}
+    assert response["headers"]["Access-Control-Allow-Origin"] == "http://localhost:5173"
+
+
+def test_run_status_handler_not_found(monkeypatch):
+    class FailingService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def execute(self, run_id):
+            raise NotFoundError(f"Run {run_id} not found")
+
+    _patch_basics(monkeypatch, FailingService)
+
+    response = handler.lambda_handler(_event(run_id="nope"), None)
+    assert response["statusCode"] == 404
+    body = json.loads(response["body"])
+    assert body["error"]["code"] == "NotFound"
+
+
+def test_run_status_handler_reuses_service_across_invocations(monkeypatch):
+    built = []
+
+    class CountingService:
+        def __init__(self, *_a, **_k):
+            built.append(self)
+
+        def execute(self, run_id):
+            return {"run_id": run_id}
+
+    _patch_basics(monkeypatch, CountingService)
+
+    handler.lambda_handler(_event(run_id="a"), None)
+    handler.lambda_handler(_event(run_id="b"), None)
+    assert len(built) == 1
+
+
+def test_run_status_handler_returns_timings_when_asked(monkeypatch):
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def execute(self, run_id):
+            return {"run_id": run_id}
+
+    _patch_basics(monkeypatch, DummyService)
+
+    plain = handler.lambda_handler(_event(), None)
+    event = {**_event(), "queryStringParameters": {"timings": "1"}}
+    debug = handler.lambda_handler(event, None)
+
+    assert "total;dur=" in plain["headers"]["Server-Timing"]
+    assert "timings" not in json.loads(plain["body"])
+    assert "totalMs" in json.loads(debug["body"])["timings"]
@@ -0,0 +1,92 @@
+import json
+from types import SimpleNamespace
+
+import src.api.handlers.view_refresh as refresh_handler
+import src.api.handlers.views as handler
+from app.domain.errors import NotFoundError, ValidationError
+from app.domain.models import MaterializedView, ViewRefreshResult
+
+
+VIEW = MaterializedView(name="daily", database="gold", table="visits_daily", sql="SELECT 1", mode="replace", inputs=["gold.fact_visit"])
+
+
+def _event(method, body=None, name=None):
+    payload = {"httpMethod": method, "headers": {"Origin": "http://localhost:5173"}}
+    if body is not None:
+        payload["body"] = body
+    if name:
+        payload["pathParameters"] = {"name": name}
+    return payload
+
+
+class DummyService:
+    def __init__(self, *_a, **_k):
+        self.deleted = []
+
+    def list(self):
+        return [VIEW]
+
+    def register(self, payload):
+        if not payload.get("sql"):
+            raise ValidationError("name, target.db, target.table and sql are required", code="MissingParam")
+        return VIEW
+
+    def delete(self, name):
+        if name != "daily":
+            raise NotFoundError(f"View {name} not found")
+
+
+def _patch_basics(monkeypatch, service_factory=DummyService):
+    settings = SimpleNamespace(allowed_origin="http://localhost:5173", region="us-west-1")
+    monkeypatch.setattr(handler, "get_view_settings", lambda: settings)
+    monkeypatch.setattr(handler, "get_clients", lambda region: object())
+    monkeypatch.setattr(handler, "ViewsService", service_factory)
+
+
+def test_views_handler_lists_registers_and_deletes(monkeypatch):
+    _patch_basics(monkeypatch)
+
+    listed = handler.lambda_handler(_event("GET"), None)
+    registered = handler.lambda_handler(_event("POST", json.dumps({"name": "daily", "sql": "SELECT 1"})), None)
+    deleted = handler.lambda_handler(_event("DELETE", name="daily"), None)
+
+    assert json.loads(listed["body"])["views"][0]["inputs"] == ["gold.fact_visit"]
+    assert json.loads(registered["body"])["name"] == "daily"
+    assert json.loads(deleted["body"]) == {"deleted": "daily"}
+    assert listed["headers"]["Access-Control-Allow-Methods"] == "DELETE,GET,OPTIONS,POST"
+
+
+def test_views_handler_maps_errors(monkeypatch):
+    _patch_basics(monkeypatch)
+
+    bad_json = handler.lambda_handler(_event("POST", "{"), None)
+    invalid = handler.lambda_handler(_event("POST", json.dumps({"name": "daily"})), None)
+    missing = handler.lambda_handler(_event("DELETE", name="gone"), None)
+
+    assert (bad_json["statusCode"], json.loads(bad_json["body"])["error"]["code"]) == (400, "BadJson")
+    assert (invalid["statusCode"], json.loads(invalid["body"])["error"]["code"]) == (400, "MissingParam")
+    assert missing["statusCode"] == 404
+
+
+def test_view_refresh_handler_refreshes_the_event_tables(monkeypatch):
+    calls = []
+
+    class RefreshService:
+        def __init__(self, settings, clients, materialize):
+            assert materialize.pool == "refresh"
+
+        def refresh(self, changed, force=False):
+            calls.append((list(changed), force))
+            return [ViewRefreshResult("daily", "refreshed", query_execution_id="qid-1"), ViewRefreshResult("weekly", "failed", error="boom")]
+
+    monkeypatch.setattr(refresh_handler, "get_clients", lambda region: object())
+    monkeypatch.setattr(refresh_handler, "build_admission", lambda settings, clients: None)
+    monkeypatch.setattr(refresh_handler, "MaterializeService", lambda settings, clients, admission, pool: SimpleNamespace(pool=pool))
+    monkeypatch.setattr(refresh_handler, "ViewsService", RefreshService)
+    event = {"source": "sewingmachine.athena-runner", "detail": {"run": "2025-08-13", "runId": "r-1", "tables": ["gold.fact_visit"]}}
+
+    result = refresh_handler.lambda_handler(event, None)
+
+    assert calls == [(["gold.fact_visit"], False)]
+    assert result["ok"] is False
+    assert [view["status"] for view in result["views"]] == ["refreshed", "failed"]
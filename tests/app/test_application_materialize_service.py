@@ -1,11 +1,14 @@
-﻿from types import SimpleNamespace
+﻿from dataclasses import replace
+from types import SimpleNamespace
 
 import pytest
 from botocore.exceptions import ClientError
 
 from app.application.materialize_service import MaterializeService
 from app.config.settings import MaterializeSettings
-from app.domain.errors import ExternalServiceError, ValidationError
+from app.domain.errors import ExternalServiceError, NotFoundError, ValidationError
+from app.domain.models import MaterializeJob
+from app.infrastructure.admission import INTERACTIVE, InMemoryAdmission
 
 
 class FakeAthena:
@@ -31,12 +34,20 @@ class FakeAthena:
 
 
 class FakeClients:
-    def __init__(self, athena):
+    def __init__(self, athena, dynamodb=None, glue=None):
         self._athena = athena
+        self._dynamodb = dynamodb
+        self._glue = glue
 
     def athena(self):
         return self._athena
 
+    def dynamodb(self):
+        return self._dynamodb
+
+    def glue(self):
+        return self._glue
+
 
 SETTINGS = MaterializeSettings(
     region="us-west-1",
@@ -66,20 +77,140 @@ def test_materialize_execute_append(monkeypatch):
     assert athena.started[0]["WorkGroup"] == "wg"
 
 
-def test_materialize_execute_replace_with_props(monkeypatch):
-    athena = FakeAthena(states=["SUCCEEDED"])
-    service = MaterializeService(SETTINGS, FakeClients(athena))
+class FakeGlue:
+    def __init__(self, tables=None, partitions=None):
+        self.tables = dict(tables or {})
+        self.partitions = {name: list(entries) for name, entries in (partitions or {}).items()}
+        self.calls = []
 
-    service.execute({
+    def get_table(self, DatabaseName, Name):
+        if Name not in self.tables:
+            raise ClientError({"Error": {"Code": "EntityNotFoundException", "Message": "missing"}}, "GetTable")
+        return {"Table": {"Name": Name, "DatabaseName": DatabaseName, "VersionId": "1", **self.tables[Name]}}
+
+    def create_table(self, DatabaseName, TableInput):
+        self.calls.append(("create", TableInput["Name"]))
+        self.tables[TableInput["Name"]] = {k: v for k, v in TableInput.items() if k != "Name"}
+
+    def update_table(self, DatabaseName, TableInput, SkipArchive, VersionId=None):
+        self.calls.append(("update", TableInput["Name"]))
+        self.tables[TableInput["Name"]] = {k: v for k, v in TableInput.items() if k != "Name"}
+
+    def delete_table(self, DatabaseName, Name):
+        self.calls.append(("delete", Name))
+        self.tables.pop(Name, None)
+
+    def get_paginator(self, name):
+        assert name == "get_partitions"
+        return SimpleNamespace(paginate=lambda DatabaseName, TableName: iter([{"Partitions": self.partitions.get(TableName, [])}]))
+
+    def batch_get_partition(self, DatabaseName, TableName, PartitionsToGet):
+        wanted = [entry["Values"] for entry in PartitionsToGet]
+        return {"Partitions": [p for p in self.partitions.get(TableName, []) if p["Values"] in wanted]}
+
+    def batch_create_partition(self, DatabaseName, TableName, PartitionInputList):
+        self.calls.append(("create-partitions", [p["Values"] for p in PartitionInputList]))
+        self.partitions.setdefault(TableName, []).extend(PartitionInputList)
+        return {}
+
+    def batch_update_partition(self, DatabaseName, TableName, Entries):
+        self.calls.append(("update-partitions", [entry["PartitionValueList"] for entry in Entries]))
+        existing = self.partitions[TableName]
+        for entry in Entries:
+            index = next(i for i, p in enumerate(existing) if p["Values"] == entry["PartitionValueList"])
+            existing[index] = entry["PartitionInput"]
+        return {}
+
+
+class CtasAthena(FakeAthena):
+    """Registers the CTAS target in the fake catalog the way Athena does when the query runs."""
+
+    def __init__(self, glue, **kwargs):
+        super().__init__(**kwargs)
+        self.glue = glue
+
+    def start_query_execution(self, **kwargs):
+        response = super().start_query_execution(**kwargs)
+        query = kwargs["QueryString"]
+        if query.startswith("CREATE TABLE"):
+            name = query.split()[2].split(".")[1]
+            location = query.split("location = '")[1].split("'")[0]
+            self.glue.tables[name] = {"StorageDescriptor": {"Location": location}, "Parameters": {"table_type": "ICEBERG"}}
+        return response
+
+    def get_query_runtime_statistics(self, **_kwargs):
+        return {"QueryRuntimeStatistics": {}}
+
+
+BUILD_SETTINGS = replace(SETTINGS, build_location="s3://lake/materialized/")
+
+
+@pytest.fixture
+def build_token(monkeypatch):
+    monkeypatch.setattr("app.application.materialize_service.uuid.uuid4", lambda: SimpleNamespace(hex="abc123def456aaaa"))
+    return "abc123def456"
+
+
+def test_materialize_replace_builds_a_shadow_table_and_swaps_it_in(build_token):
+    glue = FakeGlue({"visits": {"StorageDescriptor": {"Location": "s3://lake/gold/visits/"}}})
+    athena = CtasAthena(glue, states=["SUCCEEDED"])
+    service = MaterializeService(BUILD_SETTINGS, FakeClients(athena, glue=glue))
+
+    result = service.execute({
         "mode": "replace",
         "target": {"db": "analytics", "table": "visits"},
         "sql": "SELECT 1",
-        "properties": {"format": "PARQUET", "compression": "SNAPPY"},
+        "properties": {"format": "PARQUET", "write_compression": "SNAPPY"},
     })
 
-    query = athena.started[0]["QueryString"]
-    assert "'compression' = 'SNAPPY'" in query
-    assert query.startswith("DROP TABLE IF EXISTS")
+    location = "s3://lake/materialized/analytics/visits/abc123def456/"
+    assert athena.started[0]["QueryString"] == (
+        "CREATE TABLE analytics.visits__build_abc123def456 WITH "
+        f"(format = 'PARQUET', write_compression = 'SNAPPY', external_location = '{location}') AS SELECT 1"
+    )
+    assert result["status"] == "ok"
+    assert glue.calls == [("update", "visits"), ("delete", "visits__build_abc123def456")]
+    assert glue.tables["visits"]["StorageDescriptor"]["Location"] == location
+    assert "visits__build_abc123def456" not in glue.tables
+
+
+def test_materialize_replace_defaults_to_iceberg_and_creates_a_missing_table(build_token):
+    glue = FakeGlue()
+    athena = CtasAthena(glue, states=["SUCCEEDED"])
+    service = MaterializeService(BUILD_SETTINGS, FakeClients(athena, glue=glue))
+
+    service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"})
+
+    assert "table_type = 'ICEBERG', format = 'PARQUET', location = 's3://lake/materialized/analytics/visits/abc123def456/', is_external = false" in athena.started[0]["QueryString"]
+    assert glue.calls[0] == ("create", "visits")
+
+
+def test_materialize_replace_failure_leaves_the_table_alone(build_token):
+    glue = FakeGlue({"visits": {"StorageDescriptor": {"Location": "s3://lake/gold/visits/"}}})
+    service = MaterializeService(BUILD_SETTINGS, FakeClients(CtasAthena(glue, states=["FAILED"]), glue=glue))
+
+    with pytest.raises(ExternalServiceError):
+        service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"})
+
+    assert glue.calls == [("delete", "visits__build_abc123def456")]
+    assert glue.tables["visits"]["StorageDescriptor"]["Location"] == "s3://lake/gold/visits/"
+
+
+@pytest.mark.parametrize(
+    "settings, properties, code",
+    [
+        (SETTINGS, {}, "ModeUnavailable"),
+        (BUILD_SETTINGS, {"external_location": "s3://elsewhere/"}, "BadParam"),
+        (BUILD_SETTINGS, {"format": "PARQUET", "partitioned_by": ["day"]}, "BadParam"),
+        (BUILD_SETTINGS, {"format'); DROP": "x"}, "BadParam"),
+    ],
+)
+def test_materialize_replace_rejects_unsupported_requests(settings, properties, code):
+    service = MaterializeService(settings, FakeClients(FakeAthena(), glue=FakeGlue()))
+
+    with pytest.raises(ValidationError) as excinfo:
+        service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1", "properties": properties})
+    assert excinfo.value.code == code
 
 
 def test_materialize_execute_validates_sql():
@@ -92,6 +223,29 @@ def test_materialize_execute_validates_sql():
         })
 
 
+def test_materialize_accepts_keyword_like_columns_and_drops_terminator():
+    athena = FakeAthena()
+    service = MaterializeService(SETTINGS, FakeClients(athena))
+
+    service.execute({
+        "target": {"db": "analytics", "table": "visits"},
+        "sql": "SELECT visit_id, update_ts FROM silver.visit; -- latest",
+    })
+
+    assert athena.started[0]["QueryString"] == "INSERT INTO analytics.visits SELECT visit_id, update_ts FROM silver.visit"
+
+
+def test_materialize_rejects_write_hidden_in_cte():
+    service = MaterializeService(SETTINGS, FakeClients(FakeAthena()))
+
+    with pytest.raises(ValidationError) as excinfo:
+        service.execute({
+            "target": {"db": "analytics", "table": "visits"},
+            "sql": "WITH gone AS (DELETE FROM silver.visit) SELECT 1",
+        })
+    assert excinfo.value.code == "UnsafeSql"
+
+
 def test_materialize_execute_handles_athena_failure():
     athena = FakeAthena(states=["FAILED"])
     service = MaterializeService(SETTINGS, FakeClients(athena))
@@ -113,3 +267,392 @@ def test_materialize_execute_handles_start_error():
             "target": {"db": "analytics", "table": "visits"},
             "sql": "SELECT 1",
         })
+
+
+class FakeJobsDynamo:
+    def __init__(self):
+        self.items = {}
+        self.updates = []
+        self.update_error = None
+
+    def put_item(self, TableName, Item):
+        self.items[Item["jobId"]["S"]] = dict(Item)
+
+    def get_item(self, TableName, Key):
+        item = self.items.get(Key["jobId"]["S"])
+        return {"Item": item} if item else {}
+
+    def scan(self, TableName, FilterExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        states = [value["S"] for value in ExpressionAttributeValues.values()]
+        return {"Items": [dict(item) for item in self.items.values() if item["state"]["S"] in states]}
+
+    def update_item(self, TableName, Key, UpdateExpression, ReturnValues, ExpressionAttributeValues, ExpressionAttributeNames=None, ConditionExpression=None):
+        item = self.items[Key["jobId"]["S"]]
+        if self.update_error is not None and "swappedAt" in UpdateExpression:
+            raise self.update_error
+        if ConditionExpression and (
+            "swappedAt" in item if "swappedAt" in ConditionExpression
+            else int(item.get("swapUntil", {}).get("N", 0)) >= int(ExpressionAttributeValues[":now"]["N"])
+        ):
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "held"}}, "UpdateItem")
+        self.updates.append(ExpressionAttributeValues)
+        for assignment in UpdateExpression[len("SET "):].split(", "):
+            name, placeholder = assignment.split(" = ")
+            item[(ExpressionAttributeNames or {}).get(name, name)] = ExpressionAttributeValues[placeholder]
+        return {}
+
+
+class StatsAthena(FakeAthena):
+    def __init__(self, states):
+        super().__init__(states=states)
+        self.status_calls = 0
+
+    def get_query_execution(self, **kwargs):
+        self.status_calls += 1
+        payload = super().get_query_execution(**kwargs)
+        payload["QueryExecution"]["Statistics"] = {"DataScannedInBytes": 2048, "TotalExecutionTimeInMillis": 900}
+        return payload
+
+    def get_query_runtime_statistics(self, **_kwargs):
+        return {"QueryRuntimeStatistics": {"Rows": {"OutputRows": 42, "OutputBytes": 4096}}}
+
+
+JOB_SETTINGS = replace(SETTINGS, jobs_table_name="materialize-jobs")
+
+
+def test_materialize_with_jobs_table_starts_the_query_and_returns_a_job(monkeypatch):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    athena, ddb = StatsAthena(states=["RUNNING"]), FakeJobsDynamo()
+    service = MaterializeService(JOB_SETTINGS, FakeClients(athena, ddb))
+
+    job = service.execute({"target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}, principals=("alice",))
+
+    assert isinstance(job, MaterializeJob)
+    assert (job.state, job.query_execution_id, job.table) == ("QUEUED", "qid-123", "analytics.visits")
+    assert athena.status_calls == 0
+    item = ddb.items[job.job_id]
+    assert item["principal"] == {"S": "alice"}
+    assert item["expiresAt"] == {"N": str(1_000 + 7 * 24 * 3600)}
+
+
+def test_materialize_job_holds_its_admission_slot_until_the_query_finishes(monkeypatch):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    athena, ddb = StatsAthena(states=["RUNNING"]), FakeJobsDynamo()
+    admission = InMemoryAdmission(1)
+    service = MaterializeService(JOB_SETTINGS, FakeClients(athena, ddb), admission=admission)
+
+    service.execute({"target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"})
+    assert admission.acquire(INTERACTIVE, wait_seconds=0) is None
+
+    finished = {"QueryExecutions": [{"QueryExecutionId": "qid-123", "Status": {"State": "SUCCEEDED"}}]}
+    assert admission.sweep(SimpleNamespace(batch_get_query_execution=lambda **_kwargs: finished)) == {"released": 1, "renewed": 0}
+    assert admission.acquire(INTERACTIVE) is not None
+
+
+def test_materialize_waited_query_keeps_its_admission_slot_past_the_lease(monkeypatch):
+    clock = SimpleNamespace(now=1_000.0)
+    sleeps = SimpleNamespace(sleep=lambda seconds: setattr(clock, "now", clock.now + 30), time=lambda: clock.now)
+    monkeypatch.setattr("app.application.materialize_service.time", sleeps)
+    monkeypatch.setattr("app.infrastructure.admission.time", SimpleNamespace(time=lambda: clock.now, monotonic=lambda: clock.now))
+    admission = InMemoryAdmission(1, lease_seconds=60)
+    checks = []
+
+    class CheckingAthena(FakeAthena):
+        def get_query_execution(self, **kwargs):
+            # Another caller tries the only slot on every poll, long after the first lease ran out.
+            checks.append(admission.acquire(INTERACTIVE, wait_seconds=0))
+            return super().get_query_execution(**kwargs)
+
+    service = MaterializeService(SETTINGS, FakeClients(CheckingAthena(states=["RUNNING"] * 10 + ["SUCCEEDED"])), admission=admission)
+
+    service.execute({"target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"})
+
+    assert clock.now >= 1_000 + 5 * 60
+    assert checks == [None] * 11
+    assert admission.acquire(INTERACTIVE, wait_seconds=0) is not None
+
+
+def test_materialize_status_refreshes_from_athena_until_the_job_finishes(monkeypatch):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    athena, ddb = StatsAthena(states=["RUNNING", "SUCCEEDED"]), FakeJobsDynamo()
+    service = MaterializeService(JOB_SETTINGS, FakeClients(athena, ddb))
+    job_id = service.execute({"target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+
+    assert service.status(job_id).state == "RUNNING"
+    done = service.status(job_id)
+    assert (done.state, done.scanned_bytes, done.execution_time_ms) == ("SUCCEEDED", 2048, 900)
+    assert (done.output_rows, done.output_bytes) == (42, 4096)
+
+    # Finished jobs are answered from the table alone.
+    assert service.status(job_id) == done
+    assert athena.status_calls == 2
+    assert ddb.items[job_id]["outputRows"] == {"N": "42"}
+
+    with pytest.raises(NotFoundError):
+        service.status("missing")
+
+
+REPLACE_JOB_SETTINGS = replace(BUILD_SETTINGS, jobs_table_name="materialize-jobs")
+
+
+def test_materialize_replace_job_swaps_on_the_read_that_sees_it_succeed(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    old = "s3://lake/materialized/analytics/visits/0123456789ab/"
+    glue, ddb = FakeGlue({"visits": {"StorageDescriptor": {"Location": old}}}), FakeJobsDynamo()
+    athena = CtasAthena(glue, states=["RUNNING", "SUCCEEDED"])
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(athena, ddb, glue))
+    job_id = service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+
+    assert service.status(job_id).state == "RUNNING"
+    assert glue.calls == []
+    assert service.status(job_id).state == "SUCCEEDED"
+    assert glue.calls == [("update", "visits"), ("delete", "visits__build_abc123def456")]
+    item = ddb.items[job_id]
+    assert item["retiredLocations"] == {"SS": [old]}
+    assert item["retireAfter"] == {"N": str(1_000 + 3600)}
+
+    service.status(job_id)
+    assert len(glue.calls) == 2
+
+
+def test_materialize_replace_job_discards_its_build_when_the_job_cannot_be_recorded(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+
+    class FlakyJobsDynamo(FakeJobsDynamo):
+        def put_item(self, TableName, Item):
+            if "shadowTable" in Item:
+                raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow"}}, "PutItem")
+            super().put_item(TableName, Item)
+
+    class StoppableAthena(CtasAthena):
+        def __init__(self, glue, **kwargs):
+            super().__init__(glue, **kwargs)
+            self.stopped = []
+
+        def stop_query_execution(self, QueryExecutionId):
+            self.stopped.append(QueryExecutionId)
+
+    glue, ddb = FakeGlue(), FlakyJobsDynamo()
+    athena = StoppableAthena(glue, states=["RUNNING"])
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(athena, ddb, glue))
+
+    with pytest.raises(ExternalServiceError):
+        service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"})
+
+    assert athena.stopped == ["qid-123"]
+    assert glue.calls == [("delete", "visits__build_abc123def456")]
+    (job,) = ddb.items.values()
+    assert job["state"] == {"S": "FAILED"}
+    assert job["retiredLocations"] == {"SS": ["s3://lake/materialized/analytics/visits/abc123def456/"]}
+
+
+def test_materialize_replace_job_waits_while_another_read_holds_the_swap(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    glue, ddb = FakeGlue(), FakeJobsDynamo()
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(CtasAthena(glue, states=["SUCCEEDED"]), ddb, glue))
+    job_id = service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+    ddb.items[job_id]["swapUntil"] = {"N": "1030"}
+
+    assert service.status(job_id).state == "QUEUED"
+    assert glue.calls == []
+
+
+def test_materialize_replace_job_finishes_a_swap_recorded_by_an_earlier_read(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    build = "s3://lake/materialized/analytics/visits/abc123def456/"
+    glue, ddb = FakeGlue({"visits": {"StorageDescriptor": {"Location": build}}}), FakeJobsDynamo()
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(CtasAthena(glue, states=["SUCCEEDED"]), ddb, glue))
+    job_id = service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+    ddb.items[job_id]["swappedAt"] = {"N": "990"}
+    ddb.items[job_id]["swapUntil"] = {"N": "1030"}
+
+    assert service.status(job_id).state == "SUCCEEDED"
+    assert glue.calls == [("delete", "visits__build_abc123def456")]
+    assert "retiredLocations" not in ddb.items[job_id]
+
+
+def test_materialize_replace_job_keeps_the_shadow_until_the_swap_is_recorded(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    old = "s3://lake/materialized/analytics/visits/0123456789ab/"
+    glue, ddb = FakeGlue({"visits": {"StorageDescriptor": {"Location": old}}}), FakeJobsDynamo()
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(CtasAthena(glue, states=["SUCCEEDED"]), ddb, glue))
+    job_id = service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+    ddb.update_error = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow"}}, "UpdateItem")
+
+    with pytest.raises(ExternalServiceError):
+        service.status(job_id)
+    assert glue.calls == [("update", "visits")]
+
+    # Once the claim lapses, the retry swaps again; the build is live and is not retired.
+    ddb.update_error = None
+    ddb.items[job_id].pop("swapUntil")
+    assert service.status(job_id).state == "SUCCEEDED"
+    assert glue.calls[-1] == ("delete", "visits__build_abc123def456")
+    assert "retiredLocations" not in ddb.items[job_id]
+
+
+def test_materialize_replace_job_never_retires_the_location_the_table_reads(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    build = "s3://lake/materialized/analytics/visits/abc123def456/"
+    glue, ddb = FakeGlue({"visits": {"StorageDescriptor": {"Location": build}}}), FakeJobsDynamo()
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(CtasAthena(glue, states=["SUCCEEDED"]), ddb, glue))
+    job_id = service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+    # The shadow table is gone but the table already reads the build: it was swapped in.
+    glue.tables.pop("visits__build_abc123def456")
+
+    assert service.status(job_id).state == "SUCCEEDED"
+    assert ("update", "visits") not in glue.calls
+    assert "retiredLocations" not in ddb.items[job_id]
+
+
+def test_materialize_finalize_swaps_in_jobs_nobody_polls(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    old = "s3://lake/materialized/analytics/visits/0123456789ab/"
+    glue, ddb = FakeGlue({"visits": {"StorageDescriptor": {"Location": old}}}), FakeJobsDynamo()
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(CtasAthena(glue, states=["SUCCEEDED"]), ddb, glue))
+    job_id = service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+    ddb.items["done"] = {"jobId": {"S": "done"}, "state": {"S": "FAILED"}}
+
+    assert service.finalize() == {"SUCCEEDED": 1}
+    assert glue.calls == [("update", "visits"), ("delete", "visits__build_abc123def456")]
+    assert ddb.items[job_id]["retiredLocations"] == {"SS": [old]}
+    assert service.finalize() == {}
+
+
+def test_materialize_failed_replace_job_retires_its_partial_build(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    glue, ddb = FakeGlue({"visits": {"StorageDescriptor": {"Location": "s3://lake/gold/visits/"}}}), FakeJobsDynamo()
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(StatsAthena(states=["FAILED"]), ddb, glue))
+    job_id = service.execute({"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+
+    job = service.status(job_id)
+
+    assert (job.state, job.reason) == ("FAILED", "bad state")
+    assert glue.calls == [("delete", "visits__build_abc123def456")]
+    assert ddb.items[job_id]["retiredLocations"] == {"SS": ["s3://lake/materialized/analytics/visits/abc123def456/"]}
+
+
+def test_materialize_waited_replace_records_the_replaced_data_for_cleanup(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    old = "s3://lake/materialized/analytics/visits/0123456789ab/"
+    glue, ddb = FakeGlue({"visits": {"StorageDescriptor": {"Location": old}}}), FakeJobsDynamo()
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(CtasAthena(glue, states=["SUCCEEDED"]), ddb, glue))
+
+    result = service.execute(
+        {"mode": "replace", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}, principals=("view:daily",), wait=True
+    )
+
+    assert (result["status"], result["qid"]) == ("ok", "qid-123")
+    assert glue.calls == [("update", "visits"), ("delete", "visits__build_abc123def456")]
+    (item,) = ddb.items.values()
+    assert (item["state"], item["principal"]) == ({"S": "SUCCEEDED"}, {"S": "view:daily"})
+    assert item["retiredLocations"] == {"SS": [old]}
+    assert item["retireAfter"] == {"N": str(1_000 + 3600)}
+
+
+HIVE_VISITS = {
+    "StorageDescriptor": {"Location": "s3://lake/gold/visits/", "Columns": [{"Name": "visit_id"}, {"Name": "clinic"}]},
+    "PartitionKeys": [{"Name": "day", "Type": "string"}],
+    "Parameters": {"classification": "orc"},
+}
+
+
+def _partition(day, location):
+    return {"Values": [day], "StorageDescriptor": {"Location": location}}
+
+
+def test_materialize_overwrite_partitions_rewrites_only_the_partitions_produced(build_token):
+    build = "s3://lake/materialized/analytics/visits/abc123def456/"
+    retired = "s3://lake/materialized/analytics/visits/0123456789ab/day=2025-08-12"
+    glue = FakeGlue(
+        {"visits": HIVE_VISITS},
+        partitions={
+            "visits": [_partition("2025-08-11", "s3://lake/gold/visits/day=2025-08-11"), _partition("2025-08-12", retired)],
+            "visits__build_abc123def456": [_partition("2025-08-12", build + "day=2025-08-12"), _partition("2025-08-13", build + "day=2025-08-13")],
+        },
+    )
+    athena = CtasAthena(glue, states=["SUCCEEDED"])
+    service = MaterializeService(BUILD_SETTINGS, FakeClients(athena, glue=glue))
+
+    service.execute({
+        "mode": "overwrite_partitions",
+        "target": {"db": "analytics", "table": "visits"},
+        "sql": "SELECT day, clinic, visit_id FROM silver.visit WHERE day >= '2025-08-12'",
+    })
+
+    assert athena.started[0]["QueryString"] == (
+        "CREATE TABLE analytics.visits__build_abc123def456 WITH "
+        f"(format = 'ORC', partitioned_by = ARRAY['day'], external_location = '{build}') "
+        "AS SELECT \"visit_id\", \"clinic\", \"day\" FROM (SELECT day, clinic, visit_id FROM silver.visit WHERE day >= '2025-08-12')"
+    )
+    assert glue.calls == [
+        ("create-partitions", [["2025-08-13"]]),
+        ("update-partitions", [["2025-08-12"]]),
+        ("delete", "visits__build_abc123def456"),
+    ]
+    locations = {p["Values"][0]: p["StorageDescriptor"]["Location"] for p in glue.partitions["visits"]}
+    assert locations == {
+        "2025-08-11": "s3://lake/gold/visits/day=2025-08-11",
+        "2025-08-12": build + "day=2025-08-12",
+        "2025-08-13": build + "day=2025-08-13",
+    }
+    # The table definition itself is never swapped.
+    assert glue.tables["visits"]["StorageDescriptor"]["Location"] == "s3://lake/gold/visits/"
+
+
+def test_materialize_overwrite_partitions_job_retires_the_replaced_partitions(monkeypatch, build_token):
+    monkeypatch.setattr("app.application.materialize_service.time", SimpleNamespace(sleep=None, time=lambda: 1_000))
+    build = "s3://lake/materialized/analytics/visits/abc123def456/"
+    retired = "s3://lake/materialized/analytics/visits/0123456789ab/day=2025-08-12"
+    glue = FakeGlue(
+        {"visits": HIVE_VISITS},
+        partitions={"visits": [_partition("2025-08-12", retired)], "visits__build_abc123def456": [_partition("2025-08-12", build + "day=2025-08-12")]},
+    )
+    ddb = FakeJobsDynamo()
+    service = MaterializeService(REPLACE_JOB_SETTINGS, FakeClients(CtasAthena(glue, states=["SUCCEEDED"]), ddb, glue))
+    job_id = service.execute({"mode": "overwrite_partitions", "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"}).job_id
+
+    assert service.status(job_id).state == "SUCCEEDED"
+    assert ddb.items[job_id]["retiredLocations"] == {"SS": [retired]}
+
+
+def test_materialize_merge_updates_matching_keys_and_inserts_the_rest():
+    glue = FakeGlue({"visits": {
+        "StorageDescriptor": {"Columns": [{"Name": "visit_id"}, {"Name": "clinic"}, {"Name": "day"}]},
+        "Parameters": {"table_type": "ICEBERG"},
+    }})
+    athena = FakeAthena()
+    service = MaterializeService(SETTINGS, FakeClients(athena, glue=glue))
+
+    service.execute({"mode": "merge", "keys": ["visit_id"], "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT * FROM silver.visit"})
+
+    assert athena.started[0]["QueryString"] == (
+        'MERGE INTO analytics.visits t USING (SELECT * FROM silver.visit) s ON (t."visit_id" = s."visit_id") '
+        'WHEN MATCHED THEN UPDATE SET "clinic" = s."clinic", "day" = s."day" '
+        'WHEN NOT MATCHED THEN INSERT ("visit_id", "clinic", "day") VALUES (s."visit_id", s."clinic", s."day")'
+    )
+    assert glue.calls == []
+
+
+@pytest.mark.parametrize(
+    "payload, code",
+    [
+        ({"mode": "merge"}, "MissingParam"),
+        ({"mode": "merge", "keys": ["patient_id"]}, "BadParam"),
+        ({"mode": "overwrite_partitions"}, "BadParam"),
+    ],
+)
+def test_materialize_incremental_modes_validate_against_the_table(payload, code):
+    glue = FakeGlue({"visits": {"StorageDescriptor": {"Columns": [{"Name": "visit_id"}]}, "Parameters": {"table_type": "ICEBERG"}}})
+    service = MaterializeService(BUILD_SETTINGS, FakeClients(FakeAthena(), glue=glue))
+
+    with pytest.raises(ValidationError) as excinfo:
+        service.execute({**payload, "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"})
+    assert excinfo.value.code == code
+
+
+def test_materialize_incremental_modes_need_an_existing_table():
+    service = MaterializeService(SETTINGS, FakeClients(FakeAthena(), glue=FakeGlue()))
+
+    with pytest.raises(NotFoundError):
+        service.execute({"mode": "merge", "keys": ["id"], "target": {"db": "analytics", "table": "visits"}, "sql": "SELECT 1"})
@@ -1,9 +1,15 @@
-﻿import pytest
+﻿import time
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
 from botocore.exceptions import ClientError
 
 from app.application.query_service import QueryService
 from app.config.settings import QuerySettings
-from app.domain.errors import ExternalServiceError, ValidationError
+from app.infrastructure.admission import INTERACTIVE, InMemoryAdmission
+from app.presentation.timing import begin_timings, end_timings
+from app.domain.errors import AthenaBusyError, ExternalServiceError, NotFoundError, QueryTimeoutError, ScanBudgetExceededError, ValidationError
 
 
 class FakeAthena:
@@ -13,6 +19,7 @@ class FakeAthena:
         self.results_payloads = list(results_payloads or [])
         self.started = []
         self.results_calls = []
+        self.stopped = []
 
     def start_query_execution(self, **kwargs):
         if self.start_error:
@@ -25,6 +32,10 @@ class FakeAthena:
             raise AssertionError("No execution payloads left")
         return self.execution_payloads.pop(0)
 
+    def stop_query_execution(self, QueryExecutionId):
+        self.stopped.append(QueryExecutionId)
+        return {}
+
     def get_query_results(self, **kwargs):
         self.results_calls.append(kwargs)
         if not self.results_payloads:
@@ -32,13 +43,25 @@ class FakeAthena:
         return self.results_payloads.pop(0)
 
 
+class FakeGlue:
+    def __init__(self, table_size):
+        self.table_size = table_size
+
+    def get_table(self, **_kwargs):
+        return {"Table": {"Parameters": {"totalSize": str(self.table_size)}}}
+
+
 class FakeClients:
-    def __init__(self, athena):
+    def __init__(self, athena, glue=None):
         self._athena = athena
+        self._glue = glue
 
     def athena(self):
         return self._athena
 
+    def glue(self):
+        return self._glue
+
 
 SETTINGS = QuerySettings(
     region="us-west-1",
@@ -81,9 +104,9 @@ def test_query_execute_new_query_success(monkeypatch):
     service = QueryService(SETTINGS, FakeClients(athena))
     result = service.execute({"sql": "SELECT 1", "database": "analytics", "maxRows": 10})
 
-    assert result["columns"] == ["col1"]
-    assert result["rows"] == [["value"]]
-    assert result["stats"]["scanned_bytes"] == 123
+    assert result.columns == ["col1"]
+    assert result.rows == [["value"]]
+    assert result.stats.scanned_bytes == 123
     assert athena.started[0]["QueryExecutionContext"]["Catalog"] == "AwsDataCatalog"
 
 
@@ -108,9 +131,9 @@ def test_query_execute_existing_query_skips_start():
         "maxRows": 2,
     })
 
-    assert result["columns"] == ["col1"]
-    assert result["rows"] == [["value"]]
-    assert result["next_page_token"] == "next-token"
+    assert result.columns == ["col1"]
+    assert result.rows == [["value"]]
+    assert result.next_page_token == "next-token"
     assert athena.started == []
     assert athena.results_calls[0]["NextToken"] == "tok"
 
@@ -125,6 +148,17 @@ def test_query_execute_validates_inputs():
         service.execute({"maxRows": 10})
 
 
+def test_query_execute_rejects_writes_before_calling_athena():
+    athena = FakeAthena()
+    service = QueryService(SETTINGS, FakeClients(athena))
+
+    with pytest.raises(ValidationError) as excinfo:
+        service.execute({"sql": "SELECT 1; DROP TABLE gold.visits"})
+
+    assert excinfo.value.code == "MultipleStatements"
+    assert athena.started == []
+
+
 def test_query_execute_handles_start_error():
     error = ClientError({"Error": {"Code": "Throttled", "Message": "nope"}}, "StartQueryExecution")
     service = QueryService(SETTINGS, FakeClients(FakeAthena(start_error=error)))
@@ -143,3 +177,270 @@ def test_query_execute_handles_failed_state(monkeypatch):
 
     with pytest.raises(ExternalServiceError):
         service.execute({"sql": "SELECT 1"})
+
+
+def _succeeded_athena():
+    return FakeAthena(
+        execution_payloads=[{"QueryExecution": {"Status": {"State": "SUCCEEDED"}}}],
+        results_payloads=[{"ResultSet": {"ResultSetMetadata": {"ColumnInfo": []}, "Rows": []}}],
+    )
+
+
+def test_query_execute_rejects_queries_over_scan_budget():
+    athena = FakeAthena()
+    service = QueryService(replace(SETTINGS, scan_budget_bytes=1000), FakeClients(athena, FakeGlue(5000)))
+
+    with pytest.raises(ScanBudgetExceededError) as excinfo:
+        service.execute({"sql": "SELECT * FROM gold.visits"})
+
+    assert excinfo.value.payload["estimatedBytes"] == 5000
+    assert excinfo.value.payload["tables"] == [{"table": "gold.visits", "estimated_bytes": 5000, "partitions_scanned": None, "partitions_total": None}]
+    assert athena.started == []
+
+
+def test_query_execute_warns_or_routes_over_budget_and_honours_user_budgets():
+    budgeted = replace(SETTINGS, scan_budget_bytes=1000, scan_budget_action="route", capped_workgroup="capped")
+    athena = _succeeded_athena()
+    page = QueryService(budgeted, FakeClients(athena, FakeGlue(5000))).execute({"sql": "SELECT * FROM gold.visits"})
+    assert athena.started[0]["WorkGroup"] == "capped"
+    assert (page.scan_estimate.action, page.scan_estimate.workgroup) == ("route", "capped")
+
+    athena = _succeeded_athena()
+    warned = replace(budgeted, scan_budget_action="warn")
+    page = QueryService(warned, FakeClients(athena, FakeGlue(5000))).execute({"sql": "SELECT * FROM gold.visits"})
+    assert athena.started[0]["WorkGroup"] == "wg"
+    assert page.scan_estimate.action == "warn"
+
+    athena = _succeeded_athena()
+    analysts = replace(SETTINGS, scan_budget_bytes=1000, user_scan_budgets={"analysts": 10_000})
+    service = QueryService(analysts, FakeClients(athena, FakeGlue(5000)))
+    page = service.execute({"sql": "SELECT * FROM gold.visits"}, principals=("alice", "analysts"))
+    assert page.scan_estimate.budget_bytes == 10_000
+    assert page.scan_estimate.action is None
+
+
+RUNNING = {"QueryExecution": {"Status": {"State": "RUNNING"}, "WorkGroup": "wg"}}
+
+
+def test_query_execute_stops_query_at_deadline():
+    athena = FakeAthena(execution_payloads=[RUNNING])
+    service = QueryService(SETTINGS, FakeClients(athena))
+
+    with pytest.raises(QueryTimeoutError) as excinfo:
+        service.execute({"sql": "SELECT 1"}, deadline=time.monotonic())
+
+    assert excinfo.value.status_code == 504
+    assert excinfo.value.payload["cancelled"] is True
+    assert athena.stopped == ["qid-123"]
+
+
+def test_query_execute_async_returns_pending_page_and_resume_waits():
+    athena = FakeAthena(execution_payloads=[RUNNING, RUNNING])
+    admission = InMemoryAdmission(1)
+    service = QueryService(SETTINGS, FakeClients(athena), admission=admission)
+
+    page = service.execute({"sql": "SELECT 1", "async": True}, deadline=time.monotonic())
+    assert (page.state, page.rows, page.query_execution_id) == ("RUNNING", [], "qid-123")
+
+    page = service.execute({"queryExecutionId": "qid-123"}, deadline=time.monotonic())
+    assert page.state == "RUNNING"
+    assert athena.stopped == []
+    assert athena.results_calls == []
+
+    # The running query keeps its slot until a sweep sees it finish.
+    assert admission.acquire(INTERACTIVE, wait_seconds=0) is None
+    finished = {"QueryExecutions": [{"QueryExecutionId": "qid-123", "Status": {"State": "SUCCEEDED"}}]}
+    assert admission.sweep(SimpleNamespace(batch_get_query_execution=lambda **_kwargs: finished))["released"] == 1
+    assert admission.acquire(INTERACTIVE) is not None
+
+
+def test_query_cancel_stops_running_queries_in_its_workgroups():
+    mine = {"Query": "-- sewingmachine:principal=alice\nSELECT 1", "WorkGroup": "wg"}
+    finished = {"QueryExecution": {**mine, "Status": {"State": "SUCCEEDED"}}}
+    foreign = {"QueryExecution": {**mine, "Status": {"State": "RUNNING"}, "WorkGroup": "etl"}}
+    athena = FakeAthena(execution_payloads=[{"QueryExecution": {**mine, "Status": {"State": "RUNNING"}}}, finished, foreign])
+    service = QueryService(SETTINGS, FakeClients(athena))
+
+    assert service.cancel("qid-1", ("alice", "analysts")).state == "CANCELLED"
+    assert service.cancel("qid-2", ("alice",)).state == "SUCCEEDED"
+    with pytest.raises(NotFoundError):
+        service.cancel("qid-3", ("alice",))
+    assert athena.stopped == ["qid-1"]
+
+
+def test_query_cancel_only_stops_the_callers_own_queries():
+    athena = FakeAthena(execution_payloads=[RUNNING], results_payloads=[])
+    service = QueryService(SETTINGS, FakeClients(athena))
+    service.execute({"sql": "SELECT 1", "async": True}, principals=("bob o'neil",), deadline=time.monotonic())
+    query = athena.started[0]["QueryString"]
+    assert query == "-- sewingmachine:principal=bob%20o%27neil\nSELECT 1"
+
+    running = {"QueryExecution": {**RUNNING["QueryExecution"], "Query": query}}
+    untagged = {"QueryExecution": {**RUNNING["QueryExecution"], "Query": "SELECT 1"}}
+    athena.execution_payloads = [running, running, untagged, running]
+    for principals in (("alice",), ()):
+        with pytest.raises(NotFoundError):
+            service.cancel("qid-123", principals)
+    with pytest.raises(NotFoundError):
+        service.cancel("qid-123", ("bob o'neil",))
+    assert athena.stopped == []
+    assert service.cancel("qid-123", ("bob o'neil",)).state == "CANCELLED"
+
+
+def test_query_execute_is_refused_when_admission_is_full_and_releases_its_lease():
+    admission = InMemoryAdmission(1, per_principal=1)
+    athena = _succeeded_athena()
+    service = QueryService(SETTINGS, FakeClients(athena), admission=admission)
+
+    service.execute({"sql": "SELECT 1"}, principals=("alice",))
+    held = admission.acquire(INTERACTIVE, "bob")
+    with pytest.raises(AthenaBusyError) as excinfo:
+        service.execute({"sql": "SELECT 1"}, principals=("alice",))
+
+    assert excinfo.value.status_code == 429
+    assert len(athena.started) == 1
+    admission.release(held)
+    assert admission.acquire(INTERACTIVE, "alice") is not None
+
+
+def test_query_execute_maps_athena_concurrency_errors_to_busy():
+    error = ClientError({"Error": {"Code": "TooManyRequestsException", "Message": "limit"}}, "StartQueryExecution")
+    service = QueryService(SETTINGS, FakeClients(FakeAthena(start_error=error)), admission=InMemoryAdmission(1))
+
+    with pytest.raises(AthenaBusyError):
+        service.execute({"sql": "SELECT 1"})
+
+
+class FakeBatchAthena:
+    """Each query's SQL names the states it reports on successive polls, e.g. ``SELECT 'RUNNING,SUCCEEDED'``."""
+
+    def __init__(self):
+        self.states = {}
+        self.batch_calls = []
+        self.stopped = []
+
+    def start_query_execution(self, QueryString, **_kwargs):
+        query_id = f"qid-{len(self.states)}"
+        self.states[query_id] = QueryString.split("'")[1].split(",")
+        return {"QueryExecutionId": query_id}
+
+    def batch_get_query_execution(self, QueryExecutionIds):
+        self.batch_calls.append(list(QueryExecutionIds))
+        executions = []
+        for query_id in QueryExecutionIds:
+            states = self.states[query_id]
+            state = states.pop(0) if len(states) > 1 else states[0]
+            executions.append({"QueryExecutionId": query_id, "Status": {"State": state}, "Statistics": {"DataScannedInBytes": 7}})
+        return {"QueryExecutions": executions, "UnprocessedQueryExecutionIds": []}
+
+    def stop_query_execution(self, QueryExecutionId):
+        self.stopped.append(QueryExecutionId)
+        return {}
+
+    def get_query_results(self, QueryExecutionId, **_kwargs):
+        rows = [{"Data": [{"VarCharValue": "id"}]}, {"Data": [{"VarCharValue": QueryExecutionId}]}]
+        return {"ResultSet": {"ResultSetMetadata": {"ColumnInfo": [{"Label": "id"}]}, "Rows": rows}}
+
+
+def test_query_execute_batch_polls_all_queries_together(monkeypatch):
+    monkeypatch.setattr("app.application.query_service.time.sleep", lambda *_: None)
+    athena = FakeBatchAthena()
+    service = QueryService(SETTINGS, FakeClients(athena))
+
+    batch = service.execute_batch(
+        {
+            "queries": [
+                {"id": "fast", "sql": "SELECT 'SUCCEEDED'"},
+                {"id": "slow", "sql": "SELECT 'QUEUED,RUNNING,SUCCEEDED'"},
+                {"id": "broken", "sql": "SELECT 'FAILED'"},
+                {"id": "write", "sql": "DROP TABLE t"},
+            ]
+        }
+    )
+
+    by_id = {result.id: result for result in batch.results}
+    assert [result.id for result in batch.results] == ["fast", "slow", "broken", "write"]
+    assert by_id["slow"].status == 200
+    assert by_id["slow"].result.rows == [["qid-1"]]
+    assert by_id["slow"].result.stats.scanned_bytes == 7
+    assert (by_id["broken"].status, by_id["broken"].error["code"]) == (502, "ExternalServiceError")
+    assert by_id["write"].status == 400 and by_id["write"].result is None
+    # One poll per round for every query still running, not one per query.
+    assert athena.batch_calls == [["qid-0", "qid-1", "qid-2"], ["qid-1"], ["qid-1"]]
+
+
+def test_query_execute_batch_at_deadline_stops_or_leaves_queries_running():
+    athena = FakeBatchAthena()
+    service = QueryService(SETTINGS, FakeClients(athena))
+    queries = [{"sql": "SELECT 'SUCCEEDED'"}, {"sql": "SELECT 'RUNNING'"}]
+
+    stopped = service.execute_batch({"queries": queries}, deadline=time.monotonic())
+    assert [result.status for result in stopped.results] == [200, 504]
+    assert stopped.results[1].error["cancelled"] is True
+    assert athena.stopped == ["qid-1"]
+
+    pending = service.execute_batch({"queries": queries, "async": True}, deadline=time.monotonic())
+    assert [result.status for result in pending.results] == [200, 202]
+    assert pending.results[1].result.state == "RUNNING"
+    assert athena.stopped == ["qid-1"]
+
+
+def test_query_execute_batch_stops_its_queries_when_athena_cannot_be_polled(monkeypatch):
+    monkeypatch.setattr("app.application.query_service.time.sleep", lambda *_: None)
+
+    class FailingAthena(FakeBatchAthena):
+        def batch_get_query_execution(self, QueryExecutionIds):
+            if self.batch_calls:
+                raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "BatchGetQueryExecution")
+            return super().batch_get_query_execution(QueryExecutionIds)
+
+    athena, admission = FailingAthena(), InMemoryAdmission(2)
+    service = QueryService(SETTINGS, FakeClients(athena), admission=admission)
+
+    with pytest.raises(ExternalServiceError):
+        service.execute_batch({"queries": ["SELECT 'SUCCEEDED'", "SELECT 'RUNNING'"]})
+
+    assert athena.stopped == ["qid-1"]
+    assert admission.acquire(INTERACTIVE, wait_seconds=0) is not None
+    assert admission.acquire(INTERACTIVE, wait_seconds=0) is not None
+
+
+def test_query_execute_batch_without_deadline_stops_polling_eventually(monkeypatch):
+    monkeypatch.setattr("app.application.query_service.time.sleep", lambda *_: None)
+    monkeypatch.setattr("app.application.query_service._BATCH_MAX_POLLS", 3)
+    athena = FakeBatchAthena()
+    service = QueryService(SETTINGS, FakeClients(athena))
+
+    batch = service.execute_batch({"queries": ["SELECT 'RUNNING'"]})
+
+    assert [result.status for result in batch.results] == [504]
+    assert len(athena.batch_calls) == 3
+    assert athena.stopped == ["qid-0"]
+
+
+def test_query_execute_batch_statements_time_into_the_request():
+    timings = begin_timings()
+    try:
+        service = QueryService(SETTINGS, FakeClients(FakeBatchAthena()))
+        service.execute_batch({"queries": ["SELECT 'SUCCEEDED'", "SELECT 'SUCCEEDED'", "SELECT 'FAILED'"]})
+        phases = timings.to_dict()["phases"]
+    finally:
+        end_timings()
+
+    # Each statement's start runs on a worker thread and still lands on the request's timings.
+    assert phases["athena-start"]["count"] == 3
+    assert phases["batch-start"]["count"] == 1
+
+
+def test_query_execute_batch_validates_and_reports_busy_statements():
+    service = QueryService(SETTINGS, FakeClients(FakeBatchAthena()), admission=InMemoryAdmission(1))
+
+    with pytest.raises(ValidationError):
+        service.execute_batch({"queries": []})
+    with pytest.raises(ValidationError):
+        service.execute_batch({"queries": ["SELECT 1"] * 21})
+
+    batch = service.execute_batch({"queries": ["SELECT 'SUCCEEDED'", "SELECT 'SUCCEEDED'"]})
+    assert [result.status for result in batch.results] == [200, 429]
+    assert batch.results[1].error == {"code": "AthenaBusy", "message": "Too many queries are running; retry shortly.", "retryAfterSeconds": 2}
+    assert batch.results[0].id == "0"
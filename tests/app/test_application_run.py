@@ -1,4 +1,5 @@
 ﻿import datetime
+import json
 from types import SimpleNamespace
 
 import pytest
@@ -25,23 +26,25 @@ class FakePaginator:
 class FakeDynamo:
     def __init__(self):
         self.put_calls = []
+        self.get_calls = []
         self.raise_conditional = False
         self.current_item = None
 
     def put_item(self, **kwargs):
         self.put_calls.append(kwargs)
         if self.raise_conditional:
-            raise ClientError(
-                {
-                    "Error": {
-                        "Code": "ConditionalCheckFailedException",
-                        "Message": "condition failed",
-                    }
-                },
-                "PutItem",
-            )
+            error = {
+                "Error": {
+                    "Code": "ConditionalCheckFailedException",
+                    "Message": "condition failed",
+                }
+            }
+            if kwargs.get("ReturnValuesOnConditionCheckFailure") == "ALL_OLD" and self.current_item:
+                error["Item"] = self.current_item
+            raise ClientError(error, "PutItem")
 
-    def get_item(self, **_kwargs):
+    def get_item(self, **kwargs):
+        self.get_calls.append(kwargs)
         return {"Item": self.current_item or {}}
 
 
@@ -130,15 +133,18 @@ def test_run_service_happy_path(monkeypatch):
 
     assert result["status"] == "accepted"
     assert result["run"] == "2024-01-01"
-    assert result["layers"]["bronze"]["dir_count"] == 1
+    assert result["layers"]["bronze"].dir_count == 1
     assert clients._lambda.invocations[0]["FunctionName"] == "orchestrator"
+    invoke_payload = json.loads(clients._lambda.invocations[0]["Payload"])
+    assert invoke_payload["runId"] == result["runId"]
+    assert clients._ddb.put_calls[0]["Item"]["runId"] == {"S": result["runId"]}
     assert clients._s3.presigned[0]["Params"]["Key"] == "bronze/2024-01-01/file.parquet"
 
 
 def test_run_service_cooldown_active(monkeypatch):
     ddb = FakeDynamo()
     ddb.raise_conditional = True
-    ddb.current_item = {"allowAfter": {"N": "1300"}}
+    ddb.current_item = {"allowAfter": {"N": "1300"}, "runId": {"S": "active-run"}}
 
     clients = FakeClients(ddb=ddb)
 
@@ -153,4 +159,6 @@ def test_run_service_cooldown_active(monkeypatch):
         service.execute({"run": "2024-01-02"})
 
     assert exc_info.value.payload["retryAfterSeconds"] == 100
+    assert exc_info.value.payload["activeRunId"] == "active-run"
+    assert ddb.get_calls == []
     assert not clients._lambda.invocations
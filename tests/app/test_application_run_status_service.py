@@ -0,0 +1,102 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from app.application.run_status_service import RunStatusService
+from app.config.settings import RunStatusSettings
+from app.domain.errors import ExternalServiceError, NotFoundError, ValidationError
+
+
+class FakeDynamo:
+    def __init__(self, item=None, error=None):
+        self.item = item
+        self.error = error
+        self.get_calls = []
+
+    def get_item(self, **kwargs):
+        self.get_calls.append(kwargs)
+        if self.error:
+            raise self.error
+        return {"Item": self.item} if self.item else {}
+
+
+class FakeClients:
+    def __init__(self, ddb):
+        self._ddb = ddb
+
+    def dynamodb(self):
+        return self._ddb
+
+
+SETTINGS = RunStatusSettings(region="us-west-1", allowed_origin="*", progress_table_name="progress")
+
+
+def test_run_status_returns_ordered_steps():
+    item = {
+        "runId": {"S": "run-1"},
+        "run": {"S": "2024-01-01"},
+        "jobId": {"S": "job-1"},
+        "status": {"S": "refreshing"},
+        "dmsState": {"S": "full-load-completed"},
+        "currentStep": {"S": "visit_staging"},
+        "updatedAt": {"N": "1000"},
+        "tasks": {
+            "M": {
+                "task-visit": {"M": {"state": {"S": "running"}, "tables": {"SS": ["visit"]}}},
+                "task-resident": {"M": {"state": {"S": "refreshed"}, "tables": {"SS": ["resident"]}}},
+            }
+        },
+        "steps": {
+            "M": {
+                "visit_staging": {"M": {"state": {"S": "RUNNING"}, "queryExecutionId": {"S": "q2"}, "order": {"N": "2"}}},
+                "resident_staging": {
+                    "M": {
+                        "state": {"S": "SUCCEEDED"},
+                        "queryExecutionId": {"S": "q1"},
+                        "order": {"N": "1"},
+                        "scannedBytes": {"N": "2048"},
+                        "executionTimeMs": {"N": "1500"},
+                    }
+                },
+            }
+        },
+    }
+    ddb = FakeDynamo(item=item)
+    service = RunStatusService(SETTINGS, FakeClients(ddb))
+
+    result = service.execute("run-1")
+
+    assert ddb.get_calls[0] == {"TableName": "progress", "Key": {"runId": {"S": "run-1"}}}
+    assert result["status"] == "refreshing"
+    assert result["current_step"] == "visit_staging"
+    assert [step["name"] for step in result["steps"]] == ["resident_staging", "visit_staging"]
+    assert result["steps"][0]["scanned_bytes"] == 2048
+    assert result["steps"][0]["execution_time_ms"] == 1500
+    assert result["steps"][1]["scanned_bytes"] is None
+    assert result["tasks"] == [
+        {"task_arn": "task-resident", "state": "refreshed", "tables": ["resident"]},
+        {"task_arn": "task-visit", "state": "running", "tables": ["visit"]},
+    ]
+
+
+def test_run_status_missing_run_raises_not_found():
+    service = RunStatusService(SETTINGS, FakeClients(FakeDynamo()))
+
+    with pytest.raises(NotFoundError) as exc_info:
+        service.execute("missing")
+
+    assert exc_info.value.status_code == 404
+
+
+def test_run_status_requires_run_id():
+    service = RunStatusService(SETTINGS, FakeClients(FakeDynamo()))
+
+    with pytest.raises(ValidationError):
+        service.execute(None)
+
+
+def test_run_status_wraps_client_error():
+    error = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow"}}, "GetItem")
+    service = RunStatusService(SETTINGS, FakeClients(FakeDynamo(error=error)))
+
+    with pytest.raises(ExternalServiceError):
+        service.execute("run-1")
@@ -0,0 +1,114 @@
+from botocore.exceptions import ClientError
+
+from app.application.scan_estimator import ScanEstimator
+from app.domain.sql import parse_sql
+
+
+class FakePaginator:
+    def __init__(self, glue):
+        self._glue = glue
+
+    def paginate(self, **kwargs):
+        self._glue.partition_calls.append(kwargs)
+        expression = kwargs.get("Expression")
+        if expression in self._glue.invalid:
+            raise ClientError({"Error": {"Code": "InvalidInputException", "Message": "bad expression"}}, "GetPartitions")
+        partitions = self._glue.partitions if expression is None else self._glue.matches.get(expression, [])
+        return [{"Partitions": partitions[:2]}, {"Partitions": partitions[2:]}]
+
+
+class FakeGlue:
+    def __init__(self, tables, partitions=(), matches=None, invalid=()):
+        self.tables = tables
+        self.partitions = list(partitions)
+        self.matches = matches or {}
+        self.invalid = set(invalid)
+        self.table_calls = []
+        self.partition_calls = []
+
+    def get_table(self, **kwargs):
+        self.table_calls.append(kwargs)
+        table = self.tables.get((kwargs["DatabaseName"], kwargs["Name"]))
+        if table is None:
+            raise ClientError({"Error": {"Code": "EntityNotFoundException", "Message": "missing"}}, "GetTable")
+        return {"Table": table}
+
+    def get_paginator(self, name):
+        assert name == "get_partitions"
+        return FakePaginator(self)
+
+
+def _partition(day, size=None):
+    return {"Values": [day], "Parameters": {"totalSize": str(size)} if size else {}}
+
+
+def test_unpartitioned_and_unknown_tables():
+    glue = FakeGlue({("gold", "dim"): {"Parameters": {"recordCount": "1000", "averageRecordSize": "50"}}})
+    estimator = ScanEstimator(glue)
+
+    estimates = estimator.estimate(parse_sql("SELECT * FROM dim JOIN silver.missing USING (id)"), "gold")
+
+    assert [(e.table, e.estimated_bytes, e.partitions_scanned) for e in estimates] == [
+        ("gold.dim", 50_000, None),
+        ("silver.missing", None, None),
+    ]
+
+
+def test_partition_predicates_narrow_the_scan_with_partition_sizes():
+    partitions = [_partition(f"2025-08-{day:02d}", 10) for day in range(1, 11)]
+    glue = FakeGlue(
+        {("gold", "visits"): {"Parameters": {"totalSize": "1000"}, "PartitionKeys": [{"Name": "dt", "Type": "string"}]}},
+        partitions,
+        {"dt IN ('2025-08-01', '2025-08-02')": partitions[:2]},
+    )
+    estimator = ScanEstimator(glue)
+
+    [estimate] = estimator.estimate(parse_sql("SELECT * FROM gold.visits WHERE dt IN ('2025-08-01', '2025-08-02')"), None)
+
+    assert (estimate.estimated_bytes, estimate.partitions_scanned, estimate.partitions_total) == (20, 2, 10)
+    assert glue.partition_calls[-1]["ExcludeColumnSchema"] is True
+
+
+def test_falls_back_to_share_of_table_size_and_caches_metadata():
+    partitions = [_partition(str(day)) for day in range(4)]
+    glue = FakeGlue(
+        {("gold", "visits"): {"Parameters": {"totalSize": "4000"}, "PartitionKeys": [{"Name": "day", "Type": "int"}]}},
+        partitions,
+        {"day = 2": partitions[2:3]},
+    )
+    estimator = ScanEstimator(glue)
+
+    for _ in range(2):
+        [estimate] = estimator.estimate(parse_sql("SELECT * FROM gold.visits WHERE day = 2"), None)
+        assert (estimate.estimated_bytes, estimate.partitions_scanned, estimate.partitions_total) == (1000, 1, 4)
+    assert len(glue.table_calls) == 1
+
+
+def test_skips_literals_that_do_not_fit_the_partition_type_and_survives_glue_errors():
+    partitions = [_partition(str(day)) for day in range(4)]
+    table = {"Parameters": {"totalSize": "4000"}, "PartitionKeys": [{"Name": "day", "Type": "int"}, {"Name": "region", "Type": "string"}]}
+    glue = FakeGlue({("gold", "visits"): table}, partitions, {"day = 2": partitions[2:3]}, invalid={"region = 'west'"})
+    estimator = ScanEstimator(glue)
+
+    [estimate] = estimator.estimate(parse_sql("SELECT * FROM gold.visits WHERE day IN ('2', 'x')"), None)
+    assert (estimate.estimated_bytes, estimate.partitions_scanned) == (1000, 1)
+
+    [estimate] = estimator.estimate(parse_sql("SELECT * FROM gold.visits WHERE day = 'x'"), None)
+    assert (estimate.estimated_bytes, estimate.partitions_scanned, estimate.partitions_total) == (4000, None, 4)
+
+    [estimate] = estimator.estimate(parse_sql("SELECT * FROM gold.visits WHERE region = 'west'"), None)
+    assert (estimate.estimated_bytes, estimate.partitions_scanned, estimate.partitions_total) == (4000, None, 4)
+
+
+def test_stops_counting_partitions_past_the_limit():
+    partitions = [_partition(f"2025-08-{day:02d}", 10) for day in range(1, 5)]
+    glue = FakeGlue(
+        {("gold", "visits"): {"Parameters": {"totalSize": "1000"}, "PartitionKeys": [{"Name": "dt", "Type": "string"}]}},
+        partitions,
+        {"dt = '2025-08-01'": partitions[:1]},
+    )
+    estimator = ScanEstimator(glue, max_partitions=1)
+
+    [estimate] = estimator.estimate(parse_sql("SELECT * FROM gold.visits WHERE dt = '2025-08-01'"), None)
+
+    assert (estimate.estimated_bytes, estimate.partitions_scanned, estimate.partitions_total) == (10, 1, None)
@@ -0,0 +1,266 @@
+import threading
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.application.views_service import ViewsService
+from app.config.settings import ViewSettings
+from app.domain.errors import ExternalServiceError, NotFoundError, ValidationError
+from app.presentation.timing import begin_timings, end_timings, phase
+
+
+def _conditional_failure(operation):
+    return ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "missing"}}, operation)
+
+
+class FakeViewsDynamo:
+    def __init__(self):
+        self.items = {}
+
+    def put_item(self, TableName, Item):
+        self.items[Item["name"]["S"]] = dict(Item)
+
+    def scan(self, TableName, **_kwargs):
+        return {"Items": [dict(item) for item in self.items.values()]}
+
+    def delete_item(self, TableName, Key, ConditionExpression, ExpressionAttributeNames):
+        if self.items.pop(Key["name"]["S"], None) is None:
+            raise _conditional_failure("DeleteItem")
+
+    def update_item(self, TableName, Key, UpdateExpression, ReturnValues, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        item = self.items.get(Key["name"]["S"])
+        if item is None:
+            raise _conditional_failure("UpdateItem")
+        assignments, _, removals = UpdateExpression[len("SET "):].partition(" REMOVE ")
+        for assignment in assignments.split(", "):
+            name, placeholder = assignment.split(" = ")
+            item[name] = ExpressionAttributeValues[placeholder]
+        for name in filter(None, removals.split(", ")):
+            item.pop(name, None)
+        return {}
+
+
+class FakeGlue:
+    def __init__(self, versions):
+        self.versions = versions
+        self.reads = []
+
+    def get_table(self, DatabaseName, Name):
+        self.reads.append(f"{DatabaseName}.{Name}")
+        version = self.versions.get(f"{DatabaseName}.{Name}")
+        if version is None:
+            raise ClientError({"Error": {"Code": "EntityNotFoundException", "Message": "missing"}}, "GetTable")
+        return {"Table": {"Name": Name, "Parameters": {"table_type": "ICEBERG", "metadata_location": version}}}
+
+
+class FakeMaterialize:
+    """Rebuilds a view by moving its target's version, as a replace would."""
+
+    def __init__(self, glue, failing=()):
+        self.glue = glue
+        self.failing = set(failing)
+        self.calls = []
+        self.principals = []
+        self._lock = threading.Lock()
+
+    def execute(self, payload, principals=(), wait=False):
+        assert wait
+        target = f"{payload['target']['db']}.{payload['target']['table']}"
+        with self._lock:
+            self.calls.append(target)
+            self.principals.extend(principals)
+        if target in self.failing:
+            raise ExternalServiceError("Athena FAILED: boom")
+        self.glue.versions[target] = f"{target}@{len(self.calls)}"
+        return {"status": "ok", "qid": f"qid-{target}"}
+
+
+class FakeClients:
+    def __init__(self, dynamodb, glue):
+        self._dynamodb = dynamodb
+        self._glue = glue
+
+    def dynamodb(self):
+        return self._dynamodb
+
+    def glue(self):
+        return self._glue
+
+
+SETTINGS = ViewSettings(region="us-west-1", allowed_origin="*", table_name="views", refresh_workers=4)
+
+
+def _service(versions=None, failing=(), settings=SETTINGS):
+    ddb, glue = FakeViewsDynamo(), FakeGlue(dict(versions or {}))
+    materialize = FakeMaterialize(glue, failing)
+    return ViewsService(settings, FakeClients(ddb, glue), materialize), ddb, glue, materialize
+
+
+def _register(service, name, table, sql, **extra):
+    return service.register({"name": name, "target": {"db": "gold", "table": table}, "sql": sql, **extra})
+
+
+def test_register_derives_inputs_from_the_sql():
+    service, ddb, _, _ = _service()
+
+    view = _register(
+        service,
+        "daily",
+        "visits_daily",
+        "SELECT d.visit_date, count(*) FROM fact_visit d JOIN awsdatacatalog.silver.src_sqlserver__dbo_resident r ON r.resident_id = d.resident_id GROUP BY 1;",
+    )
+
+    assert view.inputs == ["gold.fact_visit", "silver.src_sqlserver__dbo_resident"]
+    assert (view.mode, view.target) == ("replace", "gold.visits_daily")
+    assert ddb.items["daily"]["inputs"] == {"L": [{"S": "gold.fact_visit"}, {"S": "silver.src_sqlserver__dbo_resident"}]}
+    assert [listed.name for listed in service.list()] == ["daily"]
+
+
+@pytest.mark.parametrize(
+    "payload, code",
+    [
+        ({"name": "bad name", "target": {"db": "gold", "table": "t"}, "sql": "SELECT 1"}, "BadParam"),
+        ({"name": "v", "target": {"db": "gold", "table": "t"}, "sql": "SELECT 1", "mode": "append"}, "BadParam"),
+        ({"name": "v", "target": {"db": "gold", "table": "t"}, "sql": "SELECT 1", "mode": "merge"}, "MissingParam"),
+        ({"name": "v", "target": {"db": "gold", "table": "t"}, "sql": "SELECT * FROM gold.t"}, "BadParam"),
+        ({"name": "v", "target": {"db": "gold"}, "sql": "SELECT 1"}, "MissingParam"),
+        ({"name": "v", "target": {"db": "gold", "table": "t"}, "sql": "DELETE FROM gold.t"}, "UnsafeSql"),
+    ],
+)
+def test_register_validates_the_definition(payload, code):
+    service, _, _, _ = _service()
+
+    with pytest.raises(ValidationError) as excinfo:
+        service.register(payload)
+    assert excinfo.value.code == code
+
+
+def test_register_rejects_a_taken_target_and_cycles():
+    service, _, _, _ = _service()
+    _register(service, "a", "a", "SELECT * FROM gold.b")
+
+    with pytest.raises(ValidationError) as taken:
+        _register(service, "other", "a", "SELECT 1")
+    with pytest.raises(ValidationError) as cyclic:
+        _register(service, "b", "b", "SELECT * FROM gold.a")
+
+    assert (taken.value.code, taken.value.status_code) == ("TargetTaken", 409)
+    assert (cyclic.value.code, cyclic.value.status_code) == ("CyclicViews", 409)
+
+
+def test_delete_unregisters_the_view():
+    service, ddb, _, _ = _service()
+    _register(service, "daily", "visits_daily", "SELECT * FROM gold.fact_visit")
+
+    service.delete("daily")
+
+    assert ddb.items == {}
+    with pytest.raises(NotFoundError):
+        service.delete("daily")
+
+
+def test_views_need_a_table():
+    service, _, _, _ = _service(settings=ViewSettings(region="us-west-1", allowed_origin="*"))
+
+    with pytest.raises(ValidationError) as excinfo:
+        service.list()
+    assert (excinfo.value.code, excinfo.value.status_code) == ("ViewsUnavailable", 501)
+
+
+VERSIONS = {"gold.fact_visit": "v1", "gold.dim_resident": "r1"}
+
+
+def _chain(service):
+    _register(service, "daily", "visits_daily", "SELECT * FROM gold.fact_visit")
+    _register(service, "weekly", "visits_weekly", "SELECT * FROM gold.visits_daily")
+    _register(service, "residents", "resident_summary", "SELECT * FROM gold.dim_resident")
+
+
+def test_refresh_builds_new_views_in_dependency_order():
+    service, ddb, _, materialize = _service(VERSIONS)
+    _chain(service)
+
+    results = {result.name: result for result in service.refresh(["gold.fact_visit"])}
+
+    assert {name: result.status for name, result in results.items()} == {"daily": "refreshed", "residents": "refreshed", "weekly": "refreshed"}
+    assert materialize.calls.index("gold.visits_weekly") > materialize.calls.index("gold.visits_daily")
+    assert set(materialize.principals) == {"view:daily", "view:weekly", "view:residents"}
+    assert ddb.items["daily"]["inputVersions"] == {"M": {"gold.fact_visit": {"S": "v1"}}}
+    assert ddb.items["weekly"]["lastStatus"] == {"S": "refreshed"}
+    assert ddb.items["weekly"]["lastQueryExecutionId"] == {"S": "qid-gold.visits_weekly"}
+
+
+def test_refresh_runs_views_in_the_invocation_context():
+    service, _, _, materialize = _service(VERSIONS)
+    _chain(service)
+    execute = materialize.execute
+
+    def timed_execute(payload, principals=(), wait=False):
+        with phase("materialize"):
+            return execute(payload, principals, wait)
+
+    materialize.execute = timed_execute
+    timings = begin_timings()
+    try:
+        service.refresh(["gold.fact_visit"])
+        phases = timings.to_dict()["phases"]
+    finally:
+        end_timings()
+
+    assert phases["materialize"]["count"] == 3
+
+
+def test_refresh_rebuilds_only_views_downstream_of_a_change():
+    service, _, glue, materialize = _service(VERSIONS)
+    _chain(service)
+    service.refresh()
+    materialize.calls.clear()
+
+    glue.versions["gold.fact_visit"] = "v2"
+    results = {result.name: result.status for result in service.refresh(["gold.fact_visit"])}
+
+    assert results == {"daily": "refreshed", "weekly": "refreshed", "residents": "unchanged"}
+    assert sorted(materialize.calls) == ["gold.visits_daily", "gold.visits_weekly"]
+
+
+def test_refresh_notices_catalog_changes_it_was_not_told_about():
+    service, _, glue, materialize = _service(VERSIONS)
+    _chain(service)
+    service.refresh()
+    materialize.calls.clear()
+
+    glue.versions["gold.dim_resident"] = "r2"
+    results = {result.name: result.status for result in service.refresh()}
+
+    assert results == {"daily": "unchanged", "weekly": "unchanged", "residents": "refreshed"}
+    assert materialize.calls == ["gold.resident_summary"]
+
+
+def test_refresh_skips_views_downstream_of_a_failure_and_retries_them_next_time():
+    service, ddb, _, materialize = _service(VERSIONS, failing={"gold.visits_daily"})
+    _chain(service)
+
+    results = {result.name: result for result in service.refresh(["gold.fact_visit"])}
+
+    assert (results["daily"].status, results["daily"].error) == ("failed", "Athena FAILED: boom")
+    assert results["weekly"].status == "skipped"
+    assert results["residents"].status == "refreshed"
+    assert "gold.visits_weekly" not in materialize.calls
+    assert ddb.items["daily"]["lastError"] == {"S": "Athena FAILED: boom"}
+
+    materialize.failing.clear()
+    materialize.calls.clear()
+    results = {result.name: result.status for result in service.refresh()}
+
+    assert results == {"daily": "refreshed", "weekly": "refreshed", "residents": "unchanged"}
+    assert "lastError" not in ddb.items["daily"]
+
+
+def test_refresh_force_rebuilds_everything():
+    service, _, _, materialize = _service(VERSIONS)
+    _chain(service)
+    service.refresh()
+    materialize.calls.clear()
+
+    assert {result.status for result in service.refresh(force=True)} == {"refreshed"}
+    assert len(materialize.calls) == 3
@@ -0,0 +1,113 @@
+import pytest
+
+from app.domain.errors import ValidationError
+from app.domain.sql import parse_sql, validate_read_only, validate_select
+
+
+def test_extracts_tables_and_ignores_keyword_like_columns():
+    statement = validate_select(
+        "SELECT update_ts, deleted FROM silver.visit v LEFT JOIN \"Gold\".dim_resident r ON v.resident_id = r.resident_id "
+        "WHERE extract(year FROM visit_ts) = 2025;  -- trailing note"
+    )
+
+    assert statement.kind == "SELECT"
+    assert statement.tables == ("silver.visit", "gold.dim_resident")
+    assert statement.text.endswith("= 2025")
+
+
+def test_cte_names_are_not_tables():
+    statement = parse_sql("WITH x AS (SELECT * FROM a.b), y AS (SELECT 1) SELECT * FROM x, y, c.d AS z")
+
+    assert statement.ctes == ("x", "y")
+    assert statement.tables == ("a.b", "c.d")
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "DELETE FROM visits",
+        "WITH x AS (DELETE FROM t) SELECT 1",
+        "WITH x AS (SELECT 1) INSERT INTO t SELECT * FROM x",
+        "EXPLAIN ANALYZE DELETE FROM t",
+    ],
+)
+def test_rejects_writes_wherever_a_statement_can_start(sql):
+    with pytest.raises(ValidationError) as excinfo:
+        validate_read_only(sql)
+    assert excinfo.value.code == "UnsafeSql"
+
+
+def test_rejects_multiple_statements_but_not_commented_ones():
+    with pytest.raises(ValidationError) as excinfo:
+        validate_select("SELECT 1; DROP TABLE x")
+    assert excinfo.value.code == "MultipleStatements"
+
+    assert validate_select("SELECT 1 /* ; DROP TABLE x */").statement_count == 1
+
+
+def test_query_allows_metadata_statements_that_materialize_does_not():
+    assert validate_read_only("SHOW TABLES IN gold").kind == "SHOW"
+    with pytest.raises(ValidationError):
+        validate_select("SHOW TABLES IN gold")
+
+
+@pytest.mark.parametrize("sql", ["SELECT 'oops", "SELECT 1 /* open", "   "])
+def test_malformed_sql_is_a_bad_request(sql):
+    with pytest.raises(ValidationError) as excinfo:
+        parse_sql(sql)
+    assert excinfo.value.code == "BadSql"
+
+
+def test_parses_are_cached_and_fingerprints_ignore_formatting():
+    parse_sql.cache_clear()
+    first = parse_sql("select *\n  from gold.visits -- all")
+    assert parse_sql("select *\n  from gold.visits -- all") is first
+    assert parse_sql.cache_info().hits == 1
+    assert parse_sql("SELECT * FROM gold.visits").fingerprint == first.fingerprint
+
+
+def test_collects_conjunctive_equality_predicates():
+    statement = parse_sql(
+        "SELECT * FROM gold.visits v WHERE v.dt IN ('2025-08-12', DATE '2025-08-13') AND region = 'west' "
+        "AND NOT status = 'void' AND score > 3"
+    )
+
+    assert statement.predicate_values("dt") == ("2025-08-12", "2025-08-13")
+    assert statement.predicate_values("region") == ("west",)
+    assert statement.predicate_values("status") is None
+    assert parse_sql("SELECT * FROM gold.visits WHERE dt = '2025-08-13' OR region = 'west'").predicates == ()
+
+
+def test_predicates_only_come_from_a_single_table_where():
+    assert parse_sql("SELECT * FROM gold.visits a JOIN gold.users b ON a.id = b.id WHERE dt = '2025-08-13'").predicates == ()
+    assert parse_sql("SELECT * FROM gold.visits a, gold.visits b WHERE a.dt = '2025-08-13'").predicates == ()
+    assert parse_sql("SELECT * FROM gold.visits WHERE id IN (SELECT id FROM gold.users WHERE dt = '2025-08-13')").predicates == ()
+    assert parse_sql(
+        "SELECT * FROM gold.visits WHERE dt = '2025-08-13' UNION ALL SELECT * FROM gold.visits WHERE dt = '2025-08-14'"
+    ).predicates == ()
+    assert parse_sql("WITH recent AS (SELECT * FROM gold.visits) SELECT * FROM recent WHERE dt = '2025-08-13'").predicates == ()
+    assert parse_sql("SELECT * FROM gold.visits v WHERE w.dt = '2025-08-13' AND payload.dt = 'x'").predicates == ()
+    assert parse_sql("SELECT * FROM gold.visits AS v WHERE visits.dt = '2025-08-13' ORDER BY region = 'west'").predicates == (
+        ("dt", ("2025-08-13",)),
+    )
+    assert parse_sql(
+        "SELECT extract(year FROM ts) FROM gold.visits WHERE gold.visits.dt = '2025-08-13'"
+    ).predicate_values("dt") == ("2025-08-13",)
+
+
+def test_predicates_skip_comparisons_with_expressions():
+    assert parse_sql("SELECT * FROM gold.visits WHERE dt = 5 + 1").predicates == ()
+    assert parse_sql("SELECT * FROM gold.visits WHERE dt = '5' || 'x'").predicates == ()
+    assert parse_sql("SELECT * FROM gold.visits WHERE dt IN ('5') || 'x'").predicates == ()
+    assert parse_sql("SELECT * FROM gold.visits WHERE 10 - dt = 5").predicates == ()
+    assert parse_sql("SELECT * FROM gold.visits WHERE (dt = '5') AND region = 'west' LIMIT 10").predicates == (
+        ("dt", ("5",)),
+        ("region", ("west",)),
+    )
+
+
+def test_table_queries_reference_their_table():
+    assert parse_sql("TABLE gold.visits").tables == ("gold.visits",)
+    assert parse_sql("SELECT * FROM (TABLE gold.visits) UNION ALL TABLE silver.visit").tables == ("gold.visits", "silver.visit")
+    assert parse_sql("WITH recent AS (SELECT 1) TABLE recent").tables == ()
+    assert parse_sql("SELECT * FROM TABLE(sequence(1, 3))").tables == ()
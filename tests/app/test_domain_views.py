@@ -0,0 +1,31 @@
+from app.domain.models import MaterializedView
+from app.domain.views import refresh_levels
+
+
+def _view(name, target, *inputs):
+    database, table = target.split(".")
+    return MaterializedView(name=name, database=database, table=table, sql="SELECT 1", mode="replace", inputs=list(inputs))
+
+
+def test_refresh_levels_orders_views_after_the_views_they_read():
+    daily = _view("daily", "gold.visits_daily", "gold.fact_visit")
+    residents = _view("residents", "gold.resident_summary", "gold.dim_resident")
+    weekly = _view("weekly", "gold.visits_weekly", "gold.visits_daily")
+    report = _view("report", "gold.report", "gold.visits_weekly", "gold.resident_summary")
+
+    levels, cyclic = refresh_levels([report, weekly, residents, daily])
+
+    assert [[view.name for view in level] for level in levels] == [["daily", "residents"], ["weekly"], ["report"]]
+    assert cyclic == []
+
+
+def test_refresh_levels_sets_cycles_and_their_dependents_apart():
+    first = _view("first", "gold.a", "gold.b")
+    second = _view("second", "gold.b", "gold.a")
+    after = _view("after", "gold.c", "gold.b")
+    alone = _view("alone", "gold.d", "silver.visit")
+
+    levels, cyclic = refresh_levels([first, second, after, alone])
+
+    assert [[view.name for view in level] for level in levels] == [["alone"]]
+    assert [view.name for view in cyclic] == ["after", "first", "second"]
@@ -0,0 +1,177 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from app.infrastructure.admission import INTERACTIVE, REFRESH, AthenaAdmission, DynamoAdmission, InMemoryAdmission
+from app.infrastructure.dynamodb import DynamoTable
+
+
+def test_reserved_slots_only_admit_refresh_work():
+    admission = InMemoryAdmission(3, reserved=1)
+
+    interactive = [admission.acquire(INTERACTIVE, "u1"), admission.acquire(INTERACTIVE, "u2")]
+    assert all(interactive)
+    assert admission.acquire(INTERACTIVE, "u3") is None
+
+    refresh = admission.acquire(REFRESH)
+    assert refresh is not None and refresh.keys == ("athena-slot#2",)
+    assert admission.acquire(REFRESH) is None
+
+    admission.release(interactive[0])
+    assert admission.acquire(INTERACTIVE, "u3") is not None
+
+
+def test_per_principal_slots_keep_one_user_from_taking_the_pool():
+    admission = InMemoryAdmission(4, per_principal=1)
+
+    first = admission.acquire(INTERACTIVE, "alice")
+    assert admission.acquire(INTERACTIVE, "alice") is None
+    assert admission.acquire(INTERACTIVE, "bob") is not None
+
+    with admission.admitted(INTERACTIVE, "carol") as lease:
+        assert lease is not None
+    assert admission.acquire(INTERACTIVE, "carol") is not None
+    assert len(first.keys) == 2
+
+
+def test_expired_leases_free_their_slots(monkeypatch):
+    admission = InMemoryAdmission(1, lease_seconds=10)
+    clock = [1000.0]
+    monkeypatch.setattr("app.infrastructure.admission.time.time", lambda: clock[0])
+
+    assert admission.acquire(INTERACTIVE) is not None
+    assert admission.acquire(INTERACTIVE) is None
+    clock[0] += 11
+    assert admission.acquire(INTERACTIVE) is not None
+
+
+class FakeAthena:
+    def __init__(self, states):
+        self.states = states
+
+    def batch_get_query_execution(self, QueryExecutionIds):
+        return {
+            "QueryExecutions": [
+                {"QueryExecutionId": qid, "Status": {"State": self.states[qid]}} for qid in QueryExecutionIds if qid in self.states
+            ]
+        }
+
+
+def test_attached_leases_last_as_long_as_their_query(monkeypatch):
+    admission = InMemoryAdmission(3, per_principal=1, lease_seconds=10)
+    clock = [1000.0]
+    monkeypatch.setattr("app.infrastructure.admission.time.time", lambda: clock[0])
+    running, finished, unknown = (admission.acquire(INTERACTIVE, user) for user in ("alice", "bob", "carol"))
+    for lease, query_id in ((running, "q-run"), (finished, "q-done"), (unknown, "q-gone")):
+        admission.attach(lease, query_id)
+
+    clock[0] += 5
+    athena = FakeAthena({"q-run": "RUNNING", "q-done": "SUCCEEDED"})
+    assert admission.sweep(athena) == {"released": 1, "renewed": 1}
+    assert admission.acquire(INTERACTIVE, "bob") is not None
+
+    # The running query's lease was renewed past its original expiry; the unknown one ran out.
+    clock[0] += 8
+    assert admission.acquire(INTERACTIVE, "alice") is None
+    assert admission.acquire(INTERACTIVE, "carol") is not None
+
+
+class FakeDynamo:
+    """Evaluates the conditions the admission controller writes with."""
+
+    def __init__(self):
+        self.items = {}
+
+    def batch_get_item(self, RequestItems):
+        (table, request), = RequestItems.items()
+        keys = [key["resource"]["S"] for key in request["Keys"]]
+        return {"Responses": {table: [self.items[key] for key in keys if key in self.items]}}
+
+    def put_item(self, TableName, Item, ConditionExpression, ExpressionAttributeNames, ExpressionAttributeValues):
+        current = self.items.get(Item["resource"]["S"])
+        if current and int(current["expiresAt"]["N"]) > int(ExpressionAttributeValues[":now"]["N"]):
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "held"}}, "PutItem")
+        self.items[Item["resource"]["S"]] = Item
+
+    def delete_item(self, TableName, Key, ConditionExpression, ExpressionAttributeValues):
+        current = self.items.get(Key["resource"]["S"])
+        if not current or current["holder"] != ExpressionAttributeValues[":holder"]:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "not yours"}}, "DeleteItem")
+        del self.items[Key["resource"]["S"]]
+
+    def update_item(self, TableName, Key, UpdateExpression, ConditionExpression, ExpressionAttributeValues, ReturnValues):
+        current = self.items.get(Key["resource"]["S"])
+        if not current or current["holder"] != ExpressionAttributeValues[":holder"]:
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "not yours"}}, "UpdateItem")
+        current.update(
+            queryExecutionId=ExpressionAttributeValues[":qid"],
+            leaseKeys=ExpressionAttributeValues[":keys"],
+            expiresAt=ExpressionAttributeValues[":until"],
+        )
+        return {}
+
+
+def test_dynamo_admission_leases_slot_items():
+    client = FakeDynamo()
+    admission = DynamoAdmission(DynamoTable(client, "cooldowns"), 2, per_principal=1, lease_seconds=60)
+
+    lease = admission.acquire(INTERACTIVE, "alice")
+    assert sorted(client.items) == ["athena-principal#alice#0", lease.keys[1]]
+    assert admission.acquire(INTERACTIVE, "alice") is None
+    other = admission.acquire(INTERACTIVE, "bob")
+    assert admission.acquire(INTERACTIVE, "carol") is None
+
+    admission.release(lease)
+    admission.release(other)
+    assert client.items == {}
+
+
+def test_dynamo_admission_release_frees_every_key_despite_errors():
+    class ThrottledDynamo(FakeDynamo):
+        def __init__(self):
+            super().__init__()
+            self.deletes = []
+
+        def delete_item(self, **kwargs):
+            self.deletes.append(kwargs["Key"]["resource"]["S"])
+            if len(self.deletes) == 1:
+                raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow down"}}, "DeleteItem")
+            super().delete_item(**kwargs)
+
+    client = ThrottledDynamo()
+    admission = DynamoAdmission(DynamoTable(client, "cooldowns"), 2, per_principal=1, lease_seconds=60)
+    lease = admission.acquire(INTERACTIVE, "alice")
+
+    admission.release(lease)
+
+    assert client.deletes == list(lease.keys)
+    assert sorted(client.items) == [lease.keys[0]]
+
+
+def test_dynamo_admission_releases_an_attached_lease_when_its_query_finishes(monkeypatch):
+    monkeypatch.setattr("app.infrastructure.admission.time.time", lambda: 1000.0)
+    client = FakeDynamo()
+    admission = DynamoAdmission(DynamoTable(client, "cooldowns"), 2, per_principal=1, lease_seconds=60)
+    lease = admission.acquire(INTERACTIVE, "alice")
+
+    admission.attach(lease, "qid-1")
+    slot = client.items[lease.keys[1]]
+    assert (slot["queryExecutionId"], slot["expiresAt"]) == ({"S": "qid-1"}, {"N": "1060"})
+    assert slot["leaseKeys"] == {"L": [{"S": key} for key in lease.keys]}
+
+    assert admission.sweep(FakeAthena({"qid-1": "RUNNING"})) == {"released": 0, "renewed": 1}
+    assert admission.sweep(FakeAthena({"qid-1": "FAILED"})) == {"released": 1, "renewed": 0}
+    assert client.items == {}
+
+
+def test_admission_stores_must_implement_every_slot_hook():
+    class Partial(AthenaAdmission):
+        def _held(self, keys, now):
+            return set()
+
+    with pytest.raises(TypeError):
+        Partial(1)
+
+
+def test_dynamo_admission_needs_room_in_one_batch_get():
+    with pytest.raises(ValueError):
+        DynamoAdmission(DynamoTable(FakeDynamo(), "cooldowns"), 95, per_principal=10)
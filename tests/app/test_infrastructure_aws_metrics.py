@@ -0,0 +1,105 @@
+import io
+import json
+
+import boto3
+import botocore.endpoint
+import pytest
+from botocore.awsrequest import AWSResponse
+from botocore.config import Config
+
+from app.infrastructure.aws_clients import AwsClients
+from app.infrastructure.aws_metrics import AwsCallMetrics
+from app.presentation import logging as app_logging
+
+
+class _Raw:
+    def __init__(self, body: bytes) -> None:
+        self._body = body
+
+    def stream(self, **_kwargs):
+        yield self._body
+
+
+def _response(request, status: int, payload: dict) -> AWSResponse:
+    return AWSResponse(request.url, status, {"Content-Type": "application/x-amz-json-1.1"}, _Raw(json.dumps(payload).encode()))
+
+
+def _query_execution(query_id: str, state: str) -> dict:
+    return {
+        "QueryExecution": {
+            "QueryExecutionId": query_id,
+            "Status": {"State": state},
+            "Statistics": {"QueryQueueTimeInMillis": 120, "EngineExecutionTimeInMillis": 900},
+        }
+    }
+
+
+@pytest.fixture
+def clients(monkeypatch):
+    # Real botocore clients with every request answered locally by ``responses``.
+    monkeypatch.setattr(botocore.endpoint.time, "sleep", lambda _seconds: None)
+    session = boto3.session.Session(aws_access_key_id="test", aws_secret_access_key="test", region_name="us-west-1")
+    responses = []
+    session.events.register("before-send", lambda request, **_k: responses.pop(0)(request))
+    # Standard retries: adaptive mode would also rate-limit (and sleep) after the throttle.
+    config = Config(retries={"mode": "standard", "max_attempts": 3})
+    clients = AwsClients("us-west-1", session=session, config=config, metrics=AwsCallMetrics(namespace="Test"))
+    clients.responses = responses
+    return clients
+
+
+def test_records_latency_retries_and_throttles_per_operation(clients):
+    clients.responses.extend(
+        [
+            lambda r: _response(r, 400, {"__type": "ThrottlingException", "message": "Rate exceeded"}),
+            lambda r: _response(r, 200, _query_execution("q-1", "RUNNING")),
+            lambda r: _response(r, 200, _query_execution("q-1", "SUCCEEDED")),
+        ]
+    )
+    athena = clients.athena()
+
+    athena.get_query_execution(QueryExecutionId="q-1")
+    athena.get_query_execution(QueryExecutionId="q-1")
+
+    snapshot = clients.metrics.snapshot()
+    stats = snapshot["calls"]["athena.GetQueryExecution"]
+    assert stats["count"] == 2
+    assert stats["retries"] == 1
+    assert stats["throttles"] == 1
+    assert stats["errors"] == 0
+    assert all(value >= 0 for value in stats["latency_ms"])
+    assert snapshot["athena"] == {"q-1": {"polls": 2, "queue_ms": 120, "execution_ms": 900}}
+
+
+def test_error_responses_are_counted(clients):
+    clients.responses.append(lambda r: _response(r, 400, {"__type": "InvalidRequestException", "Message": "bad"}))
+
+    with pytest.raises(clients.athena().exceptions.InvalidRequestException):
+        clients.athena().get_query_execution(QueryExecutionId="missing")
+
+    stats = clients.metrics.snapshot()["calls"]["athena.GetQueryExecution"]
+    assert stats["count"] == 1
+    assert stats["errors"] == 1
+
+
+def test_flush_logs_emf_documents_and_resets(clients):
+    stream = io.StringIO()
+    app_logging.configure_logging(stream=stream)
+    clients.responses.append(lambda r: _response(r, 200, _query_execution("q-2", "SUCCEEDED")))
+    clients.athena().get_query_execution(QueryExecutionId="q-2")
+
+    documents = clients.metrics.flush(Route="/query")
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["_aws"] for line in lines] == [document["_aws"] for document in documents]
+    call_doc, athena_doc = lines
+    directive = call_doc["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == "Test"
+    assert directive["Dimensions"] == [["Route", "Service", "Operation"]]
+    assert {metric["Name"] for metric in directive["Metrics"]} == {"AwsCallLatency", "AwsCalls", "AwsRetries", "AwsThrottles", "AwsErrors"}
+    assert (call_doc["Route"], call_doc["Service"], call_doc["Operation"], call_doc["AwsCalls"]) == ("/query", "athena", "GetQueryExecution", 1)
+    assert athena_doc["AthenaPollsPerQuery"] == [1]
+    assert athena_doc["AthenaQueueTime"] == [120]
+    assert athena_doc["AthenaExecutionTime"] == [900]
+    assert clients.metrics.snapshot() == {"calls": {}, "athena": {}}
+    app_logging.configure_logging()
@@ -6,16 +6,26 @@ import pytest
 from app.infrastructure import aws_clients
 
 
-def test_get_clients_caches_instances(monkeypatch):
-    called = {}
+class FakeSession:
+    def __init__(self, *_args, **_kwargs):
+        self.calls = []
 
-    def fake_client(name, region_name=None, config=None):
-        called.setdefault(name, 0)
-        called[name] += 1
+    def client(self, name, region_name=None, config=None):
+        self.calls.append((name, region_name, config))
         return MagicMock(name=f"client-{name}")
 
-    monkeypatch.setattr(boto3, "client", fake_client)
+    def count(self, name):
+        return sum(1 for call in self.calls if call[0] == name)
 
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(boto3.session, "Session", lambda *_a, **_k: session)
+    return session
+
+
+def test_get_clients_caches_instances(fake_session):
     aws_clients.get_clients.cache_clear()
     clients = aws_clients.get_clients("us-west-2")
 
@@ -23,8 +33,39 @@ def test_get_clients_caches_instances(monkeypatch):
     clients.lambda_()
     clients.dynamodb()
 
-    assert called["dynamodb"] == 1
-    assert called["lambda"] == 1
+    assert fake_session.count("dynamodb") == 1
+    assert fake_session.count("lambda") == 1
 
     same_clients = aws_clients.get_clients("us-west-2")
     assert clients is same_clients
+    aws_clients.get_clients.cache_clear()
+
+
+def test_dynamodb_client_uses_tuned_config(fake_session):
+    clients = aws_clients.AwsClients("us-west-2")
+    clients.dynamodb()
+    clients.s3()
+
+    configs = {name: config for name, _region, config in fake_session.calls}
+    assert configs["dynamodb"].max_pool_connections == 25
+    assert configs["dynamodb"].tcp_keepalive is True
+    assert configs["dynamodb"].retries["mode"] == "standard"
+    assert configs["s3"] is aws_clients.DEFAULT_CLIENT_CONFIG
+
+
+def test_default_config_uses_adaptive_retries_and_wide_pool():
+    config = aws_clients.DEFAULT_CLIENT_CONFIG
+    assert config.retries["mode"] == "adaptive"
+    assert config.max_pool_connections == aws_clients.MAX_POOL_CONNECTIONS
+    assert config.tcp_keepalive is True
+
+
+def test_warm_creates_each_client_once(fake_session):
+    clients = aws_clients.AwsClients("us-west-2")
+
+    assert clients.warm("s3", "lambda", "dynamodb", "s3") is clients
+    clients.warm("s3", "glue")
+
+    assert sorted(call[0] for call in fake_session.calls) == ["dynamodb", "glue", "lambda", "s3"]
+    assert all(call[1] == "us-west-2" for call in fake_session.calls)
+    assert clients.s3() is clients.s3()
@@ -0,0 +1,141 @@
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.domain.errors import ExternalServiceError
+from app.infrastructure.dynamodb import ConditionalCheckFailedError, DynamoTable
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = []
+
+    def put_item(self, **kwargs):
+        self.calls.append(("put_item", kwargs))
+        if self.error:
+            raise self.error
+
+    def get_item(self, **kwargs):
+        self.calls.append(("get_item", kwargs))
+        return {"Item": {"k": {"S": "v"}}}
+
+    def update_item(self, **kwargs):
+        self.calls.append(("update_item", kwargs))
+        return {"Attributes": {"n": {"N": "2"}}}
+
+
+def test_dynamo_table_scopes_calls_to_table():
+    client = FakeClient()
+    table = DynamoTable(client, "cooldowns")
+
+    assert table.get_item({"k": {"S": "v"}}) == {"k": {"S": "v"}}
+    attributes = table.update_item({"k": {"S": "v"}}, "ADD n :one", values={":one": {"N": "1"}}, return_values="ALL_NEW")
+
+    assert attributes == {"n": {"N": "2"}}
+    assert client.calls[0] == ("get_item", {"TableName": "cooldowns", "Key": {"k": {"S": "v"}}})
+    assert client.calls[1][1]["ExpressionAttributeValues"] == {":one": {"N": "1"}}
+    assert "ConditionExpression" not in client.calls[1][1]
+
+
+def test_dynamo_table_returns_old_item_on_conditional_failure():
+    error = ClientError(
+        {"Error": {"Code": "ConditionalCheckFailedException", "Message": "no"}, "Item": {"allowAfter": {"N": "5"}}},
+        "PutItem",
+    )
+    client = FakeClient(error=error)
+    table = DynamoTable(client, "cooldowns")
+
+    with pytest.raises(ConditionalCheckFailedError) as exc_info:
+        table.put_item({"k": {"S": "v"}}, condition="attribute_not_exists(k)", return_old_on_failure=True)
+
+    assert exc_info.value.item == {"allowAfter": {"N": "5"}}
+    assert client.calls[0][1]["ReturnValuesOnConditionCheckFailure"] == "ALL_OLD"
+
+
+def test_dynamo_table_propagates_other_errors():
+    error = ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow"}}, "PutItem")
+    table = DynamoTable(FakeClient(error=error), "cooldowns")
+
+    with pytest.raises(ClientError):
+        table.put_item({"k": {"S": "v"}})
+
+
+def test_dynamo_table_batch_get_retries_unprocessed_keys(monkeypatch):
+    monkeypatch.setattr("app.infrastructure.dynamodb.time", SimpleNamespace(sleep=lambda *_: None, perf_counter=lambda: 0.0))
+    class BatchClient:
+        def __init__(self):
+            self.requests = []
+
+        def batch_get_item(self, RequestItems):
+            self.requests.append(RequestItems)
+            if len(self.requests) == 1:
+                return {"Responses": {"cooldowns": [{"k": {"S": "a"}}]}, "UnprocessedKeys": {"cooldowns": {"Keys": [{"k": {"S": "b"}}]}}}
+            return {"Responses": {"cooldowns": [{"k": {"S": "b"}}]}}
+
+    client = BatchClient()
+    items = DynamoTable(client, "cooldowns").batch_get_items([{"k": {"S": "a"}}, {"k": {"S": "b"}}], consistent_read=True)
+
+    assert items == [{"k": {"S": "a"}}, {"k": {"S": "b"}}]
+    assert client.requests[0]["cooldowns"]["ConsistentRead"] is True
+    assert client.requests[1] == {"cooldowns": {"Keys": [{"k": {"S": "b"}}]}}
+
+
+def test_dynamo_table_batch_get_backs_off_and_gives_up_when_throttled(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("app.infrastructure.dynamodb.time", SimpleNamespace(sleep=sleeps.append, perf_counter=lambda: 0.0))
+
+    class ThrottledClient:
+        def __init__(self):
+            self.calls = 0
+
+        def batch_get_item(self, RequestItems):
+            self.calls += 1
+            return {"Responses": {}, "UnprocessedKeys": RequestItems}
+
+    client = ThrottledClient()
+    with pytest.raises(ExternalServiceError):
+        DynamoTable(client, "cooldowns").batch_get_items([{"k": {"S": "a"}}])
+
+    assert client.calls == 6
+    assert len(sleeps) == 5
+    assert all(0 <= delay <= limit for delay, limit in zip(sleeps, (0.1, 0.2, 0.4, 0.8, 1.0)))
+
+
+def test_dynamo_table_scan_follows_pagination():
+    class ScanClient:
+        def __init__(self):
+            self.calls = []
+
+        def scan(self, **kwargs):
+            self.calls.append(kwargs)
+            if len(self.calls) == 1:
+                return {"Items": [{"k": {"S": "a"}}], "LastEvaluatedKey": {"k": {"S": "a"}}}
+            return {"Items": [{"k": {"S": "b"}}]}
+
+    client = ScanClient()
+
+    assert DynamoTable(client, "views").scan_items() == [{"k": {"S": "a"}}, {"k": {"S": "b"}}]
+    assert client.calls == [{"TableName": "views"}, {"TableName": "views", "ExclusiveStartKey": {"k": {"S": "a"}}}]
+
+
+def test_dynamo_table_scan_passes_the_filter_on_every_page():
+    calls = []
+
+    def scan(**kwargs):
+        calls.append(kwargs)
+        return {"Items": []}
+
+    table = DynamoTable(SimpleNamespace(scan=scan), "jobs")
+
+    table.scan_items(filter="#state = :running", names={"#state": "state"}, values={":running": {"S": "RUNNING"}})
+
+    assert calls == [
+        {
+            "TableName": "jobs",
+            "FilterExpression": "#state = :running",
+            "ExpressionAttributeNames": {"#state": "state"},
+            "ExpressionAttributeValues": {":running": {"S": "RUNNING"}},
+        }
+    ]
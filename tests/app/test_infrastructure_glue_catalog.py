@@ -0,0 +1,166 @@
+from types import SimpleNamespace
+
+import pytest
+from botocore.exceptions import ClientError
+
+from app.infrastructure.glue_catalog import GlueCatalog
+
+
+def _error(code, operation):
+    return ClientError({"Error": {"Code": code, "Message": code}}, operation)
+
+
+class FakeGlue:
+    def __init__(self, tables, update_errors=()):
+        self.tables = tables
+        self.update_errors = list(update_errors)
+        self.updates = []
+        self.deleted = []
+
+    def get_table(self, DatabaseName, Name):
+        if Name not in self.tables:
+            raise _error("EntityNotFoundException", "GetTable")
+        return {"Table": dict(self.tables[Name])}
+
+    def update_table(self, **kwargs):
+        self.updates.append(kwargs)
+        if self.update_errors:
+            raise self.update_errors.pop(0)
+
+    def delete_table(self, DatabaseName, Name):
+        if Name not in self.tables:
+            raise _error("EntityNotFoundException", "DeleteTable")
+        self.deleted.append(Name)
+
+
+SHADOW = {
+    "Name": "visits__build_1",
+    "DatabaseName": "gold",
+    "CreateTime": "2025-08-13",
+    "VersionId": "1",
+    "StorageDescriptor": {"Location": "s3://lake/new/"},
+    "Parameters": {"table_type": "ICEBERG", "metadata_location": "s3://lake/new/metadata/00001.json"},
+}
+CURRENT = {"Name": "visits", "VersionId": "7", "StorageDescriptor": {"Location": "s3://lake/old/"}}
+
+
+def test_swap_updates_the_table_at_the_version_read_and_returns_its_old_location():
+    glue = FakeGlue({"visits__build_1": SHADOW, "visits": CURRENT})
+
+    previous = GlueCatalog(glue).swap("gold", "visits", "visits__build_1")
+
+    assert previous == "s3://lake/old/"
+    update = glue.updates[0]
+    assert update["VersionId"] == "7"
+    assert update["TableInput"] == {
+        "Name": "visits",
+        "StorageDescriptor": {"Location": "s3://lake/new/"},
+        "Parameters": {"table_type": "ICEBERG", "metadata_location": "s3://lake/new/metadata/00001.json"},
+    }
+    assert glue.deleted == []
+
+
+def test_swap_retries_when_another_writer_moved_the_table():
+    glue = FakeGlue({"visits__build_1": SHADOW, "visits": CURRENT}, update_errors=[_error("ConcurrentModificationException", "UpdateTable")])
+
+    assert GlueCatalog(glue).swap("gold", "visits", "visits__build_1") == "s3://lake/old/"
+    assert len(glue.updates) == 2
+
+
+def test_swap_requires_the_built_table():
+    with pytest.raises(LookupError):
+        GlueCatalog(FakeGlue({"visits": CURRENT})).swap("gold", "visits", "visits__build_1")
+
+
+def test_drop_ignores_a_missing_table():
+    glue = FakeGlue({"visits__build_1": SHADOW})
+    catalog = GlueCatalog(glue)
+
+    catalog.drop("gold", "visits__build_1")
+    catalog.drop("gold", "gone")
+
+    assert glue.deleted == ["visits__build_1"]
+
+
+class PartitionGlue:
+    def __init__(self, built, current, create_errors=()):
+        self.built = built
+        self.current = current
+        self.create_errors = list(create_errors)
+        self.creates = []
+        self.updates = []
+        self.gets = []
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, DatabaseName, TableName):
+        yield {"Partitions": self.built}
+
+    def batch_get_partition(self, DatabaseName, TableName, PartitionsToGet):
+        self.gets.append(len(PartitionsToGet))
+        wanted = [entry["Values"] for entry in PartitionsToGet]
+        return {"Partitions": [p for p in self.current if p["Values"] in wanted]}
+
+    def batch_create_partition(self, DatabaseName, TableName, PartitionInputList):
+        self.creates.append(len(PartitionInputList))
+        return {"Errors": self.create_errors} if self.create_errors else {}
+
+    def batch_update_partition(self, DatabaseName, TableName, Entries):
+        self.updates.append(Entries)
+        return {}
+
+
+def _partition(day, location):
+    return {"Values": [str(day)], "StorageDescriptor": {"Location": location}, "CreationTime": "2025-08-13"}
+
+
+def test_swap_partitions_creates_new_ones_in_batches_and_repoints_existing_ones():
+    built = [_partition(day, f"s3://lake/new/day={day}") for day in range(1250)]
+    glue = PartitionGlue(built, current=[_partition(7, "s3://lake/old/day=7")])
+
+    previous = GlueCatalog(glue).swap_partitions("gold", "visits", "visits__build_1")
+
+    assert previous == ["s3://lake/old/day=7"]
+    assert glue.gets == [1000, 250]
+    assert glue.creates == [100] * 12 + [49]
+    assert glue.updates == [[{
+        "PartitionValueList": ["7"],
+        "PartitionInput": {"Values": ["7"], "StorageDescriptor": {"Location": "s3://lake/new/day=7"}},
+    }]]
+
+
+def test_swap_partitions_raises_on_partition_errors():
+    error = {"PartitionValues": ["1"], "ErrorDetail": {"ErrorCode": "InternalServiceException", "ErrorMessage": "boom"}}
+    glue = PartitionGlue([_partition(1, "s3://lake/new/day=1")], current=[], create_errors=[error])
+
+    with pytest.raises(ClientError) as excinfo:
+        GlueCatalog(glue).swap_partitions("gold", "visits", "visits__build_1")
+    assert excinfo.value.response["Error"]["Code"] == "InternalServiceException"
+
+
+def test_swap_partitions_backs_off_on_unprocessed_keys_and_gives_up(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("app.infrastructure.glue_catalog.time", SimpleNamespace(sleep=sleeps.append))
+
+    class ThrottledGlue(PartitionGlue):
+        def batch_get_partition(self, DatabaseName, TableName, PartitionsToGet):
+            super().batch_get_partition(DatabaseName, TableName, PartitionsToGet)
+            if len(self.gets) == 1:
+                return {"Partitions": [], "UnprocessedKeys": PartitionsToGet}
+            return {"Partitions": []}
+
+    glue = ThrottledGlue([_partition(1, "s3://lake/new/day=1")], current=[])
+    GlueCatalog(glue).swap_partitions("gold", "visits", "visits__build_1")
+    assert glue.gets == [1, 1] and len(sleeps) == 1 and 0 <= sleeps[0] <= 0.1
+
+    class StuckGlue(PartitionGlue):
+        def batch_get_partition(self, DatabaseName, TableName, PartitionsToGet):
+            super().batch_get_partition(DatabaseName, TableName, PartitionsToGet)
+            return {"Partitions": [], "UnprocessedKeys": PartitionsToGet}
+
+    glue = StuckGlue([_partition(1, "s3://lake/new/day=1")], current=[])
+    with pytest.raises(ClientError) as excinfo:
+        GlueCatalog(glue).swap_partitions("gold", "visits", "visits__build_1")
+    assert excinfo.value.response["Error"]["Code"] == "ThrottlingException"
+    assert len(glue.gets) == 6 and glue.creates == []
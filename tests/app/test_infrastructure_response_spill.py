@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+from app.infrastructure.response_spill import S3ResponseSpill
+
+
+class FakeS3:
+    def __init__(self):
+        self.puts = []
+
+    def put_object(self, **kwargs):
+        self.puts.append(kwargs)
+
+    def generate_presigned_url(self, ClientMethod, Params, ExpiresIn):
+        return f"https://{Params['Bucket']}/{Params['Key']}?expires={ExpiresIn}"
+
+
+def test_spill_writes_body_and_returns_presigned_url():
+    s3 = FakeS3()
+    spill = S3ResponseSpill(SimpleNamespace(s3=lambda: s3), "spill-bucket", ttl_seconds=60)
+
+    url = spill(b"compressed", "application/json", "gzip")
+
+    put = s3.puts[0]
+    assert put["Bucket"] == "spill-bucket"
+    assert put["Key"].startswith("api-responses/")
+    assert put["ContentEncoding"] == "gzip"
+    assert url == f"https://spill-bucket/{put['Key']}?expires=60"
+
+
+def test_spill_omits_content_encoding_for_plain_bodies():
+    s3 = FakeS3()
+    S3ResponseSpill(SimpleNamespace(s3=lambda: s3), "b")(b"{}", "application/json", None)
+    assert "ContentEncoding" not in s3.puts[0]
@@ -1,4 +1,6 @@
-﻿from app.presentation import http
+﻿import pytest
+
+from app.presentation import http
 
 
 def test_build_json_response_contains_headers():
@@ -64,3 +66,119 @@ def test_prepare_request_handles_options():
     assert origin == "http://localhost"
     assert preflight["statusCode"] == 200
     assert event["httpMethod"] == "OPTIONS"
+
+
+def _large_payload():
+    return {"rows": [{"id": i, "name": f"resident-{i}"} for i in range(500)]}
+
+
+def test_build_json_response_gzips_large_bodies_when_accepted():
+    import base64
+    import gzip
+    import json
+
+    response = http.build_json_response(200, _large_payload(), "*", ["POST"], accept_encoding="gzip, deflate")
+
+    assert response["isBase64Encoded"] is True
+    assert response["headers"]["Content-Encoding"] == "gzip"
+    assert response["headers"]["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(base64.b64decode(response["body"]))) == _large_payload()
+
+
+def test_build_json_response_leaves_small_bodies_uncompressed():
+    response = http.build_json_response(200, {"ok": True}, "*", ["GET"], accept_encoding="gzip")
+
+    assert response["body"] in ('{"ok": true}', '{"ok":true}')
+    assert "Content-Encoding" not in response["headers"]
+    assert "isBase64Encoded" not in response
+
+
+def test_negotiate_encoding_honours_quality_values(monkeypatch):
+    monkeypatch.setattr(http, "brotli", None)
+    assert http.negotiate_encoding("gzip;q=0, identity") is None
+    assert http.negotiate_encoding("br, *;q=0.5") == "gzip"
+    assert http.negotiate_encoding(None) is None
+
+    monkeypatch.setattr(http, "brotli", object())
+    assert http.negotiate_encoding("gzip, br") == "br"
+    assert http.negotiate_encoding("gzip;q=1.0, br;q=0.4") == "gzip"
+
+
+def test_build_json_response_spills_oversize_bodies(monkeypatch):
+    spilled = []
+
+    def spill(body, content_type, encoding):
+        spilled.append((body, content_type, encoding))
+        return "https://bucket.s3.amazonaws.com/api-responses/x.json?sig"
+
+    monkeypatch.setattr(http, "MAX_INLINE_BODY_BYTES", 100)
+    response = http.build_json_response(200, _large_payload(), "*", ["POST"], accept_encoding="gzip", spill=spill)
+
+    assert response["statusCode"] == 303
+    assert response["headers"]["Location"].startswith("https://bucket")
+    assert response["headers"]["Access-Control-Allow-Origin"] == "*"
+    assert spilled[0][1:] == ("application/json", "gzip")
+
+
+def test_prepare_request_decodes_base64_body():
+    import base64
+
+    event = {"httpMethod": "POST", "isBase64Encoded": True, "body": base64.b64encode(b'{"sql": "SELECT 1"}').decode()}
+    evt, _origin, preflight = http.prepare_request(event, ["POST"], "*")
+
+    assert preflight is None
+    assert evt["body"] == '{"sql": "SELECT 1"}'
+    assert evt["isBase64Encoded"] is False
+
+
+@pytest.mark.parametrize("codec", list(http.available_codecs().values()), ids=lambda codec: codec.name)
+def test_codecs_encode_models_like_to_dict(codec):
+    import json
+
+    from app.domain.models import QueryResultPage, QueryStatistics
+
+    page = QueryResultPage(
+        columns=["id"],
+        rows=[["1"], [None]],
+        stats=QueryStatistics(scanned_bytes=10, execution_time_ms=5),
+        query_execution_id="qid",
+        next_page_token=None,
+    )
+    assert json.loads(codec.dumps({"page": page})) == {"page": page.to_dict()}
+    assert codec.loads(b'{"a": [1, 2]}') == {"a": [1, 2]}
+    with pytest.raises(ValueError):
+        codec.loads("{not json")
+
+
+def test_set_codec_swaps_encoder():
+    previous = http.set_codec("json")
+    try:
+        assert http.get_codec().name == "json"
+        assert http.build_json_response(200, {"ok": True}, "*", ["GET"])["body"] == '{"ok": true}'
+    finally:
+        http.set_codec(previous)
+
+
+def test_cors_policy_is_built_once_per_configuration():
+    first = http._policy_for("https://a.example, https://b.example", ["POST", "OPTIONS"], "Content-Type")
+    second = http._policy_for("https://a.example, https://b.example", ["POST", "OPTIONS"], "Content-Type")
+
+    assert first is second
+    assert first.methods == "OPTIONS,POST"
+    assert first.allow_origin("https://b.example") == "https://b.example"
+    assert first.allow_origin("https://evil.example") == "https://a.example"
+
+
+def test_cors_policy_hands_out_header_copies():
+    policy = http.cors_policy("*", ("GET",))
+    headers = policy.response_headers("https://any.example")
+    headers["Vary"] = "Accept-Encoding"
+
+    assert headers["Access-Control-Allow-Origin"] == "*"
+    assert "Vary" not in policy.response_headers(None)
+    assert "Content-Type" not in policy.preflight_headers(None)
+
+
+def test_extract_origin_matches_lowercase_and_mixed_case_names():
+    assert http.extract_origin({"headers": {"origin": "https://a"}}) == "https://a"
+    assert http.extract_origin({"headers": {"ORIGIN": "https://b"}}) == "https://b"
@@ -1,7 +1,85 @@
-﻿from app.presentation.logging import get_logger
+﻿import io
+import json
+import logging
+
+import pytest
+
+from app.presentation import logging as app_logging
+from app.presentation.logging import get_logger
 
 
 def test_get_logger_is_cached():
     logger1 = get_logger("sewingmachine.test")
     logger2 = get_logger("sewingmachine.test")
     assert logger1 is logger2
+
+
+@pytest.fixture
+def stream():
+    buffer = io.StringIO()
+    app_logging.configure_logging(stream=buffer, level="INFO", debug_sample_rate=0.0)
+    yield buffer
+    app_logging.end_request()
+    app_logging.configure_logging()
+
+
+def _lines(buffer):
+    return [json.loads(line) for line in buffer.getvalue().splitlines()]
+
+
+def test_logs_are_json_with_extra_fields_and_request_context(stream):
+    logger = app_logging.get_logger("sewingmachine.test.json")
+
+    app_logging.begin_request(requestId="req-1", route="/run")
+    app_logging.add_log_context(runId="run-9")
+    logger.info("Cooldown active for %s", "full-load", extra={"retryAfterSeconds": 12})
+    app_logging.end_request()
+
+    [entry] = _lines(stream)
+    assert entry["message"] == "Cooldown active for full-load"
+    assert entry["level"] == "INFO"
+    assert entry["retryAfterSeconds"] == 12
+    assert entry["requestId"] == "req-1"
+    assert entry["route"] == "/run"
+    assert entry["runId"] == "run-9"
+
+
+def test_lines_are_buffered_until_the_invocation_ends(stream):
+    logger = app_logging.get_logger("sewingmachine.test.buffer")
+
+    app_logging.begin_request(requestId="req-2")
+    logger.info("first")
+    logger.info("second")
+    assert stream.getvalue() == ""
+
+    app_logging.end_request()
+    assert [entry["message"] for entry in _lines(stream)] == ["first", "second"]
+
+
+def test_errors_flush_immediately(stream):
+    logger = app_logging.get_logger("sewingmachine.test.errors")
+
+    app_logging.begin_request()
+    logger.info("context")
+    logger.error("boom")
+    assert [entry["message"] for entry in _lines(stream)] == ["context", "boom"]
+
+
+def test_debug_lines_are_sampled_per_invocation(stream, monkeypatch):
+    logger = app_logging.get_logger("sewingmachine.test.sampling")
+    app_logging.configure_logging(stream=stream, level="INFO", debug_sample_rate=0.5)
+
+    monkeypatch.setattr(app_logging.random, "random", lambda: 0.9)
+    app_logging.begin_request(requestId="skipped")
+    logger.debug("not sampled")
+    app_logging.end_request()
+
+    monkeypatch.setattr(app_logging.random, "random", lambda: 0.1)
+    app_logging.begin_request(requestId="sampled")
+    logger.debug("sampled")
+    app_logging.end_request()
+
+    [entry] = _lines(stream)
+    assert entry["message"] == "sampled"
+    assert entry["debugSampled"] is True
+    assert not logging.getLogger(app_logging.ROOT_LOGGER).isEnabledFor(logging.DEBUG)
@@ -0,0 +1,94 @@
+import signal
+from types import SimpleNamespace
+
+from app.presentation import runtime
+from app.presentation.runtime import HandlerRuntime, invocation_deadline, reset_runtimes, shutdown_runtimes
+
+
+def test_runtime_builds_service_once():
+    calls = []
+    rt = HandlerRuntime(lambda: calls.append("init") or object())
+
+    assert not rt.initialized
+    first = rt.service()
+    assert rt.service() is first
+    assert calls == ["init"]
+    assert rt.initialized
+
+
+def test_runtime_runs_request_hooks_in_order():
+    rt = HandlerRuntime(object)
+    seen = []
+    rt.on_request(lambda event, context: seen.append(("a", event["id"], context)))
+    rt.on_request(lambda event, context: seen.append(("b", event["id"], context)))
+
+    rt.begin_request({"id": 1}, "ctx")
+    assert seen == [("a", 1, "ctx"), ("b", 1, "ctx")]
+
+
+def test_warm_clients_builds_the_configured_services(monkeypatch):
+    warmed = []
+    monkeypatch.setattr(runtime, "get_clients", lambda region: SimpleNamespace(warm=lambda *services: warmed.append((region, services))))
+
+    HandlerRuntime(object).warm_clients("eu-west-1", "athena", glue="budget", dynamodb=None)
+
+    assert warmed == [("eu-west-1", ("athena", "glue"))]
+
+
+def test_shutdown_runs_hooks_with_service_and_drops_it():
+    rt = HandlerRuntime(lambda: "svc")
+    closed = []
+    rt.on_shutdown(closed.append)
+
+    rt.shutdown()
+    assert closed == []  # never initialised, nothing to close
+
+    rt.service()
+    shutdown_runtimes()
+    assert closed == ["svc"]
+    assert not rt.initialized
+
+
+def test_reset_runtimes_forces_rebuild():
+    counter = iter(range(10))
+    rt = HandlerRuntime(lambda: next(counter))
+
+    assert rt.service() == 0
+    reset_runtimes()
+    assert rt.service() == 1
+
+
+def test_sigterm_handler_is_installed():
+    HandlerRuntime(object)
+    assert runtime._sigterm_installed
+    assert signal.getsignal(signal.SIGTERM).__name__ == "_handle_sigterm"
+
+
+def test_entrypoint_runs_end_hooks_and_clears_log_context():
+    from app.presentation import logging as app_logging
+
+    rt = HandlerRuntime(object)
+    ended = []
+    rt.on_request_end(lambda event, context: ended.append(event["resource"]))
+
+    @rt.entrypoint
+    def handler(event, context):
+        assert app_logging._context.get()["requestId"] == "aws-req"
+        raise RuntimeError("boom")
+
+    context = type("Ctx", (), {"aws_request_id": "aws-req"})()
+    try:
+        handler({"resource": "/query", "httpMethod": "POST"}, context)
+    except RuntimeError:
+        pass
+
+    assert ended == ["/query"]
+    assert app_logging._context.get() == {}
+
+
+def test_invocation_deadline_reserves_time_and_caps_at_api_gateway_timeout(monkeypatch):
+    monkeypatch.setattr(runtime.time, "monotonic", lambda: 100.0)
+
+    assert invocation_deadline(SimpleNamespace(get_remaining_time_in_millis=lambda: 10_000), 1.5) == 108.5
+    assert invocation_deadline(SimpleNamespace(get_remaining_time_in_millis=lambda: 900_000)) == 129.0
+    assert invocation_deadline(None) is None
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from app.presentation import timing
+from app.presentation.http import build_json_response
+
+
+@pytest.fixture(autouse=True)
+def _clear_timings():
+    yield
+    timing.end_timings()
+    timing.server_timing_enabled.cache_clear()
+
+
+def test_phase_is_a_no_op_outside_a_request():
+    with timing.phase("parse"):
+        pass
+    assert timing.current_timings() is None
+
+
+def test_phases_accumulate_duration_and_count():
+    timings = timing.begin_timings()
+    with timing.phase("s3-list"):
+        pass
+    with timing.phase("s3-list"):
+        pass
+    timings.record("athena-wait", 120.0)
+
+    header = timings.header()
+    assert header.startswith("s3-list;dur=") and ';desc="x2"' in header
+    assert "athena-wait;dur=120.0" in header
+    assert header.split(", ")[-1].startswith("total;dur=")
+    assert timings.to_dict()["phases"]["s3-list"]["count"] == 2
+
+
+def test_response_carries_server_timing_and_optional_body_field():
+    timing.begin_timings(include_in_body=True)
+    timing.current_timings().record("athena-read", 42.0)
+
+    response = build_json_response(200, {"ok": True}, "https://app.example.com", ["GET"], request_origin="https://app.example.com")
+
+    assert "athena-read;dur=42.0" in response["headers"]["Server-Timing"]
+    assert "serialize;dur=" in response["headers"]["Server-Timing"]
+    assert response["headers"]["Timing-Allow-Origin"] == "https://app.example.com"
+    body = json.loads(response["body"])
+    assert body["ok"] is True
+    assert body["timings"]["phases"]["athena-read"] == {"ms": 42.0, "count": 1}
+
+
+def test_server_timing_can_be_turned_off(monkeypatch):
+    monkeypatch.setenv("SERVER_TIMING", "off")
+    timing.server_timing_enabled.cache_clear()
+
+    assert timing.begin_timings(include_in_body=True) is None
+    response = build_json_response(200, {"ok": True}, "*", ["GET"])
+    assert "Server-Timing" not in response["headers"]
+    assert "timings" not in json.loads(response["body"])
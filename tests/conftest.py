@@ -2,6 +2,8 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 src_dir = ROOT / "src"
 api_dir = src_dir / "api"
@@ -25,3 +27,13 @@ except ModuleNotFoundError:  # pragma: no cover - optional dependency
 
 # Load .env before importing app modules when available
 load_dotenv()
+
+
+@pytest.fixture(autouse=True)
+def _reset_handler_runtimes():
+    # Handlers keep their service for the container's lifetime; tests swap factories per case.
+    from app.presentation.runtime import reset_runtimes
+
+    reset_runtimes()
+    yield
+    reset_runtimes()
@@ -1,5 +1,8 @@
+from dataclasses import replace
 from types import SimpleNamespace
 
+import threading
+
 import pytest
 
 import src.jobs.athena_runner as runner
@@ -11,14 +14,20 @@ class FakeAthena:
         self.started = []
         self.execution_checks = []
 
+        self.batch_calls = []
+
     def start_query_execution(self, **kwargs):
         self.started.append(kwargs)
-        return {"QueryExecutionId": "qid-123"}
+        return {"QueryExecutionId": f"qid-{len(self.started)}"}
 
-    def get_query_execution(self, **kwargs):
-        state = self.states.pop(0)
-        self.execution_checks.append(state)
-        return {"QueryExecution": {"Status": {"State": state}}}
+    def batch_get_query_execution(self, QueryExecutionIds):
+        self.batch_calls.append(list(QueryExecutionIds))
+        executions = []
+        for query_id in QueryExecutionIds:
+            state = self.states.pop(0) if len(self.states) > 1 else self.states[0]
+            self.execution_checks.append(state)
+            executions.append({"QueryExecutionId": query_id, "Status": {"State": state}})
+        return {"QueryExecutions": executions, "UnprocessedQueryExecutionIds": []}
 
 
 class FakeEvents:
@@ -33,6 +42,12 @@ class FakeEvents:
         self.delete_calls.append(kwargs)
 
 
+@pytest.fixture(autouse=True)
+def offline_clients(monkeypatch):
+    for name in ("athena", "events", "dynamodb"):
+        monkeypatch.setattr(runner, name, object())
+
+
 @pytest.fixture(autouse=True)
 def patch_sleep(monkeypatch):
     monkeypatch.setattr(runner, "time", SimpleNamespace(sleep=lambda *_: None))
@@ -54,7 +69,8 @@ def test_run_sql_waits_until_success(monkeypatch, base_config):
 
     qid = service._run_sql("SELECT 1", "db")
 
-    assert qid == "qid-123"
+    assert qid == "qid-1"
+    assert fake_athena.execution_checks == ["RUNNING", "SUCCEEDED"]
     assert fake_athena.started[0]["QueryString"] == "SELECT 1"
     assert fake_athena.started[0]["QueryExecutionContext"]["Database"] == "db"
 
@@ -78,7 +94,7 @@ def test_handler_runs_queries_and_cleans_up(monkeypatch, base_config):
     fake_events = FakeEvents()
 
     monkeypatch.setattr(runner, "_load_config", lambda: base_config)
-    monkeypatch.setattr(runner, "AthenaRunnerService", lambda athena_client, events_client, config: StubService(FakeAthena(["SUCCEEDED"]), fake_events, config))
+    monkeypatch.setattr(runner, "AthenaRunnerService", lambda athena_client, events_client, config, slots=None: StubService(FakeAthena(["SUCCEEDED"]), fake_events, config))
 
     event = {"run": "2024-01-01", "cleanupRule": "rule-1"}
     response = runner.lambda_handler(event, None)
@@ -91,3 +107,293 @@ def test_handler_runs_queries_and_cleans_up(monkeypatch, base_config):
     assert response["run"] == "2024-01-01"
     assert fake_events.remove_calls[0]["Rule"] == "rule-1"
     assert fake_events.delete_calls[0]["Name"] == "rule-1"
+
+
+class FakeDynamo:
+    def __init__(self):
+        self.updates = []
+
+    def update_item(self, **kwargs):
+        self.updates.append(kwargs)
+        if kwargs.get("ReturnValues") == "ALL_NEW":
+            return {"Attributes": {"completedTables": kwargs["ExpressionAttributeValues"][":tables"]}}
+        return {}
+
+
+def test_run_refresh_records_progress(monkeypatch, base_config):
+    monkeypatch.setattr(runner, "time", SimpleNamespace(sleep=lambda *_: None, time=lambda: 1_000))
+
+    class StatsAthena(FakeAthena):
+        def batch_get_query_execution(self, QueryExecutionIds):
+            payload = super().batch_get_query_execution(QueryExecutionIds)
+            for execution in payload["QueryExecutions"]:
+                execution["Statistics"] = {"DataScannedInBytes": 10, "TotalExecutionTimeInMillis": 20}
+            return payload
+
+    ddb = FakeDynamo()
+    tracker = runner.RunProgressTracker(ddb, "progress", "run-1")
+    service = runner.AthenaRunnerService(StatsAthena(["SUCCEEDED"] * 8), FakeEvents(), base_config)
+
+    service.run_refresh(runner.RefreshRequest(run="2024-01-01", run_id="run-1"), progress=tracker)
+
+    assert ddb.updates[0]["ExpressionAttributeValues"][":status"] == {"S": "refreshing"}
+    assert ddb.updates[-1]["ExpressionAttributeValues"][":status"] == {"S": "succeeded"}
+    finished = [
+        update["ExpressionAttributeValues"][":entry"]["M"]
+        for update in ddb.updates
+        if update["ExpressionAttributeNames"].get("#name") == "resident_staging" and "#current" not in update["ExpressionAttributeNames"]
+    ]
+    entry = finished[0]
+    assert entry["state"] == {"S": "SUCCEEDED"}
+    assert entry["order"] == {"N": "1"}
+    assert entry["scannedBytes"] == {"N": "10"}
+    assert entry["executionTimeMs"] == {"N": "20"}
+    assert all(update["Key"] == {"runId": {"S": "run-1"}} for update in ddb.updates)
+
+
+def test_run_refresh_marks_progress_failed(monkeypatch, base_config):
+    monkeypatch.setattr(runner, "time", SimpleNamespace(sleep=lambda *_: None, time=lambda: 1_000))
+    ddb = FakeDynamo()
+    tracker = runner.RunProgressTracker(ddb, "progress", "run-1")
+    service = runner.AthenaRunnerService(FakeAthena(["FAILED"]), FakeEvents(), base_config)
+
+    with pytest.raises(RuntimeError):
+        service.run_refresh(runner.RefreshRequest(run="2024-01-01"), progress=tracker)
+
+    assert ddb.updates[-2]["ExpressionAttributeValues"][":entry"]["M"]["state"] == {"S": "FAILED"}
+    assert ddb.updates[-1]["ExpressionAttributeValues"][":status"] == {"S": "failed"}
+
+
+class FakeJobsDynamo:
+    def __init__(self, item=None):
+        self.item = item
+        self.deleted = []
+
+    def get_item(self, **_kwargs):
+        return {"Item": self.item} if self.item else {}
+
+    def delete_item(self, **kwargs):
+        self.deleted.append(kwargs)
+
+
+def _dms_event(task_arn="task-arn"):
+    return {
+        "source": "aws.dms",
+        "detail-type": "DMS Replication Task State Change",
+        "resources": [task_arn],
+        "detail": {"ReplicationTaskState": "full-load-completed"},
+    }
+
+
+def test_handler_resolves_dms_event_from_jobs_table(monkeypatch, base_config):
+    requests = []
+
+    class StubService(runner.AthenaRunnerService):
+        def run_refresh(self, request, progress=None):
+            requests.append(request)
+            return {"ok": True, "run": request.run}
+
+    ddb = FakeJobsDynamo(item={"taskArn": {"S": "task-arn"}, "jobId": {"S": "job-1"}, "runId": {"S": "run-1"}, "run": {"S": "2024-03-03"}})
+    config = runner.AthenaRunnerConfig(**{**base_config.__dict__, "jobs_table": "jobs"})
+    monkeypatch.setattr(runner, "_load_config", lambda: config)
+    monkeypatch.setattr(runner, "dynamodb", ddb)
+    monkeypatch.setattr(runner, "AthenaRunnerService", lambda athena_client, events_client, cfg, slots=None: StubService(None, None, cfg))
+
+    response = runner.lambda_handler(_dms_event(), None)
+
+    assert response == {"ok": True, "run": "2024-03-03"}
+    assert requests[0].run_id == "run-1"
+    assert requests[0].cleanup_rule is None
+    assert ddb.deleted[0]["Key"] == {"taskArn": {"S": "task-arn"}}
+    assert ddb.deleted[0]["ExpressionAttributeValues"][":job"] == {"S": "job-1"}
+
+
+def test_handler_skips_dms_event_without_pending_job(monkeypatch, base_config):
+    config = runner.AthenaRunnerConfig(**{**base_config.__dict__, "jobs_table": "jobs"})
+    monkeypatch.setattr(runner, "_load_config", lambda: config)
+    monkeypatch.setattr(runner, "dynamodb", FakeJobsDynamo())
+
+    def factory(*_a, **_k):
+        raise AssertionError("service should not be created")
+
+    monkeypatch.setattr(runner, "AthenaRunnerService", factory)
+
+    assert runner.lambda_handler(_dms_event(), None) == {"ok": False, "skipped": True}
+
+
+class CompletionDynamo(FakeDynamo):
+    def __init__(self, completed, expected):
+        super().__init__()
+        self.completed = completed
+        self.expected = expected
+
+    def update_item(self, **kwargs):
+        super().update_item(**kwargs)
+        if kwargs.get("ReturnValues") == "ALL_NEW":
+            return {"Attributes": {"completedTables": {"SS": self.completed}, "tables": {"SS": self.expected}}}
+        return {}
+
+
+def _stub_steps(calls):
+    class StubService(runner.AthenaRunnerService):
+        def _run_sql(self, sql: str, database: str) -> str:
+            calls.append(database)
+            return "qid"
+
+    return StubService
+
+
+def test_run_refresh_runs_only_the_task_tables(monkeypatch, base_config):
+    monkeypatch.setattr(runner, "time", SimpleNamespace(sleep=lambda *_: None, time=lambda: 1_000))
+    calls = []
+    ddb = CompletionDynamo(completed=["resident"], expected=["resident", "visit"])
+    tracker = runner.RunProgressTracker(ddb, "progress", "run-1", task_arn="task-resident")
+    service = _stub_steps(calls)(None, FakeEvents(), base_config)
+
+    service.run_refresh(runner.RefreshRequest(run="2024-01-01", tables=("resident",)), progress=tracker)
+
+    # resident staging/merge/soft delete plus dim_resident; fact_visit waits for visit.
+    assert calls == ["staging", "silver", "silver", "gold"]
+    assert ddb.updates[-1]["ExpressionAttributeValues"][":status"] == {"S": "refreshing"}
+    assert any(u["ExpressionAttributeNames"].get("#arn") == "task-resident" for u in ddb.updates)
+
+
+def test_run_refresh_last_table_runs_shared_gold_steps(monkeypatch, base_config):
+    monkeypatch.setattr(runner, "time", SimpleNamespace(sleep=lambda *_: None, time=lambda: 1_000))
+    calls = []
+    ddb = CompletionDynamo(completed=["resident", "visit"], expected=["resident", "visit"])
+    tracker = runner.RunProgressTracker(ddb, "progress", "run-1", task_arn="task-visit")
+    service = _stub_steps(calls)(None, FakeEvents(), base_config)
+
+    service.run_refresh(runner.RefreshRequest(run="2024-01-01", tables=("visit",)), progress=tracker)
+
+    # visit chain plus fact_visit only; dim_resident ran with the resident task.
+    assert calls == ["staging", "silver", "silver", "gold"]
+    assert ddb.updates[-1]["ExpressionAttributeValues"][":status"] == {"S": "succeeded"}
+
+
+def test_run_refresh_publishes_the_tables_it_wrote_once_gold_steps_ran(monkeypatch, base_config):
+    monkeypatch.setattr(runner, "time", SimpleNamespace(sleep=lambda *_: None, time=lambda: 1_000))
+
+    class PublishingEvents(FakeEvents):
+        def __init__(self):
+            super().__init__()
+            self.entries = []
+
+        def put_events(self, Entries):
+            self.entries.extend(Entries)
+
+    config = replace(base_config, publish_refreshed=True)
+    events = PublishingEvents()
+    service = _stub_steps([])(None, events, config)
+    tracker = runner.RunProgressTracker(CompletionDynamo(completed=["resident"], expected=["resident", "visit"]), "progress", "run-1")
+
+    service.run_refresh(runner.RefreshRequest(run="2024-01-01", run_id="run-1", tables=("resident",)), progress=tracker)
+
+    (entry,) = events.entries
+    assert (entry["Source"], entry["DetailType"], entry["EventBusName"]) == ("sewingmachine.athena-runner", "Tables Refreshed", "bus")
+    assert runner.json.loads(entry["Detail"]) == {
+        "run": "2024-01-01",
+        "runId": "run-1",
+        "tables": ["gold.dim_resident", "silver.src_sqlserver__dbo_resident", "staging.dbo_resident_latest"],
+    }
+
+
+def test_run_refresh_of_a_subset_needs_recorded_progress(monkeypatch, base_config):
+    monkeypatch.setattr(runner, "time", SimpleNamespace(sleep=lambda *_: None, time=lambda: 1_000))
+    calls = []
+    service = _stub_steps(calls)(None, FakeEvents(), base_config)
+
+    with pytest.raises(ValueError):
+        service.run_refresh(runner.RefreshRequest(run="2024-01-01", tables=("resident",)))
+    assert calls == []
+
+    class LostUpdates(FakeDynamo):
+        def update_item(self, **kwargs):
+            super().update_item(**kwargs)
+            raise runner.ClientError({"Error": {"Code": "ProvisionedThroughputExceededException", "Message": "slow"}}, "UpdateItem")
+
+    ddb = LostUpdates()
+    tracker = runner.RunProgressTracker(ddb, "progress", "run-1")
+
+    with pytest.raises(RuntimeError):
+        service.run_refresh(runner.RefreshRequest(run="2024-01-01", run_id="run-1", tables=("resident",)), progress=tracker)
+    # The resident chain ran; dim_resident did not.
+    assert calls == ["staging", "silver", "silver"]
+
+
+class FakeSlotsDynamo:
+    def __init__(self, held=()):
+        self.items = {slot: {"holder": {"S": "other"}} for slot in held}
+        self.puts = []
+
+    def put_item(self, **kwargs):
+        slot = kwargs["Item"]["resource"]["S"]
+        self.puts.append(slot)
+        if slot in self.items:
+            raise runner.ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "held"}}, "PutItem")
+        self.items[slot] = kwargs["Item"]
+
+    def delete_item(self, **kwargs):
+        slot = kwargs["Key"]["resource"]["S"]
+        if self.items.get(slot, {}).get("holder") == kwargs["ExpressionAttributeValues"][":holder"]:
+            del self.items[slot]
+
+
+def test_run_sql_holds_a_reserved_slot_while_the_statement_runs(monkeypatch, base_config):
+    monkeypatch.setattr(runner, "time", SimpleNamespace(sleep=lambda *_: None, time=lambda: 1000))
+    ddb = FakeSlotsDynamo(held={"athena-slot#3"})
+    slots = runner.RefreshSlots(ddb, "cooldowns", capacity=4, reserved=2)
+    service = runner.AthenaRunnerService(FakeAthena(states=["SUCCEEDED"]), FakeEvents(), base_config, slots=slots)
+
+    service._run_sql("SELECT 1", "db")
+
+    assert ddb.puts[0] in {"athena-slot#2", "athena-slot#3"}
+    assert "athena-slot#2" in ddb.puts
+    assert list(ddb.items) == ["athena-slot#3"]
+
+
+def test_waiter_polls_pending_executions_in_batches_of_fifty():
+    gate = threading.Event()
+    calls = []
+
+    class GatedAthena:
+        def batch_get_query_execution(self, QueryExecutionIds):
+            gate.wait()
+            calls.append(len(QueryExecutionIds))
+            return {"QueryExecutions": [{"QueryExecutionId": qid, "Status": {"State": "SUCCEEDED"}} for qid in QueryExecutionIds]}
+
+    waiter = runner.ExecutionWaiter(GatedAthena(), poll_seconds=0)
+    finished = []
+    done = threading.Event()
+
+    def callback(execution):
+        finished.append(execution["QueryExecutionId"])
+        if len(finished) == 60:
+            done.set()
+
+    for index in range(60):
+        waiter.watch(f"qid-{index}", callback)
+    gate.set()
+
+    assert done.wait(5)
+    assert sorted(finished) == sorted(f"qid-{index}" for index in range(60))
+    assert max(calls) <= 50 and len(calls) <= 4
+
+
+def test_run_refresh_runs_table_chains_side_by_side(monkeypatch, base_config):
+    class LockstepAthena(FakeAthena):
+        """Finishes queries only when polled together with another one: each chain waits for its peer."""
+
+        def batch_get_query_execution(self, QueryExecutionIds):
+            self.batch_calls.append(list(QueryExecutionIds))
+            state = "SUCCEEDED" if len(QueryExecutionIds) > 1 else "RUNNING"
+            return {"QueryExecutions": [{"QueryExecutionId": qid, "Status": {"State": state}} for qid in QueryExecutionIds]}
+
+    athena = LockstepAthena([])
+    service = runner.AthenaRunnerService(athena, FakeEvents(), base_config)
+
+    service.run_refresh(runner.RefreshRequest(run="2024-01-01"))
+
+    assert len(athena.started) == 8
+    assert [len(ids) for ids in athena.batch_calls if len(ids) > 1] == [2, 2, 2, 2]
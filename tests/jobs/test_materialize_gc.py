@@ -0,0 +1,93 @@
+from botocore.exceptions import ClientError
+
+import src.jobs.materialize_gc as gc
+
+
+class FakeDynamo:
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.scans = []
+        self.cleared = []
+
+    def scan(self, **kwargs):
+        self.scans.append(kwargs)
+        return self.pages.pop(0)
+
+    def update_item(self, **kwargs):
+        self.cleared.append(kwargs["Key"]["jobId"]["S"])
+
+
+class FakeS3:
+    def __init__(self, keys, errors=()):
+        self.keys = keys
+        self.errors = list(errors)
+        self.deleted = []
+
+    def get_paginator(self, name):
+        assert name == "list_objects_v2"
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        keys = [key for key in self.keys if key.startswith(Prefix)]
+        for start in range(0, len(keys), 1500):
+            yield {"Contents": [{"Key": key} for key in keys[start:start + 1500]]}
+
+    def delete_objects(self, Bucket, Delete):
+        self.deleted.append((Bucket, [entry["Key"] for entry in Delete["Objects"]]))
+        return {"Errors": self.errors} if self.errors else {}
+
+
+CONFIG = gc.RetiredDataConfig(jobs_table="materialize-jobs", build_location="s3://lake/materialized/")
+
+
+def _item(job_id, *locations):
+    return {"jobId": {"S": job_id}, "retiredLocations": {"SS": list(locations)}}
+
+
+def test_collect_deletes_due_locations_in_batches_and_clears_them():
+    keys = [f"materialized/gold/visits/old/part-{index:05d}.parquet" for index in range(2500)] + ["materialized/gold/visits/new/part.parquet"]
+    ddb = FakeDynamo([
+        {"Items": [_item("job-1", "s3://lake/materialized/gold/visits/old/")], "LastEvaluatedKey": {"jobId": {"S": "job-1"}}},
+        {"Items": [_item("job-2", "s3://lake/gold/visits/")]},
+    ])
+    s3 = FakeS3(keys)
+
+    result = gc.RetiredDataCollector(ddb, s3, CONFIG).collect(now=5_000)
+
+    assert result == {"ok": True, "collected": 1, "skipped": 1, "objects": 2500}
+    assert [len(batch) for _, batch in s3.deleted] == [1000, 1000, 500]
+    assert all(key.startswith("materialized/gold/visits/old/") for _, batch in s3.deleted for key in batch)
+    assert ddb.scans[0]["ExpressionAttributeValues"] == {":now": {"N": "5000"}}
+    assert ddb.scans[1]["ExclusiveStartKey"] == {"jobId": {"S": "job-1"}}
+    # Locations outside the build prefix are never deleted, only dropped from the table.
+    assert ddb.cleared == ["job-1", "job-2"]
+
+
+def test_collect_keeps_the_record_when_deletes_fail():
+    ddb = FakeDynamo([{"Items": [_item("job-1", "s3://lake/materialized/gold/visits/old/")]}])
+    s3 = FakeS3(["materialized/gold/visits/old/part.parquet"], errors=[{"Code": "AccessDenied", "Message": "denied"}])
+
+    result = gc.RetiredDataCollector(ddb, s3, CONFIG).collect(now=5_000)
+
+    assert result["collected"] == 0
+    assert ddb.cleared == []
+
+
+def test_collect_deletes_partition_locations_without_touching_their_neighbours():
+    keys = ["materialized/gold/visits/old/day=1/part.parquet", "materialized/gold/visits/old/day=10/part.parquet"]
+    ddb = FakeDynamo([{"Items": [_item("job-1", "s3://lake/materialized/gold/visits/old/day=1")]}])
+    s3 = FakeS3(keys)
+
+    gc.RetiredDataCollector(ddb, s3, CONFIG).collect(now=5_000)
+
+    assert s3.deleted == [("lake", ["materialized/gold/visits/old/day=1/part.parquet"])]
+
+
+def test_clear_tolerates_a_newer_retirement():
+    class RacingDynamo(FakeDynamo):
+        def update_item(self, **kwargs):
+            raise ClientError({"Error": {"Code": "ConditionalCheckFailedException", "Message": "changed"}}, "UpdateItem")
+
+    ddb = RacingDynamo([{"Items": [_item("job-1", "s3://lake/materialized/gold/visits/old/")]}])
+
+    assert gc.RetiredDataCollector(ddb, FakeS3([]), CONFIG).collect(now=5_000)["collected"] == 1
@@ -13,53 +13,37 @@ class FakeDMS:
         self.calls.append(kwargs)
 
 
-class FakeEvents:
+class FakeDynamo:
     def __init__(self):
-        self.put_rule_calls = []
-        self.put_targets_calls = []
+        self.items = []
 
-    def put_rule(self, **kwargs):
-        self.put_rule_calls.append(kwargs)
-        return {"RuleArn": "arn:rule"}
-
-    def put_targets(self, **kwargs):
-        self.put_targets_calls.append(kwargs)
-
-
-class FakeLambda:
-    def __init__(self):
-        self.permissions = []
-
-    def add_permission(self, **kwargs):
-        self.permissions.append(kwargs)
+    def put_item(self, **kwargs):
+        self.items.append(kwargs)
 
 
 @pytest.fixture
 def patched_environment(monkeypatch):
     dms = FakeDMS()
-    events = FakeEvents()
-    lamb = FakeLambda()
+    ddb = FakeDynamo()
 
     monkeypatch.setattr(orchestrator, "dms", dms)
-    monkeypatch.setattr(orchestrator, "events", events)
-    monkeypatch.setattr(orchestrator, "lambda_", lamb)
+    monkeypatch.setattr(orchestrator, "dynamodb", ddb)
     monkeypatch.setattr(
         orchestrator,
         "_load_config",
         lambda: orchestrator.OrchestratorConfig(
-            task_arn="task-arn",
-            event_bus="bus",
-            runner_function_arn="lambda-arn",
+            tasks=(orchestrator.DmsTask(arn="task-arn"),),
+            jobs_table="jobs",
             default_run="2024-01-01",
         ),
     )
     monkeypatch.setattr(orchestrator.uuid, "uuid4", lambda: "job-123")
 
-    return dms, events, lamb
+    return dms, ddb
 
 
 def test_orchestrator_lambda_handler(patched_environment):
-    dms, events, lamb = patched_environment
+    dms, ddb = patched_environment
 
     response = orchestrator.lambda_handler({}, None)
 
@@ -70,13 +54,105 @@ def test_orchestrator_lambda_handler(patched_environment):
 
     assert dms.calls[0]["ReplicationTaskArn"] == "task-arn"
 
-    rule_call = events.put_rule_calls[0]
-    assert rule_call["Name"].startswith("sewingmachine-dms-finished-job-123")
+    job = ddb.items[0]
+    assert job["TableName"] == "jobs"
+    assert job["Item"]["taskArn"] == {"S": "task-arn"}
+    assert job["Item"]["jobId"] == {"S": "job-123"}
+    assert job["Item"]["run"] == {"S": "2024-01-01"}
+    assert len(ddb.items) == 1
+
+
+def test_orchestrator_records_progress(monkeypatch):
+    ddb = FakeDynamo()
+    config = orchestrator.OrchestratorConfig(
+        tasks=(orchestrator.DmsTask(arn="task-arn"),),
+        jobs_table="jobs",
+        default_run="2024-01-01",
+        progress_table="progress",
+    )
+    monkeypatch.setattr(orchestrator.uuid, "uuid4", lambda: "job-123")
+    monkeypatch.setattr(orchestrator.time, "time", lambda: 1_000)
+    service = orchestrator.OrchestratorService(FakeDMS(), ddb, config)
+
+    result = service.trigger_full_load(orchestrator.TriggerRunCommand(run="2024-02-02", run_id="run-9"))
+
+    assert result.run_id == "run-9"
+    assert ddb.items[0]["Item"]["runId"] == {"S": "run-9"}
+    progress = ddb.items[1]
+    assert progress["TableName"] == "progress"
+    assert progress["Item"]["runId"] == {"S": "run-9"}
+    assert progress["Item"]["status"] == {"S": "loading"}
+    assert progress["Item"]["dmsState"] == {"S": "starting"}
+
+
+def test_orchestrator_fans_out_tasks(monkeypatch):
+    ddb = FakeDynamo()
+    dms = FakeDMS()
+    config = orchestrator.OrchestratorConfig(
+        tasks=(
+            orchestrator.DmsTask(arn="task-resident", tables=("resident",)),
+            orchestrator.DmsTask(arn="task-visit", tables=("visit",)),
+        ),
+        jobs_table="jobs",
+        default_run="2024-01-01",
+        progress_table="progress",
+    )
+    monkeypatch.setattr(orchestrator.uuid, "uuid4", lambda: "job-123")
+    service = orchestrator.OrchestratorService(dms, ddb, config)
+
+    result = service.trigger_full_load(orchestrator.TriggerRunCommand(run=None))
+
+    assert sorted(call["ReplicationTaskArn"] for call in dms.calls) == ["task-resident", "task-visit"]
+    assert result.task_states == {"task-resident": "starting", "task-visit": "starting"}
+    jobs = {item["Item"]["taskArn"]["S"]: item["Item"] for item in ddb.items if item["TableName"] == "jobs"}
+    assert jobs["task-visit"]["tables"] == {"SS": ["visit"]}
+    assert jobs["task-resident"]["jobId"] == {"S": "job-123"}
+    progress = [item["Item"] for item in ddb.items if item["TableName"] == "progress"][0]
+    assert progress["tables"] == {"SS": ["resident", "visit"]}
+    assert set(progress["tasks"]["M"]) == {"task-resident", "task-visit"}
+
+
+def test_orchestrator_records_the_started_tasks_when_one_fails_to_start(monkeypatch):
+    class FailingDMS(FakeDMS):
+        def start_replication_task(self, **kwargs):
+            super().start_replication_task(**kwargs)
+            if kwargs["ReplicationTaskArn"] == "task-visit":
+                raise RuntimeError("InvalidResourceStateFault")
+            return {"ReplicationTask": {"Status": "starting"}}
+
+    ddb = FakeDynamo()
+    config = orchestrator.OrchestratorConfig(
+        tasks=(
+            orchestrator.DmsTask(arn="task-resident", tables=("resident",)),
+            orchestrator.DmsTask(arn="task-visit", tables=("visit",)),
+        ),
+        jobs_table="jobs",
+        default_run="2024-01-01",
+        progress_table="progress",
+    )
+    service = orchestrator.OrchestratorService(FailingDMS(), ddb, config)
+
+    with pytest.raises(RuntimeError):
+        service.trigger_full_load(orchestrator.TriggerRunCommand(run=None, run_id="run-1"))
+
+    (progress,) = [item["Item"] for item in ddb.items if item["TableName"] == "progress"]
+    assert progress["runId"] == {"S": "run-1"}
+    assert progress["status"] == {"S": "failed"}
+    assert progress["tasks"]["M"]["task-resident"]["M"]["state"] == {"S": "starting"}
+    assert progress["tasks"]["M"]["task-visit"]["M"]["state"] == {"S": "start-failed"}
+
+
+def test_parse_tasks_prefers_task_mapping():
+    tasks = orchestrator._parse_tasks('{"a": ["resident"], "b": []}', "fallback")
+    assert tasks == (orchestrator.DmsTask(arn="a", tables=("resident",)), orchestrator.DmsTask(arn="b"))
+    assert orchestrator._parse_tasks(None, "fallback") == (orchestrator.DmsTask(arn="fallback"),)
+
 
-    target_call = events.put_targets_calls[0]
-    assert target_call["EventBusName"] == "bus"
-    target_input = json.loads(target_call["Targets"][0]["Input"])
-    assert target_input["cleanupRule"].startswith("sewingmachine-dms-finished-")
+def test_clients_are_created_on_first_use(monkeypatch):
+    created = []
+    monkeypatch.setattr(orchestrator, "dms", None)
+    monkeypatch.setattr(orchestrator.boto3, "client", lambda name, config=None: created.append(name) or name)
 
-    permission = lamb.permissions[0]
-    assert permission["SourceArn"] == "arn:rule"
+    assert orchestrator._client("dms") == "dms"
+    assert orchestrator._client("dms") == "dms"
+    assert created == ["dms"]
@@ -5,6 +5,7 @@ import pytest
 
 import src.api.handlers.query as handler
 from app.domain.errors import ValidationError
+from app.domain.models import QueryResultPage, QueryStatistics
 
 
 def _event(method="POST", body=None, origin="http://localhost:5173"):
@@ -15,7 +16,7 @@ def _event(method="POST", body=None, origin="http://localhost:5173"):
 
 
 def _patch_basics(monkeypatch, service_factory):
-    settings = SimpleNamespace(allowed_origin="https://awssewingmachine.com,http://localhost:5173", region="us-west-1")
+    settings = SimpleNamespace(allowed_origin="https://awssewingmachine.com,http://localhost:5173", region="us-west-1", response_spill_bucket=None, cancel_reserve_seconds=1.5)
     monkeypatch.setattr(handler, "get_query_settings", lambda: settings)
     monkeypatch.setattr(handler, "get_clients", lambda region: object())
     monkeypatch.setattr(handler, "QueryService", service_factory)
@@ -54,7 +55,7 @@ def test_query_handler_success(monkeypatch):
         def __init__(self, *_a, **_k):
             pass
 
-        def execute(self, payload):
+        def execute(self, payload, principals=(), deadline=None):
             return {"columns": ["c1"], "rows": [["v1"]], "payload": payload}
 
     _patch_basics(monkeypatch, DummyService)
@@ -71,7 +72,7 @@ def test_query_handler_domain_error(monkeypatch):
         def __init__(self, *_a, **_k):
             pass
 
-        def execute(self, _payload):
+        def execute(self, _payload, principals=(), deadline=None):
             raise ValidationError("nope", code="Bad")
 
     _patch_basics(monkeypatch, FailingService)
@@ -88,7 +89,7 @@ def test_query_handler_unexpected(monkeypatch):
         def __init__(self, *_a, **_k):
             pass
 
-        def execute(self, _payload):
+        def execute(self, _payload, principals=(), deadline=None):
             raise RuntimeError("boom")
 
     _patch_basics(monkeypatch, FailingService)
@@ -98,3 +99,23 @@ def test_query_handler_unexpected(monkeypatch):
     body = json.loads(response["body"])
     assert body["error"]["code"] == "InternalError"
     assert response["headers"]["Access-Control-Allow-Origin"] == "http://localhost:5173"
+
+
+def test_query_handler_pending_async_query_is_accepted(monkeypatch):
+    captured = {}
+
+    class DummyService:
+        def __init__(self, *_a, **_k):
+            pass
+
+        def execute(self, payload, principals=(), deadline=None):
+            captured["deadline"] = deadline
+            return QueryResultPage(columns=[], rows=[], stats=QueryStatistics(None, None), query_execution_id="qid", next_page_token=None, state="RUNNING")
+
+    _patch_basics(monkeypatch, DummyService)
+
+    context = SimpleNamespace(aws_request_id="req-1", get_remaining_time_in_millis=lambda: 10_000)
+    response = handler.lambda_handler(_event(body={"sql": "SELECT 1", "async": True}), context)
+    assert response["statusCode"] == 202
+    assert json.loads(response["body"])["state"] == "RUNNING"
+    assert captured["deadline"] is not None
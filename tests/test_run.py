@@ -15,7 +15,7 @@ def _event(method="POST", body=None, origin="http://localhost:5173"):
 
 
 def _patch_basics(monkeypatch, service_factory):
-    settings = SimpleNamespace(allowed_origin="https://awssewingmachine.com,http://localhost:5173", region="us-west-1")
+    settings = SimpleNamespace(allowed_origin="https://awssewingmachine.com,http://localhost:5173", region="us-west-1", response_spill_bucket=None)
     monkeypatch.setattr(handler, "get_run_settings", lambda: settings)
     monkeypatch.setattr(handler, "get_clients", lambda region: object())
     monkeypatch.setattr(handler, "RunService", service_factory)